@@ -0,0 +1,112 @@
+# Testbed to compare the replacement policies of the caches in
+# lrucacheExtension.  The workload mixes lookups of a small set of hot
+# keys with scans over many keys that are used just once, which is
+# what happens when index lookups are interleaved with large queries.
+
+import random
+from time import time
+
+import numpy
+import tables
+from tables.lrucacheExtension import ChunkCache, ObjectCache, NumCache
+print "PyTables version-->", tables.__version__
+
+filename = "/tmp/junk-policies.h5"
+NSLOTS = 128       # the number of slots (or chunks) in caches
+NHOT = NSLOTS // 2   # the number of hot keys
+NACCESSES = 100000   # the number of accesses in workload
+SCANRATIO = 0.5      # the fraction of accesses that are part of scans
+
+def workload(seed=1):
+    """Return a list of keys mixing hot lookups and scans."""
+    rnd = random.Random(seed)
+    keys = []
+    scankey = NHOT
+    while len(keys) < NACCESSES:
+        if rnd.random() < SCANRATIO:
+            # A scan over keys that will not be seen again
+            keys.extend(xrange(scankey, scankey + NSLOTS))
+            scankey += NSLOTS
+        else:
+            keys.extend(rnd.randint(0, NHOT-1) for i in xrange(NSLOTS))
+    return keys[:NACCESSES]
+
+def bench_objectcache(keys, policy):
+    cache = ObjectCache(NSLOTS, 1024*1024, 'bench', policy)
+    hits = 0
+    for key in keys:
+        nslot = cache.getslot(key)
+        if nslot >= 0:
+            cache.getitem(nslot)
+            hits += 1
+        else:
+            cache.setitem(key, key, 8)
+    return hits
+
+def bench_numcache(keys, policy):
+    cache = NumCache((NSLOTS, 16), numpy.dtype('int64'), 'bench', policy)
+    data = numpy.arange(16, dtype='int64')
+    hits = 0
+    for key in keys:
+        nslot = cache.getslot(key)
+        if nslot >= 0:
+            cache.getitem(nslot, data, 0)
+            hits += 1
+        else:
+            cache.setitem(key, data, 0)
+    return hits
+
+def bench_chunkcache(keys, policy):
+    fileh = tables.openFile(filename, mode = "w")
+    leaf = fileh.createArray(fileh.root, 'array', [1])
+    cache = ChunkCache(NSLOTS*1024, 'bench', policy)
+    hits = 0
+    for key in keys:
+        if cache.getchunk(leaf, key) is not None:
+            hits += 1
+        else:
+            cache.putchunk(leaf, key, numpy.empty(1024, 'uint8'))
+    fileh.close()
+    return hits
+
+def bench_table():
+    """Hot row lookups interleaved with full table scans.
+
+    This uses the shared chunk cache, so its policy is the one set in
+    the SHARED_CHUNK_CACHE_POLICY parameter.
+    """
+    fileh = tables.openFile(filename, mode = "w")
+    table = fileh.createTable(fileh.root, 'table',
+                              {'x': tables.Int64Col(), 'y': tables.FloatCol()},
+                              chunkshape=1024)
+    nrows = 1024*1024
+    table.append(numpy.zeros(nrows, dtype=table.dtype))
+    table.flush()
+    tables.setChunkCacheSize(NSLOTS*16*1024)
+    cache = tables.lrucacheExtension.sharedcache
+    cache.clear()
+    hits, misses = cache.hits, cache.misses
+    rnd = random.Random(1)
+    t1 = time()
+    for i in xrange(10):
+        for j in xrange(1000):
+            table[rnd.randint(0, NHOT-1) * 1024]
+        for j in xrange(0, nrows, 1024):
+            table[j]
+    tref = time() - t1
+    hits, misses = cache.hits - hits, cache.misses - misses
+    fileh.close()
+    return cache.policy, hits / float(hits + misses), tref
+
+if __name__ == '__main__':
+    keys = workload()
+    for bench in [bench_objectcache, bench_numcache, bench_chunkcache]:
+        for policy in tables.lrucacheExtension.cache_policies:
+            t1 = time()
+            hits = bench(keys, policy)
+            print "%s, %s policy --> hit ratio: %.3f, time: %.3f" % (
+                bench.__name__, policy, hits / float(len(keys)),
+                round(time()-t1, 3))
+    policy, ratio, tref = bench_table()
+    print "bench_table, %s policy --> hit ratio: %.3f, time: %.3f" % (
+        policy, ratio, round(tref, 3))
@@ -0,0 +1,69 @@
+"""Benchmark for fancy selections (lists of indices) on CArrays.
+
+The indices are picked with a random pattern (scattered rows) and with a
+clustered one (short runs of consecutive rows), both in sorted and in
+random order.
+
+Usage: python fancy-selection-bench.py [nrows] [nselected]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import numpy
+import tables
+
+nrows = 10**6
+nselected = 10**5
+ncols = 10
+clustersize = 16
+
+if len(sys.argv) > 1:
+    nrows = int(sys.argv[1])
+if len(sys.argv) > 2:
+    nselected = int(sys.argv[2])
+
+
+def random_indices():
+    return numpy.random.permutation(nrows)[:nselected]
+
+
+def clustered_indices():
+    nclusters = nselected // clustersize
+    starts = numpy.random.permutation(nrows // clustersize)[:nclusters]
+    starts *= clustersize
+    indices = starts[:, numpy.newaxis] + numpy.arange(clustersize)
+    return indices.ravel()
+
+
+filename = tempfile.mktemp(".h5")
+fileh = tables.openFile(filename, 'w')
+carray = fileh.createCArray(fileh.root, 'carray', tables.Float64Atom(),
+                            (nrows, ncols), filters=tables.Filters(1))
+data = numpy.arange(nrows * ncols, dtype='f8').reshape(nrows, ncols)
+carray[:] = data
+
+print "Selecting %d rows out of %d" % (nselected, nrows)
+for pattern in (random_indices, clustered_indices):
+    indices = pattern()
+    for order in ('sorted', 'unsorted'):
+        if order == 'sorted':
+            indices = numpy.sort(indices)
+        else:
+            indices = numpy.random.permutation(indices)
+        t1 = time.time()
+        result = carray[indices]
+        ttime = round(time.time() - t1, 3)
+        assert (result == data[indices]).all()
+        print "%-9s %-8s read: %s s" % (pattern.__name__.split('_')[0],
+                                        order, ttime)
+        t1 = time.time()
+        carray[indices] = result
+        ttime = round(time.time() - t1, 3)
+        print "%-9s %-8s write: %s s" % (pattern.__name__.split('_')[0],
+                                         order, ttime)
+
+fileh.close()
+os.remove(filename)
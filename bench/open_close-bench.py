@@ -114,10 +114,19 @@ def check_open_leaf():
         fileh.close()
         show_stats("After closing file", tref)
 
+def check_pooled_open_close():
+    for i in range(niter):
+        print "------------------ pooled_open_close #%s ------------------" % i
+        tref = time.time()
+        fileh=tables.openFile(filename, pooled=True)
+        leaf = fileh.root.ngroup0.ngroup1.array9
+        fileh.close()
+        show_stats("After closing file", tref)
+
 
 if __name__ == '__main__':
 
-    usage = """usage: %s [-v] [-p] [-n niter] [-O] [-o] [-B] [-b] [-g] [-l] [-A] [-a] [-E] [-S] datafile
+    usage = """usage: %s [-v] [-p] [-n niter] [-O] [-o] [-B] [-b] [-g] [-l] [-P] [-A] [-a] [-E] [-S] datafile
               -v verbose  (total dump of profiling)
               -p do profiling
               -n number of iterations for reading
@@ -129,12 +138,13 @@ if __name__ == '__main__':
               -a Check partial browse and reading one attr each node
               -g Check open nested group
               -l Check open nested leaf
+              -P Check open nested leaf in a pooled file
               -E Check everything
               -S Check everything as subprocess
               \n""" % sys.argv[0]
 
     try:
-        opts, pargs = getopt.getopt(sys.argv[1:], 'vpn:OoBbAaglESs')
+        opts, pargs = getopt.getopt(sys.argv[1:], 'vpn:OoBbAaglPESs')
     except:
         sys.stderr.write(usage)
         sys.exit(0)
@@ -156,7 +166,7 @@ if __name__ == '__main__':
     func = []
 
     # Checking options
-    options = ['-O', '-o', '-B', '-b', '-A', '-a', '-g', '-l']
+    options = ['-O', '-o', '-B', '-b', '-A', '-a', '-g', '-l', '-P']
 
     # Dict to map options to checking functions
     option2func = {
@@ -168,6 +178,7 @@ if __name__ == '__main__':
         '-a': 'check_partial_browse_attrs',
         '-g': 'check_open_group',
         '-l': 'check_open_leaf',
+        '-P': 'check_pooled_open_close',
         }
 
     # Get the options
@@ -108,6 +108,66 @@ class WideTreeTestCase(unittest.TestCase):
         # Then, delete the file
         os.remove(file)
 
+    def test02_loadLeaves(self):
+        """Checking the loading of all the leaves of a wide group
+
+        The metadata of the children can be read in one batch or
+        (with BATCH_NODE_METADATA=False) separately for each child.
+
+        """
+
+        import time
+        maxchilds = 10000
+        file = tempfile.mktemp(".h5")
+        fileh = openFile(file, mode = "w")
+        group = fileh.createGroup(fileh.root, 'group')
+        for child in range(maxchilds):
+            fileh.createArray(group, 'array' + str(child), [1, 1])
+        fileh.close()
+
+        for batch in (True, False):
+            t1 = time.time()
+            fileh = openFile(file, mode = "r", batch_node_metadata=batch)
+            for node in fileh.root.group:
+                pass
+            print "\nTime spent loading %d arrays (batch=%s): %s s" % \
+                  (maxchilds, batch, time.time()-t1)
+            fileh.close()
+        os.remove(file)
+
+    def test03_scan(self):
+        """Checking the scan of the metadata of a wide tree
+
+        The metadata of all the nodes is got by walking the tree and
+        by scanning the file without creating node objects.
+
+        """
+
+        import time
+        maxchilds = 10000
+        file = tempfile.mktemp(".h5")
+        fileh = openFile(file, mode = "w")
+        for child in range(maxchilds):
+            group = fileh.createGroup(fileh.root, 'group' + str(child))
+            fileh.createArray(group, 'array', [1, 1])
+        fileh.close()
+
+        fileh = openFile(file, mode = "r")
+        t1 = time.time()
+        for node in fileh.walkNodes():
+            shape = getattr(node, 'shape', None)
+        print "\nTime spent walking %d groups + %d arrays: %s s" % \
+              (maxchilds, maxchilds, time.time()-t1)
+        fileh.close()
+
+        fileh = openFile(file, mode = "r")
+        t1 = time.time()
+        fileh.scan(fields=('path', 'class', 'shape'))
+        print "Time spent scanning %d groups + %d arrays: %s s" % \
+              (maxchilds, maxchilds, time.time()-t1)
+        fileh.close()
+        os.remove(file)
+
 #----------------------------------------------------------------------
 
 def suite():
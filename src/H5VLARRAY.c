@@ -240,6 +240,91 @@ out:
 }
 
 
+/*-------------------------------------------------------------------------
+ * Function: H5VLARRAYextend_records
+ *
+ * Purpose: Appends a batch of records to an array
+ *
+ * Return: Success: 0, Failure: -1
+ *
+ * Comments: The objects of all the records are packed in `data`, and
+ *  record `i` is made of the objects in `[offsets[i], offsets[i+1])`
+ *  (`offsets` has `nrows + 1` elements).  `objsize` is the size in bytes
+ *  of an object.  The dataset is extended and written just once.
+ *
+ *-------------------------------------------------------------------------
+ */
+
+
+herr_t H5VLARRAYextend_records( hid_t dataset_id,
+                                hid_t type_id,
+                                hsize_t nrows,
+                                const hsize_t *offsets,
+                                size_t objsize,
+                                hsize_t nrecords,
+                                const void *data )
+{
+
+ hid_t    space_id = -1;
+ hid_t    mem_space_id = -1;
+ hsize_t  start[1];
+ hsize_t  count[1];
+ hsize_t  dataset_dims[1];
+ hvl_t    *wdata = NULL;   /* Information to write */
+ hsize_t  i;
+ herr_t   ret = -1;
+
+ if ( nrows == 0 )
+  return 0;
+
+ /* Initialize VL data to write */
+ if ( (wdata = (hvl_t *)malloc( (size_t)nrows * sizeof(hvl_t) )) == NULL )
+  return -1;
+ for ( i = 0; i < nrows; i++ ) {
+  wdata[i].len = (size_t)(offsets[i+1] - offsets[i]);
+  if ( wdata[i].len > 0 )
+   wdata[i].p = (char *)data + offsets[i] * objsize;
+  else
+   wdata[i].p = NULL;
+ }
+
+ /* Dimension for the new dataset */
+ dataset_dims[0] = nrecords + nrows;
+
+ /* Extend the dataset */
+ if ( H5Dset_extent( dataset_id, dataset_dims ) < 0 )
+  goto out;
+
+ /* Create a simple memory data space */
+ count[0] = nrows;
+ if ( (mem_space_id = H5Screate_simple( 1, count, NULL )) < 0 )
+  goto out;
+
+ /* Get the file data space */
+ if ( (space_id = H5Dget_space( dataset_id )) < 0 )
+  goto out;
+
+ /* Define a hyperslab in the dataset */
+ start[0] = nrecords;
+ if ( H5Sselect_hyperslab( space_id, H5S_SELECT_SET, start, NULL, count, NULL) < 0 )
+   goto out;
+
+ if ( H5Dwrite( dataset_id, type_id, mem_space_id, space_id, H5P_DEFAULT, wdata ) < 0 )
+     goto out;
+
+ ret = 0;
+
+out:
+ if ( space_id >= 0 )
+  H5Sclose( space_id );
+ if ( mem_space_id >= 0 )
+  H5Sclose( mem_space_id );
+ free( wdata );
+ return ret;
+
+}
+
+
 /*-------------------------------------------------------------------------
  * Function: H5ARRAYmodify_records
  *
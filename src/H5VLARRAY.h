@@ -27,6 +27,14 @@ herr_t H5VLARRAYappend_records( hid_t dataset_id,
                                 hsize_t nrecords,
                                 const void *data );
 
+herr_t H5VLARRAYextend_records( hid_t dataset_id,
+                                hid_t type_id,
+                                hsize_t nrows,
+                                const hsize_t *offsets,
+                                size_t objsize,
+                                hsize_t nrecords,
+                                const void *data );
+
 herr_t H5VLARRAYmodify_records( hid_t dataset_id,
                                 hid_t type_id,
                                 hsize_t nrow,
@@ -1,11 +1,14 @@
 #include <stdarg.h>
 #include "utils.h"
+#include "H5ATTR.h"
 #include "version.h"
 #include "H5Zlzo.h"                /* Import FILTER_LZO */
 #include "H5Zbzip2.h"              /* Import FILTER_BZIP2 */
 
 #if PY_MAJOR_VERSION > 2
 #define PyString_FromString PyUnicode_FromString
+#define PyString_FromStringAndSize PyUnicode_FromStringAndSize
+#define PyString_InternFromString PyUnicode_InternFromString
 #endif
 
 /* ---------------------------------------------------------------- */
@@ -173,10 +176,8 @@ PyObject *createNamesList(char *buffer[], int nelements)
  *-------------------------------------------------------------------------
  */
 
-PyObject *get_filter_names( hid_t loc_id,
-                            const char *dset_name)
+static PyObject *get_dset_filter_names(hid_t dset)
 {
- hid_t    dset;
  hid_t    dcpl;           /* dataset creation property list */
 /*  hsize_t  chsize[64];     /\* chunk size in elements *\/ */
  int      i, j;
@@ -188,11 +189,6 @@ PyObject *get_filter_names( hid_t loc_id,
  PyObject *filters;
  PyObject *filter_values;
 
- /* Open the dataset. */
- if ( (dset = H5Dopen( loc_id, dset_name, H5P_DEFAULT )) < 0 ) {
-   goto out;
- }
-
  /* Get the properties container */
  dcpl = H5Dget_create_plist(dset);
  /* Collect information about filters on chunked storage */
@@ -209,6 +205,7 @@ PyObject *get_filter_names( hid_t loc_id,
          PyTuple_SetItem(filter_values, j, PyLong_FromLong(cd_values[j]));
        }
        PyMapping_SetItemString (filters, f_name, filter_values);
+       Py_DECREF(filter_values);
      }
    }
  }
@@ -219,6 +216,100 @@ PyObject *get_filter_names( hid_t loc_id,
  }
 
  H5Pclose(dcpl);
+
+return filters;
+}
+
+/*-------------------------------------------------------------------------
+ * Function: get_filter_pipeline
+ *
+ * Purpose: Get the filter pipeline of a chunked dataset, in order
+ *
+ * Return: Success: a list of (filter_id, cd_values) tuples
+ *         Failure: None if HDF5 fails, NULL (with a Python exception set)
+ *                  if Python objects can not be created
+ *
+ * Comments: Used for decoding raw chunks read with pt_H5Dread_chunk().
+ *
+ *-------------------------------------------------------------------------
+ */
+
+PyObject *get_filter_pipeline(hid_t dset)
+{
+ hid_t    dcpl;           /* dataset creation property list */
+ int      i, j;
+ int      nf;             /* number of filters */
+ unsigned filt_flags;     /* filter flags */
+ size_t   cd_nelmts;      /* filter client number of values */
+ unsigned cd_values[20];  /* filter client data values */
+ H5Z_filter_t filt_id;    /* filter identifier */
+ PyObject *filters = NULL;
+ PyObject *filter_values;
+ PyObject *value;
+ PyObject *filter;
+
+ if ((dcpl = H5Dget_create_plist(dset)) < 0)
+   goto out;
+ if (H5D_CHUNKED != H5Pget_layout(dcpl) ||
+     (nf = H5Pget_nfilters(dcpl)) < 0) {
+   H5Pclose(dcpl);
+   goto out;
+ }
+
+ if ((filters = PyList_New(nf)) == NULL)
+   goto pyerror;
+ for (i=0; i<nf; i++) {
+   cd_nelmts = 20;
+   filt_id = H5Pget_filter(dcpl, i, &filt_flags, &cd_nelmts,
+                           cd_values, 0, NULL, NULL);
+   if (filt_id < 0) {
+     Py_DECREF(filters);
+     H5Pclose(dcpl);
+     goto out;
+   }
+   if ((filter_values = PyTuple_New(cd_nelmts)) == NULL)
+     goto pyerror;
+   for (j=0;j<(long)cd_nelmts;j++) {
+     if ((value = PyLong_FromLong(cd_values[j])) == NULL) {
+       Py_DECREF(filter_values);
+       goto pyerror;
+     }
+     /* PyTuple_SetItem() steals the reference to value */
+     PyTuple_SetItem(filter_values, j, value);
+   }
+   filter = Py_BuildValue("(iO)", (int)filt_id, filter_values);
+   Py_DECREF(filter_values);
+   if (filter == NULL)
+     goto pyerror;
+   PyList_SetItem(filters, i, filter);
+ }
+
+ H5Pclose(dcpl);
+
+return filters;
+
+out:
+ Py_INCREF(Py_None);
+ return Py_None;
+
+pyerror:
+ Py_XDECREF(filters);
+ H5Pclose(dcpl);
+ return NULL;
+}
+
+PyObject *get_filter_names( hid_t loc_id,
+                            const char *dset_name)
+{
+ hid_t    dset;
+ PyObject *filters;
+
+ /* Open the dataset. */
+ if ( (dset = H5Dopen( loc_id, dset_name, H5P_DEFAULT )) < 0 ) {
+   goto out;
+ }
+
+ filters = get_dset_filter_names(dset);
  H5Dclose(dset);
 
 return filters;
@@ -355,6 +446,426 @@ PyObject *Giterate(hid_t parent_id, hid_t loc_id, const char *name) {
   return t;
 }
 
+/* The state kept while iterating over the children of a group
+   for gathering their metadata. */
+typedef struct {
+  PyObject *names;      /* the names of the children */
+  PyObject *classes;    /* their CLASS attributes (or None) */
+  PyObject *versions;   /* their VERSION attributes (or None) */
+  char     *kinds;      /* one kind code per child */
+  size_t   nkinds;
+  size_t   maxkinds;
+  int      sysattrs;    /* whether to read the system attributes */
+} meta_info_t;
+
+/****************************************************************
+**
+**  get_interned_attr(): Read a string attribute of an object
+**  as an interned string, or None if it can not be read.
+**
+****************************************************************/
+static PyObject *get_interned_attr(hid_t obj_id, const char *attr_name) {
+  char     *data = NULL;
+  hsize_t  size;
+  PyObject *value;
+
+  if (H5ATTRfind_attribute(obj_id, attr_name) <= 0) {
+    Py_INCREF(Py_None);
+    return Py_None;
+  }
+  size = H5ATTRget_attribute_string(obj_id, attr_name, &data, NULL);
+  if ((data == NULL) || (size == 0)) {
+    if (data != NULL)
+      free(data);
+    Py_INCREF(Py_None);
+    return Py_None;
+  }
+  /* Class names and versions repeat a lot, so share them */
+  value = PyString_InternFromString(data);
+  free(data);
+  return value;
+}
+
+/****************************************************************
+**
+**  litermetacb(): Link iteration callback routine gathering
+**  the kind and the CLASS and VERSION attributes of each child.
+**
+****************************************************************/
+herr_t litermetacb(hid_t loc_id, const char *name, const H5L_info_t *info,
+                   void *data) {
+  meta_info_t *meta = (meta_info_t *)data;
+  PyObject    *strname, *classname, *version;
+  herr_t      ret;
+  hid_t       obj_id;
+  H5O_info_t  oinfo;
+  char        kind, *kinds;
+
+  classname = version = NULL;
+
+  switch(info->type) {
+    case H5L_TYPE_SOFT:
+      kind = 'S';
+      break;
+    case H5L_TYPE_EXTERNAL:
+      kind = 'E';
+      break;
+    case H5L_TYPE_HARD:
+      /* Get type of the object and check it */
+      ret = H5Oget_info_by_name(loc_id, name, &oinfo, H5P_DEFAULT);
+      if (ret < 0)
+          return -1;
+
+      switch(oinfo.type) {
+        case H5O_TYPE_GROUP:
+          kind = 'G';
+          break;
+        case H5O_TYPE_DATASET:
+          kind = 'L';
+          break;
+        case H5O_TYPE_NAMED_DATATYPE:
+          /* named datatypes are not children for PyTables */
+          return 0;
+        default:
+          kind = 'U';
+      }
+      if (meta->sysattrs && (kind != 'U')) {
+        H5E_BEGIN_TRY {
+          obj_id = H5Oopen(loc_id, name, H5P_DEFAULT);
+        } H5E_END_TRY;
+        if (obj_id >= 0) {
+          classname = get_interned_attr(obj_id, "CLASS");
+          version = get_interned_attr(obj_id, "VERSION");
+          H5Oclose(obj_id);
+        }
+      }
+      break;
+    default:
+      /* should not happen */
+      kind = 'U';
+  }
+  if (classname == NULL) {
+    classname = Py_None;
+    Py_INCREF(classname);
+  }
+  if (version == NULL) {
+    version = Py_None;
+    Py_INCREF(version);
+  }
+
+  /* Grow the buffer of kinds if needed */
+  if (meta->nkinds == meta->maxkinds) {
+    meta->maxkinds = meta->maxkinds ? 2 * meta->maxkinds : 256;
+    kinds = (char *)realloc(meta->kinds, meta->maxkinds);
+    if (kinds == NULL) {
+      Py_DECREF(classname);
+      Py_DECREF(version);
+      return -1;
+    }
+    meta->kinds = kinds;
+  }
+  meta->kinds[meta->nkinds++] = kind;
+
+  strname = PyString_FromString(name);
+  PyList_Append(meta->names, strname);
+  PyList_Append(meta->classes, classname);
+  PyList_Append(meta->versions, version);
+  Py_DECREF(strname);
+  Py_DECREF(classname);
+  Py_DECREF(version);
+
+  return 0 ;  /* Loop until no more objects remain in directory */
+}
+
+/****************************************************************
+**
+**  Giterate_meta(): Group iteration routine gathering the metadata
+**  of all the children in one single pass.
+**
+**  Returns a tuple with the list of children names (sorted), a
+**  string with the kind of each child ('G'roup, 'L'eaf, 'S'oft link,
+**  'E'xternal link or 'U'nknown), and the lists of their CLASS and
+**  VERSION attributes (None when missing or not requested).
+**
+****************************************************************/
+PyObject *Giterate_meta(hid_t parent_id, hid_t loc_id, const char *name,
+                        int sysattrs) {
+  hsize_t     i=0;
+  PyObject    *t, *kinds;
+  meta_info_t meta;
+
+  meta.names = PyList_New(0);
+  meta.classes = PyList_New(0);
+  meta.versions = PyList_New(0);
+  meta.kinds = NULL;
+  meta.nkinds = meta.maxkinds = 0;
+  meta.sysattrs = sysattrs;
+
+  /* Iterate over all the childs behind loc_id (parent_id+loc_id) in
+   * increasing order of names, so that they can be binary searched. */
+  H5Literate_by_name(parent_id, name, H5_INDEX_NAME, H5_ITER_INC,
+                     &i, litermetacb, &meta, H5P_DEFAULT);
+
+  kinds = PyString_FromStringAndSize(meta.kinds, meta.nkinds);
+  if (meta.kinds != NULL)
+    free(meta.kinds);
+
+  t = PyTuple_New(4);
+  PyTuple_SetItem(t, 0, meta.names);
+  PyTuple_SetItem(t, 1, kinds);
+  PyTuple_SetItem(t, 2, meta.classes);
+  PyTuple_SetItem(t, 3, meta.versions);
+
+  return t;
+}
+
+/* The state kept while walking over a hierarchy for scanning
+   the metadata of its nodes. */
+typedef struct {
+  PyObject *names;      /* the paths of the nodes (relative to the start) */
+  PyObject *classes;    /* their CLASS attributes (or None) */
+  PyObject *shapes;     /* the shapes of datasets (or None) */
+  PyObject *types;      /* the open type ids of datasets (or None) */
+  PyObject *filters;    /* the filters of datasets (or None) */
+  char     *kinds;      /* one kind code per node */
+  size_t   nkinds;
+  size_t   maxkinds;
+  int      sysattrs;    /* whether to read the system attributes */
+  int      gettypes;    /* whether to get the types of datasets */
+  int      getfilters;  /* whether to get the filters of datasets */
+} scan_info_t;
+
+/****************************************************************
+**
+**  is_hidden_path(): Does the relative path contain a hidden name?
+**  This is the same test as ``tables.path.isVisiblePath()``.
+**
+****************************************************************/
+static int is_hidden_path(const char *name) {
+  const char *comp;
+
+  for (comp = name; comp != NULL; comp = strchr(comp, '/')) {
+    if (*comp == '/')
+      comp++;
+    if ((comp[0] == '_') && ((comp[1] == 'p') || (comp[1] == 'i'))
+        && (comp[2] == '_'))
+      return 1;
+  }
+  return 0;
+}
+
+/****************************************************************
+**
+**  scan_object(): Add the metadata of an object to the scan.
+**
+****************************************************************/
+static herr_t scan_object(scan_info_t *scan, hid_t loc_id, const char *name,
+                          char kind) {
+  PyObject *strname, *classname, *shape, *type, *filters;
+  hid_t    obj_id, space_id, type_id;
+  hsize_t  dims[H5S_MAX_RANK];
+  int      rank, i;
+  char     *kinds;
+
+  classname = shape = type = filters = NULL;
+
+  if ((kind == 'G') || (kind == 'L')) {
+    H5E_BEGIN_TRY {
+      obj_id = H5Oopen(loc_id, name, H5P_DEFAULT);
+    } H5E_END_TRY;
+    if (obj_id >= 0) {
+      if (scan->sysattrs)
+        classname = get_interned_attr(obj_id, "CLASS");
+      if (kind == 'L') {
+        /* The shape of the dataset */
+        space_id = H5Dget_space(obj_id);
+        rank = H5Sget_simple_extent_dims(space_id, dims, NULL);
+        H5Sclose(space_id);
+        if (rank >= 0) {
+          shape = PyTuple_New(rank);
+          for (i = 0; i < rank; i++)
+            PyTuple_SetItem(shape, i, PyLong_FromLongLong(dims[i]));
+        }
+        /* Its type is handed over to the caller, which must close it */
+        if (scan->gettypes) {
+          type_id = H5Dget_type(obj_id);
+          if (type_id >= 0)
+            type = PyLong_FromLongLong(type_id);
+        }
+        if (scan->getfilters)
+          filters = get_dset_filter_names(obj_id);
+      }
+      H5Oclose(obj_id);
+    }
+  }
+  if (classname == NULL) {
+    classname = Py_None;
+    Py_INCREF(classname);
+  }
+  if (shape == NULL) {
+    shape = Py_None;
+    Py_INCREF(shape);
+  }
+  if (type == NULL) {
+    type = Py_None;
+    Py_INCREF(type);
+  }
+  if (filters == NULL) {
+    filters = Py_None;
+    Py_INCREF(filters);
+  }
+
+  /* Grow the buffer of kinds if needed */
+  if (scan->nkinds == scan->maxkinds) {
+    scan->maxkinds = scan->maxkinds ? 2 * scan->maxkinds : 256;
+    kinds = (char *)realloc(scan->kinds, scan->maxkinds);
+    if (kinds == NULL) {
+      Py_DECREF(classname);
+      Py_DECREF(shape);
+      Py_DECREF(type);
+      Py_DECREF(filters);
+      return -1;
+    }
+    scan->kinds = kinds;
+  }
+  scan->kinds[scan->nkinds++] = kind;
+
+  strname = PyString_FromString(name);
+  PyList_Append(scan->names, strname);
+  PyList_Append(scan->classes, classname);
+  PyList_Append(scan->shapes, shape);
+  PyList_Append(scan->types, type);
+  PyList_Append(scan->filters, filters);
+  Py_DECREF(strname);
+  Py_DECREF(classname);
+  Py_DECREF(shape);
+  Py_DECREF(type);
+  Py_DECREF(filters);
+
+  return 0;
+}
+
+/****************************************************************
+**
+**  lscancb(): Link visiting callback routine for the scan.
+**
+****************************************************************/
+herr_t lscancb(hid_t loc_id, const char *name, const H5L_info_t *info,
+               void *data) {
+  scan_info_t *scan = (scan_info_t *)data;
+  H5O_info_t  oinfo;
+  char        kind;
+
+  /* Hidden nodes (and everything below them) are not scanned */
+  if (is_hidden_path(name))
+    return 0;
+
+  switch(info->type) {
+    case H5L_TYPE_SOFT:
+      kind = 'S';
+      break;
+    case H5L_TYPE_EXTERNAL:
+      kind = 'E';
+      break;
+    case H5L_TYPE_HARD:
+      if (H5Oget_info_by_name(loc_id, name, &oinfo, H5P_DEFAULT) < 0)
+          return -1;
+      switch(oinfo.type) {
+        case H5O_TYPE_GROUP:
+          kind = 'G';
+          break;
+        case H5O_TYPE_DATASET:
+          kind = 'L';
+          break;
+        case H5O_TYPE_NAMED_DATATYPE:
+          /* named datatypes are not nodes for PyTables */
+          return 0;
+        default:
+          kind = 'U';
+      }
+      break;
+    default:
+      /* should not happen */
+      kind = 'U';
+  }
+
+  return scan_object(scan, loc_id, name, kind);
+}
+
+/****************************************************************
+**
+**  Gscan(): Gather the metadata of a node and all the visible nodes
+**  hanging from it, in one single pass over the hierarchy.
+**
+**  Returns a tuple with the list of paths relative to the starting
+**  node (which is included with path "."), a string with the kind of
+**  each node (as in Giterate_meta), and the lists of their CLASS
+**  attributes, of the shapes of datasets, of the (open) type ids of
+**  datasets and of the filters of datasets (None when missing or not
+**  requested).  Returns None if the starting node does not exist.
+**
+****************************************************************/
+PyObject *Gscan(hid_t loc_id, const char *name, int sysattrs, int gettypes,
+                int getfilters) {
+  PyObject    *t, *kinds;
+  scan_info_t scan;
+  H5O_info_t  oinfo;
+  herr_t      ret;
+  char        kind;
+
+  H5E_BEGIN_TRY {
+    ret = H5Oget_info_by_name(loc_id, name, &oinfo, H5P_DEFAULT);
+  } H5E_END_TRY;
+  if (ret < 0) {
+    Py_INCREF(Py_None);
+    return Py_None;
+  }
+  switch(oinfo.type) {
+    case H5O_TYPE_GROUP:
+      kind = 'G';
+      break;
+    case H5O_TYPE_DATASET:
+      kind = 'L';
+      break;
+    default:
+      kind = 'U';
+  }
+
+  scan.names = PyList_New(0);
+  scan.classes = PyList_New(0);
+  scan.shapes = PyList_New(0);
+  scan.types = PyList_New(0);
+  scan.filters = PyList_New(0);
+  scan.kinds = NULL;
+  scan.nkinds = scan.maxkinds = 0;
+  scan.sysattrs = sysattrs;
+  scan.gettypes = gettypes;
+  scan.getfilters = getfilters;
+
+  ret = scan_object(&scan, loc_id, name, kind);
+  if ((ret >= 0) && (kind == 'G')) {
+    /* Recursively visit all the links below the starting group */
+    H5Lvisit_by_name(loc_id, name, H5_INDEX_NAME, H5_ITER_INC,
+                     lscancb, &scan, H5P_DEFAULT);
+  }
+  /* The starting node is named "." like in H5Lvisit() */
+  if (scan.nkinds > 0)
+    PyList_SetItem(scan.names, 0, PyString_FromString("."));
+
+  kinds = PyString_FromStringAndSize(scan.kinds, scan.nkinds);
+  if (scan.kinds != NULL)
+    free(scan.kinds);
+
+  t = PyTuple_New(6);
+  PyTuple_SetItem(t, 0, scan.names);
+  PyTuple_SetItem(t, 1, kinds);
+  PyTuple_SetItem(t, 2, scan.classes);
+  PyTuple_SetItem(t, 3, scan.shapes);
+  PyTuple_SetItem(t, 4, scan.types);
+  PyTuple_SetItem(t, 5, scan.filters);
+  return t;
+}
+
 /****************************************************************
 **
 **  aitercb(): Custom attribute iteration callback routine.
@@ -994,3 +1505,36 @@ ssize_t pt_H5Fget_file_image(hid_t file_id, void *buf_ptr, size_t buf_len) {
  return -1;
 }
 #endif /* (H5_HAVE_IMAGE_FILE == 1) */
+
+
+#if (H5_HAVE_READ_CHUNK == 1)
+/* HDF5 version >= 1.10.2 */
+
+herr_t pt_H5Dget_chunk_storage_size(hid_t dset_id, const hsize_t *offset,
+                                    hsize_t *chunk_nbytes) {
+ return H5Dget_chunk_storage_size(dset_id, offset, chunk_nbytes);
+}
+
+herr_t pt_H5Dread_chunk(hid_t dset_id, hid_t dxpl_id, const hsize_t *offset,
+                        unsigned *filter_mask, void *buf) {
+ herr_t ret;
+ uint32_t filters = 0;
+
+ ret = H5Dread_chunk(dset_id, dxpl_id, offset, &filters, buf);
+ *filter_mask = (unsigned)filters;
+ return ret;
+}
+
+#else /* (H5_HAVE_READ_CHUNK == 1) */
+/* HDF5 version < 1.10.2 */
+
+herr_t pt_H5Dget_chunk_storage_size(hid_t dset_id, const hsize_t *offset,
+                                    hsize_t *chunk_nbytes) {
+ return -1;
+}
+
+herr_t pt_H5Dread_chunk(hid_t dset_id, hid_t dxpl_id, const hsize_t *offset,
+                        unsigned *filter_mask, void *buf) {
+ return -1;
+}
+#endif /* (H5_HAVE_READ_CHUNK == 1) */
@@ -52,6 +52,14 @@
 #define H5_HAVE_IMAGE_FILE 0
 #endif
 
+#if (H5_VERS_MAJOR == 1 && H5_VERS_MINOR == 10 && H5_VERS_RELEASE >= 2) || (H5_VERS_MAJOR == 1 && H5_VERS_MINOR > 10)
+/* HDF5 version >= 1.10.2 */
+#define H5_HAVE_READ_CHUNK 1
+#else
+/* HDF5 version < 1.10.2 */
+#define H5_HAVE_READ_CHUNK 0
+#endif
+
 /* Use %ld to print the value because long should cover most cases. */
 /* Used to make certain a return value _is_not_ a value */
 #define CHECK(ret, val, where) do {                                           \
@@ -77,12 +85,20 @@ PyObject *createNamesTuple(char *buffer[], int nelements);
 
 PyObject *get_filter_names( hid_t loc_id, const char *dset_name);
 
+PyObject *get_filter_pipeline(hid_t dset);
+
 int get_objinfo(hid_t loc_id, const char *name);
 
 int get_linkinfo(hid_t loc_id, const char *name);
 
 PyObject *Giterate(hid_t parent_id, hid_t loc_id, const char *name);
 
+PyObject *Giterate_meta(hid_t parent_id, hid_t loc_id, const char *name,
+                        int sysattrs);
+
+PyObject *Gscan(hid_t loc_id, const char *name, int sysattrs, int gettypes,
+                int getfilters);
+
 PyObject *Aiterate(hid_t loc_id);
 
 H5T_class_t getHDF5ClassID(hid_t loc_id,
@@ -125,3 +141,9 @@ herr_t pt_H5Pset_fapl_windows(hid_t fapl_id);
 herr_t pt_H5Pset_file_image(hid_t fapl_id, void *buf_ptr, size_t buf_len);
 
 ssize_t pt_H5Fget_file_image(hid_t file_id, void *buf_ptr, size_t buf_len);
+
+herr_t pt_H5Dget_chunk_storage_size(hid_t dset_id, const hsize_t *offset,
+                                    hsize_t *chunk_nbytes);
+
+herr_t pt_H5Dread_chunk(hid_t dset_id, hid_t dxpl_id, const hsize_t *offset,
+                        unsigned *filter_mask, void *buf);
@@ -89,6 +89,7 @@ hdf5Version = getHDF5Version()
 from tables.utilsExtension import (
     isHDF5File, isPyTablesFile, whichLibVersion, setBloscMaxThreads,
     silenceHDF5Messages)
+from tables.lrucacheExtension import setChunkCacheSize
 
 from tables.misc.enum import Enum
 from tables.atom import *
@@ -98,11 +99,12 @@ from tables.filters import Filters
 
 # Import the user classes from the proper modules
 from tables.exceptions import *
-from tables.file import File, openFile, copyFile
+from tables.file import File, FilePool, openFile, copyFile, cache_stats
 from tables.node import Node
 from tables.group import Group
 from tables.leaf import Leaf
 from tables.table import Table, Cols, Column
+from tables.ctable import CTable
 from tables.array import Array
 from tables.carray import CArray
 from tables.earray import EArray
@@ -126,7 +128,7 @@ __all__ = [
     'isHDF5File', 'isPyTablesFile', 'whichLibVersion',
     'copyFile', 'openFile', 'print_versions', 'test',
     'split_type', 'restrict_flavors', 'setBloscMaxThreads',
-    'silenceHDF5Messages',
+    'silenceHDF5Messages', 'setChunkCacheSize', 'cache_stats',
     # Helper classes:
     'IsDescription', 'Description', 'Filters', 'Cols', 'Column',
     # Types:
@@ -149,10 +151,11 @@ __all__ = [
     'TimeCol', 'Time32Col', 'Time64Col',
     'EnumCol',
     # Node classes:
-    'Node', 'Group', 'Leaf', 'Table', 'Array', 'CArray', 'EArray', 'VLArray',
+    'Node', 'Group', 'Leaf', 'Table', 'CTable', 'Array', 'CArray', 'EArray',
+    'VLArray',
     'UnImplemented', 'Unknown',
     # The File class:
-    'File',
+    'File', 'FilePool',
     # Expr class
     'Expr',
     ]
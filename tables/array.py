@@ -23,6 +23,7 @@ from tables.flavor import flavor_of, array_as_internal, internal_to_flavor
 from tables.utils import (is_idx, convertToNPAtom2, SizeType, lazyattr,
                           byteorders)
 from tables.leaf import Leaf
+from tables.lrucacheExtension import sharedcache
 
 
 # default version for ARRAY objects
@@ -296,6 +297,64 @@ class Array(hdf5Extension.Array, Leaf):
         return self
 
 
+    def iterblocks(self, start=None, stop=None, step=None, blocksize=None):
+        """Iterate over the array in blocks of rows.
+
+        This method returns an iterator yielding a NumPy array for each
+        block of rows read from the *main dimension* of the array, so
+        that vectorized computations can be used instead of the per-row
+        access offered by :meth:`Array.iterrows`.  The start, stop and
+        step parameters have the same meaning as in :meth:`Array.read`.
+
+        blocksize is the number of rows spanned by every block.  By
+        default, it is the largest multiple of the chunk length (over the
+        main dimension) that fits in the I/O buffer, so that each block
+        covers whole chunks.
+
+        .. warning::
+
+            The blocks are views over an internal buffer that is reused
+            by the iterator.  Make a copy of a block if you want to keep
+            it after the next iteration.
+
+        Examples
+        --------
+
+        ::
+
+            total = 0
+            for block in arrayInstance.iterblocks():
+                total += block.sum()
+
+        """
+
+        self._g_checkOpen()
+        if not self.shape:
+            raise TypeError("scalar arrays can not be iterated in blocks")
+        (start, stop, step) = self._processRangeRead(start, stop, step)
+        return self._iterblocks(start, stop, step, blocksize)
+
+
+    def _iterblocks(self, start, stop, step, blocksize):
+        """Low-level counterpart of `self.iterblocks()`."""
+
+        maindim = self.maindim
+        shape = list(self.shape)
+        flatbuf, bufrows = None, 0
+        for (bstart, bstop) in self._blockRanges(start, stop, step, blocksize):
+            nrows = len(xrange(bstart, bstop, step))
+            shape[maindim] = nrows
+            # The first block may be shorter than the next ones
+            if nrows > bufrows:
+                flatbuf = numpy.empty(
+                    shape=shape, dtype=self.atom.dtype).reshape(-1)
+                bufrows = nrows
+            # Get a contiguous view over the buffer for this block
+            block = flatbuf[:flatbuf.size // bufrows * nrows]
+            block = block.reshape(shape + list(self.atom.shape))
+            yield self._read(bstart, bstop, step, out=block)
+
+
     def _initLoop(self):
         "Initialization for the __iter__ iterator"
 
@@ -425,21 +484,24 @@ class Array(hdf5Extension.Array, Leaf):
         addition to the standard slice-and-int behavior.
 
         Indexing arguments may be ints, slices or lists of indices.
+        The indices of a list are sorted and coalesced into runs of
+        consecutive indices, each of them selected with a hyperslab.
 
         Note: This is a backport from the h5py project.
         """
 
         # Internal functions
 
-        def validate_number(num, length):
-            """Validate a list member for the given axis length"""
+        def coalesce_runs(nexp):
+            """
+            Given a sorted array of indices without repetitions, return
+            the (starts, counts) arrays of its runs of consecutive indices
+            """
 
-            try:
-                num = long(num)
-            except TypeError:
-                raise TypeError("Illegal index: %r" % num)
-            if num > length-1:
-                raise IndexError("Index out of bounds: %d" % num)
+            breaks = numpy.flatnonzero(numpy.diff(nexp) != 1) + 1
+            starts = nexp[numpy.concatenate(([0], breaks))]
+            stops = nexp[numpy.concatenate((breaks-1, [len(nexp)-1]))] + 1
+            return starts, stops-starts
 
 
         def expand_ellipsis(args, rank):
@@ -532,13 +594,19 @@ class Array(hdf5Extension.Array, Leaf):
                 selection.append((start, count, step, idx, "AND"))
                 mshape.append(count)
             else:
-                try:
-                    exp = list(exp)
-                except TypeError:
-                    exp = [exp]      # Handle scalar index as a list of length 1
-                    mshape.append(0) # Keep track of scalar index for NumPy
-                else:
+                if isinstance(exp, numpy.ndarray) and exp.ndim > 0:
+                    # Avoid building a list for (long) arrays of indices
                     mshape.append(len(exp))
+                else:
+                    try:
+                        exp = list(exp)
+                    except TypeError:
+                        # Handle scalar index as a list of length 1
+                        exp = [exp]
+                        # Keep track of scalar index for NumPy
+                        mshape.append(0)
+                    else:
+                        mshape.append(len(exp))
                 if len(exp) == 0:
                     raise IndexError(
                         "Empty selections are not allowed (axis %d)" % idx)
@@ -551,39 +619,30 @@ class Array(hdf5Extension.Array, Leaf):
                 nexp = numpy.asarray(exp, dtype="i8")
                 # Convert negative values
                 nexp = numpy.where(nexp < 0, length+nexp, nexp)
+                outofbounds = (nexp < 0) | (nexp > length-1)
+                if outofbounds.any():
+                    raise IndexError("Index out of bounds: %d"
+                                     % nexp[outofbounds][0])
                 # Check whether the list is ordered or not
                 # (only one unordered list is allowed)
-                if not len(nexp) == len(numpy.unique(nexp)):
-                    raise IndexError(
-                        "Selection lists cannot have repeated values")
-                neworder = nexp.argsort()
-                if not numpy.alltrue(neworder == numpy.arange(len(exp))):
+                if len(nexp) > 1 and (numpy.diff(nexp) <= 0).any():
+                    neworder = nexp.argsort(kind='mergesort')
+                    nexp = nexp[neworder]
+                    if (numpy.diff(nexp) == 0).any():
+                        raise IndexError(
+                            "Selection lists cannot have repeated values")
                     if reorder is not None:
                         raise IndexError(
                             "Only one selection list can be unordered")
                     corrected_idx = sum(1 for x in mshape if x != 0) - 1
                     reorder = (corrected_idx, neworder)
-                    nexp = nexp[neworder]
-                for select_idx in xrange(len(nexp)+1):
-                    # This crazy piece of code performs a list selection
-                    # using HDF5 hyperslabs.
-                    # For each index, perform a "NOTB" selection on every
-                    # portion of *this axis* which falls *outside* the list
-                    # selection.  For this to work, the input array MUST be
-                    # monotonically increasing.
-                    if select_idx < len(nexp):
-                        validate_number(nexp[select_idx], length)
-                    if select_idx == 0:
-                        start = 0
-                        count = nexp[0]
-                    elif select_idx == len(nexp):
-                        start = nexp[-1]+1
-                        count = length-start
-                    else:
-                        start = nexp[select_idx-1]+1
-                        count = nexp[select_idx] - start
-                    if count > 0:
-                        selection.append((start, count, 1, idx, "NOTB"))
+                # Select the runs of consecutive indices in the list
+                # (just one run for scalars) as hyperslabs in this axis.
+                starts, counts = coalesce_runs(nexp)
+                if len(starts) == 1:
+                    selection.append((starts[0], counts[0], 1, idx, "AND"))
+                else:
+                    selection.append((starts, counts, 1, idx, "OR"))
 
         mshape = tuple(x for x in mshape if x != 0)
         return selection, reorder, mshape
@@ -718,17 +777,51 @@ class Array(hdf5Extension.Array, Leaf):
     def _readSlice(self, startl, stopl, stepl, shape):
         """Read a slice based on `startl`, `stopl` and `stepl`."""
 
-        nparr = numpy.empty(dtype=self.atom.dtype, shape=shape)
-        # Protection against reading empty arrays
-        if 0 not in shape:
-            # Arrays that have non-zero dimensionality
-            self._g_readSlice(startl, stopl, stepl, nparr)
+        nparr = None
+        if (self.chunkshape is not None and 0 not in shape
+            and sharedcache.maxsize > 0):
+            nparr = self._readSliceFromChunk(startl, stopl, stepl, shape)
+        if nparr is None:
+            nparr = numpy.empty(dtype=self.atom.dtype, shape=shape)
+            # Protection against reading empty arrays
+            if 0 not in shape:
+                # Arrays that have non-zero dimensionality
+                self._g_readSlice(startl, stopl, stepl, nparr)
         # For zero-shaped arrays, return the scalar
         if nparr.shape == ():
             nparr = nparr[()]
         return nparr
 
 
+    def _readSliceFromChunk(self, startl, stopl, stepl, shape):
+        """Read a slice falling in a single chunk through the chunk cache.
+
+        The whole chunk is read and kept in the shared chunk cache, so
+        that other slices in it can be served from memory.  If the slice
+        spans more than one chunk, None is returned.
+        """
+
+        chunkshape = numpy.array(self.chunkshape, dtype=SizeType)
+        lastl = stopl - 1 - (stopl - 1 - startl) % stepl
+        nchunkl = startl // chunkshape
+        if (lastl // chunkshape != nchunkl).any():
+            return None
+        nchunk = tuple([int(n) for n in nchunkl])
+        chunk = sharedcache.getchunk(self, nchunk)
+        cstartl = nchunkl * chunkshape
+        if chunk is None:
+            cstopl = numpy.minimum(cstartl + chunkshape,
+                                   numpy.array(self.shape, dtype=SizeType))
+            chunk = numpy.empty(dtype=self.atom.dtype,
+                                shape=tuple(cstopl - cstartl))
+            self._g_readSlice(cstartl, cstopl, numpy.ones_like(stepl), chunk)
+            sharedcache.putchunk(self, nchunk, chunk)
+        slices = tuple([slice(start, stop, step) for (start, stop, step)
+                        in zip(startl - cstartl, stopl - cstartl, stepl)])
+        # The chunk in cache must not be shared with the caller
+        return numpy.array(chunk[slices]).reshape(shape)
+
+
     def _readCoords(self, coords):
         """Read a set of points defined by `coords`."""
 
@@ -752,13 +845,12 @@ class Array(hdf5Extension.Array, Leaf):
         if nparr.shape == ():
             nparr = nparr[()]
         elif reorder is not None:
-            # We need to reorder the array
+            # We need to reorder the array with the inverse of the
+            # sorting permutation (`take()` gives a contiguous array)
             idx, neworder = reorder
-            k = [slice(None)]*len(shape)
-            k[idx] = neworder.argsort()
-            # Apparently, a copy is not needed here, but doing it
-            # for symmetry with the `_writeSelection()` method.
-            nparr = nparr[k].copy()
+            inverse = numpy.empty_like(neworder)
+            inverse[neworder] = numpy.arange(len(neworder))
+            nparr = nparr.take(inverse, axis=idx)
         return nparr
 
 
@@ -784,12 +876,9 @@ class Array(hdf5Extension.Array, Leaf):
         nparr = self._checkShape(nparr, tuple(shape))
         # Check whether we should reorder the array
         if reorder is not None:
+            # `take()` gives a new contiguous array, as needed for writing
             idx, neworder = reorder
-            k = [slice(None)]*len(shape)
-            k[idx] = neworder
-            # For a reason a don't understand well, we need a copy of
-            # the reordered array
-            nparr = nparr[k].copy()
+            nparr = nparr.take(neworder, axis=idx)
         self._g_writeSelection(selection, nparr)
 
 
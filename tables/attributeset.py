@@ -19,7 +19,7 @@ import cPickle
 import numpy
 
 from tables import hdf5Extension
-from tables.utils import SizeType
+from tables.utils import SizeType, hdf5lock
 from tables.registry import classNameDict
 from tables.exceptions import ClosedNodeError, PerformanceWarning
 from tables.path import checkNameValidity
@@ -290,7 +290,8 @@ class AttributeSet(hdf5Extension.AttributeSet, object):
         # takes care of other types as well as for example NROWS for
         # Tables and EXTDIM for EArrays
         format_version = self._v__format_version
-        value = self._g_getAttr(self._v_node, name)
+        with hdf5lock:
+            value = self._g_getAttr(self._v_node, name)
 
         # Check whether the value is pickled
         # Pickled values always seems to end with a "."
@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#
+# License: BSD
+# Created: October 18, 2026
+# Author:  The PyTables Developers
+#
+# $Id$
+#
+########################################################################
+
+"""Here is defined the catalog of nodes of a file.
+
+The catalog is a hidden table with a row for every visible node in the
+file, which keeps its path name, class, shape, type and filters.  This
+allows getting the metadata of many nodes without opening each of them.
+"""
+
+import ast
+
+import numpy
+
+from tables.description import StringCol, Int8Col, Int64Col
+from tables.exceptions import NoSuchNodeError
+from tables.filters import Filters
+from tables.registry import classNameDict, getClassByName
+from tables.path import joinPath, isVisiblePath
+from tables.node import NotLoggedMixin
+from tables.leaf import Leaf
+from tables.group import Group
+from tables.table import Table
+
+
+# Paths and names for the hidden catalog table.
+_catalogVersion = '1.1'  # full descriptions of types
+
+_catalogParent = '/'
+_catalogName = '_p_catalog'
+_catalogPath = joinPath(_catalogParent, _catalogName)
+
+# The maximum rank of HDF5 dataspaces.
+_maxDims = 32
+
+# Values meaning that a node has no shape, type or filters.
+_noShape = -1
+_noFilters = -1
+
+
+def _dtypeToString(dtype):
+    """Get a string from which `dtype` can be rebuilt with `_dtypeFromString`.
+
+    The ``str`` of structured or subarray types is just a void type of
+    the same size, so their fields or shape are kept too.
+    """
+
+    if dtype.fields is not None:
+        return repr(dtype.descr)
+    if dtype.subdtype is not None:
+        return repr((dtype.base.str, dtype.shape))
+    return dtype.str
+
+
+def _dtypeFromString(string):
+    """Rebuild a type from a string returned by `_dtypeToString()`."""
+
+    if string[:1] in ('[', '('):
+        return numpy.dtype(ast.literal_eval(string))
+    return numpy.dtype(string)
+
+
+def _encode(value):
+    if not isinstance(value, bytes):
+        value = value.encode('utf-8')
+    return value
+
+
+def _decode(value):
+    if not isinstance(value, str):
+        value = value.decode('utf-8')
+    return value
+
+
+class NodeInfo(object):
+    """Metadata of a node, as kept in the catalog of nodes of a file.
+
+    Instances of this class are returned by :meth:`File.getNodeInfo`
+    and :meth:`File.listNodeInfo`.
+
+    .. versionadded:: 3.0
+
+    """
+
+    __slots__ = ('pathname', 'classname', 'shape', 'dtype', 'filters')
+
+    def __init__(self, pathname, classname, shape, dtype, filters):
+        self.pathname = pathname
+        """The path of the node in the tree (a string)."""
+        self.classname = classname
+        """The name of the class of the node."""
+        self.shape = shape
+        """The shape of the node (``None`` for groups and links)."""
+        self.dtype = dtype
+        """The NumPy type of the node (``None`` if it has no type)."""
+        self.filters = filters
+        """The filters of the node (``None`` for links)."""
+
+    def __eq__(self, other):
+        return (isinstance(other, NodeInfo) and
+                all(getattr(self, name) == getattr(other, name)
+                    for name in self.__slots__))
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return "NodeInfo(%s)" % ", ".join(
+            "%s=%r" % (name, getattr(self, name)) for name in self.__slots__)
+
+    def __str__(self):
+        shape = ""
+        if self.shape is not None:
+            shape = str(self.shape)
+        filters = ""
+        if self.filters is not None and self.shape is not None:
+            if self.filters.fletcher32:
+                filters += ", fletcher32"
+            if self.filters.complevel:
+                if self.filters.shuffle:
+                    filters += ", shuffle"
+                filters += ", %s(%s)" % (self.filters.complib,
+                                         self.filters.complevel)
+        return "%s (%s%s%s)" % (self.pathname, self.classname, shape, filters)
+
+
+def nodeInfo(node):
+    """Get the `NodeInfo` metadata of a `node`."""
+
+    shape = dtype = filters = None
+    if isinstance(node, Leaf):
+        shape = tuple(node.shape)
+        dtype = getattr(node, 'dtype', None)
+        filters = node.filters
+    elif isinstance(node, Group):
+        # Columnar tables are groups with a shape.
+        if hasattr(node.__class__, 'shape'):
+            shape = tuple(node.shape)
+            dtype = node.dtype
+        filters = node._v_filters
+    if dtype is not None:
+        dtype = numpy.dtype(dtype)
+    return NodeInfo(node._v_pathname, node.__class__.__name__,
+                    shape, dtype, filters)
+
+
+def _infoToRow(info):
+    """Convert a `NodeInfo` into a row of the catalog table."""
+
+    shape = [0] * _maxDims
+    if info.shape is None:
+        ndim = _noShape
+    else:
+        ndim = len(info.shape)
+        shape[:ndim] = info.shape
+    if info.dtype is None:
+        dtype = b''
+    else:
+        dtype = _encode(_dtypeToString(info.dtype))
+    if info.filters is None:
+        filters = _noFilters
+    else:
+        filters = info.filters._pack()
+    return (_encode(info.pathname), _encode(info.classname),
+            ndim, shape, dtype, filters)
+
+
+def _sameRow(stored, row):
+    """Does the `stored` catalog row have the values in `row`?"""
+
+    (pathname, classname, ndim, shape, dtype, filters) = row
+    return (stored['pathname'] == pathname and
+            stored['classname'] == classname and
+            stored['ndim'] == ndim and
+            list(stored['shape']) == shape and
+            stored['dtype'] == dtype and
+            stored['filters'] == filters)
+
+
+def _rowToInfo(row):
+    """Convert a row of the catalog table into a `NodeInfo`."""
+
+    ndim = int(row['ndim'])
+    if ndim == _noShape:
+        shape = None
+    else:
+        shape = tuple(int(dim) for dim in row['shape'][:ndim])
+    dtype = None
+    if row['dtype']:
+        dtype = _dtypeFromString(_decode(row['dtype']))
+    filters = None
+    if row['filters'] != _noFilters:
+        filters = Filters._unpack(int(row['filters']))
+    return NodeInfo(_decode(row['pathname']), _decode(row['classname']),
+                    shape, dtype, filters)
+
+
+def _checkPathLength(pathname, pathlen):
+    """Check that `pathname` fits in `pathlen` bytes of the catalog."""
+
+    if len(_encode(pathname)) > pathlen:
+        raise ValueError(
+            "path ``%s`` does not fit in the node catalog; please "
+            "increase the ``NODE_CATALOG_PATH_LENGTH`` parameter"
+            % (pathname,))
+
+
+def _checkDtypeLength(row, dtypelen):
+    """Check that the type in the catalog `row` fits in `dtypelen` bytes."""
+
+    (pathname, classname, ndim, shape, dtype, filters) = row
+    if len(dtype) > dtypelen:
+        raise ValueError(
+            "the type of node ``%s`` does not fit in the node catalog; "
+            "please increase the ``NODE_CATALOG_DTYPE_LENGTH`` parameter"
+            % (_decode(pathname),))
+
+
+class _CatalogTable(NotLoggedMixin, Table):
+    pass
+
+
+class NodeCatalog(object):
+    """The catalog of nodes of a file.
+
+    The catalog is kept in a hidden table with a row per visible node,
+    indexed by path name.  Rows of removed nodes are blanked and reused
+    by new nodes.  Queries on the catalog only touch that table.
+    """
+
+    def __init__(self, file_):
+        self._v_file = file_
+        self.table = file_._getNode(_catalogPath)
+        """The hidden table holding the catalog."""
+        self._free = None
+        """The coordinates of blank rows (loaded lazily)."""
+
+
+    @classmethod
+    def create(class_, file_, filters):
+        """Create the catalog of `file_` and fill it with its nodes."""
+
+        pathlen = file_.params['NODE_CATALOG_PATH_LENGTH']
+        dtypelen = file_.params['NODE_CATALOG_DTYPE_LENGTH']
+        infos = [nodeInfo(node) for node in file_.walkNodes('/')]
+        rows = [_infoToRow(info) for info in infos]
+        for (info, row) in zip(infos, rows):
+            _checkPathLength(info.pathname, pathlen)
+            _checkDtypeLength(row, dtypelen)
+        description = {
+            'pathname': StringCol(pathlen, pos=0),
+            'classname': StringCol(32, pos=1),
+            'ndim': Int8Col(pos=2),
+            'shape': Int64Col(shape=(_maxDims,), pos=3),
+            'dtype': StringCol(dtypelen, pos=4),
+            'filters': Int64Col(pos=5),
+            }
+        table = _CatalogTable(file_.root, _catalogName, description,
+                              "Catalog of nodes", filters=filters)
+        table.attrs._g__setattr('FORMATVERSION', _catalogVersion)
+        table.cols.pathname.createIndex()
+        # Nodes are updated one at a time, so keep them in index deltas
+        # instead of reindexing the whole catalog on every change.
+        table.incrementalIndex = True
+
+        if rows:
+            table.append(rows)
+            table.flush()
+        return class_(file_)
+
+
+    def _checkPath(self, pathname):
+        _checkPathLength(pathname, self.table.coldtypes['pathname'].itemsize)
+
+
+    def _getCoords(self, pathname, descendants=False):
+        """Get the coordinates of the rows of `pathname`.
+
+        The rows of the nodes hanging from it are also returned if
+        `descendants` is true.
+        """
+
+        pathname = _encode(pathname)
+        if not descendants:
+            return self.table.getWhereList(
+                'pathname == path', {'path': pathname})
+        # Descendants of ``/a`` are the paths in ``[/a/, /a0)``.
+        if pathname == b'/':
+            prefix = b'/'
+        else:
+            prefix = pathname + b'/'
+        upper = prefix[:-1] + b'0'
+        condvars = {'path': pathname, 'lower': prefix, 'upper': upper}
+        return self.table.getWhereList(
+            '(pathname == path) | ((pathname > lower) & (pathname < upper))',
+            condvars, sort=True)
+
+
+    def _getFree(self):
+        if self._free is None:
+            self._free = self.table.getWhereList(
+                'pathname == empty', {'empty': b''}).tolist()
+        return self._free
+
+
+    def update(self, node):
+        """Add or update the metadata of `node` in the catalog."""
+
+        if not isVisiblePath(node._v_pathname):
+            return
+        info = nodeInfo(node)
+        self._checkPath(info.pathname)
+        table = self.table
+        row = _infoToRow(info)
+        _checkDtypeLength(row, table.coldtypes['dtype'].itemsize)
+        coords = self._getCoords(info.pathname)
+        if len(coords) > 0:
+            nrow = coords[0]
+            if not _sameRow(table[nrow], row):
+                table.modifyCoordinates([nrow], [row])
+            return
+        free = self._getFree()
+        if free:
+            table.modifyCoordinates([free.pop()], [row])
+        else:
+            table.append([row])
+
+
+    def remove(self, pathname):
+        """Remove the `pathname` node and its descendants from the catalog."""
+
+        if not isVisiblePath(pathname):
+            return
+        coords = self._getCoords(pathname, descendants=True)
+        if len(coords) == 0:
+            return
+        blank = (b'', b'', _noShape, [0] * _maxDims, b'', _noFilters)
+        self.table.modifyCoordinates(coords, [blank] * len(coords))
+        self._getFree().extend(coords.tolist())
+
+
+    def move(self, node, oldPathname):
+        """Update the catalog after moving `node` from `oldPathname`."""
+
+        newPathname = node._v_pathname
+        if not isVisiblePath(newPathname):
+            # Moved out of sight (e.g. when removing with undo enabled).
+            self.remove(oldPathname)
+            return
+        if not isVisiblePath(oldPathname):
+            # Moved into sight (e.g. when undoing a removal).
+            if isinstance(node, Group):
+                for child in self._v_file.walkNodes(node):
+                    self.update(child)
+            else:
+                self.update(node)
+            return
+
+        table = self.table
+        coords = self._getCoords(oldPathname, descendants=True)
+        if len(coords) == 0:
+            return
+        rows = table.readCoordinates(coords)
+        oldlen = len(_encode(oldPathname))
+        newPathname = _encode(newPathname)
+        pathnames = [newPathname + pathname[oldlen:]
+                     for pathname in rows['pathname']]
+        for pathname in pathnames:
+            self._checkPath(pathname)
+        rows['pathname'] = pathnames
+        table.modifyCoordinates(coords, rows)
+
+
+    def getInfo(self, pathname):
+        """Get the `NodeInfo` of the `pathname` node."""
+
+        coords = self._getCoords(pathname)
+        if len(coords) == 0:
+            raise NoSuchNodeError("there is no node in the catalog "
+                                  "with path ``%s``" % pathname)
+        return _rowToInfo(self.table[coords[0]])
+
+
+    def listInfo(self, where, classname=None, recursive=False):
+        """Get the `NodeInfo` of the children of the `where` node.
+
+        If `recursive` is true, the `where` node and all its descendants
+        are included.  If `classname` is given, only nodes of that class
+        (or subclasses of it) are included.  The list is sorted by path.
+        """
+
+        class_ = getClassByName(classname)
+        info = self.getInfo(where)  # does the node exist?
+        if not recursive:
+            whereclass = classNameDict.get(info.classname)
+            if whereclass is None or not issubclass(whereclass, Group):
+                raise TypeError("node ``%s`` is not a group" % (where,))
+        coords = self._getCoords(where, descendants=True)
+        rows = self.table.readCoordinates(coords)
+        rows.sort(order='pathname')
+        depth = where.count('/') + (where != '/')
+        infolist = []
+        for row in rows:
+            info = _rowToInfo(row)
+            if not recursive and info.pathname.count('/') != depth:
+                continue
+            rowclass = classNameDict.get(info.classname)
+            if rowclass is None or not issubclass(rowclass, class_):
+                continue
+            infolist.append(info)
+        return infolist
+
+
+    def flush(self):
+        """Flush the catalog table."""
+
+        self.table.flush()
+
+
+
+## Local Variables:
+## mode: python
+## py-indent-offset: 4
+## tab-width: 4
+## fill-column: 72
+## End:
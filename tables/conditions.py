@@ -88,6 +88,7 @@ def _get_indexable_cmp(exprnode, indexedcols):
     turncmp = { 'lt': 'gt',
                 'le': 'ge',
                 'eq': 'eq',
+                'ne': 'ne',
                 'ge': 'le',
                 'gt': 'lt', }
 
@@ -135,7 +136,8 @@ def _get_indexable_cmp(exprnode, indexedcols):
     return not_indexable
 
 
-def _get_idx_expr_recurse(exprnode, indexedcols, idxexprs, strexpr):
+def _get_idx_expr_recurse(exprnode, indexedcols, bitmapcols,
+                          idxexprs, strexpr):
     """Here lives the actual implementation of the get_idx_expr() wrapper.
 
     'idxexprs' is a list of expressions in the form ``(var, (ops),
@@ -153,6 +155,8 @@ def _get_idx_expr_recurse(exprnode, indexedcols, idxexprs, strexpr):
                 'not': '~', }
     negcmp = { 'lt': 'ge',
                'le': 'gt',
+               'eq': 'ne',
+               'ne': 'eq',
                'ge': 'lt',
                'gt': 'le', }
 
@@ -170,17 +174,18 @@ def _get_idx_expr_recurse(exprnode, indexedcols, idxexprs, strexpr):
     idxcmp = _get_indexable_cmp(exprnode, indexedcols)
     idxcmp, exprnode, invert = fix_invert(idxcmp, exprnode, indexedcols)
     if idxcmp[0]:
+        var, op, value = idxcmp
         if invert:
-            var, op, value = idxcmp
-            if op == 'eq' and value in [True, False]:
+            if op == 'eq' and (value is True or value is False):
                 # ``var`` must be a boolean index.  Flip its value.
                 value ^= True
             else:
                 op = negcmp[op]
-            expr = (var, (op,), (value,))
             invert = False
-        else:
-            expr = (idxcmp[0], (idxcmp[1],), (idxcmp[2],))
+        # Only bitmap indexes can resolve inequalities.
+        if op == 'ne' and var not in bitmapcols:
+            return not_indexable
+        expr = (var, (op,), (value,))
         return [expr]
 
     # For now negations of complex expressions will be not supported as
@@ -213,8 +218,10 @@ def _get_idx_expr_recurse(exprnode, indexedcols, idxexprs, strexpr):
             return [expr]
 
     # Recursively get the expressions at the left and the right
-    lexpr = _get_idx_expr_recurse(left, indexedcols, idxexprs, strexpr)
-    rexpr = _get_idx_expr_recurse(right, indexedcols, idxexprs, strexpr)
+    lexpr = _get_idx_expr_recurse(left, indexedcols, bitmapcols,
+                                  idxexprs, strexpr)
+    rexpr = _get_idx_expr_recurse(right, indexedcols, bitmapcols,
+                                  idxexprs, strexpr)
 
     def add_expr(expr, idxexprs, strexpr):
         """Add a single expression to the list."""
@@ -245,11 +252,13 @@ def _get_idx_expr_recurse(exprnode, indexedcols, idxexprs, strexpr):
     return not_indexable
 
 
-def _get_idx_expr(expr, indexedcols):
+def _get_idx_expr(expr, indexedcols, bitmapcols=frozenset()):
     """Extract an indexable expression out of `exprnode`.
 
     Looks for variable-constant comparisons in the expression node
-    `exprnode` involving variables in `indexedcols`.
+    `exprnode` involving variables in `indexedcols`.  Variables in
+    `bitmapcols` have a bitmap index, which can resolve ``!=``
+    comparisons as well.
 
     It returns a tuple of (idxexprs, strexpr) where 'idxexprs' is a
     list of expressions in the form ``(var, (ops), (limits))`` and
@@ -266,14 +275,91 @@ def _get_idx_expr(expr, indexedcols):
     (where ``a``, ``b`` and ``c_bool`` are indexed columns, but
     ``c_extra`` is not)
 
-    Particularly, the ``!=`` operator and negations of complex boolean
-    expressions are *not considered* as valid candidates:
+    Particularly, the ``!=`` operator (unless ``a`` has a bitmap index)
+    and negations of complex boolean expressions are *not considered* as
+    valid candidates:
 
     * ``a != 1`` and  ``c_bool != False``
     * ``~((a > 0) & (c_bool))``
     """
 
-    return _get_idx_expr_recurse(expr, indexedcols, [], [''])
+    return _get_idx_expr_recurse(expr, indexedcols, bitmapcols, [], [''])
+
+
+def _get_composite_expr(exprnode, compositecols):
+    """Extract an expression usable by a composite index out of `exprnode`.
+
+    `compositecols` is a sequence of tuples with the variable names of
+    the key columns of every usable composite index, in key order.
+    Only the comparisons and'ed at the top level of `exprnode` are
+    considered.  The keys of a composite index can be used as long as
+    there are equality comparisons on a prefix of them, optionally
+    followed by a range (``<``, ``<=``, ``>`` or ``>=`` comparisons) on
+    the next key, as in ``(a == x) & (b == y) & (c > z)``.
+
+    It returns a list of expressions in the form ``(var, (ops),
+    (limits))`` for the longest usable prefix of keys found in any of
+    the composite indexes, or an empty list if none can be used.
+    """
+
+    if not compositecols:
+        return []
+
+    # Collect the variable-constant comparisons which are and'ed.
+    keyvars = set()
+    for keys in compositecols:
+        keyvars.update(keys)
+    cmps = {}
+    stack = [exprnode]
+    while stack:
+        node = stack.pop()
+        if node.astType == 'op' and node.value == 'and':
+            stack.extend(node.children)
+            continue
+        var, op, lim = _get_indexable_cmp(node, keyvars)
+        if var is None or op == 'invert':
+            continue
+        cmps.setdefault(var, []).append((op, lim))
+
+    best = []
+    for keys in compositecols:
+        exprs = []
+        for var in keys:
+            varcmps = cmps.get(var, [])
+            eqlims = [lim for (op, lim) in varcmps if op == 'eq']
+            if eqlims:
+                exprs.append((var, ('eq',), (eqlims[0],)))
+                continue
+            # A range on this key is the last usable component.
+            lower = [(op, lim) for (op, lim) in varcmps if op in ('gt', 'ge')]
+            upper = [(op, lim) for (op, lim) in varcmps if op in ('lt', 'le')]
+            rangecmps = lower[:1] + upper[:1]
+            if rangecmps:
+                ops = tuple([op for (op, lim) in rangecmps])
+                lims = tuple([lim for (op, lim) in rangecmps])
+                exprs.append((var, ops, lims))
+            break
+        if len(exprs) > len(best):
+            best = exprs
+    return best
+
+
+def _replace_limit_vars(exprs, condvars):
+    """Replace limit variables in `exprs` with their values in `condvars`."""
+
+    exprs2 = []
+    for expr in exprs:
+        idxlims = expr[2]  # the limits are in third place
+        limit_values = []
+        for idxlim in idxlims:
+            if isinstance(idxlim, tuple):  # variable
+                idxlim = condvars[idxlim[0]]  # look up value
+                idxlim = idxlim.tolist()  # convert back to Python
+            limit_values.append(idxlim)
+        # Add this replaced entry to the new exprs2
+        var, ops, _ = expr
+        exprs2.append((var, ops, tuple(limit_values)))
+    return exprs2
 
 
 class CompiledCondition(object):
@@ -294,7 +380,7 @@ class CompiledCondition(object):
         return frozenset(idxvars)
 
 
-    def __init__(self, func, params, idxexprs, strexpr):
+    def __init__(self, func, params, idxexprs, strexpr, compexprs=None):
         self.function = func
         """The compiled function object corresponding to this condition."""
         self.parameters = params
@@ -303,11 +389,16 @@ class CompiledCondition(object):
         """A list of expressions in the form ``(var, (ops), (limits))``."""
         self.string_expression = strexpr
         """The indexable expression in string format."""
+        if compexprs is None:
+            compexprs = []
+        self.composite_expressions = compexprs
+        """A list of expressions in the form ``(var, (ops), (limits))``
+        usable by a composite index, in key order."""
 
     def __repr__(self):
-        return ( "idxexprs: %s\nstrexpr: %s\nidxvars: %s"
+        return ( "idxexprs: %s\nstrexpr: %s\nidxvars: %s\ncompexprs: %s"
                  % ( self.index_expressions, self.string_expression,
-                     self.index_variables) )
+                     self.index_variables, self.composite_expressions) )
 
 
     def with_replaced_vars(self, condvars):
@@ -317,22 +408,12 @@ class CompiledCondition(object):
         the `condvars` mapping and converted to Python scalars.
         """
 
-        exprs = self.index_expressions
-        exprs2 = []
-        for expr in exprs:
-            idxlims = expr[2]  # the limits are in third place
-            limit_values = []
-            for idxlim in idxlims:
-                if isinstance(idxlim, tuple):  # variable
-                    idxlim = condvars[idxlim[0]]  # look up value
-                    idxlim = idxlim.tolist()  # convert back to Python
-                limit_values.append(idxlim)
-            # Add this replaced entry to the new exprs2
-            var, ops, _ = expr
-            exprs2.append((var, ops, tuple(limit_values)))
+        exprs2 = _replace_limit_vars(self.index_expressions, condvars)
+        compexprs2 = _replace_limit_vars(self.composite_expressions, condvars)
         # Create a new container for the converted values
         newcc = CompiledCondition(
-            self.function, self.parameters, exprs2, self.string_expression )
+            self.function, self.parameters, exprs2, self.string_expression,
+            compexprs2 )
         return newcc
 
 
@@ -350,7 +431,8 @@ def _get_variable_names(expression):
     return list(set(names))  # remove repeated names
 
 
-def compile_condition(condition, typemap, indexedcols, copycols):
+def compile_condition(condition, typemap, indexedcols, copycols,
+                      compositecols=(), bitmapcols=frozenset()):
     """Compile a condition and extract usable index conditions.
 
     Looks for variable-constant comparisons in the `condition` string
@@ -369,6 +451,14 @@ def compile_condition(condition, typemap, indexedcols, copycols):
     referenced.  This seems to accelerate access to unaligned,
     *unidimensional* arrays up to 2x (multidimensional arrays still
     need to be copied by `call_on_recarr()`.).
+
+    `compositecols` is a sequence with a tuple of variable names for
+    every usable composite index, in key order.  Comparisons on these
+    variables that can be resolved by a composite index are returned
+    in the ``composite_expressions`` list of the compiled condition.
+
+    The indexed columns whose variable names appear in `bitmapcols`
+    have bitmap indexes, so ``!=`` comparisons on them are usable too.
     """
 
     # Get the expression tree and extract index conditions.
@@ -376,7 +466,7 @@ def compile_condition(condition, typemap, indexedcols, copycols):
     if expr.astKind != 'bool':
         raise TypeError( "condition ``%s`` does not have a boolean type"
                          % condition )
-    idxexprs = _get_idx_expr(expr, indexedcols)
+    idxexprs = _get_idx_expr(expr, indexedcols, bitmapcols)
     # Post-process the answer
     if isinstance(idxexprs, list):
         # Simple expression
@@ -386,6 +476,7 @@ def compile_condition(condition, typemap, indexedcols, copycols):
         idxexprs, strexpr = idxexprs
     # Get rid of the unneccessary list wrapper for strexpr
     strexpr = strexpr[0]
+    compexprs = _get_composite_expr(expr, compositecols)
 
     # Get the variable names used in the condition.
     # At the same time, build its signature.
@@ -402,7 +493,7 @@ def compile_condition(condition, typemap, indexedcols, copycols):
     params = varnames
 
     # This is more comfortable to handle about than a tuple.
-    return CompiledCondition(func, params, idxexprs, strexpr)
+    return CompiledCondition(func, params, idxexprs, strexpr, compexprs)
 
 
 def call_on_recarr(func, params, recarr, param2arg=None):
@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#
+# License: BSD
+# Created: October 18, 2026
+# Author:  The PyTables Developers
+#
+# $Id$
+#
+########################################################################
+
+"""Here is defined the CTable class (tables with a columnar layout)."""
+
+import numpy
+
+from tables.node import NotLoggedMixin
+from tables.atom import Atom, EnumAtom
+from tables.description import Description
+from tables.utils import SizeType, hdf5lock, convertToNPAtom2
+from tables.utilsExtension import getNestedField
+from tables.exceptions import NoSuchNodeError
+from tables.group import Group
+from tables.earray import EArray
+from tables.table import Table
+from tables.path import joinPath, splitPath
+
+
+def _columnsNameOf(node):
+    return '_p_cols_%s' % node._v_name
+
+def _columnsPathnameOf(node):
+    nodeParentPath = splitPath(node._v_pathname)[0]
+    return joinPath(nodeParentPath, _columnsNameOf(node))
+
+
+def _atom_from_col(col):
+    """Get an atom with the same type, shape and default than `col`."""
+
+    if col.kind == 'enum':
+        return EnumAtom(col.enum, col.dflt, col.base, shape=col.shape)
+    return Atom.from_kind(col.kind, col.itemsize, col.shape, col.dflt)
+
+
+def _coord_runs(ucoords):
+    """Get the ``(start, stop)`` runs of consecutive `ucoords`.
+
+    `ucoords` must be sorted and without repetitions.
+    """
+
+    bounds = numpy.flatnonzero(numpy.diff(ucoords) != 1) + 1
+    starts = numpy.concatenate(([0], bounds))
+    stops = numpy.concatenate((bounds, [len(ucoords)]))
+    return zip(ucoords[starts], ucoords[stops - 1] + 1)
+
+
+def _read_coords(leaf, coords):
+    """Read the rows of the column dataset `leaf` in `coords`.
+
+    Coordinates may be unsorted or repeated.
+    """
+
+    if leaf.atom.shape == ():
+        return leaf._readCoords(coords)
+    # Point selections can not be used when the atom has a shape, so
+    # runs of consecutive rows are read instead.
+    ucoords, inverse = numpy.unique(coords, return_inverse=True)
+    values = numpy.concatenate([leaf._read(start, stop, 1)
+                                for (start, stop) in _coord_runs(ucoords)])
+    return values[inverse]
+
+
+def _write_coords(leaf, coords, values):
+    """Write `values` in the rows of the column dataset `leaf` in `coords`."""
+
+    if leaf.atom.shape == ():
+        leaf._writeCoords(coords, convertToNPAtom2(values, leaf.atom))
+        return
+    ucoords, first = numpy.unique(coords, return_index=True)
+    values = values[first]
+    offset = 0
+    for (start, stop) in _coord_runs(ucoords):
+        leaf[start:stop] = values[offset:offset+stop-start]
+        offset += stop - start
+
+
+class ColumnsTableG(NotLoggedMixin, Group):
+    _c_classId = 'TCOLUMNS'
+
+
+class CTable(Table):
+    """A table whose columns are stored in separate datasets.
+
+    Instead of keeping whole rows in a single compound dataset, each
+    (bottom-level) column in the description is stored as its own
+    chunked and separately compressed :class:`EArray`, so that reads and
+    queries involving just a few columns only read and decompress the
+    datasets of these columns, and compression usually works better on
+    homogeneous data.  The column datasets live in a hidden group next
+    to the table (nested columns become subgroups of it), which is
+    moved, copied and removed along with the table.
+
+    Instances of this class are created by :meth:`File.createTable` when
+    the ``layout='columnar'`` argument is passed.  Apart from the
+    storage of rows, they behave exactly like :class:`Table` instances
+    (this class derives from it), so the ``row`` accessor, the ``cols``
+    accessor, queries and column indexes are all available.  Every
+    column dataset uses the chunk length of the table, so that chunks of
+    all the columns hold the same rows.
+
+    """
+
+    # Class identifier.
+    _c_classId = 'CTABLE'
+
+    # Properties
+    # ~~~~~~~~~~
+    size_on_disk = property(
+        lambda self: sum(self._g_getColumnLeaf(colpathname).size_on_disk
+                         for colpathname in self.colpathnames),
+        None, None,
+        "The size of the data of all the columns in the file, in bytes.")
+
+
+    # Private methods
+    # ~~~~~~~~~~~~~~~
+    def _g_create(self):
+        # The compound dataset of the table is kept empty: initial rows
+        # are appended to the column datasets once they are created.
+        self._v_initrows = recarray = self._v_recarray
+        if recarray is not None:
+            if len(recarray) > self._v_expectedrows:
+                self._v_expectedrows = len(recarray)
+            self._v_recarray = None
+            self.nrows = SizeType(0)
+        return super(CTable, self)._g_create()
+
+
+    def _g_open(self):
+        objectID = super(CTable, self)._g_open()
+        # The number of rows is kept by the column datasets.
+        leaf = self._g_getColumnLeaf(self.colpathnames[0])
+        self.nrows = SizeType(leaf.nrows)
+        self._v_expectedrows = self.nrows
+        return objectID
+
+
+    def _g_postInitHook(self):
+        super(CTable, self)._g_postInitHook()
+        if not self._v_new:
+            return
+
+        cgroup = ColumnsTableG(
+            self._v_parent, _columnsNameOf(self),
+            "Columns container for table "+self._v_pathname, new=True)
+        self._g_createColumns(cgroup, self.description)
+        initrows, self._v_initrows = self._v_initrows, None
+        if initrows is not None:
+            self.append(initrows.astype(self._v_dtype))
+
+
+    def _g_createColumns(self, group, desc):
+        """Create the datasets for the columns in `desc` under `group`."""
+
+        for name in desc._v_names:
+            colobj = desc._v_colObjects[name]
+            if isinstance(colobj, Description):
+                subgroup = ColumnsTableG(group, name, new=True)
+                self._g_createColumns(subgroup, colobj)
+                continue
+            EArray(group, name, atom=_atom_from_col(colobj), shape=(0,),
+                   filters=self.filters, expectedrows=self._v_expectedrows,
+                   chunkshape=self.chunkshape, byteorder=self.byteorder,
+                   _log=False)
+
+
+    def _g_getColumnLeaf(self, colpathname):
+        """Get the dataset holding the bottom-level column `colpathname`."""
+
+        # Rows may be read from several threads (see `Table._whereParallel`)
+        with hdf5lock:
+            return self._v_file._getNode(
+                joinPath(_columnsPathnameOf(self), colpathname))
+
+
+    def _g_colpathnamesOf(self, names):
+        """Get the pathnames of the bottom-level columns in `names`.
+
+        `names` are the names of top-level columns.
+        """
+
+        colpathnames = []
+        for name in names:
+            colobj = self.description._v_colObjects[name]
+            if isinstance(colobj, Description):
+                colpathnames.extend(
+                    col._v_pathname for col in colobj._f_walk(type="Col"))
+            else:
+                colpathnames.append(name)
+        return colpathnames
+
+
+    # Storage of rows
+    # ~~~~~~~~~~~~~~~
+    # These overload the primitives in `tableExtension.Table`, so that
+    # the rest of the machinery of `Table` works on the column datasets.
+    def _open_append(self, recarr):
+        self._v_recarray = recarr
+
+
+    def _append_records(self, nrecords):
+        recarr = self._v_recarray
+        for colpathname in self.colpathnames:
+            self._g_getColumnLeaf(colpathname).append(
+                getNestedField(recarr, colpathname)[:nrecords])
+        self.nrows = SizeType(self.nrows + nrecords)
+
+
+    def _close_append(self):
+        self._v_recarray = None
+
+
+    def _update_records(self, start, stop, step, recarr):
+        nrecords = min(len(recarr), len(xrange(start, stop, step)))
+        if nrecords == 0:
+            return
+        stop = start + (nrecords - 1) * step + 1
+        for colpathname in self._g_colpathnamesOf(recarr.dtype.names):
+            leaf = self._g_getColumnLeaf(colpathname)
+            leaf[start:stop:step] = getNestedField(
+                recarr, colpathname)[:nrecords]
+        self._dirtycache = True
+
+
+    def _update_elements(self, nrecords, coords, recarr):
+        if nrecords == 0:
+            return
+        coords = coords[:nrecords]
+        for colpathname in self._g_colpathnamesOf(recarr.dtype.names):
+            _write_coords(self._g_getColumnLeaf(colpathname), coords,
+                          getNestedField(recarr, colpathname)[:nrecords])
+        self._dirtycache = True
+
+
+    def _read_records(self, start, nrecords, recarr):
+        # Correct the number of records to read, if needed
+        if (start + nrecords) > self.nrows:
+            nrecords = self.nrows - start
+        return self._read_fields(start, nrecords, 1, recarr)
+
+
+    def _read_chunk(self, nchunk, IObuf, cstart):
+        chunkshape = self.chunkshape[0]
+        return self._read_records(
+            nchunk * chunkshape, chunkshape, IObuf[cstart:])
+
+
+    def _read_fields(self, start, nrecords, step, recarr):
+        if nrecords <= 0:
+            return 0
+        stop = start + (nrecords - 1) * step + 1
+        for colpathname in self._g_colpathnamesOf(recarr.dtype.names):
+            leaf = self._g_getColumnLeaf(colpathname)
+            getNestedField(recarr, colpathname)[:nrecords] = leaf._read(
+                start, stop, step)
+        return nrecords
+
+
+    def _read_elements(self, coords, recarr):
+        return self._read_fields_elements(coords, recarr)
+
+
+    def _read_fields_elements(self, coords, recarr):
+        nrecords = len(coords)
+        if nrecords == 0:
+            return 0
+        for colpathname in self._g_colpathnamesOf(recarr.dtype.names):
+            getNestedField(recarr, colpathname)[:nrecords] = _read_coords(
+                self._g_getColumnLeaf(colpathname), coords)
+        return nrecords
+
+
+    def _get_raw_filters(self):
+        # Rows are not stored in chunks of the table dataset.
+        return None
+
+
+    def _remove_row(self, nrow, nrecords):
+        nrows = self.nrows
+        # Protection against deleting too many rows
+        if (nrow + nrecords > nrows):
+            nrecords = nrows - nrow
+
+        # Move the rows after the removed ones back, a buffer at a time.
+        nrowsinbuf = self.nrowsinbuf
+        for colpathname in self.colpathnames:
+            leaf = self._g_getColumnLeaf(colpathname)
+            for start in xrange(nrow + nrecords, nrows, nrowsinbuf):
+                stop = min(start + nrowsinbuf, nrows)
+                leaf[start-nrecords:stop-nrecords] = leaf._read(start, stop, 1)
+            leaf.truncate(nrows - nrecords)
+        self.nrows = SizeType(nrows - nrecords)
+        # Set the caches to dirty
+        self._dirtycache = True
+        return nrecords
+
+
+    def _g_truncate(self, size):
+        for colpathname in self.colpathnames:
+            self._g_getColumnLeaf(colpathname).truncate(size)
+        self.nrows = SizeType(size)
+        # Cached results of indexed queries do not survive a truncation
+        self._dirtycache = True
+
+
+    # Tree manipulation
+    # ~~~~~~~~~~~~~~~~~
+    def _g_move(self, newParent, newName):
+        """Move this node in the hierarchy.
+
+        This overloads the Table._g_move() method.
+        """
+
+        ctgpathname = _columnsPathnameOf(self)
+
+        # First, move the table (and its indexes) to the new location.
+        super(CTable, self)._g_move(newParent, newName)
+
+        # Then move the associated columns group.
+        ctgroup = self._v_file._getNode(ctgpathname)
+        ctgroup._g_move(self._v_parent, _columnsNameOf(self))
+
+
+    def _g_remove(self, recursive=False, force=False):
+        # Remove the associated columns group (if any).
+        ctgpathname = _columnsPathnameOf(self)
+        try:
+            ctgroup = self._v_file._getNode(ctgpathname)
+        except NoSuchNodeError:
+            pass
+        else:
+            ctgroup._f_remove(recursive=True)
+
+        # Remove the table itself from the hierarchy.
+        super(CTable, self)._g_remove(recursive, force)
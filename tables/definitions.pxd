@@ -335,6 +335,7 @@ cdef extern from "hdf5.h" nogil:
   hid_t  H5Tvlen_create(hid_t base_type_id)
   hid_t  H5Tcopy(hid_t type_id)
   herr_t H5Tclose(hid_t type_id)
+  htri_t H5Tequal(hid_t type1_id, hid_t type2_id)
 
   # Operations defined on string data types
   htri_t H5Tis_variable_str(hid_t dtype_id)
@@ -343,6 +344,7 @@ cdef extern from "hdf5.h" nogil:
   int    H5Tget_nmembers(hid_t type_id)
   char  *H5Tget_member_name(hid_t type_id, unsigned membno)
   hid_t  H5Tget_member_type(hid_t type_id, unsigned membno)
+  int    H5Tget_member_index(hid_t type_id, char *name)
   hid_t  H5Tget_native_type(hid_t type_id, H5T_direction_t direction)
   herr_t H5Tget_member_value(hid_t type_id, int membno, void *value)
   int    H5Tget_offset(hid_t type_id)
@@ -475,13 +477,23 @@ cdef extern from "utils.h" nogil:
   herr_t pt_H5Pset_fapl_windows(hid_t fapl_id)
   herr_t pt_H5Pset_file_image(hid_t fapl_id, void *buf_ptr, size_t buf_len)
   ssize_t pt_H5Fget_file_image(hid_t file_id, void *buf_ptr, size_t buf_len)
+  herr_t pt_H5Dget_chunk_storage_size(hid_t dset_id, hsize_t *offset,
+                                      hsize_t *chunk_nbytes)
+  herr_t pt_H5Dread_chunk(hid_t dset_id, hid_t dxpl_id, hsize_t *offset,
+                          unsigned *filter_mask, void *buf)
   int H5_HAVE_DIRECT_DRIVER, H5_HAVE_WINDOWS_DRIVER, H5_HAVE_IMAGE_FILE
+  int H5_HAVE_READ_CHUNK
 
 
 cdef extern from "utils.h":
   object Giterate(hid_t parent_id, hid_t loc_id, char *name)
+  object Giterate_meta(hid_t parent_id, hid_t loc_id, char *name,
+                       int sysattrs)
+  object Gscan(hid_t loc_id, char *name, int sysattrs, int gettypes,
+               int getfilters)
   object Aiterate(hid_t loc_id)
   object H5UIget_info(hid_t loc_id, char *name, char *byteorder)
+  object get_filter_pipeline(hid_t dset_id)
 
 
 # Type conversion routines
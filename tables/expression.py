@@ -13,6 +13,8 @@
 """Here is defined the Expr class."""
 
 import sys
+import Queue
+import threading
 import warnings
 
 import numpy as np
@@ -21,7 +23,51 @@ from numexpr.necompiler import getContext, getExprNames, getType, NumExpr
 from numexpr.expressions import functions as numexpr_functions
 from tables.utilsExtension import getIndices
 from tables.exceptions import PerformanceWarning
-from tables.parameters import IO_BUFFER_SIZE, BUFFER_TIMES
+from tables.parameters import (IO_BUFFER_SIZE, BUFFER_TIMES,
+    EXPR_PIPELINE_BUFFERS)
+
+
+_end = object()
+"""Marks the end of the blocks flowing through an `Expr` pipeline."""
+
+
+class _PipelineStage(threading.Thread):
+    """A stage of the `Expr.eval()` pipeline, running in its own thread.
+
+    The items got from `inqueue` are passed to `func`, and its results
+    are put in `outqueue` (if any), followed by `_end` after the last
+    one.  If `func` raises an exception, the whole pipeline is stopped
+    and the information of the exception is kept in `error`.  Once the
+    pipeline is stopped, the items got from `inqueue` are just dropped,
+    so that the stages feeding this one never block.
+    """
+
+    def __init__(self, func, inqueue, outqueue, stopped):
+        super(_PipelineStage, self).__init__()
+        self.setDaemon(True)
+        self.func = func
+        self.inqueue = inqueue
+        self.outqueue = outqueue
+        self.stopped = stopped
+        self.error = None
+
+    def run(self):
+        while True:
+            item = self.inqueue.get()
+            if item is _end:
+                break
+            if self.stopped.isSet():
+                continue
+            try:
+                result = self.func(*item)
+            except:
+                self.error = sys.exc_info()
+                self.stopped.set()
+                continue
+            if self.outqueue is not None:
+                self.outqueue.put(result)
+        if self.outqueue is not None:
+            self.outqueue.put(_end)
 
 
 class Expr(object):
@@ -120,6 +166,12 @@ class Expr(object):
 
         The step range selection for the user-provided output.
 
+    .. attribute:: pipeline_buffers
+
+        The number of blocks in flight between the read, compute and
+        write stages of :meth:`Expr.eval` (0 means no pipelining).  It
+        defaults to the ``EXPR_PIPELINE_BUFFERS`` parameter.
+
     .. attribute:: shape
 
         Common shape for the arrays in expression.
@@ -150,6 +202,8 @@ class Expr(object):
         """The stop range selection for the user-provided output."""
         self.o_step = None
         """The step range selection for the user-provided output."""
+        self.pipeline_buffers = EXPR_PIPELINE_BUFFERS
+        """The number of blocks in flight between the stages of `eval()`."""
         self.shape = None
         """Common shape for the arrays in expression."""
         self.start, self.stop, self.step = (None,)*3
@@ -581,17 +635,8 @@ value of dimensions that are orthogonal (and preferably close) to the
         i_slices = [slice(None)]*(maindim+1)
         o_slices = [slice(None)]*(o_maindim+1)
 
-        # This is a hack to prevent doing unnecessary flavor conversions
-        # while reading buffers
-        for val in values:
-            if hasattr(val, 'maindim'):
-                val._v_convert = False
-
-        # Start the computation itself
-        for start2 in xrange(start, stop, step*nrowsinbuf):
-            stop2 = start2 + step * nrowsinbuf
-            if stop2 > stop:
-                stop2 = stop
+        def read(start2, stop2):
+            """Read the inputs for the `start2`-`stop2` block."""
             # Set the proper slice for inputs
             i_slices[maindim] = slice(start2, stop2, step)
             # Get the input values
@@ -603,9 +648,14 @@ value of dimensions that are orthogonal (and preferably close) to the
                     # A read of values is not apparently needed, as PyTables
                     # leaves seems to work just fine inside Numexpr
                     vals.append(val)
-            # Do the actual computation for this slice
-            rout = self._compiled_expr(*vals)
-            # Set the values into the out buffer
+            return (start2, vals)
+
+        def compute(start2, vals):
+            """Do the actual computation for the block at `start2`."""
+            return (start2, self._compiled_expr(*vals))
+
+        def write(start2, rout):
+            """Set the values of the block at `start2` into `out`."""
             if self.append_mode:
                 out.append(rout)
             else:
@@ -618,14 +668,83 @@ value of dimensions that are orthogonal (and preferably close) to the
                 # Set the slice
                 out[tuple(o_slices)] = rout
 
-        # Activate the conversion again (default)
+        # The blocks of rows to compute
+        blocks = []
+        for start2 in xrange(start, stop, step*nrowsinbuf):
+            stop2 = start2 + step * nrowsinbuf
+            if stop2 > stop:
+                stop2 = stop
+            blocks.append((start2, stop2))
+
+        # This is a hack to prevent doing unnecessary flavor conversions
+        # while reading buffers
         for val in values:
             if hasattr(val, 'maindim'):
-                val._v_convert = True
+                val._v_convert = False
+
+        # Start the computation itself.  Reading ahead is not safe when
+        # the output is also an input.
+        nbuffers = self.pipeline_buffers
+        try:
+            if (nbuffers > 0 and len(blocks) > 1 and
+                not [val for val in values if val is out]):
+                self._evalPipelined(blocks, read, compute, write, nbuffers)
+            else:
+                for (start2, stop2) in blocks:
+                    write(*compute(*read(start2, stop2)))
+        finally:
+            # Activate the conversion again (default)
+            for val in values:
+                if hasattr(val, 'maindim'):
+                    val._v_convert = True
 
         return out
 
 
+    def _evalPipelined(self, blocks, read, compute, write, nbuffers):
+        """Run the read, compute and write stages of `eval()` in parallel.
+
+        The blocks are read and written by two threads of their own, and
+        they are computed in the calling thread (Numexpr already uses
+        several threads of its own).  Up to `nbuffers` blocks are queued
+        between each pair of stages, and blocks are written in order.
+        """
+
+        stopped = threading.Event()
+        blockq = Queue.Queue()
+        for block in blocks:
+            blockq.put(block)
+        blockq.put(_end)
+        readq = Queue.Queue(nbuffers)
+        writeq = Queue.Queue(nbuffers)
+        reader = _PipelineStage(read, blockq, readq, stopped)
+        writer = _PipelineStage(write, writeq, None, stopped)
+        reader.start()
+        writer.start()
+        try:
+            while True:
+                item = readq.get()
+                if item is _end:
+                    break
+                if not stopped.isSet():
+                    writeq.put(compute(*item))
+        except:
+            error = sys.exc_info()
+            stopped.set()
+            # Drop the blocks already read, so that the reader can end.
+            while readq.get() is not _end:
+                pass
+            raise error[0], error[1], error[2]
+        finally:
+            writeq.put(_end)
+            reader.join()
+            writer.join()
+        for stage in (reader, writer):
+            if stage.error is not None:
+                (exctype, value, traceback) = stage.error
+                raise exctype, value, traceback
+
+
     def __iter__(self):
         """Iterate over the rows of the outcome of the expression.
 
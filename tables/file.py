@@ -23,6 +23,7 @@ import os
 import sys
 import time
 import weakref
+import threading
 import warnings
 
 import numexpr
@@ -34,7 +35,7 @@ from tables import utilsExtension
 from tables import parameters
 from tables.exceptions import (ClosedFileError, FileModeError,
      NodeError, NoSuchNodeError, UndoRedoError, PerformanceWarning)
-from tables.registry import getClassByName
+from tables.registry import getClassByName, classIdDict
 from tables.path import joinPath, splitPath
 from tables import undoredo
 from tables.description import IsDescription, UInt8Col, StringCol
@@ -48,11 +49,28 @@ from tables.carray import CArray
 from tables.earray import EArray
 from tables.vlarray import VLArray
 from tables.table import Table
+from tables.ctable import CTable
+from tables.catalog import NodeCatalog, nodeInfo, _catalogPath
 from tables import linkExtension
-from tables.utils import detectNumberOfCores
+from tables.utils import detectNumberOfCores, hdf5lock
 from tables import lrucacheExtension
 
 from tables.link import SoftLink, ExternalLink
+from tables.unimplemented import UnImplemented, Unknown
+
+
+# The metadata fields available in `File.scan()` and their types.
+_scanFields = {
+    'path': numpy.object_,
+    'class': numpy.object_,
+    'shape': numpy.object_,
+    'dtype': numpy.object_,
+    'nbytes': numpy.int64,
+    'filters': numpy.object_,
+    }
+
+# The classes of nodes which are neither groups nor leaves, by kind code.
+_scanKindClasses = {'S': SoftLink, 'E': ExternalLink, 'U': Unknown}
 
 
 #format_version = "1.0" # Initial format
@@ -112,6 +130,70 @@ _shadowName   = 'a%d'  # %d -> action number
 _shadowPath   = joinPath(_shadowParent, _shadowName)
 
 
+# Counters of cache statistics (see `File.cache_stats()`)
+_cacheCounters = ['hits', 'misses', 'evictions', 'disables', 'enables']
+
+
+def _addCacheStats(allstats, kind, stats, counters=False):
+    """Add the `stats` of a cache of `kind` to the totals in `allstats`.
+
+    If `counters` is true, only the counters in `stats` are added (this
+    is used for caches which are not in use anymore).
+    """
+
+    totals = allstats.get(kind)
+    if totals is None:
+        totals = allstats[kind] = dict.fromkeys(
+            _cacheCounters + ['size', 'maxsize', 'ncaches'], 0)
+    for name in _cacheCounters:
+        totals[name] += stats[name]
+    if not counters:
+        totals['size'] += stats['size']
+        totals['maxsize'] += stats['maxsize']
+        totals['ncaches'] += stats.get('ncaches', 1)
+
+
+def _finishCacheStats(allstats):
+    """Compute the hit ratios of the totals in `allstats`."""
+
+    for totals in allstats.itervalues():
+        nprobes = totals['hits'] + totals['misses']
+        if nprobes > 0:
+            totals['hitratio'] = totals['hits'] / float(nprobes)
+        else:
+            totals['hitratio'] = 0.0
+    return allstats
+
+
+def cache_stats(reset=False):
+    """Get the statistics of the caches used by all the open files.
+
+    This returns a dictionary like the one returned by
+    :meth:`File.cache_stats` which adds up the statistics of the caches
+    in every open file, plus an additional ``'chunks'`` entry for the
+    chunk cache shared by all leaves (see
+    :data:`tables.parameters.SHARED_CHUNK_CACHE_SIZE`) and a ``'files'``
+    entry for the default pool of files (see :class:`FilePool`).
+
+    If `reset` is true, the counters of the caches are reset after
+    being read.
+
+    .. versionadded:: 3.0
+
+    """
+
+    allstats = {}
+    for fileh in _open_files.values():
+        fileh._g_addCacheStats(allstats, reset)
+    sharedcache = lrucacheExtension.sharedcache
+    _addCacheStats(allstats, 'chunks', sharedcache.getstats())
+    _addCacheStats(allstats, 'files', _filepool.getstats())
+    if reset:
+        sharedcache.resetstats()
+        _filepool.resetstats()
+    return _finishCacheStats(allstats)
+
+
 def _checkfilters(filters):
     if not (filters is None or
             isinstance(filters, Filters)):
@@ -146,7 +228,7 @@ def copyFile(srcfilename, dstfilename, overwrite=False, **kwargs):
 
 
 def openFile(filename, mode="r", title="", rootUEP="/", filters=None,
-             **kwargs):
+             pooled=False, **kwargs):
     """Open a PyTables (or generic HDF5) file and return a File object.
 
     Parameters
@@ -183,6 +265,13 @@ def openFile(filename, mode="r", title="", rootUEP="/", filters=None,
         properties are specified for these leaves. Besides, if you do not
         specify filter properties for child groups, they will inherit these
         ones, which will in turn propagate to child nodes.
+    pooled : bool
+        If true, the file is got from the default pool of files (see
+        :class:`FilePool`), so that it is kept open after being closed
+        and opening it again is almost free.  Only files opened in
+        read-only mode can be pooled.
+
+        .. versionadded:: 3.0
 
     Notes
     -----
@@ -200,6 +289,18 @@ def openFile(filename, mode="r", title="", rootUEP="/", filters=None,
 
     """
 
+    if pooled:
+        if mode != 'r':
+            raise ValueError("only files opened in read-only mode "
+                             "can be pooled, not in mode %r" % (mode,))
+        return _filepool.openFile(filename, rootUEP, filters, **kwargs)
+
+    # A pooled file which is not in use can be reopened in any mode.
+    filehandle = _open_files.get(filename)
+    if (mode != 'r' and filehandle is not None
+        and filehandle._pool is not None):
+        filehandle._pool._g_releaseIdle(filename)
+
     # Get the list of already opened files
     ofiles = [fname for fname in _open_files]
     if filename in ofiles:
@@ -230,6 +331,186 @@ def openFile(filename, mode="r", title="", rootUEP="/", filters=None,
     return File(filename, mode, title, rootUEP, filters, **kwargs)
 
 
+class FilePool(object):
+    """A pool of files kept open in read-only mode.
+
+    Opening a file through a pool returns a :class:`File` instance like
+    :func:`openFile` does, but the pool keeps the file open after it is
+    closed, so that opening it again just hands out the same instance.
+    This saves the cost of opening the HDF5 file and loading its root
+    group, which dominates the opening of files in applications which
+    open and close the same files very often.
+
+    The pool keeps at most `maxfiles` files, and the least recently
+    used ones are closed when it gets full.  A file is opened again if
+    its modification time or size have changed since it was pooled, or
+    if it is asked for with different options, unless it is still in
+    use.  Since a pooled file is shared by everyone opening it, closing
+    it has no effect on other users, but you should not change its
+    state (e.g. by closing its nodes) while others may be using it.
+
+    A default pool with :data:`tables.parameters.FILE_POOL_SLOTS` slots
+    is used by ``openFile(..., pooled=True)``.  Opening a pooled file
+    in a mode other than read-only with :func:`openFile` closes it in
+    the pool if nobody is using it.
+
+    Parameters
+    ----------
+    maxfiles : int
+        The maximum number of files to keep open.  A value of 0 means
+        that files are not kept open after being closed.
+
+    .. versionadded:: 3.0
+
+    """
+
+    def __init__(self, maxfiles=None):
+        if maxfiles is None:
+            maxfiles = parameters.FILE_POOL_SLOTS
+        if maxfiles < 0:
+            raise ValueError("Negative number (%s) of files!" % maxfiles)
+        self.maxfiles = maxfiles
+        """The maximum number of files to keep open."""
+        self.hits = 0
+        """The number of times that a pooled file has been reused."""
+        self.misses = 0
+        """The number of times that a file has been actually opened."""
+        self.evictions = 0
+        """The number of files closed to make room for other ones."""
+        # {filename: [file, options, stamp, lastuse]}
+        self._files = {}
+        self._usecount = 0
+        # Files can be opened from different threads.
+        self._lock = threading.RLock()
+
+
+    def __len__(self):
+        return len(self._files)
+
+
+    def __contains__(self, filename):
+        return filename in self._files
+
+
+    def __iter__(self):
+        return iter(self._files.keys())
+
+
+    def _getStamp(self, filename):
+        """Get the stamp of `filename` for telling whether it changed."""
+
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+        return (stat.st_mtime, stat.st_size)
+
+
+    def openFile(self, filename, rootUEP="/", filters=None, **kwargs):
+        """Open the file named `filename` in read-only mode.
+
+        The arguments work as in :func:`openFile`.  The file is got
+        from the pool if it is there, or opened and put in the pool
+        otherwise.  Please remember to close it when you are done.
+        """
+
+        options = (rootUEP, filters, sorted(kwargs.items()))
+        with self._lock:
+            entry = self._files.get(filename)
+            if entry is not None:
+                (fileh, poptions, pstamp, lastuse) = entry
+                if not fileh.isopen:
+                    # It has been closed once too often, forget it.
+                    del self._files[filename]
+                elif (fileh._open_count > 1 or
+                      (poptions == options and
+                       pstamp == self._getStamp(filename))):
+                    # It is in use or it is still valid, so share it.
+                    fileh._open_count += 1
+                    self.hits += 1
+                    self._usecount += 1
+                    entry[3] = self._usecount
+                    return fileh
+                else:
+                    self._g_releaseIdle(filename)
+
+            # Open the file and keep a reference to it for the pool.
+            fileh = openFile(filename, 'r', rootUEP=rootUEP,
+                             filters=filters, **kwargs)
+            self.misses += 1
+            if self.maxfiles == 0:
+                return fileh
+            fileh._open_count += 1
+            fileh._pool = self
+            self._usecount += 1
+            self._files[filename] = [fileh, options,
+                                     self._getStamp(filename), self._usecount]
+            while len(self._files) > self.maxfiles:
+                oldest = min(self._files,
+                             key=lambda name: self._files[name][3])
+                self._release(oldest)
+                self.evictions += 1
+            return fileh
+
+
+    def _release(self, filename):
+        """Take `filename` out of the pool.
+
+        The file is actually closed if it is not in use.
+        """
+
+        fileh = self._files.pop(filename)[0]
+        if fileh.isopen:
+            fileh._pool = None
+            fileh.close()
+
+
+    def _g_releaseIdle(self, filename):
+        """Take `filename` out of the pool if it is not in use."""
+
+        with self._lock:
+            entry = self._files.get(filename)
+            if entry is not None and entry[0]._open_count <= 1:
+                self._release(filename)
+
+
+    def close(self):
+        """Take all the files out of the pool.
+
+        Files which are not in use are closed.
+        """
+
+        with self._lock:
+            for filename in list(self._files):
+                self._release(filename)
+
+
+    def getstats(self):
+        """Return a dictionary with the statistics of the pool."""
+
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'disables': 0,
+                    'enables': 0, 'size': len(self._files),
+                    'maxsize': self.maxfiles}
+
+
+    def resetstats(self):
+        """Reset the counters of the pool."""
+
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+
+    def __repr__(self):
+        return "<%s (%d of %d files)>" % (
+            self.__class__.__name__, len(self._files), self.maxfiles)
+
+
+# The pool used by ``openFile(..., pooled=True)``.
+_filepool = FilePool()
+
+
 class _AliveNodes(dict):
     """Stores strong or weak references to nodes in a transparent way."""
 
@@ -280,6 +561,8 @@ class _NoDeadNodes(object):
         return False
     def __iter__(self):
         return iter([])
+    def values(self):
+        return []
 
 
 class _NodeDict(tables.misc.proxydict.ProxyDict):
@@ -483,6 +766,12 @@ class File(hdf5Extension.File, object):
         if params['MAX_BLOSC_THREADS'] is None:
             params['MAX_BLOSC_THREADS'] = detectNumberOfCores()
 
+        if params['MAX_QUERY_THREADS'] is None:
+            params['MAX_QUERY_THREADS'] = detectNumberOfCores()
+
+        if params['INDEX_BUILD_THREADS'] is None:
+            params['INDEX_BUILD_THREADS'] = detectNumberOfCores()
+
         self.params = params
 
         # Now, it is time to initialize the File extension
@@ -502,13 +791,21 @@ class File(hdf5Extension.File, object):
         nodeCacheSlots = params['NODE_CACHE_SLOTS']
         self._aliveNodes = _AliveNodes(nodeCacheSlots)
         if nodeCacheSlots > 0:
-            self._deadNodes = _DeadNodes(nodeCacheSlots)
+            self._deadNodes = _DeadNodes(nodeCacheSlots,
+                                         params['NODE_CACHE_SIZE'])
         else:
             self._deadNodes = _NoDeadNodes()
 
+        # The counters of the caches in closed nodes are kept here
+        # (see `cache_stats()`).
+        self._cachestats = {}
+
         # For the moment Undo/Redo is not enabled.
         self._undoEnabled = False
 
+        # The catalog of nodes (if any).
+        self._catalog = None
+
         # Set the flag to indicate that the file has been opened.
         # It must be set before opening the root group
         # to allow some basic access to its attributes.
@@ -520,6 +817,8 @@ class File(hdf5Extension.File, object):
 
         # Set the number of times this file has been opened to 1
         self._open_count = 1
+        # The pool keeping this file open, if any.
+        self._pool = None
 
         # Get the root group from this file
         self.root = root = self.__getRootGroup(rootUEP, title, filters)
@@ -540,6 +839,13 @@ class File(hdf5Extension.File, object):
             # It does. Enable the undo.
             self.enableUndo()
 
+        # Use the catalog of nodes if the file has one,
+        # or create it for new files if asked to.
+        if not new and _catalogPath in self:
+            self._catalog = NodeCatalog(self)
+        elif new and params['NODE_CATALOG']:
+            self.enableCatalog()
+
         # Set the maximum number of threads for Numexpr
         numexpr.set_vml_num_threads(params['MAX_NUMEXPR_THREADS'])
 
@@ -654,7 +960,7 @@ class File(hdf5Extension.File, object):
     def createTable(self, where, name, description, title="",
                     filters=None, expectedrows=10000,
                     chunkshape=None, byteorder=None,
-                    createparents=False):
+                    createparents=False, layout='row'):
         """Create a new table with the given name in where location.
 
         Parameters
@@ -711,6 +1017,14 @@ class File(hdf5Extension.File, object):
         createparents : bool
             Whether to create the needed groups for the parent path to exist
             (not done by default).
+        layout : str
+            How data is laid out on disk.  With 'row' (the default), whole
+            rows are stored in a single compound dataset.  With 'columnar',
+            every column is stored in its own chunked and compressed dataset
+            and a :class:`CTable` instance is returned; this is faster for
+            reading and querying just a few columns of wide tables.
+
+            .. versionadded:: 3.0
 
         See Also
         --------
@@ -722,10 +1036,17 @@ class File(hdf5Extension.File, object):
         if description is None:
             raise ValueError("invalid table description: None")
         _checkfilters(filters)
-        return Table(parentNode, name,
-                     description=description, title=title,
-                     filters=filters, expectedrows=expectedrows,
-                     chunkshape=chunkshape, byteorder=byteorder)
+        if layout == 'columnar':
+            tableclass = CTable
+        elif layout == 'row':
+            tableclass = Table
+        else:
+            raise ValueError("layout must be 'row' or 'columnar', "
+                             "not %r" % (layout,))
+        return tableclass(parentNode, name,
+                          description=description, title=title,
+                          filters=filters, expectedrows=expectedrows,
+                          chunkshape=chunkshape, byteorder=byteorder)
 
 
     def createArray(self, where, name, object, title="",
@@ -1029,22 +1350,25 @@ class File(hdf5Extension.File, object):
         aliveNodes = self._aliveNodes
         deadNodes = self._deadNodes
 
-        if nodePath in aliveNodes:
-            # The parent node is in memory and alive, so get it.
-            node = aliveNodes[nodePath]
-            assert node is not None, \
-                   "stale weak reference to dead node ``%s``" % nodePath
-            return node
-        if nodePath in deadNodes:
-            # The parent node is in memory but dead, so revive it.
-            node = self._reviveNode(nodePath)
+        # Nodes may be got from several threads, and loading them
+        # touches the node caches and the HDF5 library.
+        with hdf5lock:
+            if nodePath in aliveNodes:
+                # The parent node is in memory and alive, so get it.
+                node = aliveNodes[nodePath]
+                assert node is not None, \
+                       "stale weak reference to dead node ``%s``" % nodePath
+                return node
+            if nodePath in deadNodes:
+                # The parent node is in memory but dead, so revive it.
+                node = self._reviveNode(nodePath)
+                return node
+
+            # The node has not been found in alive or dead nodes.
+            # Open it directly from disk.
+            node = self.root._g_loadChild(nodePath)
             return node
 
-        # The node has not been found in alive or dead nodes.
-        # Open it directly from disk.
-        node = self.root._g_loadChild(nodePath)
-        return node
-
 
     def getNode(self, where, name=None, classname=None):
         """Get the node under where with the given name.
@@ -1581,6 +1905,135 @@ class File(hdf5Extension.File, object):
         return group._f_walkGroups()
 
 
+    def scan(self, where="/",
+             fields=('path', 'class', 'shape', 'dtype', 'nbytes', 'filters')):
+        """Get the metadata of the nodes hanging from where in bulk.
+
+        This gets the metadata of the where node and all the visible
+        nodes hanging from it (like :meth:`File.walkNodes` does) in a
+        single pass over the hierarchy in the HDF5 file, without
+        creating any node object.  This is much faster than walking the
+        tree for taking an inventory of files with many nodes.
+
+        Parameters
+        ----------
+        where : str or Node, optional
+            The node where the scan starts.  It can be a path string or
+            a Node instance (see :ref:`NodeClassDescr`).
+        fields : sequence of str, optional
+            The names of the metadata fields to get, among ``path``
+            (the path of the node), ``class`` (the name of the class
+            which the node would have), ``shape``, ``dtype`` (the NumPy
+            type of the elements of leaves), ``nbytes`` (the size in
+            bytes of the data of leaves when loaded into memory) and
+            ``filters`` (a Filters instance for leaves, see
+            :ref:`FiltersClassDescr`).  Metadata which is not asked for
+            is not read.
+
+        Returns
+        -------
+        A NumPy structured array with a record per node and the given
+        fields, in the order of a depth-first traversal where children
+        are visited in alphanumerical order.  The ``nbytes`` field is -1
+        and the other fields are ``None`` when they do not apply to a
+        node (e.g. the shape of a group) or can not be known without
+        reading its data (e.g. the size of a variable length array).
+
+        Notes
+        -----
+        The metadata is read from the HDF5 file, so changes to alive
+        nodes which have not been flushed yet (e.g. rows appended to a
+        table) are not reflected, and the filters of groups are not
+        reported.
+
+        Examples
+        --------
+
+        ::
+
+            # Print the shape of all the tables in the file.
+            nodes = h5file.scan(fields=('path', 'class', 'shape'))
+            for node in nodes[nodes['class'] == 'Table']:
+                print node['path'], node['shape']
+
+        .. versionadded:: 3.0
+
+        """
+
+        self._checkOpen()
+
+        for field in fields:
+            if field not in _scanFields:
+                raise ValueError("unknown metadata field: %r" % (field,))
+        if isinstance(where, Node):
+            where = where._v_pathname
+        if not where.startswith('/'):
+            raise NameError("``where`` must start with a slash ('/')")
+
+        # The class of nodes is also needed for telling variable length
+        # arrays apart when computing sizes.
+        getclasses = 'class' in fields or 'nbytes' in fields
+        sysattrs = getclasses and self.params['PYTABLES_SYS_ATTRS']
+        types = 'dtype' in fields or 'nbytes' in fields
+        # Paths in the HDF5 file are relative to the root user entry point.
+        h5where = where
+        if self.rootUEP != '/':
+            h5where = joinPath(self.rootUEP, where)
+        scan = self._g_scan(h5where, sysattrs, types, 'filters' in fields)
+        if scan is None:
+            raise NoSuchNodeError(
+                "there is no node at ``%s`` in the file" % (where,))
+        (names, kinds, classIds, shapes, dtypes, filtersDicts) = scan
+
+        # Work out the class which each node would have when loaded.
+        classes = []
+        if getclasses:
+            for (name, kind, classId) in zip(names, kinds, classIds):
+                if kind == 'G':
+                    if name == '.' and where == '/':
+                        class_ = RootGroup
+                    else:
+                        class_ = classIdDict.get(classId, Group)
+                elif kind == 'L':
+                    if classId not in classIdDict:
+                        classId = utilsExtension.whichClass(
+                            self._getFileId(), joinPath(h5where, name))
+                    class_ = classIdDict.get(classId, UnImplemented)
+                else:
+                    class_ = _scanKindClasses[kind]
+                classes.append(class_)
+
+        columns = {
+            'path': [where if name == '.' else joinPath(where, name)
+                     for name in names],
+            'class': [class_.__name__ for class_ in classes],
+            'shape': shapes,
+            'dtype': dtypes,
+            }
+        if 'filters' in fields:
+            columns['filters'] = [
+                Filters._from_filters_dict(filtersDict) if kind == 'L'
+                else None
+                for (kind, filtersDict) in zip(kinds, filtersDicts)]
+        if 'nbytes' in fields:
+            columns['nbytes'] = nbytes = [-1] * len(names)
+            for (i, class_) in enumerate(classes):
+                (shape, dtype) = (shapes[i], dtypes[i])
+                if (shape is not None and dtype is not None
+                    and not issubclass(class_, VLArray)):
+                    nbytes[i] = int(numpy.prod(shape)) * dtype.itemsize
+
+        records = numpy.empty(len(names), dtype=[
+            (field, _scanFields[field]) for field in fields])
+        for field in fields:
+            # Fill the fields one element at a time, so that tuples
+            # in object fields are not taken as sequences of values.
+            column = records[field]
+            for (i, value) in enumerate(columns[field]):
+                column[i] = value
+        return records
+
+
     def _checkOpen(self):
         """Check the state of the file.
 
@@ -2120,6 +2573,166 @@ Mark ``%s`` is older than the current mark. Use `redo()` or `goto()` instead."""
     # </Undo/Redo support>
 
 
+    # <Node catalog support>
+
+    def isCatalogEnabled(self):
+        """Does the file keep a catalog of its nodes?
+
+        Returns True if the catalog of nodes has been enabled for this
+        file, False otherwise.  Please note that the catalog is
+        persistent, so a newly opened PyTables file may already have it.
+
+        .. versionadded:: 3.0
+
+        """
+
+        self._checkOpen()
+        return self._catalog is not None
+
+
+    def enableCatalog(self, filters=Filters(complevel=1)):
+        """Enable the catalog of nodes.
+
+        The catalog is a hidden table which keeps the path, class,
+        shape, type and filters of every visible node in the file.  It
+        is kept up to date when nodes are created, moved, renamed,
+        removed or flushed, and allows :meth:`File.getNodeInfo` and
+        :meth:`File.listNodeInfo` to get the metadata of nodes without
+        opening them, which is much faster for files with lots of nodes.
+
+        Enabling the catalog requires opening every node in the file
+        once.  The filters argument, when specified, must be an instance
+        of class Filters (see :ref:`FiltersClassDescr`) and is meant for
+        setting the compression values for the catalog.  The length of
+        paths is limited by :data:`tables.parameters.NODE_CATALOG_PATH_LENGTH`,
+        and the one of the descriptions of types (which include all the
+        fields of tables) by
+        :data:`tables.parameters.NODE_CATALOG_DTYPE_LENGTH`.
+
+        Calling this method when the catalog is already enabled does
+        nothing.  Please note that changes to the file made by software
+        not aware of the catalog are not reflected in it.
+
+        .. versionadded:: 3.0
+
+        """
+
+        self._checkOpen()
+        if self._catalog is not None:
+            return
+
+        # The file is going to be changed.
+        self._checkWritable()
+        self._catalog = NodeCatalog.create(self, filters)
+
+
+    def disableCatalog(self):
+        """Disable the catalog of nodes.
+
+        The hidden table holding the catalog is removed from the file.
+        Calling this method when the catalog is already disabled does
+        nothing.
+
+        .. versionadded:: 3.0
+
+        """
+
+        self._checkOpen()
+        if self._catalog is None:
+            return
+
+        # The file is going to be changed.
+        self._checkWritable()
+        catalog, self._catalog = self._catalog, None
+        catalog.table._g_remove()
+
+
+    def getNodeInfo(self, where):
+        """Get the metadata of the node in where.
+
+        The where argument works as in :meth:`File.getNode`.  A
+        :class:`tables.catalog.NodeInfo` instance is returned.  If the
+        catalog of nodes is enabled (see :meth:`File.enableCatalog`),
+        the node is not opened.
+
+        .. versionadded:: 3.0
+
+        """
+
+        self._checkOpen()
+        if self._catalog is None:
+            return nodeInfo(self.getNode(where))
+        if hasattr(where, '_v_pathname'):
+            where = where._v_pathname
+        return self._catalog.getInfo(where)
+
+
+    def listNodeInfo(self, where="/", classname=None, recursive=False):
+        """Get the metadata of the nodes hanging from where.
+
+        This returns a list of :class:`tables.catalog.NodeInfo`
+        instances for the children of the where group, sorted by path.
+        If recursive is true, the where node itself and all of its
+        descendants are included.  The where and classname arguments
+        work as in :meth:`File.walkNodes`.
+
+        If the catalog of nodes is enabled (see :meth:`File.enableCatalog`),
+        nodes are not opened, so getting the metadata of large
+        hierarchies is much faster.
+
+        .. versionadded:: 3.0
+
+        """
+
+        self._checkOpen()
+        if self._catalog is None:
+            if recursive:
+                nodes = self.walkNodes(where, classname)
+            else:
+                nodes = self.iterNodes(where, classname)
+            infolist = [nodeInfo(node) for node in nodes]
+            infolist.sort(key=lambda info: info.pathname)
+            return infolist
+        if hasattr(where, '_v_pathname'):
+            where = where._v_pathname
+        return self._catalog.listInfo(where, classname, recursive)
+
+
+    def _g_updateCatalog(self, node):
+        """Update the metadata of `node` in the catalog (if any)."""
+
+        if self._catalog is None or not self._isWritable():
+            return
+        try:
+            self._catalog.update(node)
+        except ValueError, exc:
+            warnings.warn("%s; the catalog of nodes has been disabled"
+                          % (exc,), PerformanceWarning)
+            self.disableCatalog()
+
+
+    def _g_removeFromCatalog(self, pathname):
+        """Remove the node in `pathname` from the catalog (if any)."""
+
+        if self._catalog is not None:
+            self._catalog.remove(pathname)
+
+
+    def _g_moveInCatalog(self, node, oldPathname):
+        """Update the catalog (if any) after moving `node`."""
+
+        if self._catalog is None:
+            return
+        try:
+            self._catalog.move(node, oldPathname)
+        except ValueError, exc:
+            warnings.warn("%s; the catalog of nodes has been disabled"
+                          % (exc,), PerformanceWarning)
+            self.disableCatalog()
+
+    # </Node catalog support>
+
+
     def flush(self):
         """Flush all the alive leaves in the object tree."""
 
@@ -2141,6 +2754,83 @@ Mark ``%s`` is older than the current mark. Use `redo()` or `goto()` instead."""
         self._flushFile(0)  # 0 means local scope, 1 global (virtual) scope
 
 
+    def cache_stats(self, reset=False):
+        """Get the statistics of the caches used by this file.
+
+        This returns a dictionary mapping each kind of cache to a
+        dictionary with the statistics of the caches of that kind in
+        use by the file and its nodes.  The kinds of caches and the
+        parameters in :mod:`tables.parameters` controlling them are:
+
+        * ``'nodes'``: the cache of unreferenced nodes
+          (:data:`tables.parameters.NODE_CACHE_SLOTS` and
+          :data:`tables.parameters.NODE_CACHE_SIZE`).
+        * ``'conditions'``: the caches of compiled conditions in tables
+          (:data:`tables.parameters.COND_CACHE_SLOTS`).
+        * ``'iterseq'``: the caches of row coordinates for indexed
+          queries in tables (``ITERSEQ_*`` parameters).
+        * ``'bounds'``, ``'limbounds'`` and ``'sortedlr'``: the caches
+          of indexes (``BOUNDS_*``, ``LIMBOUNDS_*`` and ``SORTEDLR_*``
+          parameters).
+
+        Only the kinds of caches which have been used appear in the
+        dictionary.  The statistics of each kind are:
+
+        * ``hits``, ``misses``, ``hitratio``: the lookups which have
+          found an entry in cache or not, and the ratio of the former.
+        * ``evictions``: the entries discarded from caches.
+        * ``disables``, ``enables``: the times that caches have been
+          disabled because of a too low hit ratio, or enabled again.
+        * ``size``, ``maxsize``: the current and maximum size of caches
+          in bytes (or in number of entries for the caches of nodes and
+          conditions).
+        * ``ncaches``: the number of caches of this kind in use.
+
+        Counters are accumulated since the file was opened, including
+        those of the caches of nodes which have already been closed.
+        If `reset` is true, counters are reset after being read, so
+        calling this method periodically yields the statistics of each
+        period.  See also :func:`tables.cache_stats`.
+
+        .. versionadded:: 3.0
+
+        """
+
+        self._checkOpen()
+        return _finishCacheStats(self._g_addCacheStats({}, reset))
+
+
+    def _g_addCacheStats(self, allstats, reset):
+        """Add the statistics of the caches of this file to `allstats`."""
+
+        aliveNodes = self._aliveNodes
+        deadNodes = self._deadNodes
+        caches = []
+        if isinstance(deadNodes, _DeadNodes):
+            caches.append(('nodes', deadNodes))
+        nodes = [aliveNodes[path] for path in aliveNodes] + deadNodes.values()
+        for node in nodes:
+            if node is not None:
+                caches.extend(node._g_getCaches())
+        for kind, cache in caches:
+            _addCacheStats(allstats, kind, cache.getstats())
+            if reset:
+                cache.resetstats()
+        for kind, stats in self._cachestats.iteritems():
+            _addCacheStats(allstats, kind, stats, counters=True)
+        if reset:
+            self._cachestats.clear()
+        return allstats
+
+
+    def _g_retireCaches(self, caches):
+        """Keep the counters of the `caches` of a node being closed."""
+
+        for kind, cache in caches:
+            _addCacheStats(self._cachestats, kind, cache.getstats(),
+                           counters=True)
+
+
     def close(self):
         """Flush all the alive leaves in object tree and close the file."""
 
@@ -2161,8 +2851,31 @@ Mark ``%s`` is older than the current mark. Use `redo()` or `goto()` instead."""
             self._actionlog.attrs._g__setattr("CURMARK", self._curmark)
             self._actionlog.attrs._g__setattr("CURACTION", self._curaction)
 
+        # Save the current shapes of nodes in the catalog before it
+        # gets closed.
+        if self._catalog is not None:
+            if self._isWritable():
+                self.flush()
+                for node in self._deadNodes.values():
+                    if isinstance(node, Leaf):
+                        self._g_updateCatalog(node)
+            self._catalog = None
+
+        # Columnar tables must save their buffered rows while their
+        # column datasets are still open.
+        if self._isWritable():
+            for refnode in self._aliveNodes.values():
+                if self._aliveNodes.hassoftlinks:
+                    node = refnode()
+                else:
+                    node = refnode
+                if isinstance(node, CTable):
+                    node.flush()
+
         # Close all loaded nodes.
         self.root._f_close()
+        # Forget the chunks of this file in the shared chunk cache.
+        lrucacheExtension.sharedcache.invalidate(self, recursive=True)
 
         # Post-conditions
         assert len(self._deadNodes) == 0, \
@@ -2359,6 +3072,7 @@ Mark ``%s`` is older than the current mark. Use `redo()` or `goto()` instead."""
 
 # If a user hits ^C during a run, it is wise to gracefully close the opened files.
 def close_open_files():
+    _filepool.close()
     are_open_files = len(_open_files) > 0
     if are_open_files:
         print >> sys.stderr, "Closing remaining open files:",
@@ -143,6 +143,17 @@ class Filters(object):
         parent = leaf._v_parent
         filtersDict = utilsExtension.getFilters( parent._v_objectID,
                                                  leaf._v_name )
+        return class_._from_filters_dict(filtersDict)
+
+    @classmethod
+    def _from_filters_dict(class_, filtersDict):
+        """Create a new `Filters` object from the filters of a dataset.
+
+        `filtersDict` maps the names of the HDF5 filters in the dataset
+        to their client values, or it is ``None`` if the dataset is not
+        chunked.
+        """
+
         if filtersDict is None:
             filtersDict = {}  # not chunked
 
@@ -12,6 +12,7 @@
 
 """Here is defined the Group class."""
 
+import bisect
 import warnings
 import weakref
 
@@ -23,7 +24,8 @@ from tables.exceptions import (
     NodeError, NoSuchNodeError, NaturalNameWarning, PerformanceWarning)
 from tables.filters import Filters
 from tables.registry import getClassByName
-from tables.path import checkNameValidity, joinPath, isVisibleName
+from tables.path import (
+    checkNameValidity, joinPath, splitPath, isVisibleName)
 from tables.node import Node, NotLoggedMixin
 from tables.leaf import Leaf
 from tables.unimplemented import UnImplemented, Unknown
@@ -33,12 +35,95 @@ from tables.link import Link, SoftLink, ExternalLink
 
 obversion = "1.0"
 
+# Approximate memory used by the entry of a child in the dictionaries
+# of children of a group.
+_childOverhead = 256
+
 
 class _ChildrenDict(tables.misc.proxydict.ProxyDict):
     def _getValueFromContainer(self, container, key):
         return container._f_getChild(key)
 
 
+# Map from the kind codes of children metadata to node types
+# (as returned by ``Group._g_checkHasChild()``).
+_kindToNodeType = {
+    'G': 'Group', 'L': 'Leaf', 'S': 'SoftLink', 'E': 'ExternalLink',
+    'U': 'Unknown'}
+
+
+class _ChildrenMetadata(object):
+    """Metadata of the children of a group, as found on disk.
+
+    The names of the children are kept in a sorted list, their kinds in
+    a string with a code for each child, and their ``CLASS`` and
+    ``VERSION`` attributes in two lists of (shared) strings, so that
+    very large groups do not need any per-child object.  Children are
+    looked up by a binary search.
+
+    Children which are created, removed or moved after the metadata has
+    been read are marked as stale, and their metadata is not used.
+    """
+
+    __slots__ = ('names', 'kinds', 'classes', 'versions', 'stale')
+
+    def __init__(self, names, kinds, classes, versions):
+        self.names = names
+        self.kinds = kinds
+        self.classes = classes
+        self.versions = versions
+        self.stale = set()
+
+    def __len__(self):
+        return len(self.names)
+
+    def _index(self, name):
+        names = self.names
+        idx = bisect.bisect_left(names, name)
+        if idx < len(names) and names[idx] == name:
+            return idx
+        return -1
+
+    def get(self, name):
+        """Get the ``(nodetype, classid, version)`` of the `name` child.
+
+        ``None`` is returned if there is no (valid) metadata for it.
+        """
+
+        if name in self.stale:
+            return None
+        idx = self._index(name)
+        if idx < 0:
+            return None
+        return (_kindToNodeType[self.kinds[idx]],
+                self.classes[idx], self.versions[idx])
+
+    def invalidate(self, name):
+        """Do not use the metadata of the `name` child any more."""
+
+        if self._index(name) >= 0:
+            self.stale.add(name)
+
+
+def _getChildMetadata(file_, path, load=True):
+    """Get the metadata of the node in `path` from its parent group.
+
+    The metadata is only looked up in parent groups which are already
+    alive, and ``None`` is returned if it is not available.  If `load`
+    is false, the metadata of the parent is not loaded if it has not
+    been yet.
+    """
+
+    parentPath, name = splitPath(path)
+    aliveNodes = file_._aliveNodes
+    if name == '' or parentPath not in aliveNodes:
+        return None
+    parent = aliveNodes[parentPath]
+    if parent is None:
+        return None
+    return parent._g_getChildMetadata(name, load)
+
+
 class Group(hdf5Extension.Group, Node):
     """Basic PyTables grouping structure.
 
@@ -236,8 +321,13 @@ class Group(hdf5Extension.Group, Node):
                 if newFilters is not None:
                     setAttr('FILTERS', newFilters)
         else:
+            # Avoid reading the attributes if the version is already known.
+            meta = _getChildMetadata(self._v_file, self._v_pathname,
+                                     load=False)
+            if meta is not None and meta[2] is not None:
+                self._v_version = meta[2]
             # If the file has PyTables format, get the VERSION attr
-            if 'VERSION' in self._v_attrs._v_attrnamessys:
+            elif 'VERSION' in self._v_attrs._v_attrnamessys:
                 self._v_version = self._v_attrs.VERSION
             else:
                 self._v_version = "0.0 (unknown)"
@@ -263,13 +353,25 @@ class Group(hdf5Extension.Group, Node):
         super(Group, self).__del__()
 
 
-    def _g_getChildGroupClass(self, childName):
+    def _g_footprint(self):
+        size = super(Group, self)._g_footprint()
+        # The dictionaries of children (if already loaded).
+        if '_v_children' in self.__dict__:
+            nchildren = len(self._v_children) + len(self._v_hidden)
+            size += nchildren * _childOverhead
+        return size
+
+
+    def _g_getChildGroupClass(self, childName, childCID=False):
         """Get the class of a not-yet-loaded group child.
 
-        `childName` must be the name of a *group* child.
+        `childName` must be the name of a *group* child.  Its ``CLASS``
+        attribute is read from disk unless it is given in `childCID`
+        (``None`` meaning that the child has no such attribute).
         """
 
-        childCID = self._g_getGChildAttr(childName, 'CLASS')
+        if childCID is False:
+            childCID = self._g_getGChildAttr(childName, 'CLASS')
         if childCID is not None and not isinstance(childCID, str):
             childCID = childCID.decode('utf-8')
 
@@ -279,21 +381,22 @@ class Group(hdf5Extension.Group, Node):
             return Group  # default group class
 
 
-    def _g_getChildLeafClass(self, childName, warn=True):
+    def _g_getChildLeafClass(self, childName, warn=True, childCID=False):
         """Get the class of a not-yet-loaded leaf child.
 
         `childName` must be the name of a *leaf* child.  If the child
         belongs to an unknown kind of leaf, or if its kind can not be
         guessed, `UnImplemented` will be returned and a warning will be
-        issued if `warn` is true.
+        issued if `warn` is true.  The ``CLASS`` attribute of the child
+        is read from disk unless it is given in `childCID`.
         """
 
-        if self._v_file.params['PYTABLES_SYS_ATTRS']:
-            childCID = self._g_getLChildAttr(childName, 'CLASS')
-            if childCID is not None and not isinstance(childCID, str):
-                childCID = childCID.decode('utf-8')
-        else:
+        if not self._v_file.params['PYTABLES_SYS_ATTRS']:
             childCID = None
+        elif childCID is False:
+            childCID = self._g_getLChildAttr(childName, 'CLASS')
+        if childCID is not None and not isinstance(childCID, str):
+            childCID = childCID.decode('utf-8')
 
         if childCID in classIdDict:
             return classIdDict[childCID]  # look up leaf class
@@ -340,29 +443,63 @@ class Group(hdf5Extension.Group, Node):
         myDict['_v_hidden'] = hidden = _ChildrenDict(self)
         """Dictionary with all hidden nodes hanging from this group."""
 
-        # Get the names of *all* child groups and leaves.
-        (groupNames, leafNames, linkNames, unknownNames) = \
-                     self._g_listGroup(self._v_parent)
+        params = self._v_file.params
+        if params['BATCH_NODE_METADATA']:
+            # Get the names and metadata of *all* children in one go.
+            meta = _ChildrenMetadata(*self._g_listGroupMetadata(
+                self._v_parent, params['PYTABLES_SYS_ATTRS']))
+            myDict['_v__childrenmeta'] = meta
+            """The metadata of the children as found on disk."""
+            childNames = {'G': [], 'L': [], 'S': [], 'E': [], 'U': []}
+            for (childName, kind) in zip(meta.names, meta.kinds):
+                childNames[kind].append(childName)
+            groupNames, leafNames, unknownNames = (
+                childNames['G'], childNames['L'], childNames['U'])
+            linkNames = childNames['S'] + childNames['E']
+        else:
+            # Get the names of *all* child groups and leaves.
+            (groupNames, leafNames, linkNames, unknownNames) = \
+                         self._g_listGroup(self._v_parent)
 
         # Separate groups into visible groups and hidden nodes,
         # and leaves into visible leaves and hidden nodes.
+        # (Assigned values are entirely irrelevant.)
         for (childNames, childDict) in (
             (groupNames, groups),
             (leafNames, leaves),
             (linkNames, links),
             (unknownNames, unknown)):
 
+            # See whether the name implies that the node is hidden.
+            visibleNames = []
             for childName in childNames:
-                # See whether the name implies that the node is hidden.
-                # (Assigned values are entirely irrelevant.)
                 if isVisibleName(childName):
-                    # Visible node.
-                    members.insert(0, childName)
-                    children[childName] = None
-                    childDict[childName] = None
+                    visibleNames.append(childName)
                 else:
-                    # Hidden node.
                     hidden[childName] = None
+            members.extend(visibleNames)
+            dict.update(children, dict.fromkeys(visibleNames))
+            dict.update(childDict, dict.fromkeys(visibleNames))
+        # Latest children come first.
+        members.reverse()
+
+
+    def _g_getChildMetadata(self, childName, load=True):
+        """Get the metadata of the `childName` child as found on disk.
+
+        A ``(nodetype, classid, version)`` tuple is returned, or ``None``
+        if it is not available.  The metadata of all children is loaded
+        at once the first time that it is needed, unless `load` is false.
+        """
+
+        myDict = self.__dict__
+        if (load and '_v_children' not in myDict
+            and self._v_file.params['BATCH_NODE_METADATA']):
+            self._g_addChildrenNames()
+        meta = myDict.get('_v__childrenmeta')
+        if meta is None:
+            return None
+        return meta.get(childName)
 
 
     def _g_checkHasChild(self, name):
@@ -525,6 +662,9 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O."""
         else:
             # Hidden node.
             self._v_hidden[childName] = None  # insert node
+        # The metadata read from disk is no longer valid for this name.
+        if '_v__childrenmeta' in self.__dict__:
+            self._v__childrenmeta.invalidate(childName)
 
 
     def _g_unrefNode(self, childName):
@@ -554,6 +694,9 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O."""
             else:
                 # Hidden node.
                 del self._v_hidden[childName]  # remove node
+        # The metadata read from disk is no longer valid for this name.
+        if '_v__childrenmeta' in self.__dict__:
+            self._v__childrenmeta.invalidate(childName)
 
 
     def _g_move(self, newParent, newName):
@@ -1112,10 +1255,17 @@ class RootGroup(Group):
         child, a `NoSuchNodeError` is raised.
         """
 
+        # The metadata of the children of an alive parent group saves
+        # querying the node on disk.
+        meta = _getChildMetadata(self._v_file, childName)
         if self._v_file.rootUEP != "/":
             childName = joinPath(self._v_file.rootUEP, childName)
         # Is the node a group or a leaf?
-        node_type = self._g_checkHasChild(childName)
+        if meta is None:
+            node_type = self._g_checkHasChild(childName)
+            childCID = False  # read it from disk when needed
+        else:
+            node_type, childCID = meta[:2]
 
         # Nodes that HDF5 report as H5G_UNKNOWN
         if node_type == 'Unknown':
@@ -1125,13 +1275,13 @@ class RootGroup(Group):
         # build a PyTables node and return it.
         if node_type == "Group":
             if self._v_file.params['PYTABLES_SYS_ATTRS']:
-                childClass = self._g_getChildGroupClass(childName)
+                childClass = self._g_getChildGroupClass(childName, childCID)
             else:
                 # Default is a Group class
                 childClass = Group
             return childClass(self, childName, new=False)
         elif node_type == "Leaf":
-            childClass = self._g_getChildLeafClass(childName, warn=True)
+            childClass = self._g_getChildLeafClass(childName, True, childCID)
             # Building a leaf may still fail because of unsupported types
             # and other causes.
             ###return childClass(self, childName)  # uncomment for debugging
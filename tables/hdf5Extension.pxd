@@ -32,6 +32,7 @@ cdef class Array(Leaf):
   cdef int      rank
   cdef hsize_t *maxdims
   cdef hsize_t *dims_chunk
+  cdef _g_select(self, hid_t space_id, object selection)
 
 
 
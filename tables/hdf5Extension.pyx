@@ -42,7 +42,7 @@ import numpy
 from tables.exceptions import HDF5ExtError, DataTypeWarning
 
 from tables.utils import (checkFileAccess, byteorders, correct_byteorder,
-  SizeType)
+  SizeType, hdf5lock)
 
 from tables.atom import Atom
 
@@ -54,13 +54,15 @@ from tables.utilsExtension import (encode_filename, setBloscMaxThreads,
   platform_byteorder)
 
 
+from tables.lrucacheExtension import sharedcache
+
 from utilsExtension cimport malloc_dims, get_native_type
 
 
 # Types, constants, functions, classes & other objects from everywhere
 from libc.stdlib cimport malloc, free
-from libc.string cimport strdup, strlen
-from numpy cimport import_array, ndarray, npy_intp
+from libc.string cimport memcpy, strdup, strlen
+from numpy cimport import_array, ndarray, npy_intp, npy_int64
 from cpython cimport (PyBytes_AsString, PyBytes_FromStringAndSize,
     PyBytes_Check)
 from cpython.unicode cimport PyUnicode_DecodeUTF8
@@ -74,7 +76,7 @@ from definitions cimport (const_char, uintptr_t, hid_t, herr_t, hsize_t, hvl_t,
   H5T_cset_t, H5T_CSET_ASCII, H5T_CSET_UTF8,
   H5F_SCOPE_GLOBAL, H5F_ACC_TRUNC, H5F_ACC_RDONLY, H5F_ACC_RDWR,
   H5P_DEFAULT, H5P_FILE_ACCESS, H5P_FILE_CREATE,
-  H5S_SELECT_SET, H5S_SELECT_AND, H5S_SELECT_NOTB,
+  H5S_SELECT_SET, H5S_SELECT_OR, H5S_SELECT_AND, H5S_SELECT_NOTB,
   H5Fcreate, H5Fopen, H5Fclose, H5Fflush, H5Fget_vfd_handle, H5Fget_filesize,
   H5Fget_create_plist,
   H5Gcreate, H5Gopen, H5Gclose, H5Ldelete, H5Lmove,
@@ -91,7 +93,8 @@ from definitions cimport (const_char, uintptr_t, hid_t, herr_t, hsize_t, hvl_t,
   H5ATTRget_attribute_vlen_string_array,
   H5ATTRfind_attribute, H5ATTRget_type_ndims, H5ATTRget_dims,
   H5ARRAYget_ndims, H5ARRAYget_info,
-  set_cache_size, get_objinfo, get_linkinfo, Giterate, Aiterate, H5UIget_info,
+  set_cache_size, get_objinfo, get_linkinfo, Giterate, Giterate_meta, Gscan,
+  Aiterate, H5UIget_info,
   get_len_of_range, conv_float64_timeval32, truncate_dset,
   H5_HAVE_DIRECT_DRIVER, pt_H5Pset_fapl_direct,
   H5_HAVE_WINDOWS_DRIVER, pt_H5Pset_fapl_windows,
@@ -150,6 +153,11 @@ cdef extern from "H5VLARRAY.h" nogil:
                                   int nobjects, hsize_t nrecords,
                                   void *data )
 
+  herr_t H5VLARRAYextend_records( hid_t dataset_id, hid_t type_id,
+                                  hsize_t nrows, hsize_t *offsets,
+                                  size_t objsize, hsize_t nrecords,
+                                  void *data )
+
   herr_t H5VLARRAYmodify_records( hid_t dataset_id, hid_t type_id,
                                   hsize_t nrow, int nobjects,
                                   void *data )
@@ -268,6 +276,29 @@ cdef object get_dtype_scalar(hid_t type_id, H5T_class_t class_id,
   return ntype
 
 
+# Get the numpy dtype of the data in a dataset from its HDF5 type
+cdef object get_dtype_or_none(hid_t type_id):
+  """Returns the NumPy dtype of the elements of a dataset of `type_id`.
+
+  Like in leaves, this is the type of the atom for non-compound types
+  (the base type for variable length ones) and the record type for
+  compound ones.  It returns ``None`` if the type is not supported.
+  """
+
+  cdef object stype, shape
+
+  try:
+    return AtomFromHDF5Type(type_id).dtype
+  except (TypeError, ValueError, KeyError):
+    pass
+  # Compound types do not make atoms.
+  try:
+    stype, shape = HDF5ToNPExtType(type_id, pure_numpy_types=True)
+    return numpy.dtype((stype, shape))
+  except (TypeError, ValueError):
+    return None
+
+
 _supported_drivers = (
     "H5FD_SEC2",
     "H5FD_DIRECT",
@@ -580,6 +611,45 @@ cdef class File:
     return descriptor[0]
 
 
+  def _g_scan(self, where, sysattrs=True, types=True, filters=True):
+    """Return the metadata of the `where` node and the nodes below it.
+
+    The visible nodes hanging from `where` are found in a single pass
+    over the hierarchy, without opening any node.  A tuple with the
+    list of their paths relative to `where` (which is named ``.``), a
+    string with the kind code of each node (as in
+    `Group._g_listGroupMetadata()`), and the lists of their ``CLASS``
+    attributes and of the shapes, NumPy types and filter dictionaries
+    of datasets is returned.  Attributes, types and filters are not
+    read (and ``None`` is returned for them) if `sysattrs`, `types` or
+    `filters` are false, respectively.  ``None`` is returned if there
+    is no `where` node.
+    """
+
+    cdef bytes encoded_where
+    cdef hid_t type_id
+    cdef object scan, dtypes
+
+    encoded_where = where.encode('utf-8')
+
+    scan = Gscan(self.file_id, encoded_where, bool(sysattrs), bool(types),
+                 bool(filters))
+    if scan is None:
+      return None
+
+    # Convert the types of datasets and release them.
+    (names, kinds, classes, shapes, typeids, filterdicts) = scan
+    dtypes = []
+    for typeid in typeids:
+      if typeid is None:
+        dtypes.append(None)
+        continue
+      type_id = typeid
+      dtypes.append(get_dtype_or_none(type_id))
+      H5Tclose(type_id)
+    return (names, kinds, classes, shapes, dtypes, filterdicts)
+
+
   def _flushFile(self, scope):
     # Close the file
     H5Fflush(self.file_id, scope)
@@ -975,6 +1045,24 @@ cdef class Group(Node):
     return Giterate(parent._v_objectID, self._v_objectID, encoded_name)
 
 
+  def _g_listGroupMetadata(self, parent, sysattrs=True):
+    """Return the metadata of all the children hanging from self.
+
+    A tuple with the sorted list of children names, a string with the
+    kind code of each child, and the lists of their ``CLASS`` and
+    ``VERSION`` attributes is returned.  All of them are gathered in a
+    single pass over the group.  The attributes are not read (and
+    ``None`` is returned for them) if `sysattrs` is false.
+    """
+
+    cdef bytes encoded_name
+
+    encoded_name = self.name.encode('utf-8')
+
+    return Giterate_meta(parent._v_objectID, self._v_objectID, encoded_name,
+                         bool(sysattrs))
+
+
   def _g_getGChildAttr(self, group_name, attr_name):
     """Return an attribute of a child `Group`.
 
@@ -1123,6 +1211,7 @@ cdef class Leaf(Node):
     ret = truncate_dset(self.dataset_id, self.maindim, size)
     if ret < 0:
       raise HDF5ExtError("Problems truncating the leaf: %s" % self)
+    sharedcache.invalidate(self._v_file, self._v_pathname)
 
     classname = self.__class__.__name__
     if classname in ('EArray', 'CArray'):
@@ -1132,7 +1221,11 @@ cdef class Leaf(Node):
       shape = list(self.shape)
       shape[self.maindim] = SizeType(size)
       self.shape = tuple(shape)
-    elif classname in ('Table', 'VLArray'):
+    elif classname == 'Table':
+      self.nrows = size
+      # Cached results of indexed queries do not survive a truncation
+      self._dirtycache = True
+    elif classname == 'VLArray':
       self.nrows = size
     else:
       raise ValueError("Unexpected classname: %s" % classname)
@@ -1394,12 +1487,13 @@ cdef class Array(Leaf):
 
     # Append the records
     extdim = self.extdim
-    with nogil:
+    with hdf5lock, nogil:
         ret = H5ARRAYappend_records(self.dataset_id, self.type_id, self.rank,
                                     self.dims, dims_arr, extdim, rbuf)
 
     if ret < 0:
       raise HDF5ExtError("Problems appending the elements")
+    sharedcache.invalidate(self._v_file, self._v_pathname)
 
     free(dims_arr)
     # Update the new dimensionality
@@ -1426,17 +1520,18 @@ cdef class Array(Leaf):
       extdim = -1
 
     # Do the physical read
-    with nogil:
-        ret = H5ARRAYread(self.dataset_id, self.type_id, start, nrows, step,
-                          extdim, rbuf)
+    with hdf5lock:
+      with nogil:
+          ret = H5ARRAYread(self.dataset_id, self.type_id, start, nrows, step,
+                            extdim, rbuf)
 
-    if ret < 0:
-      raise HDF5ExtError("Problems reading the array data.")
+      if ret < 0:
+        raise HDF5ExtError("Problems reading the array data.")
 
-    if self.atom.kind == 'time':
-      # Swap the byteorder by hand (this is not currently supported by HDF5)
-      if H5Tget_order(self.type_id) != platform_byteorder:
-        nparr.byteswap(True)
+      if self.atom.kind == 'time':
+        # Swap the byteorder by hand (this is not currently supported by HDF5)
+        if H5Tget_order(self.type_id) != platform_byteorder:
+          nparr.byteswap(True)
 
     # Convert some HDF5 types to NumPy after reading.
     if self.atom.type == 'time64':
@@ -1459,17 +1554,18 @@ cdef class Array(Leaf):
     rbuf = nparr.data
 
     # Do the physical read
-    with nogil:
-        ret = H5ARRAYreadSlice(self.dataset_id, self.type_id,
-                               start, stop, step, rbuf)
+    with hdf5lock:
+      with nogil:
+          ret = H5ARRAYreadSlice(self.dataset_id, self.type_id,
+                                 start, stop, step, rbuf)
 
-    if ret < 0:
-      raise HDF5ExtError("Problems reading the array data.")
+      if ret < 0:
+        raise HDF5ExtError("Problems reading the array data.")
 
-    if self.atom.kind == 'time':
-      # Swap the byteorder by hand (this is not currently supported by HDF5)
-      if H5Tget_order(self.type_id) != platform_byteorder:
-        nparr.byteswap(True)
+      if self.atom.kind == 'time':
+        # Swap the byteorder by hand (this is not currently supported by HDF5)
+        if H5Tget_order(self.type_id) != platform_byteorder:
+          nparr.byteswap(True)
 
     # Convert some HDF5 types to NumPy after reading
     if self.atom.type == 'time64':
@@ -1488,36 +1584,37 @@ cdef class Array(Leaf):
     cdef void *rbuf
     cdef object mode
 
-    # Get the dataspace handle
-    space_id = H5Dget_space(self.dataset_id)
-    # Create a memory dataspace handle
+    # Get the pointer to the buffer data area
+    rbuf = nparr.data
     size = nparr.size
-    mem_space_id = H5Screate_simple(1, &size, NULL)
 
-    # Select the dataspace to be read
-    H5Sselect_elements(space_id, H5S_SELECT_SET,
-                       <size_t>size, <hsize_t *>coords.data)
+    with hdf5lock:
+      # Get the dataspace handle
+      space_id = H5Dget_space(self.dataset_id)
+      # Create a memory dataspace handle
+      mem_space_id = H5Screate_simple(1, &size, NULL)
 
-    # Get the pointer to the buffer data area
-    rbuf = nparr.data
+      # Select the dataspace to be read
+      H5Sselect_elements(space_id, H5S_SELECT_SET,
+                         <size_t>size, <hsize_t *>coords.data)
 
-    # Do the actual read
-    with nogil:
-        ret = H5Dread(self.dataset_id, self.type_id, mem_space_id, space_id,
-                      H5P_DEFAULT, rbuf)
+      # Do the actual read
+      with nogil:
+          ret = H5Dread(self.dataset_id, self.type_id, mem_space_id,
+                        space_id, H5P_DEFAULT, rbuf)
 
-    if ret < 0:
-      raise HDF5ExtError("Problems reading the array data.")
+      # Terminate access to the memory dataspace
+      H5Sclose(mem_space_id)
+      # Terminate access to the dataspace
+      H5Sclose(space_id)
 
-    # Terminate access to the memory dataspace
-    H5Sclose(mem_space_id)
-    # Terminate access to the dataspace
-    H5Sclose(space_id)
+      if ret < 0:
+        raise HDF5ExtError("Problems reading the array data.")
 
-    if self.atom.kind == 'time':
-      # Swap the byteorder by hand (this is not currently supported by HDF5)
-      if H5Tget_order(self.type_id) != platform_byteorder:
-        nparr.byteswap(True)
+      if self.atom.kind == 'time':
+        # Swap the byteorder by hand (this is not currently supported by HDF5)
+        if H5Tget_order(self.type_id) != platform_byteorder:
+          nparr.byteswap(True)
 
     # Convert some HDF5 types to NumPy after reading
     if self.atom.type == 'time64':
@@ -1567,6 +1664,55 @@ cdef class Array(Leaf):
                         startp, stepp, countp, NULL)
 
 
+  cdef _g_select(self, hid_t space_id, object selection):
+    """Select in `space_id` the `selection` made by ``_fancySelection()``.
+
+    The runs of the selection list (there is one at most) are ORed in a
+    single loop, and the result is then narrowed with the range of
+    every other axis.  The whole space is the starting point if there
+    is no such list.
+    """
+
+    cdef int rank, axis
+    cdef npy_intp i, nruns
+    cdef ndarray start_, count_, step_, starts, counts
+    cdef hsize_t *startp, *countp, *stepp
+    cdef npy_int64 *startsp, *countsp
+    cdef H5S_seloper_t op
+
+    rank = len(self.shape)
+    start_ = numpy.zeros(rank, dtype="i8")
+    count_ = numpy.array(self.shape, dtype="i8")
+    step_ = numpy.ones(rank, dtype="i8")
+    startp = <hsize_t *>start_.data
+    countp = <hsize_t *>count_.data
+    stepp = <hsize_t *>step_.data
+
+    H5Sselect_all(space_id)
+    for (start, count, step, idx, mode) in selection:
+      if mode != "OR":
+        continue
+      axis = idx
+      starts = numpy.ascontiguousarray(start, dtype="i8")
+      counts = numpy.ascontiguousarray(count, dtype="i8")
+      startsp = <npy_int64 *>starts.data
+      countsp = <npy_int64 *>counts.data
+      nruns = len(starts)
+      with nogil:
+        op = H5S_SELECT_SET
+        for i from 0 <= i < nruns:
+          startp[axis] = startsp[i]
+          countp[axis] = countsp[i]
+          H5Sselect_hyperslab(space_id, op, startp, stepp, countp, NULL)
+          op = H5S_SELECT_OR
+      startp[axis] = 0
+      countp[axis] = self.shape[axis]
+
+    for args in selection:
+      if args[4] != "OR":
+        self.perform_selection(space_id, *args)
+
+
   def _g_readSelection(self, object selection, ndarray nparr):
     """Read a selection in an already created NumPy array."""
 
@@ -1577,39 +1723,36 @@ cdef class Array(Leaf):
     cdef void *rbuf
     cdef object mode
 
-    # Get the dataspace handle
-    space_id = H5Dget_space(self.dataset_id)
-    # Create a memory dataspace handle
+    # Get the pointer to the buffer data area
+    rbuf = nparr.data
     size = nparr.size
-    mem_space_id = H5Screate_simple(1, &size, NULL)
 
-    # Select the dataspace to be read
-    # Start by selecting everything
-    H5Sselect_all(space_id)
-    # Now refine with outstanding selections
-    for args in selection:
-      self.perform_selection(space_id, *args)
+    with hdf5lock:
+      # Get the dataspace handle
+      space_id = H5Dget_space(self.dataset_id)
+      # Create a memory dataspace handle
+      mem_space_id = H5Screate_simple(1, &size, NULL)
 
-    # Get the pointer to the buffer data area
-    rbuf = nparr.data
+      # Select the dataspace to be read
+      self._g_select(space_id, selection)
 
-    # Do the actual read
-    with nogil:
-        ret = H5Dread(self.dataset_id, self.type_id, mem_space_id, space_id,
-                      H5P_DEFAULT, rbuf)
+      # Do the actual read
+      with nogil:
+          ret = H5Dread(self.dataset_id, self.type_id, mem_space_id,
+                        space_id, H5P_DEFAULT, rbuf)
 
-    if ret < 0:
-      raise HDF5ExtError("Problems reading the array data.")
+      # Terminate access to the memory dataspace
+      H5Sclose(mem_space_id)
+      # Terminate access to the dataspace
+      H5Sclose(space_id)
 
-    # Terminate access to the memory dataspace
-    H5Sclose(mem_space_id)
-    # Terminate access to the dataspace
-    H5Sclose(space_id)
+      if ret < 0:
+        raise HDF5ExtError("Problems reading the array data.")
 
-    if self.atom.kind == 'time':
-      # Swap the byteorder by hand (this is not currently supported by HDF5)
-      if H5Tget_order(self.type_id) != platform_byteorder:
-        nparr.byteswap(True)
+      if self.atom.kind == 'time':
+        # Swap the byteorder by hand (this is not currently supported by HDF5)
+        if H5Tget_order(self.type_id) != platform_byteorder:
+          nparr.byteswap(True)
 
     # Convert some HDF5 types to NumPy after reading
     if self.atom.type == 'time64':
@@ -1638,13 +1781,14 @@ cdef class Array(Leaf):
       self._convertTime64(nparr, 0)
 
     # Modify the elements:
-    with nogil:
+    with hdf5lock, nogil:
         ret = H5ARRAYwrite_records(self.dataset_id, self.type_id, self.rank,
                                    start, step, count, rbuf)
 
     if ret < 0:
       raise HDF5ExtError("Internal error modifying the elements "
                 "(H5ARRAYwrite_records returned errorcode -%i)" % (-ret))
+    sharedcache.invalidate(self._v_file, self._v_pathname)
 
     return
 
@@ -1659,35 +1803,37 @@ cdef class Array(Leaf):
     cdef void *rbuf
     cdef object mode
 
-    # Get the dataspace handle
-    space_id = H5Dget_space(self.dataset_id)
-    # Create a memory dataspace handle
-    size = nparr.size
-    mem_space_id = H5Screate_simple(1, &size, NULL)
-
-    # Select the dataspace to be written
-    H5Sselect_elements(space_id, H5S_SELECT_SET,
-                       <size_t>size, <hsize_t *>coords.data)
-
     # Get the pointer to the buffer data area
     rbuf = nparr.data
+    size = nparr.size
 
     # Convert some NumPy types to HDF5 before storing.
     if self.atom.type == 'time64':
       self._convertTime64(nparr, 0)
 
-    # Do the actual write
-    with nogil:
-        ret = H5Dwrite(self.dataset_id, self.type_id, mem_space_id, space_id,
-                       H5P_DEFAULT, rbuf)
+    with hdf5lock:
+      # Get the dataspace handle
+      space_id = H5Dget_space(self.dataset_id)
+      # Create a memory dataspace handle
+      mem_space_id = H5Screate_simple(1, &size, NULL)
+
+      # Select the dataspace to be written
+      H5Sselect_elements(space_id, H5S_SELECT_SET,
+                         <size_t>size, <hsize_t *>coords.data)
+
+      # Do the actual write
+      with nogil:
+          ret = H5Dwrite(self.dataset_id, self.type_id, mem_space_id,
+                         space_id, H5P_DEFAULT, rbuf)
+
+      # Terminate access to the memory dataspace
+      H5Sclose(mem_space_id)
+      # Terminate access to the dataspace
+      H5Sclose(space_id)
 
     if ret < 0:
       raise HDF5ExtError("Problems writing the array data.")
-
-    # Terminate access to the memory dataspace
-    H5Sclose(mem_space_id)
-    # Terminate access to the dataspace
-    H5Sclose(space_id)
+    sharedcache.invalidate(self._v_file, self._v_pathname)
 
     return
 
@@ -1702,38 +1848,36 @@ cdef class Array(Leaf):
     cdef void *rbuf
     cdef object mode
 
-    # Get the dataspace handle
-    space_id = H5Dget_space(self.dataset_id)
-    # Create a memory dataspace handle
-    size = nparr.size
-    mem_space_id = H5Screate_simple(1, &size, NULL)
-
-    # Select the dataspace to be written
-    # Start by selecting everything
-    H5Sselect_all(space_id)
-    # Now refine with outstanding selections
-    for args in selection:
-      self.perform_selection(space_id, *args)
-
     # Get the pointer to the buffer data area
     rbuf = nparr.data
+    size = nparr.size
 
     # Convert some NumPy types to HDF5 before storing.
     if self.atom.type == 'time64':
       self._convertTime64(nparr, 0)
 
-    # Do the actual write
-    with nogil:
-        ret = H5Dwrite(self.dataset_id, self.type_id, mem_space_id, space_id,
-                       H5P_DEFAULT, rbuf)
+    with hdf5lock:
+      # Get the dataspace handle
+      space_id = H5Dget_space(self.dataset_id)
+      # Create a memory dataspace handle
+      mem_space_id = H5Screate_simple(1, &size, NULL)
+
+      # Select the dataspace to be written
+      self._g_select(space_id, selection)
+
+      # Do the actual write
+      with nogil:
+          ret = H5Dwrite(self.dataset_id, self.type_id, mem_space_id,
+                         space_id, H5P_DEFAULT, rbuf)
+
+      # Terminate access to the memory dataspace
+      H5Sclose(mem_space_id)
+      # Terminate access to the dataspace
+      H5Sclose(space_id)
 
     if ret < 0:
       raise HDF5ExtError("Problems writing the array data.")
-
-    # Terminate access to the memory dataspace
-    H5Sclose(mem_space_id)
-    # Terminate access to the dataspace
-    H5Sclose(space_id)
+    sharedcache.invalidate(self._v_file, self._v_pathname)
 
     return
 
@@ -1876,7 +2020,7 @@ cdef class VLArray(Leaf):
       rbuf = NULL
 
     # Append the records:
-    with nogil:
+    with hdf5lock, nogil:
         ret = H5VLARRAYappend_records(self.dataset_id, self.type_id,
                                       nobjects, self.nrecords, rbuf)
 
@@ -1886,6 +2030,41 @@ cdef class VLArray(Leaf):
     self.nrecords = self.nrecords + 1
 
 
+  def _extend(self, ndarray nparr, ndarray offsets):
+    """Append the rows packed in `nparr` in a single write.
+
+    Row ``i`` is made of the objects in ``nparr[offsets[i]:offsets[i+1]]``,
+    where `nparr` is a contiguous array with an object per element of
+    its first dimension and `offsets` a contiguous array of ``int64``
+    values.
+    """
+
+    cdef int ret
+    cdef hsize_t nrows
+    cdef size_t objsize
+    cdef void *rbuf
+    cdef hsize_t *offs
+
+    nrows = len(offsets) - 1
+    objsize = nparr.strides[0]
+    # Convert some NumPy types to HDF5 before storing.
+    if len(nparr) and self.atom.type == 'time64':
+      self._convertTime64(nparr, 0)
+    rbuf = nparr.data
+    offs = <hsize_t *>offsets.data
+
+    # Append the records:
+    with hdf5lock, nogil:
+        ret = H5VLARRAYextend_records(self.dataset_id, self.type_id,
+                                      nrows, offs, objsize,
+                                      self.nrecords, rbuf)
+
+    if ret < 0:
+      raise HDF5ExtError("Problems appending the records.")
+
+    self.nrecords = self.nrecords + nrows
+
+
   def _modify(self, hsize_t nrow, ndarray nparr, int nobjects):
     cdef int ret
     cdef void *rbuf
@@ -1898,7 +2077,7 @@ cdef class VLArray(Leaf):
         self._convertTime64(nparr, 0)
 
     # Append the records:
-    with nogil:
+    with hdf5lock, nogil:
         ret = H5VLARRAYmodify_records(self.dataset_id, self.type_id,
                                       nrow, nobjects, rbuf)
 
@@ -1932,15 +2111,10 @@ cdef class VLArray(Leaf):
     return size
 
 
-  def _readArray(self, hsize_t start, hsize_t stop, hsize_t step):
-    cdef int i
-    cdef size_t vllen
-    cdef herr_t ret
-    cdef hvl_t *rdata
+  def _readArray(self, hsize_t start, hsize_t stop, hsize_t step,
+                 int flat=0):
     cdef hsize_t nrows
     cdef hid_t space_id
-    cdef hid_t mem_space_id
-    cdef object buf, nparr, shape, datalist
 
     # Compute the number of rows to read
     nrows = get_len_of_range(start, stop, step)
@@ -1949,68 +2123,140 @@ cdef class VLArray(Leaf):
         "Asking for a range of rows exceeding the available ones!.",
         h5bt=False)
 
+    with hdf5lock:
+      # Get the dataspace handle
+      space_id = H5Dget_space(self.dataset_id)
+      # Select the data to be read
+      H5Sselect_hyperslab(space_id, H5S_SELECT_SET, &start, &step,
+                          &nrows, NULL)
+    return self._readSelection(space_id, nrows, flat)
+
+
+  def _readCoords(self, ndarray coords, int flat=0):
+    """Read the rows in `coords` (a contiguous array of ``int64``)."""
+
+    cdef hsize_t nrows
+    cdef hid_t space_id
+
+    nrows = coords.size
+    with hdf5lock:
+      # Get the dataspace handle
+      space_id = H5Dget_space(self.dataset_id)
+      # Select the rows to be read (in the order given)
+      H5Sselect_elements(space_id, H5S_SELECT_SET,
+                         <size_t>nrows, <hsize_t *>coords.data)
+    return self._readSelection(space_id, nrows, flat)
+
+
+  cdef object _readSelection(self, hid_t space_id, hsize_t nrows, int flat):
+    """Read the `nrows` rows selected in `space_id` and close it.
+
+    A list with an array per row is returned, or a ``(values, offsets)``
+    tuple if `flat` is true.  In the latter, `values` packs the objects
+    of all the rows and row ``i`` is ``values[offsets[i]:offsets[i+1]]``.
+    """
+
+    cdef hsize_t i, nobjects
+    cdef size_t vllen, objsize
+    cdef herr_t ret
+    cdef hvl_t *rdata
+    cdef hid_t mem_space_id
+    cdef char *vbuf
+    cdef npy_int64 *offs
+    cdef ndarray values, offsets
+    cdef object buf, nparr, shape, datalist, swap
+
     # Now, read the chunk of rows
-    with nogil:
-        # Allocate the necessary memory for keeping the row handlers
-        rdata = <hvl_t *>malloc(<size_t>nrows*sizeof(hvl_t))
-        # Get the dataspace handle
-        space_id = H5Dget_space(self.dataset_id)
-        # Create a memory dataspace handle
-        mem_space_id = H5Screate_simple(1, &nrows, NULL)
-        # Select the data to be read
-        H5Sselect_hyperslab(space_id, H5S_SELECT_SET, &start, &step, &nrows,
-                            NULL)
-        # Do the actual read
-        ret = H5Dread(self.dataset_id, self.type_id, mem_space_id, space_id,
-                      H5P_DEFAULT, rdata)
+    with hdf5lock:
+      with nogil:
+          # Allocate the necessary memory for keeping the row handlers
+          rdata = <hvl_t *>malloc(<size_t>nrows*sizeof(hvl_t))
+          # Create a memory dataspace handle
+          mem_space_id = H5Screate_simple(1, &nrows, NULL)
+          # Do the actual read
+          ret = H5Dread(self.dataset_id, self.type_id, mem_space_id,
+                        space_id, H5P_DEFAULT, rdata)
+      swap = (self.atom.kind == 'time' and
+              H5Tget_order(self.type_id) != platform_byteorder)
 
     if ret < 0:
+      with hdf5lock:
+        H5Sclose(mem_space_id)
+        H5Sclose(space_id)
+      free(rdata)
       raise HDF5ExtError(
         "VLArray._readArray: Problems reading the array data.")
 
-    datalist = []
-    for i from 0 <= i < nrows:
-      # Number of atoms in row
-      vllen = rdata[i].len
-      # Get the pointer to the buffer data area
-      if vllen > 0:
-        # Create a buffer to keep this info. It is important to do a
-        # copy, because we will dispose the buffer memory later on by
-        # calling the H5Dvlen_reclaim. PyBytes_FromStringAndSize does this.
-        buf = PyBytes_FromStringAndSize(<char *>rdata[i].p,
-                                        vllen*self._atomicsize)
-      else:
-        # Case where there is info with zero lentgh
-        buf = None
-      # Compute the shape for the read array
+    if flat:
+      # Compute the offsets of the rows and pack all of them in a
+      # single buffer.
+      offsets = numpy.empty(nrows + 1, dtype=numpy.int64)
+      offs = <npy_int64 *>offsets.data
+      offs[0] = 0
+      for i from 0 <= i < nrows:
+        offs[i+1] = offs[i] + rdata[i].len
+      nobjects = offs[nrows]
       shape = list(self._atomicshape)
-      shape.insert(0, vllen)  # put the length at the beginning of the shape
-      nparr = numpy.ndarray(
-        buffer=buf, dtype=self._atomicdtype.base, shape=shape)
-      # Set the writeable flag for this ndarray object
-      nparr.flags.writeable = True
-      if self.atom.kind == 'time':
+      shape.insert(0, nobjects)
+      values = numpy.empty(shape, dtype=self._atomicdtype.base)
+      objsize = self._atomicsize
+      vbuf = values.data
+      with nogil:
+        for i from 0 <= i < nrows:
+          vllen = rdata[i].len
+          if vllen > 0:
+            memcpy(vbuf, rdata[i].p, vllen*objsize)
+            vbuf += vllen*objsize
+      datalist = [values]
+    else:
+      datalist = []
+      for i from 0 <= i < nrows:
+        # Number of atoms in row
+        vllen = rdata[i].len
+        # Get the pointer to the buffer data area
+        if vllen > 0:
+          # Create a buffer to keep this info. It is important to do a
+          # copy, because we will dispose the buffer memory later on by
+          # calling the H5Dvlen_reclaim. PyBytes_FromStringAndSize does
+          # this.
+          buf = PyBytes_FromStringAndSize(<char *>rdata[i].p,
+                                          vllen*self._atomicsize)
+        else:
+          # Case where there is info with zero lentgh
+          buf = None
+        # Compute the shape for the read array
+        shape = list(self._atomicshape)
+        shape.insert(0, vllen)  # put the length at the beginning
+        nparr = numpy.ndarray(
+          buffer=buf, dtype=self._atomicdtype.base, shape=shape)
+        # Set the writeable flag for this ndarray object
+        nparr.flags.writeable = True
+        # Append this array to the output list
+        datalist.append(nparr)
+
+    for nparr in datalist:
+      if swap:
         # Swap the byteorder by hand (this is not currently supported by HDF5)
-        if H5Tget_order(self.type_id) != platform_byteorder:
-          nparr.byteswap(True)
+        nparr.byteswap(True)
       # Convert some HDF5 types to NumPy after reading.
-      if self.atom.type == 'time64':
+      if self.atom.type == 'time64' and len(nparr):
         self._convertTime64(nparr, 1)
-      # Append this array to the output list
-      datalist.append(nparr)
 
     # Release resources
-    # Reclaim all the (nested) VL data
-    ret = H5Dvlen_reclaim(self.type_id, mem_space_id, H5P_DEFAULT, rdata)
+    with hdf5lock:
+      # Reclaim all the (nested) VL data
+      ret = H5Dvlen_reclaim(self.type_id, mem_space_id, H5P_DEFAULT, rdata)
+      # Terminate access to the memory dataspace
+      H5Sclose(mem_space_id)
+      # Terminate access to the dataspace
+      H5Sclose(space_id)
     if ret < 0:
       raise HDF5ExtError("VLArray._readArray: error freeing the data buffer.")
-    # Terminate access to the memory dataspace
-    H5Sclose(mem_space_id)
-    # Terminate access to the dataspace
-    H5Sclose(space_id)
     # Free the amount of row pointers to VL row data
     free(rdata)
 
+    if flat:
+      return (values, offsets)
     return datalist
 
 
@@ -13,12 +13,14 @@
 """Here is defined the Index class."""
 
 import sys
+import operator
 from bisect import bisect_left, bisect_right
 from time import time, clock
 import os, os.path
 import tempfile
 import math
 import warnings
+import threading
 
 import numpy
 
@@ -27,15 +29,16 @@ from tables.idxutils import (calcChunksize, calcoptlevels,
 
 from tables import indexesExtension
 from tables.node import NotLoggedMixin
-from tables.atom import UIntAtom, Atom
+from tables.atom import UIntAtom, UInt8Atom, Int64Atom, Atom
 from tables.earray import EArray
 from tables.carray import CArray
 from tables.leaf import Filters
-from tables.indexes import CacheArray, LastRowArray, IndexArray
+from tables.indexes import (CacheArray, LastRowArray, IndexArray,
+    CompositeArray, BitmapArray, DeltaArray)
 from tables.group import Group
 from tables.path import joinPath
 from tables.exceptions import PerformanceWarning
-from tables.utils import is_idx, idx2long, lazyattr
+from tables.utils import is_idx, idx2long, lazyattr, hdf5lock
 from tables.lrucacheExtension import ObjectCache
 
 
@@ -79,6 +82,71 @@ opt_search_types = ("int8", "int16", "int32", "int64",
 # The upper limit for uint32 ints
 max32 = 2**32
 
+# Bitmap indexes are meant for columns with no more distinct values than this
+maxBitmapValues = 256
+
+# The number of bits set in every possible byte
+_popcount = numpy.array([bin(i).count('1') for i in xrange(256)],
+                        dtype='int64')
+
+# Comparison functions for looking up values in bitmap indexes
+_cmpfuncs = { 'lt': operator.lt,
+              'le': operator.le,
+              'eq': operator.eq,
+              'ge': operator.ge,
+              'gt': operator.gt, }
+
+
+def bitmap_to_coords(bitmap, blocksize=2**13):
+    """Get the coordinates of the bits set in a packed `bitmap`.
+
+    The bitmap is unpacked in blocks of `blocksize` bytes.
+    """
+
+    coords = []
+    for start in xrange(0, len(bitmap), blocksize):
+        bits = numpy.unpackbits(bitmap[start:start+blocksize])
+        coords.append(numpy.flatnonzero(bits) + start*8)
+    if not coords:
+        return numpy.array([], dtype='int64')
+    return numpy.concatenate(coords).astype('int64')
+
+
+def _lexsearchsorted(keys, values):
+    """Find the rightmost insertion point of `values` in sorted `keys`.
+
+    `keys` is a list of arrays with the lexicographically sorted keys,
+    and `values` is a tuple with a value for every key.
+    """
+
+    lo, hi = 0, len(keys[0])
+    for (key, value) in zip(keys, values):
+        key = key[lo:hi]
+        lo, hi = (lo + key.searchsorted(value, side='left'),
+                  lo + key.searchsorted(value, side='right'))
+        if lo >= hi:
+            break
+    return hi
+
+
+def _merge_ranges(ranges):
+    """Merge the overlapping ``[start, stop)`` rows in the `ranges` array.
+
+    The result is sorted by start and has no overlapping ranges.
+    """
+
+    if len(ranges) == 0:
+        return numpy.empty(shape=(0, 2), dtype='int64')
+    ranges = ranges[ranges[:,0].argsort(kind='mergesort')]
+    # A range starts a new merged range if it begins after all the
+    # previous ones end
+    ends = numpy.maximum.accumulate(ranges[:,1])
+    isfirst = numpy.concatenate(([True], ranges[1:,0] > ends[:-1]))
+    nfirst = numpy.flatnonzero(isfirst)
+    nlast = numpy.concatenate((nfirst[1:] - 1, [len(ranges) - 1]))
+    return numpy.column_stack(
+        (ranges[nfirst,0], ends[nlast])).astype('int64')
+
 
 def _tableColumnPathnameOfIndex(indexpathname):
     names = indexpathname.split("/")
@@ -270,6 +338,18 @@ class Index(NotLoggedMixin, indexesExtension.Index, Group):
         _is_CSI,  None, None,
         "Whether the index is completely sorted or not.")
 
+    has_delta = property(
+        lambda self: (len(self.delta_updated) > 0 or
+                      len(self.delta_removed) > 0),
+        None, None,
+        "Whether some indexed rows have been updated or removed.")
+
+    nremoved = property(
+        lambda self: long((self.delta_removed[:,1] -
+                           self.delta_removed[:,0]).sum()),
+        None, None,
+        "The number of indexed rows that have been removed from the table.")
+
     @lazyattr
     def nrowsinchunk(self):
         """The number of rows that fits in a *table* chunk."""
@@ -366,6 +446,10 @@ class Index(NotLoggedMixin, indexesExtension.Index, Group):
         self.noverlaps = -1
         """The number of overlaps in an index.  0 means a completely
         sorted index. -1 means that this number is not computed yet."""
+        self.delta_updated = numpy.array([], dtype='int64')
+        """The (index) coordinates of indexed rows updated afterwards."""
+        self.delta_removed = numpy.empty(shape=(0, 2), dtype='int64')
+        """The (index) coordinate ranges of indexed rows removed afterwards."""
         self.tprof = 0
         """Time counter for benchmarking purposes."""
 
@@ -428,6 +512,8 @@ class Index(NotLoggedMixin, indexesExtension.Index, Group):
             nboundsLR += 2 # bounds + begin + end
             # All bounds values (+begin+end) are at the end of sortedLR
             self.bebounds = self.sortedLR[nelementsSLR:nelementsSLR+nboundsLR]
+            # Get the rows changed since the index was built (if any)
+            self._load_delta()
             return
 
         # The index is new. Initialize the values
@@ -789,6 +875,188 @@ class Index(NotLoggedMixin, indexesExtension.Index, Group):
         return
 
 
+    def build(self, nthreads=1, memory=None, progress=None, verbose=False):
+        """Build a completely sorted index out of the indexed column.
+
+        This is an alternative to appending slices and optimizing them
+        afterwards.  The column is read in runs that fit in `memory`
+        bytes, which are sorted by `nthreads` worker threads (the GIL
+        is released while sorting) and saved in the temporary file.
+        The sorted runs are then merged into the slices of the index,
+        so the resulting index is completely sorted.  The index must
+        be new and it must require a temporary file.
+
+        If `progress` is not None, it is called with the number of rows
+        processed so far and the total number of rows to be processed
+        (every row is processed twice: when its run is sorted and when
+        it is merged).  The number of indexed rows is returned.
+        """
+
+        assert self.nelements == 0, "the index must be empty"
+        assert self.indsize == 8, "only full indexes can be built"
+        assert self.temp_required, "a temporary file is required"
+
+        if verbose == True:
+            self.verbose = True
+        else:
+            self.verbose = debug
+        if self.verbose:
+            t1 = time();  c1 = clock()
+
+        table = self.table
+        colpathname = self.column.pathname
+        nrows = table.nrows
+        ss = self.slicesize
+        cs = self.chunksize
+        tmp = self.tmp
+        filters = self.filters
+        atom = Atom.from_dtype(self.dtype)
+        elsize = self.dtype.itemsize + self.indsize
+        if memory is None:
+            memory = 64 * 1024 * 1024
+        nthreads = max(nthreads, 1)
+        if progress is None:
+            progress = lambda done, total: None
+
+        # Every worker keeps a run in memory
+        runsize = memory // (nthreads * elsize)
+        runsize = max(runsize // ss, 1) * ss
+        rstarts = range(0, nrows, runsize)
+        nthreads = min(nthreads, len(rstarts))
+        if self.verbose:
+            print "Sorting %d runs of %d rows with %d threads..." % (
+                len(rstarts), runsize, nthreads)
+
+        # Reads and writes are serialized by the HDF5 lock (see
+        # `tables.utils`); sorting is done in parallel.
+        iolock = hdf5lock
+        tasklock = threading.Lock()
+        tasks = iter(enumerate(rstarts))
+        errors = []
+        done = [0]
+
+        def worker():
+            while not errors:
+                tasklock.acquire()
+                try:
+                    try:
+                        (nrun, rstart) = tasks.next()
+                    except StopIteration:
+                        return
+                finally:
+                    tasklock.release()
+                rstop = min(rstart + runsize, nrows)
+                try:
+                    iolock.acquire()
+                    try:
+                        arr = table._read(rstart, rstop, 1, colpathname)
+                    finally:
+                        iolock.release()
+                    idx = numpy.arange(rstart, rstop, dtype="uint64")
+                    indexesExtension.keysort(arr, idx)
+                    iolock.acquire()
+                    try:
+                        EArray(tmp, 'rsorted%d' % nrun, atom, (0,),
+                               "Sorted run", filters, chunkshape=(cs,),
+                               expectedrows=len(arr)).append(arr)
+                        EArray(tmp, 'rindices%d' % nrun, UIntAtom(itemsize=8),
+                               (0,), "Indices of sorted run", filters,
+                               chunkshape=(cs,),
+                               expectedrows=len(idx)).append(idx)
+                        done[0] += len(arr)
+                        progress(done[0], 2*nrows)
+                    finally:
+                        iolock.release()
+                except Exception, exc:
+                    errors.append(exc)
+
+        workers = [threading.Thread(target=worker) for i in xrange(nthreads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+        # Merge the sorted runs.  The runs are read in buffers, and all
+        # the values not larger than the smallest of the last values in
+        # the buffers can be safely sorted and written out.
+        nruns = len(rstarts)
+        if self.verbose:
+            print "Merging %d runs..." % nruns
+        bufsize = max(memory // ((nruns + 1) * elsize), cs)
+        rsorted = [getattr(tmp, 'rsorted%d' % i) for i in xrange(nruns)]
+        rindices = [getattr(tmp, 'rindices%d' % i) for i in xrange(nruns)]
+        rpos = [0] * nruns
+        bsorted = [None] * nruns
+        bindices = [None] * nruns
+        osorted = numpy.array([], dtype=self.dtype)
+        oindices = numpy.array([], dtype="uint64")
+        while True:
+            # Refill the empty buffers
+            for i in xrange(nruns):
+                if ((bsorted[i] is None or len(bsorted[i]) == 0) and
+                    rpos[i] < rsorted[i].nrows):
+                    stop = rpos[i] + bufsize
+                    bsorted[i] = rsorted[i].read(rpos[i], stop)
+                    bindices[i] = rindices[i].read(rpos[i], stop)
+                    rpos[i] += len(bsorted[i])
+            active = [i for i in xrange(nruns)
+                      if bsorted[i] is not None and len(bsorted[i]) > 0]
+            if not active:
+                break
+            pending = [bsorted[i][-1] for i in active
+                       if rpos[i] < rsorted[i].nrows]
+            ssorted, sindices = [osorted], [oindices]
+            for i in active:
+                if pending:
+                    n = bsorted[i].searchsorted(min(pending), side='right')
+                else:
+                    n = len(bsorted[i])
+                ssorted.append(bsorted[i][:n])
+                sindices.append(bindices[i][:n])
+                bsorted[i] = bsorted[i][n:]
+                bindices[i] = bindices[i][n:]
+            osorted = numpy.concatenate(ssorted)
+            oindices = numpy.concatenate(sindices)
+            indexesExtension.keysort(osorted, oindices)
+            # Write out the complete slices
+            nslices = len(osorted) // ss
+            for j in xrange(nslices):
+                tmp.sorted.append(osorted[j*ss:(j+1)*ss].reshape(1, ss))
+                tmp.indices.append(oindices[j*ss:(j+1)*ss].reshape(1, ss))
+            osorted = osorted[nslices*ss:].copy()
+            oindices = oindices[nslices*ss:].copy()
+            done[0] += nslices*ss
+            progress(done[0], 2*nrows)
+
+        # The remaining values go to the last row
+        nelementsLR = len(osorted)
+        if nelementsLR > 0:
+            tmp.sortedLR[:nelementsLR] = osorted
+            tmp.indicesLR[:nelementsLR] = oindices
+            done[0] += nelementsLR
+            progress(done[0], 2*nrows)
+        for i in xrange(nruns):
+            rsorted[i]._f_remove()
+            rindices[i]._f_remove()
+
+        # Update counters and copy the sorted data into the index
+        self.nelements = nrows
+        self.nelementsSLR = nelementsLR
+        self.nelementsILR = nelementsLR
+        self.nrows = tmp.sorted.nrows
+        if nelementsLR > 0:
+            self.nrows += 1
+        self.cleanup_temp()
+        self._v_attrs.is_CSI = True
+        self.noverlaps = 0
+        if self.verbose:
+            t = round(time()-t1, 4);  c = round(clock()-c1, 4)
+            print "time: %s. clock: %s" % (t, c)
+        return nrows
+
+
     def do_complete_sort(self):
         """Bring an already optimized index into a complete sorted state."""
 
@@ -1712,6 +1980,16 @@ class Index(NotLoggedMixin, indexesExtension.Index, Group):
         return self.nelements
 
 
+    def _g_getCaches(self):
+        caches = []
+        for kind, name in [('limbounds', 'limboundscache'),
+                           ('sortedlr', 'sortedLRcache')]:
+            cache = self.__dict__.get(name)
+            if cache is not None:
+                caches.append((kind, cache))
+        return caches
+
+
     def restorecache(self):
         "Clean the limits cache and resize starts and lengths arrays"
 
@@ -1724,19 +2002,23 @@ class Index(NotLoggedMixin, indexesExtension.Index, Group):
         self._sorted = self.sorted
         self._sorted.boundscache = ObjectCache(params['BOUNDS_MAX_SLOTS'],
                                                params['BOUNDS_MAX_SIZE'],
-                                               'non-opt types bounds')
+                                               'non-opt types bounds',
+                                               params['BOUNDS_POLICY'])
         self.sorted.boundscache = ObjectCache(params['BOUNDS_MAX_SLOTS'],
                                               params['BOUNDS_MAX_SIZE'],
-                                              'non-opt types bounds')
+                                              'non-opt types bounds',
+                                              params['BOUNDS_POLICY'])
         """A cache for the bounds (2nd hash) data. Only used for
         non-optimized types searches."""
         self.limboundscache = ObjectCache(params['LIMBOUNDS_MAX_SLOTS'],
                                           params['LIMBOUNDS_MAX_SIZE'],
-                                          'bounding limits')
+                                          'bounding limits',
+                                          params['LIMBOUNDS_POLICY'])
         """A cache for bounding limits."""
         self.sortedLRcache = ObjectCache(params['SORTEDLR_MAX_SLOTS'],
                                          params['SORTEDLR_MAX_SIZE'],
-                                         'last row chunks')
+                                         'last row chunks',
+                                         params['SORTEDLR_POLICY'])
         """A cache for the last row chunks. Only used for searches in
         the last row, and mainly useful for small indexes."""
         self.starts = numpy.empty(shape=self.nrows, dtype=numpy.int32)
@@ -1981,6 +2263,236 @@ class Index(NotLoggedMixin, indexesExtension.Index, Group):
         return chunkmap
 
 
+    def get_coords(self):
+        """Get the sorted row coordinates found in the last search.
+
+        Only full indexes keep the actual row coordinates in the table,
+        so this cannot be used with other kinds of indexes.
+        """
+
+        assert self.indsize == 8, "only full indexes keep row coordinates"
+        nslices = self.nslices
+        starts, lengths = self.starts, self.lengths
+        indices = self.indices
+        coords = []
+        for nslice in xrange(self.nrows):
+            start = starts[nslice];  stop = start + lengths[nslice]
+            if stop > start:
+                idx = numpy.empty(shape=stop-start, dtype='u8')
+                if nslice < nslices:
+                    indices._readIndexSlice(nslice, start, stop, idx)
+                else:
+                    self.indicesLR._readIndexSlice(start, stop, idx)
+                coords.append(idx)
+        if not coords:
+            return numpy.array([], dtype='int64')
+        coords = numpy.concatenate(coords).astype('int64')
+        coords.sort()
+        return coords
+
+
+    # Deltas
+    # ~~~~~~
+    # Rows updated or removed in the table after being indexed are kept
+    # as a delta, and queries take it into account until the index is
+    # built again.  Coordinates in the index are never changed, so the
+    # removed rows are kept as ranges of *index* coordinates, which are
+    # translated into table coordinates (and back) when needed.
+    #
+    # On disk, the changes are just appended to the ``dupdated`` and
+    # ``dremoved`` arrays as they happen; they are only sorted and merged
+    # in memory, when the index is opened.
+
+    def _append_delta(self, name, values):
+        """Append `values` to the `name` delta array on disk."""
+
+        if name in self._v_children:
+            array = self._f_getChild(name)
+        else:
+            title = {'dupdated': "Updated rows",
+                     'dremoved': "Removed row ranges"}[name]
+            array = DeltaArray(self, name, Int64Atom(),
+                               (0,) + values.shape[1:], title, self.filters)
+        array.append(values)
+
+
+    def _load_delta(self):
+        """Load the delta saved on disk, sorting and merging it."""
+
+        if 'dremoved' in self._v_children:
+            self.delta_removed = _merge_ranges(
+                self._f_getChild('dremoved').read())
+        if 'dupdated' in self._v_children:
+            updated = numpy.unique(self._f_getChild('dupdated').read())
+            self.delta_updated = self._not_removed(updated)
+
+
+    def _not_removed(self, coords):
+        """Leave the removed rows out of the sorted index `coords`."""
+
+        removed = self.delta_removed
+        if len(removed) == 0:
+            return coords
+        nrange = removed[:,0].searchsorted(coords, side='right') - 1
+        isremoved = ((nrange >= 0) &
+                     (coords < removed[numpy.maximum(nrange, 0), 1]))
+        return coords[~isremoved]
+
+
+    def _removed_before(self, coords):
+        """Get the number of removed rows before the index `coords`."""
+
+        removed = self.delta_removed
+        if len(removed) == 0:
+            return numpy.zeros(len(coords), dtype='int64')
+        rstarts, rstops = removed[:,0], removed[:,1]
+        cumlen = numpy.concatenate(([0], numpy.cumsum(rstops - rstarts)))
+        # The number of ranges starting before every coordinate
+        nranges = rstarts.searchsorted(coords, side='left')
+        prev = numpy.maximum(nranges - 1, 0)
+        partial = numpy.minimum(coords, rstops[prev]) - rstarts[prev]
+        return numpy.where(nranges > 0, cumlen[prev] + partial, 0)
+
+
+    def _to_index_coords(self, coords):
+        """Translate table coordinates into index coordinates."""
+
+        coords = numpy.asarray(coords, dtype='int64')
+        removed = self.delta_removed
+        if len(removed) == 0:
+            return coords
+        cumlen = numpy.concatenate(
+            ([0], numpy.cumsum(removed[:,1] - removed[:,0])))
+        # Where the removed ranges would start in table coordinates
+        tstarts = removed[:,0] - cumlen[:-1]
+        return coords + cumlen[tstarts.searchsorted(coords, side='right')]
+
+
+    def _to_table_coords(self, coords):
+        """Translate sorted index coordinates into table coordinates.
+
+        Coordinates of removed rows are left out.
+        """
+
+        if len(self.delta_removed) == 0:
+            return coords
+        coords = self._not_removed(coords)
+        return coords - self._removed_before(coords)
+
+
+    def _drop_last_row(self):
+        """Leave the rows in the last row out of the index."""
+
+        self.nelements -= self.nelementsILR
+        self.nrows = self.sorted.nrows
+        self.nelementsSLR = 0
+        self.nelementsILR = 0
+        self.sortedLR.attrs.nelements = 0
+        self.indicesLR.attrs.nelements = 0
+        self.dirtycache = True
+
+
+    def add_updated(self, coords):
+        """Add the table `coords` of updated rows to the delta.
+
+        Rows not indexed yet are not taken into account.
+        """
+
+        coords = numpy.asarray(coords, dtype='int64')
+        coords = coords[coords < self.nelements - self.nremoved]
+        if len(coords) == 0:
+            return
+        coords = numpy.unique(self._to_index_coords(coords))
+        # Only the rows not in the delta yet are added (in place)
+        updated = self.delta_updated
+        pos = updated.searchsorted(coords)
+        if len(updated) > 0:
+            isnew = updated[numpy.minimum(pos, len(updated) - 1)] != coords
+            coords, pos = coords[isnew], pos[isnew]
+        if len(coords) == 0:
+            return
+        self.delta_updated = numpy.insert(updated, pos, coords)
+        self._append_delta('dupdated', coords)
+
+
+    def add_removed(self, start, nrows):
+        """Add the `nrows` table rows removed from `start` to the delta.
+
+        The rows in the last row of the index are always left out of
+        the index when some of them are removed, so that rows can still
+        be appended to the index afterwards.  Rows not indexed are not
+        taken into account.
+        """
+
+        stop = start + nrows
+        nremoved = self.nremoved
+        if (self.nelementsILR > 0 and
+            stop > self.nelements - self.nelementsILR - nremoved):
+            self._drop_last_row()
+        stop = min(stop, self.nelements - nremoved)
+        if start >= stop:
+            return
+        istart, istop = self._to_index_coords([start, stop-1])
+        istop += 1
+        updated = self.delta_updated
+        self.delta_updated = updated[(updated < istart) | (updated >= istop)]
+        newrange = numpy.array([[istart, istop]], dtype='int64')
+        self.delta_removed = _merge_ranges(
+            numpy.concatenate((self.delta_removed, newrange)))
+        self._append_delta('dremoved', newrange)
+
+
+    def get_delta_coords(self, coords):
+        """Apply the delta to the sorted index `coords` of the last search.
+
+        The coordinates of removed rows are left out, and the rest are
+        translated into table coordinates.  The rows updated afterwards
+        are always included, as they have to be checked against the
+        condition.
+        """
+
+        updated = self.delta_updated
+        if len(updated) > 0:
+            coords = numpy.union1d(coords, updated)
+        return self._to_table_coords(coords)
+
+
+    def get_delta_chunkmap(self, chunkmap):
+        """Translate the `chunkmap` of the last search into table chunks.
+
+        The chunks with updated rows are always selected, as their rows
+        have to be checked against the condition.
+        """
+
+        nrowsinchunk = self.nrowsinchunk
+        if len(self.delta_removed) > 0:
+            # The table rows for every selected chunk in the index
+            ichunks = chunkmap.nonzero()[0]
+            istarts = ichunks * nrowsinchunk
+            istops = numpy.minimum(istarts + nrowsinchunk, self.nelements)
+            tstarts = istarts - self._removed_before(istarts)
+            tstops = istops - self._removed_before(istops)
+            nonempty = tstops > tstarts
+            tstarts = tstarts[nonempty] // nrowsinchunk
+            tstops = (tstops[nonempty] - 1) // nrowsinchunk + 1
+            nrows = self.nelements - self.nremoved
+            nchunks = long(math.ceil(float(nrows)/nrowsinchunk))
+            if len(tstarts) == 0:
+                chunkmap = numpy.zeros(shape=nchunks, dtype="bool")
+            else:
+                # Both starts and stops are sorted, so a table chunk is
+                # selected if the last range starting before it
+                # contains it.
+                tchunks = numpy.arange(nchunks)
+                nrange = tstarts.searchsorted(tchunks, side='right') - 1
+                chunkmap = ((nrange >= 0) &
+                            (tstops[numpy.maximum(nrange, 0)] > tchunks))
+        if len(self.delta_updated) > 0:
+            tupdated = self._to_table_coords(self.delta_updated)
+            chunkmap[tupdated // nrowsinchunk] = True
+        return chunkmap
+
+
     def getLookupRange(self, ops, limits):
         assert len(ops) in [1, 2]
         assert len(limits) in [1, 2]
@@ -2086,6 +2598,313 @@ class Index(NotLoggedMixin, indexesExtension.Index, Group):
 
 
 
+class BitmapIndex(NotLoggedMixin, Group):
+    """Represent a bitmap index for a column with few distinct values.
+
+    Every distinct value of the column is kept in the ``values`` array,
+    and the rows holding the i-th value are marked in the ``bitmap<i>``
+    array (one bit per row, packed in bytes).  Bitmaps are made mostly
+    of zeros, so they compress very well with the index filters.
+
+    Lookups (``==``, ``!=`` and ranges) are solved by OR-ing the bitmaps
+    of the selected values, and the bitmaps of several lookups can be
+    combined with bitwise AND/OR operations.
+
+    Parameters
+    ----------
+    parentNode
+        The parent :class:`Group` object.
+    name : str
+        The name of this node in its parent group.
+    atom : Atom
+        An Atom object representing the values of the indexed column.
+    title
+        Sets a TITLE attribute of the BitmapIndex entity.
+    optlevel
+        The optimization level for this index (kept for compatibility
+        with other kinds of indexes).
+    filters : Filters
+        An instance of the Filters class that provides information about the
+        desired I/O filters to be applied during the life of this object.
+
+    """
+
+    _c_classId = 'BITMAPINDEX'
+
+
+    # <properties>
+
+    kind = 'bitmap'
+    """The kind of this index."""
+
+    is_CSI = False
+    """Bitmap indexes are never completely sorted."""
+
+    has_delta = False
+    """Bitmap indexes do not keep track of updated or removed rows."""
+
+    nremoved = 0
+    """Bitmap indexes do not keep track of updated or removed rows."""
+
+    reduction = 1
+    """Bitmap indexes are exact (no reduction is applied)."""
+
+    blocksize = 2**16
+    """The number of rows added to the bitmaps at a time."""
+
+    filters = property(
+        lambda self: self._v_filters, None, None, """
+        Filter properties for this index - see Filters in
+        :ref:`FiltersClassDescr`.""")
+
+    def _getdirty(self):
+        if 'DIRTY' not in self._v_attrs:
+            return False
+        return self._v_attrs.DIRTY
+
+    def _setdirty(self, dirty):
+        wasdirty, isdirty = self.dirty, bool(dirty)
+        self._v_attrs.DIRTY = dirty
+        conditionCache = self.table._conditionCache
+        if not wasdirty and isdirty:
+            conditionCache.nail()
+        if wasdirty and not isdirty:
+            conditionCache.unnail()
+
+    dirty = property(
+        _getdirty, _setdirty, None,
+        """Whether the index is dirty or not.
+
+        Dirty indexes are out of sync with column data, so they exist but they
+        are not usable.
+        """ )
+
+    def _getcolumn(self):
+        tablepath, columnpath = _tableColumnPathnameOfIndex(self._v_pathname)
+        table = self._v_file._getNode(tablepath)
+        column = table.cols._g_col(columnpath)
+        return column
+
+    column = property(
+        _getcolumn, None, None, """
+        The Column (see :ref:`ColumnClassDescr`) instance for the indexed
+        column.""")
+
+    def _gettable(self):
+        tablepath, columnpath = _tableColumnPathnameOfIndex(self._v_pathname)
+        table = self._v_file._getNode(tablepath)
+        return table
+
+    table = property(
+        _gettable, None, None,
+        "Accessor for the `Table` object of this index.")
+
+    def _getvalues(self):
+        if self._values is None:
+            self._values = self._f_getChild('values').read()
+        return self._values
+
+    values = property(
+        _getvalues, None, None,
+        "The distinct values of the indexed column.")
+
+    @lazyattr
+    def nrowsinchunk(self):
+        """The number of rows that fits in a *table* chunk."""
+
+        return self.table.chunkshape[0]
+
+    # </properties>
+
+
+    def __init__(self, parentNode, name, atom=None, title="",
+                 optlevel=None, filters=None, new=True):
+
+        self._atom = atom
+        """The atom of the values array (only for new indexes)."""
+        self.optlevel = optlevel
+        """The optimization level for this index."""
+        self.dtype = None
+        """The datatype of the indexed values."""
+        self.nelements = None
+        """The number of currently indexed rows for this column."""
+        self._values = None
+        """The cached distinct values of the column."""
+        self._bitmap = None
+        """The bitmap with the rows found by the last search."""
+
+        super(BitmapIndex, self).__init__(
+            parentNode, name, title, new, filters)
+
+
+    def _g_postInitHook(self):
+        super(BitmapIndex, self)._g_postInitHook()
+
+        if not self._v_new:
+            attrs = self._v_attrs
+            self.optlevel = int(attrs.optlevel)
+            self.nelements = long(attrs.nelements)
+            self.dtype = self._f_getChild('values').atom.dtype
+            return
+
+        # The index is new.  Initialize the values.
+        self.nelements = 0
+        self.dtype = self._atom.dtype
+        self._v_attrs.optlevel = self.optlevel
+        self._v_attrs.nelements = numpy.uint64(0)
+        BitmapArray(self, 'values', self._atom, (0,),
+                    "Distinct values of the column")
+
+
+    def append(self, arr):
+        """Add the values in `arr` for the rows next to the indexed ones."""
+
+        arr = numpy.asarray(arr)
+        nelements = self.nelements
+        offset = nelements % 8
+        nbytes = (nelements + 7) // 8
+        valuesarray = self._f_getChild('values')
+        values = self.values
+
+        # Create empty bitmaps for the rows already indexed in case of
+        # new distinct values.  NaNs are never equal to any value, so
+        # they are left out.
+        newvalues = numpy.unique(arr)
+        newvalues = numpy.setdiff1d(newvalues[newvalues == newvalues], values)
+        if len(newvalues) > 0:
+            nvalues = len(values) + len(newvalues)
+            if len(values) <= maxBitmapValues < nvalues:
+                warnings.warn(
+                    "the bitmap index for column ``%s`` is exceeding the "
+                    "recommended maximum of distinct values (%d); queries "
+                    "and appends will get slower" % (
+                    self.column.pathname, maxBitmapValues),
+                    PerformanceWarning )
+            for value in newvalues:
+                nvalue = valuesarray.nrows
+                bitmap = BitmapArray(
+                    self, 'bitmap%d' % nvalue, UInt8Atom(), (0,),
+                    "Bitmap for value #%d" % nvalue)
+                for start in xrange(0, nbytes, self.blocksize):
+                    bitmap.append(numpy.zeros(
+                        min(self.blocksize, nbytes - start), dtype='uint8'))
+                valuesarray.append(numpy.array([value], dtype=self.dtype))
+            self._values = None
+            values = self.values
+
+        for (nvalue, value) in enumerate(values):
+            bitmap = self._f_getChild('bitmap%d' % nvalue)
+            bits = (arr == value)
+            if offset > 0:
+                # Merge the bits in the last byte, which is not complete
+                lastbits = numpy.unpackbits(bitmap[-1:])[:offset]
+                bits = numpy.concatenate((lastbits.astype('bool'), bits))
+                bitmap.truncate(bitmap.nrows - 1)
+            bitmap.append(numpy.packbits(bits))
+
+        self.nelements = nelements + len(arr)
+        self._v_attrs.nelements = numpy.uint64(self.nelements)
+
+
+    def getLookupRange(self, ops, limits):
+        """Get the lookup range for `ops` and `limits`.
+
+        Values are looked up directly in bitmap indexes, so this is just
+        a ``(ops, limits)`` pair to be passed to `search()`.
+        """
+
+        assert len(ops) == len(limits)
+        return (tuple(ops), tuple(limits))
+
+
+    def search(self, item):
+        """Compute the bitmap of the rows fulfilling `item`.
+
+        `item` is an ``(ops, limits)`` pair as returned by
+        `getLookupRange()`.  The number of rows found is returned.
+        """
+
+        ops, limits = item
+        values = self.values
+        selected = numpy.ones(len(values), dtype='bool')
+        negate = False
+        for (op, limit) in zip(ops, limits):
+            if op == 'ne':
+                op, negate = 'eq', True
+            selected &= _cmpfuncs[op](values, limit)
+
+        nelements = self.nelements
+        nbytes = (nelements + 7) // 8
+        bitmap = numpy.zeros(nbytes, dtype='uint8')
+        for nvalue in numpy.flatnonzero(selected):
+            bitmap |= self._f_getChild('bitmap%d' % nvalue).read()
+        if negate:
+            bitmap = ~bitmap
+            # Clear the padding bits in the last byte
+            padding = nbytes*8 - nelements
+            if padding > 0:
+                bitmap[-1] &= (0xff << padding) & 0xff
+        self._bitmap = bitmap
+        return long(_popcount[bitmap].sum())
+
+
+    def get_bitmap(self):
+        """Get the packed bitmap of the rows found in the last search."""
+
+        return self._bitmap
+
+
+    def get_coords(self):
+        """Get the sorted row coordinates found in the last search."""
+
+        return bitmap_to_coords(self._bitmap)
+
+
+    def get_chunkmap(self):
+        """Compute a map with the interesting chunks in index"""
+
+        nrowsinchunk = self.nrowsinchunk
+        nchunks = long(math.ceil(float(self.nelements)/nrowsinchunk))
+        chunkmap = numpy.zeros(shape=nchunks, dtype="bool")
+        chunkmap[self.get_coords() // nrowsinchunk] = True
+        return chunkmap
+
+
+    def _f_remove(self, recursive=False):
+        """Remove this BitmapIndex object"""
+
+        # Index removal is always recursive,
+        # no matter what `recursive` says.
+        super(BitmapIndex, self)._f_remove(True)
+
+
+    def __str__(self):
+        """This provides a more compact representation than __repr__"""
+
+        filters = ""
+        if self.filters.complevel:
+            if self.filters.shuffle:
+                filters += ", shuffle"
+            filters += ", %s(%s)" % (self.filters.complib,
+                                     self.filters.complevel)
+        return "BitmapIndex(%s, %s%s)" % (self.optlevel, self.kind, filters)
+
+
+    def __repr__(self):
+        """This provides more metainfo than standard __repr__"""
+
+        cpathname = self.table._v_pathname + ".cols." + self.column.pathname
+        retstr = """%s (BitmapIndex for column %s)
+  kind := %s
+  filters := %s
+  nelements := %s
+  dirty := %s
+  values := %s""" % (self._v_pathname, cpathname, self.kind, self.filters,
+                     self.nelements, self.dirty, self.values)
+        return retstr
+
+
+
 class IndexesDescG(NotLoggedMixin, Group):
     _c_classId = 'DINDEX'
 
@@ -2111,6 +2930,14 @@ class IndexesTableG(NotLoggedMixin, Group):
         del self._v_attrs.AUTO_INDEX
     auto = property(_getauto, _setauto, _delauto)
 
+    def _getincremental(self):
+        if 'INCREMENTAL_INDEX' not in self._v_attrs:
+            return False
+        return self._v_attrs.INCREMENTAL_INDEX
+    def _setincremental(self, incremental):
+        self._v_attrs.INCREMENTAL_INDEX = bool(incremental)
+    incremental = property(_getincremental, _setincremental)
+
     def _g_widthWarning(self):
         warnings.warn(
             "the number of indexed columns on a single table "
@@ -2138,6 +2965,383 @@ class IndexesTableG(NotLoggedMixin, Group):
 
 
 
+class CompositeIndex(NotLoggedMixin, Group):
+    """Represent a sorted index over several columns of a table.
+
+    The values of the key columns are kept in lexicographical order in
+    the ``key0``, ``key1``... arrays, while the ``indices`` array keeps
+    the row coordinates of every sorted entry.  Equality lookups on a
+    prefix of the keys, optionally followed by a range on the next key,
+    select a single contiguous range of entries, so the coordinates of
+    the matching rows are obtained without visiting any other row.
+
+    The index is made of one or more segments of sorted entries.  It is
+    built as a single segment, and the rows appended to the table
+    afterwards are sorted into new segments (see `append_rows()`).
+    Rows not added to the index yet are checked by queries in-kernel.
+
+    Parameters
+    ----------
+    parentNode
+        The parent :class:`Group` object (the indexes group of the
+        table).
+    name : str
+        The name of this node in its parent group.
+    colpathnames
+        The pathnames of the key columns, in key order.
+    filters : Filters
+        An instance of the Filters class that provides information about the
+        desired I/O filters to be applied during the life of this object.
+    new : bool
+        Whether the index is being created or opened.
+
+    """
+
+    _c_classId = 'COMPOSITEINDEX'
+
+
+    # <properties>
+
+    kind = 'full'
+    """The kind of this index (only ``full`` is supported)."""
+
+    filters = property(
+        lambda self: self._v_filters, None, None, """
+        Filter properties for this index - see Filters in
+        :ref:`FiltersClassDescr`.""")
+
+    def _getdirty(self):
+        if 'DIRTY' not in self._v_attrs:
+            return False
+        return self._v_attrs.DIRTY
+
+    def _setdirty(self, dirty):
+        wasdirty, isdirty = self.dirty, bool(dirty)
+        self._v_attrs.DIRTY = dirty
+        # Dirty indexes can not be used by cached conditions.
+        conditionCache = self.table._conditionCache
+        if not wasdirty and isdirty:
+            conditionCache.nail()
+        if wasdirty and not isdirty:
+            conditionCache.unnail()
+
+    dirty = property(
+        _getdirty, _setdirty, None,
+        """Whether the index is dirty or not.
+
+        Dirty indexes are out of sync with column data, so they exist but they
+        are not usable.
+        """ )
+
+    nelements = property(
+        lambda self: self._f_getChild('indices').nrows, None, None,
+        "The number of indexed rows.")
+
+    def _gettable(self):
+        tablepath, name = _tableColumnPathnameOfIndex(self._v_pathname)
+        table = self._v_file._getNode(tablepath)
+        return table
+
+    table = property(
+        _gettable, None, None,
+        "Accessor for the `Table` object of this index.")
+
+    # </properties>
+
+
+    def __init__(self, parentNode, name, colpathnames=None, filters=None,
+                 new=False):
+
+        self.colpathnames = colpathnames
+        """The pathnames of the key columns, in key order."""
+        self.segments = []
+        """The start positions of the sorted segments of the index."""
+
+        from tables.file import openFile
+        self._openFile = openFile
+        """The `openFile()` function, to avoid a circular import."""
+
+        super(CompositeIndex, self).__init__(
+            parentNode, name, "", new, filters)
+
+
+    def _g_postInitHook(self):
+        super(CompositeIndex, self)._g_postInitHook()
+
+        if not self._v_new:
+            self.colpathnames = list(self._v_attrs.colpathnames)
+            if 'segments' in self._v_attrs:
+                self.segments = list(self._v_attrs.segments)
+            elif self.nelements > 0:
+                self.segments = [0]
+            return
+
+        # The index is new.  Create the (empty) key and indices arrays.
+        self._v_attrs.colpathnames = list(self.colpathnames)
+        self._v_attrs.segments = []
+        table = self.table
+        expectedrows = max(table.nrows, table._v_expectedrows)
+        for (i, colpathname) in enumerate(self.colpathnames):
+            atom = Atom.from_dtype(table.coldtypes[colpathname])
+            CompositeArray(self, 'key%d' % i, atom, (0,),
+                           "Sorted values of column " + colpathname,
+                           expectedrows=expectedrows)
+        CompositeArray(self, 'indices', Int64Atom(), (0,),
+                       "Row coordinates of sorted values",
+                       expectedrows=expectedrows)
+
+
+    def _getarrays(self):
+        """Get the key arrays followed by the indices array."""
+
+        arrays = [ self._f_getChild('key%d' % i)
+                   for i in xrange(len(self.colpathnames)) ]
+        arrays.append(self._f_getChild('indices'))
+        return arrays
+
+
+    def _setsegments(self, segments):
+        self.segments = segments
+        self._v_attrs.segments = segments
+
+
+    def _sortrows(self, start, stop):
+        """Get the keys of table rows in ``[start, stop)`` sorted.
+
+        The sorted keys are returned followed by the row coordinates.
+        """
+
+        table = self.table
+        keys = [ table._read(start, stop, 1, colpathname)
+                 for colpathname in self.colpathnames ]
+        # The last key passed to ``lexsort()`` is the primary one
+        order = numpy.lexsort(keys[::-1])
+        sorted = [key[order] for key in keys]
+        sorted.append(order.astype('int64') + start)
+        return sorted
+
+
+    def _mergesorted(self, parts):
+        """Merge the sequences of sorted keys and coordinates in `parts`."""
+
+        merged = [numpy.concatenate(arrs) for arrs in zip(*parts)]
+        order = numpy.lexsort(merged[-2::-1])
+        return [arr[order] for arr in merged]
+
+
+    def _elsize(self):
+        """The size in bytes of an entry of the index."""
+
+        coldtypes = self.table.coldtypes
+        return sum([ coldtypes[colpathname].itemsize
+                     for colpathname in self.colpathnames ]) + 8
+
+
+    def rebuild(self):
+        """Compute the index again out of the current table contents.
+
+        The rows are sorted in runs that fit in ``INDEX_BUILD_MEMORY``
+        bytes, which are saved in a temporary file and merged into a
+        single segment afterwards, like in `Index.build()`.
+        """
+
+        table = self.table
+        nrows = table.nrows
+        memory = self._v_file.params['INDEX_BUILD_MEMORY']
+        runsize = max(memory // self._elsize(), 1)
+        arrays = self._getarrays()
+        for array in arrays:
+            array.truncate(0)
+        if nrows <= runsize:
+            for (array, arr) in zip(arrays, self._sortrows(0, nrows)):
+                array.append(arr)
+        else:
+            fd, tmpfilename = tempfile.mkstemp(".tmp", "pytables-")
+            # Close the file descriptor so as to avoid leaks
+            os.close(fd)
+            tmpfile = self._openFile(tmpfilename, "w")
+            try:
+                runs = []
+                for rstart in xrange(0, nrows, runsize):
+                    run = []
+                    sorted = self._sortrows(rstart, min(rstart+runsize, nrows))
+                    for (i, arr) in enumerate(sorted):
+                        rarray = EArray(
+                            tmpfile.root, 'run%d_%d' % (len(runs), i),
+                            Atom.from_dtype(arr.dtype), (0,), "Sorted run",
+                            self.filters, expectedrows=len(arr))
+                        rarray.append(arr)
+                        run.append(rarray)
+                    runs.append(run)
+                self._mergeruns(runs, arrays, memory)
+            finally:
+                tmpfile.close()
+                os.remove(tmpfilename)
+        if nrows > 0:
+            self._setsegments([0])
+        else:
+            self._setsegments([])
+        self.dirty = False
+
+
+    def _mergeruns(self, runs, arrays, memory):
+        """Merge the sorted `runs` and append them to `arrays`.
+
+        The runs are read in buffers, and all the entries not larger
+        than the smallest of the last entries in the buffers can be
+        safely sorted and written out.
+        """
+
+        nruns = len(runs)
+        nkeys = len(self.colpathnames)
+        bufsize = max(memory // ((nruns + 1) * self._elsize()), 1)
+        rpos = [0] * nruns
+        buffers = [None] * nruns
+        while True:
+            # Refill the empty buffers
+            for i in xrange(nruns):
+                if ((buffers[i] is None or len(buffers[i][0]) == 0) and
+                    rpos[i] < runs[i][0].nrows):
+                    stop = rpos[i] + bufsize
+                    buffers[i] = [rarray.read(rpos[i], stop)
+                                  for rarray in runs[i]]
+                    rpos[i] += len(buffers[i][0])
+            active = [i for i in xrange(nruns)
+                      if buffers[i] is not None and len(buffers[i][0]) > 0]
+            if not active:
+                break
+            pending = [ tuple([key[-1] for key in buffers[i][:nkeys]])
+                        for i in active if rpos[i] < runs[i][0].nrows ]
+            parts = []
+            for i in active:
+                if pending:
+                    n = _lexsearchsorted(buffers[i][:nkeys], min(pending))
+                else:
+                    n = len(buffers[i][0])
+                parts.append([arr[:n] for arr in buffers[i]])
+                buffers[i] = [arr[n:] for arr in buffers[i]]
+            for (array, arr) in zip(arrays, self._mergesorted(parts)):
+                array.append(arr)
+
+
+    def append_rows(self):
+        """Add the rows appended to the table since the last update.
+
+        The new rows are sorted into a new segment.  The last segments
+        are merged with it as long as they are not larger than it and
+        they fit in ``INDEX_BUILD_MEMORY`` bytes, so that the number of
+        segments grows logarithmically with the number of updates.  The
+        number of rows added is returned.
+        """
+
+        start, stop = self.nelements, self.table.nrows
+        if start >= stop:
+            return 0
+        maxrows = self._v_file.params['INDEX_BUILD_MEMORY'] // self._elsize()
+        arrays = self._getarrays()
+        segments = list(self.segments)
+        sorted = self._sortrows(start, stop)
+        send = start
+        while segments:
+            sstart = segments[-1]
+            nsrows, nrows = send - sstart, len(sorted[0])
+            if nsrows > nrows or nsrows + nrows > maxrows:
+                break
+            ssorted = [array.read(sstart, send) for array in arrays]
+            sorted = self._mergesorted([ssorted, sorted])
+            segments.pop()
+            send = sstart
+        for (array, arr) in zip(arrays, sorted):
+            if send < start:
+                array.truncate(send)
+            array.append(arr)
+        segments.append(send)
+        self._setsegments(segments)
+        return stop - start
+
+
+    def _bisect(self, array, value, lo, hi, side):
+        """Find the insertion point of `value` in ``array[lo:hi]``.
+
+        Elements are read one by one until the range fits in the
+        buffer of `array`, which is then searched in memory.
+        """
+
+        nrowsinbuf = array.nrowsinbuf
+        while hi - lo > nrowsinbuf:
+            mid = (lo + hi) // 2
+            midvalue = array[mid]
+            if midvalue < value or (side == 'right' and midvalue == value):
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo >= hi:
+            return lo
+        return lo + array.read(lo, hi).searchsorted(value, side=side)
+
+
+    def _searchsegment(self, lookups, lo, hi):
+        """Get the range of entries in ``[lo, hi)`` fulfilling `lookups`."""
+
+        for (i, (ops, lims)) in enumerate(lookups):
+            array = self._f_getChild('key%d' % i)
+            for (op, lim) in zip(ops, lims):
+                if op == 'eq':
+                    lo, hi = (self._bisect(array, lim, lo, hi, 'left'),
+                              self._bisect(array, lim, lo, hi, 'right'))
+                elif op == 'gt':
+                    lo = self._bisect(array, lim, lo, hi, 'right')
+                elif op == 'ge':
+                    lo = self._bisect(array, lim, lo, hi, 'left')
+                elif op == 'lt':
+                    hi = self._bisect(array, lim, lo, hi, 'left')
+                elif op == 'le':
+                    hi = self._bisect(array, lim, lo, hi, 'right')
+                if lo >= hi:
+                    return (lo, lo)
+        return (lo, hi)
+
+
+    def search(self, lookups):
+        """Get the coordinates of the rows fulfilling `lookups`.
+
+        `lookups` is a sequence of ``(ops, limits)`` pairs for the
+        leading keys of the index.  All of them but the last one must
+        be equalities (``('eq',), (value,)``).  Every segment of the
+        index is searched, and the coordinates are returned as a sorted
+        array of int64.
+        """
+
+        indices = self._f_getChild('indices')
+        bounds = self.segments + [self.nelements]
+        coords = []
+        for nseg in xrange(len(self.segments)):
+            lo, hi = self._searchsegment(
+                lookups, bounds[nseg], bounds[nseg+1])
+            if lo < hi:
+                coords.append(indices.read(lo, hi))
+        if not coords:
+            return numpy.array([], dtype='int64')
+        coords = numpy.concatenate(coords)
+        coords.sort()
+        return coords
+
+
+    def __repr__(self):
+        """This provides more metainfo than standard __repr__"""
+
+        cpathname = self.table._v_pathname + ".cols"
+        retstr = """%s (CompositeIndex for columns %s)
+  nelements := %s
+  dirty := %s
+  filters := %s""" % (self._v_pathname,
+                      ", ".join(["%s.%s" % (cpathname, cpn)
+                                 for cpn in self.colpathnames]),
+                      self.nelements, self.dirty, self.filters)
+        return retstr
+
+
+
 class OldIndex(NotLoggedMixin, Group):
     """This is meant to hide indexes of PyTables 1.x files."""
 
@@ -35,6 +35,27 @@ class LastRowArray(NotLoggedMixin, CArray, indexesExtension.LastRowArray):
     _c_classId = 'LASTROWARRAY'
 
 
+class CompositeArray(NotLoggedMixin, EArray):
+    """Container for the sorted keys and indices of a composite index."""
+
+    # Class identifier.
+    _c_classId = 'COMPOSITEARRAY'
+
+
+class BitmapArray(NotLoggedMixin, EArray):
+    """Container for the distinct values and bitmaps of a bitmap index."""
+
+    # Class identifier.
+    _c_classId = 'BITMAPARRAY'
+
+
+class DeltaArray(NotLoggedMixin, EArray):
+    """Container for the rows changed since an index was last built."""
+
+    # Class identifier.
+    _c_classId = 'DELTAARRAY'
+
+
 class IndexArray(NotLoggedMixin, EArray, indexesExtension.IndexArray):
     """Represent the index (sorted or reverse index) dataset in HDF5 file.
 
@@ -100,6 +121,11 @@ class IndexArray(NotLoggedMixin, EArray, indexesExtension.IndexArray):
             chunkshape=chunkshape, byteorder=byteorder)
 
 
+    def _g_getCaches(self):
+        caches = [self.__dict__.get('boundscache'), self._getBoundsNumCache()]
+        return [('bounds', cache) for cache in caches if cache is not None]
+
+
     # This version of searchBin uses both ranges (1st level) and
     # bounds (2nd level) caches. It uses a cache for boundary rows,
     # but not for 'sorted' rows (this is only supported for the
@@ -26,6 +26,7 @@ Misc variables:
 import numpy
 
 from tables.exceptions import HDF5ExtError
+from tables.utils import hdf5lock
 from hdf5Extension cimport Array
 
 
@@ -41,7 +42,8 @@ from numpy cimport (import_array, ndarray,
 ctypedef npy_uint16 npy_float16
 
 from definitions cimport hid_t, herr_t, hsize_t, H5Screate_simple, H5Sclose
-from lrucacheExtension cimport NumCache
+from lrucacheExtension cimport NumCache, ChunkCache
+from lrucacheExtension import sharedcache
 
 
 #-------------------------------------------------------------------
@@ -91,18 +93,18 @@ cdef extern from "idx-opt.h" nogil:
   int bisect_left_d(npy_float64 *a, npy_float64 x, int hi, int offset)
   int bisect_right_d(npy_float64 *a, npy_float64 x, int hi, int offset)
 
-  int keysort_f64(npy_float64 *start1, char *start2, npy_intp num, int ts)
-  int keysort_f32(npy_float32 *start1, char *start2, npy_intp num, int ts)
-  int keysort_f16(npy_float16 *start1, char *start2, npy_intp num, int ts)
-  int keysort_i64(npy_int64 *start1, char *start2, npy_intp num, int ts)
-  int keysort_u64(npy_uint64 *start1, char *start2, npy_intp num, int ts)
-  int keysort_i32(npy_int32 *start1, char *start2, npy_intp num, int ts)
-  int keysort_u32(npy_uint32 *start1, char *start2, npy_intp num, int ts)
-  int keysort_i16(npy_int16 *start1, char *start2, npy_intp num, int ts)
-  int keysort_u16(npy_uint16 *start1, char *start2, npy_intp num, int ts)
-  int keysort_i8(npy_int8 *start1, char *start2, npy_intp num, int ts)
-  int keysort_u8(npy_uint8 *start1, char *start2, npy_intp num, int ts)
-  int keysort_S(char *start1, int ss, char *start2, npy_intp num, int ts)
+  int keysort_f64(npy_float64 *start1, char *start2, npy_intp num, int ts) nogil
+  int keysort_f32(npy_float32 *start1, char *start2, npy_intp num, int ts) nogil
+  int keysort_f16(npy_float16 *start1, char *start2, npy_intp num, int ts) nogil
+  int keysort_i64(npy_int64 *start1, char *start2, npy_intp num, int ts) nogil
+  int keysort_u64(npy_uint64 *start1, char *start2, npy_intp num, int ts) nogil
+  int keysort_i32(npy_int32 *start1, char *start2, npy_intp num, int ts) nogil
+  int keysort_u32(npy_uint32 *start1, char *start2, npy_intp num, int ts) nogil
+  int keysort_i16(npy_int16 *start1, char *start2, npy_intp num, int ts) nogil
+  int keysort_u16(npy_uint16 *start1, char *start2, npy_intp num, int ts) nogil
+  int keysort_i8(npy_int8 *start1, char *start2, npy_intp num, int ts) nogil
+  int keysort_u8(npy_uint8 *start1, char *start2, npy_intp num, int ts) nogil
+  int keysort_S(char *start1, int ss, char *start2, npy_intp num, int ts) nogil
 
 
 #----------------------------------------------------------------------------
@@ -124,41 +126,61 @@ def keysort(ndarray array1, ndarray array2):
   array1 can be of any type, except complex or string.  array2 may be made of
   elements on any size.
 
+  The GIL is released during the sort, so several threads can sort
+  different arrays at the same time.
+
   """
 
   cdef npy_intp size
-  cdef int elsize1, elsize2
+  cdef int elsize1, elsize2, ret
+  cdef char *data1
+  cdef char *data2
 
   size = array1.size
   elsize1 = array1.itemsize
   elsize2 = array2.itemsize
+  data1 = array1.data
+  data2 = array2.data
   if array1.dtype == "float64":
-    return keysort_f64(<npy_float64 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_f64(<npy_float64 *>data1, data2, size, elsize2)
   elif array1.dtype == "float32":
-    return keysort_f32(<npy_float32 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_f32(<npy_float32 *>data1, data2, size, elsize2)
   # elif array1.dtype == "float16": # raises an error if float16 is not defined
   elif array1.dtype.name == "float16":
-    return keysort_f16(<npy_float16 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_f16(<npy_float16 *>data1, data2, size, elsize2)
   elif array1.dtype == "int64":
-    return keysort_i64(<npy_int64 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_i64(<npy_int64 *>data1, data2, size, elsize2)
   elif array1.dtype == "uint64":
-    return keysort_u64(<npy_uint64 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u64(<npy_uint64 *>data1, data2, size, elsize2)
   elif array1.dtype == "int32":
-    return keysort_i32(<npy_int32 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_i32(<npy_int32 *>data1, data2, size, elsize2)
   elif array1.dtype == "uint32":
-    return keysort_u32(<npy_uint32 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u32(<npy_uint32 *>data1, data2, size, elsize2)
   elif array1.dtype == "int16":
-    return keysort_i16(<npy_int16 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_i16(<npy_int16 *>data1, data2, size, elsize2)
   elif array1.dtype == "uint16":
-    return keysort_u16(<npy_uint16 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u16(<npy_uint16 *>data1, data2, size, elsize2)
   elif array1.dtype == "int8":
-    return keysort_i8(<npy_int8 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_i8(<npy_int8 *>data1, data2, size, elsize2)
   elif array1.dtype == "uint8":
-    return keysort_u8(<npy_uint8 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u8(<npy_uint8 *>data1, data2, size, elsize2)
   elif array1.dtype == "bool":
-    return keysort_u8(<npy_uint8 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u8(<npy_uint8 *>data1, data2, size, elsize2)
   elif array1.dtype.char == "S":
-    return keysort_S(array1.data, elsize1, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_S(data1, elsize1, data2, size, elsize2)
     # As it turns out, an indirect sort is always faster, and much faster on
     # new processors.  See
     # http://www.mail-archive.com/numpy-discussion@scipy.org/msg06639.html
@@ -172,6 +194,7 @@ def keysort(ndarray array1, ndarray array2):
     #return 0
   else:
     raise ValueError("This shouldn't happen!")
+  return ret
 
 
 # Classes
@@ -222,8 +245,8 @@ cdef class IndexArray(Array):
   cdef hid_t   mem_space_id
   cdef int     l_chunksize, l_slicesize, nbounds, indsize
   cdef CacheArray bounds_ext
-  cdef NumCache boundscache, sortedcache
-  cdef ndarray bufferbc, bufferlb
+  cdef NumCache boundscache
+  cdef ndarray bufferbc, bufferlb, sortedchunk
 
 
   def _readIndexSlice(self, hsize_t irow, hsize_t start, hsize_t stop,
@@ -231,7 +254,7 @@ cdef class IndexArray(Array):
     cdef herr_t ret
 
     # Do the physical read
-    with nogil:
+    with hdf5lock, nogil:
         ret = H5ARRAYOread_readSlice(self.dataset_id, self.type_id,
                                      irow, start, stop, idx.data)
 
@@ -239,6 +262,11 @@ cdef class IndexArray(Array):
       raise HDF5ExtError("Problems reading the index indices.")
 
 
+  # Return the cache of bounds for optimized types (if any)
+  def _getBoundsNumCache(self):
+    return self.boundscache
+
+
   def _initSortedSlice(self, index):
     """Initialize the structures for doing a binary search."""
 
@@ -285,22 +313,19 @@ cdef class IndexArray(Array):
       rowsize = (self.bounds_ext._v_chunkshape[1] * dtype.itemsize)
       maxslots = params['BOUNDS_MAX_SIZE'] / rowsize
       self.boundscache = <NumCache>NumCache(
-        (maxslots, self.nbounds), dtype, 'non-opt types bounds')
+        (maxslots, self.nbounds), dtype, 'non-opt types bounds',
+        params['BOUNDS_POLICY'])
       self.bufferbc = numpy.empty(dtype=dtype, shape=self.nbounds)
       # Get the pointer for the internal buffer for 2nd level cache
       self.rbufbc = self.bufferbc.data
-      # Another NumCache for the sorted values
-      rowsize = (self.chunksize*dtype.itemsize)
-      maxslots = params['SORTED_MAX_SIZE'] / (self.chunksize*dtype.itemsize)
-      self.sortedcache = <NumCache>NumCache(
-        (maxslots, self.chunksize), dtype, 'sorted')
+      # The sorted values are kept in the shared chunk cache
 
 
   cdef void *_g_readSortedSlice(self, hsize_t irow, hsize_t start,
                                 hsize_t stop):
     """Read the sorted part of an index."""
 
-    with nogil:
+    with hdf5lock, nogil:
         ret = H5ARRAYOread_readSortedSlice(
           self.dataset_id, self.mem_space_id, self.type_id,
           irow, start, stop, self.rbuflb)
@@ -387,19 +412,25 @@ cdef class IndexArray(Array):
 
     cdef void *vpointer
     cdef npy_int64 nckey
-    cdef long nslot
     cdef hsize_t start, stop
+    cdef ChunkCache chunkcache
+    cdef ndarray chunk
 
     # Compute the number of chunk read and use it as the key for the cache.
     nckey = nrow*ncs+nchunk
-    nslot = self.sortedcache.getslot_(nckey)
-    if nslot >= 0:
-      vpointer = self.sortedcache.getitem1_(nslot)
+    chunkcache = <ChunkCache>sharedcache
+    chunk = chunkcache.getchunk_(self, nckey)
+    if chunk is not None:
+      # Keep a reference so that the chunk outlives a possible eviction
+      # while its values are still being used.
+      self.sortedchunk = chunk
+      vpointer = chunk.data
     else:
-      # The sorted chunk is not in cache. Read it and put it in the LRU cache.
+      # The sorted chunk is not in cache. Read it and put it in the cache.
       start = cs*nchunk;  stop = cs*(nchunk+1)
       vpointer = self._g_readSortedSlice(nrow, start, stop)
-      self.sortedcache.setitem_(nckey, vpointer, 0)
+      if chunkcache.maxsize > 0:
+        chunkcache.putchunk_(self, nckey, self.bufferlb.copy())
     return vpointer
 
 
@@ -950,7 +981,7 @@ cdef class LastRowArray(Array):
   def _readIndexSlice(self, hsize_t start, hsize_t stop, ndarray idx):
     """Read the reverse index part of an LR index."""
 
-    with nogil:
+    with hdf5lock, nogil:
         ret = H5ARRAYOreadSliceLR(self.dataset_id, self.type_id,
                                   start, stop, idx.data)
 
@@ -964,7 +995,7 @@ cdef class LastRowArray(Array):
     cdef void  *rbuflb
 
     rbuflb = sorted.rbuflb  # direct access to rbuflb: very fast.
-    with nogil:
+    with hdf5lock, nogil:
         ret = H5ARRAYOreadSliceLR(self.dataset_id, self.type_id,
                                   start, stop, rbuflb)
 
@@ -310,6 +310,17 @@ class Leaf(Node):
                 self._flavor = internal_flavor
 
 
+    def _g_footprint(self):
+        size = super(Leaf, self)._g_footprint()
+        # Every open chunked dataset has a raw chunk cache of its own in
+        # the HDF5 library, which can not hold more than its data.
+        if self._v_chunkshape is not None:
+            cachesize = self._v_file.params['CHUNK_CACHE_SIZE']
+            datasize = getattr(self, 'size_in_memory', cachesize)
+            size += min(cachesize, datasize)
+        return size
+
+
     def _calc_chunkshape(self, expectedrows, rowsize, itemsize):
         """Calculate the shape for the HDF5 chunk."""
 
@@ -420,6 +431,35 @@ very small/large chunksize, you may want to increase/decrease it."""
         return (start, stop, step)
 
 
+    def _blockRanges(self, start, stop, step, blocksize=None):
+        """Get the ranges of rows to be read by ``iterblocks()`` methods.
+
+        A ``(bstart, bstop)`` tuple is yielded for every block, where
+        `bstart` is the first row selected by `start` and `step` in
+        it.  Block boundaries are placed at multiples of `blocksize`
+        over the main dimension which, by default, is the largest
+        multiple of the chunk length that fits in the I/O buffer, so
+        that blocks never straddle chunks.
+        """
+
+        if blocksize is None:
+            nrowsinbuf = self.nrowsinbuf
+            if self.chunkshape is None:
+                blocksize = nrowsinbuf
+            else:
+                chunkrows = self.chunkshape[self.maindim]
+                blocksize = max(nrowsinbuf // chunkrows, 1) * chunkrows
+        elif blocksize < 1:
+            raise ValueError("blocksize must be a positive integer")
+
+        bstart = start
+        while bstart < stop:
+            bstop = min((bstart // blocksize + 1) * blocksize, stop)
+            yield (bstart, bstop)
+            # Go to the next selected row
+            bstart += ((bstop - bstart + step - 1) // step) * step
+
+
     def _g_copy(self, newParent, newName, recursive, _log=True, **kwargs):
         # Compute default arguments.
         start = kwargs.pop('start', None)
@@ -705,6 +745,8 @@ very small/large chunksize, you may want to increase/decrease it."""
         """
 
         self._g_flush()
+        # The shape of the leaf may have changed.
+        self._v_file._g_updateCatalog(self)
 
 
     def _f_close(self, flush=True):
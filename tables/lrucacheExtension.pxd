@@ -13,18 +13,42 @@
 from numpy cimport ndarray
 
 # Declaration of instance variables for shared classes
+# Helper class for NodeCache
+cdef class NodeCacheEntry:
+  cdef object key, node
+  cdef long long size
+  cdef int pinned
+  cdef NodeCacheEntry prev, next
+
+
 # The NodeCache class is useful for caching general objects (like Nodes).
 cdef class NodeCache:
-  cdef long nextslot, nslots
-  cdef object nodes, paths
+  cdef readonly long nslots, npinned
+  cdef readonly long long maxsize, size, pinnedsize
+  cdef readonly long long hits, misses, evictions, pins
+  cdef object entries
+  cdef NodeCacheEntry head, pinhead
+  cdef GhostList revived
+  cdef unlinkentry_(self, NodeCacheEntry entry)
+  cdef linkentry_(self, NodeCacheEntry entry)
+  cdef evict_(self)
+  cdef int isfull_(self, long long size)
   cdef object setitem(self, object path, object node)
-  cdef long getslot(self, object path)
   cdef object cpop(self, object path)
 
 
+# Keys recently evicted from a cache (for the 2Q policy)
+cdef class GhostList:
+  cdef long maxlen, seqn
+  cdef object keys, order
+  cdef add(self, object key)
+  cdef int pop(self, object key)
+
+
 # Base class for other caches
 cdef class BaseCache:
   cdef int iscachedisabled, incsetcount
+  cdef readonly long long hits, misses, evictions, disables, enables
   cdef long setcount, getcount, containscount
   cdef long disablecyclecount, disableeverycycles
   cdef long enablecyclecount, enableeverycycles
@@ -34,9 +58,20 @@ cdef class BaseCache:
   cdef double lowesthr
   cdef ndarray atimes
   cdef object name
+  cdef readonly object policy
+  cdef int policy2q
+  cdef long kin
+  cdef ndarray inam
+  cdef char *rinam
+  cdef GhostList ghosts
   cdef int checkhitratio(self)
+  cdef getsizes_(self)
   cdef int couldenablecache_(self)
   cdef long incseqn(self)
+  cdef long victim_(self)
+  cdef touch_(self, long nslot)
+  cdef admit_(self, long nslot, object key)
+  cdef forget_(self, long nslot, object key)
 
 
 #  Helper class for ObjectCache
@@ -58,6 +93,7 @@ cdef class ObjectCache(BaseCache):
   cdef long setitem_(self, object key, object value, long size)
   cdef long getslot_(self, object key)
   cdef object getitem_(self, long nslot)
+  cdef getsizes_(self)
 
 
 # The NumCache class is useful for caching numerical data in an efficient way
@@ -73,10 +109,36 @@ cdef class NumCache(BaseCache):
   cdef long getslot_(self, long long key)
   cdef getitem_(self, long nslot, void *data, long start)
   cdef void *getitem1_(self, long nslot)
+  cdef getsizes_(self)
 
 
 
-## Local Variables:
+# Helper class for ChunkCache
+cdef class ChunkNode:
+  cdef object key, chunk
+  cdef long long size
+  cdef int inam
+  cdef ChunkNode prev, next
+
+
+# The ChunkCache class keeps decompressed chunks of any leaf in any file
+cdef class ChunkCache:
+  cdef readonly long long maxsize, size, hits, misses, evictions
+  cdef readonly object policy
+  cdef int policy2q
+  cdef long long insize
+  cdef object name, lock, chunks, leaves
+  cdef ChunkNode head, amhead
+  cdef GhostList ghosts
+  cdef clearcache_(self)
+  cdef unlinknode_(self, ChunkNode node)
+  cdef linknode_(self, ChunkNode node)
+  cdef removenode_(self, ChunkNode node)
+  cdef ChunkNode victim_(self)
+  cdef evict_(self)
+  cdef object getchunk_(self, object leaf, object nchunk)
+  cdef putchunk_(self, object leaf, object nchunk, ndarray chunk)
+
 ## mode: python
 ## py-indent-offset: 2
 ## tab-width: 2
@@ -17,16 +17,24 @@ Classes (type extensions):
     NodeCache
     ObjectCache
     NumCache
+    ChunkCache
 
 Functions:
 
+    setChunkCacheSize
+
 Misc variables:
+
+    cache_policies
+    sharedcache
 """
 
 cdef extern from "Python.h":
     int PyUnicode_Compare(object, object)
 
 import sys
+import threading
+import collections
 
 import numpy
 from libc.string cimport memcpy, strcmp
@@ -34,7 +42,7 @@ from cpython.unicode cimport PyUnicode_Check
 from numpy cimport import_array, ndarray
 
 from tables.parameters import (DISABLE_EVERY_CYCLES, ENABLE_EVERY_CYCLES,
-  LOWEST_HIT_RATIO)
+  LOWEST_HIT_RATIO, SHARED_CHUNK_CACHE_SIZE, SHARED_CHUNK_CACHE_POLICY)
 
 
 
@@ -47,14 +55,24 @@ import_array()
 
 
 
-# ------- Minimalist NodeCache for nodes in PyTables ---------
+# ------- NodeCache for nodes in PyTables ---------
 
 # The next NodeCache code relies on the fact that a node that is
 # fetched from the cache will be removed from it. Said in other words:
 # "A node cannot be alive and dead at the same time."
 
-# Thanks to the above behaviour, the next code has been stripped down
-# to a bare minimum (the info in cache is kept in just 2 lists).
+# Thanks to the above behaviour, the cache is just a dictionary of
+# entries (for lookups) which are also linked in circular lists (for
+# keeping them in LRU order), so that every operation is O(1) and the
+# cache can be made as large as needed.
+
+# The cache is bounded both by a number of slots and by the approximate
+# memory used by the nodes in it.  Nodes which are revived from the
+# cache and then unreferenced again are deemed frequently used, and
+# they are *pinned*: they go to a protected list that can take up to a
+# half of the cache and which is only emptied when there are no other
+# nodes to discard.  This way, a scan over many nodes does not wipe out
+# the nodes which are being used over and over.
 
 #*********************** Important note! *****************************
 # The code behind has been carefully tuned to serve the needs of
@@ -64,88 +82,150 @@ import_array()
 #*********************************************************************
 
 
+cdef class NodeCacheEntry:
+  """Record of a cached node. Not for public consumption."""
+
+  def __init__(self, object key, object node, long long size):
+    self.key = key
+    self.node = node
+    self.size = size
+
+
+  def __repr__(self):
+    return "<%s %s (%d bytes%s)>" % (self.__class__, self.key, self.size,
+                                     self.pinned and ", pinned" or "")
+
+
 cdef class NodeCache:
   """Least-Recently-Used (LRU) cache for PyTables nodes."""
 
-  # This class variables are declared in utilsExtension.pxd
+  # This class variables are declared in lrucacheExtension.pxd
 
 
-  def __init__(self, nslots):
-    """Maximum nslots of the cache.
+  def __init__(self, nslots, maxsize=0):
+    """Maximum nslots and size of the cache.
 
-    If more than 'nslots' elements are added to the cache,
-    the least-recently-used ones will be discarded.
+    If more than 'nslots' elements are added to the cache, or if they
+    take more than 'maxsize' bytes (as told by their `_g_footprint()`
+    method), the least-recently-used ones will be discarded.  A zero
+    'maxsize' means that the cache is only bounded by 'nslots'.
     """
 
     if nslots < 0:
       raise ValueError("Negative number (%s) of slots!" % nslots)
+    if maxsize < 0:
+      raise ValueError("Negative size (%s) for the cache!" % maxsize)
     self.nslots = nslots
-    self.nextslot = 0
-    self.nodes = []
-    self.paths = []
+    self.maxsize = maxsize
+    self.entries = {}
+    # The sentinels of the circular lists of entries: the entry next
+    # to a sentinel is the least recently used one, and the previous
+    # one, the most recently used.  Pinned entries go to pinhead.
+    self.head = NodeCacheEntry(None, None, 0)
+    self.head.prev = self.head;  self.head.next = self.head
+    self.pinhead = NodeCacheEntry(None, None, 0)
+    self.pinhead.prev = self.pinhead;  self.pinhead.next = self.pinhead
+    self.size = 0
+    self.npinned = 0;  self.pinnedsize = 0
+    # The keys of the nodes recently revived from the cache
+    self.revived = GhostList(max(nslots, 16))
+    self.hits = 0;  self.misses = 0;  self.evictions = 0;  self.pins = 0
 
 
   def __len__(self):
-    return len(self.nodes)
+    return len(self.entries)
 
 
   def __setitem__(self, path, node):
     self.setitem(path, node)
 
 
+  cdef unlinkentry_(self, NodeCacheEntry entry):
+    entry.prev.next = entry.next
+    entry.next.prev = entry.prev
+    self.size = self.size - entry.size
+    if entry.pinned:
+      self.npinned = self.npinned - 1
+      self.pinnedsize = self.pinnedsize - entry.size
+
+
+  # Make entry the most recently used one in its list
+  cdef linkentry_(self, NodeCacheEntry entry):
+    cdef NodeCacheEntry head
+
+    if entry.pinned:
+      head = self.pinhead
+      self.npinned = self.npinned + 1
+      self.pinnedsize = self.pinnedsize + entry.size
+    else:
+      head = self.head
+    entry.prev = head.prev
+    entry.next = head
+    head.prev.next = entry
+    head.prev = entry
+    self.size = self.size + entry.size
+
+
+  # Discard the least recently used entry, sparing pinned ones if possible
+  cdef evict_(self):
+    cdef NodeCacheEntry entry
+
+    entry = self.head.next
+    if entry is self.head:
+      entry = self.pinhead.next
+    self.unlinkentry_(entry)
+    del self.entries[entry.key]
+    self.evictions = self.evictions + 1
+
+
+  # Does the cache need room for a new entry of size bytes?
+  cdef int isfull_(self, long long size):
+    if len(self.entries) >= self.nslots:
+      return True
+    return self.maxsize > 0 and self.size + size > self.maxsize
+
+
   cdef setitem(self, object path, object node):
     """Puts a new node in the node list."""
 
+    cdef NodeCacheEntry entry
+    cdef long long size
+
     if self.nslots == 0:   # Oops, the cache is set to empty
       return
-    # Check if we are growing out of space
-    if self.nextslot == self.nslots:
-      # It is critical to reduce nextslot *before* the preemption of
-      # the LRU node.  If not, this can lead with problems in situations
-      # with very small caches (length 1 or so).
-      # F. Alted 2008-10-22
-      self.nextslot = self.nextslot - 1
-      # Remove the LRU node and path (the start of the lists)
-      del self.nodes[0]
-      del self.paths[0]
-    # The equality protection has been put for situations in which a
-    # node is being preempted and added simultaneously (with very small
-    # caches).
-    if len(self.nodes) == len(self.paths):
-      # Add the node and path to the end of its lists
-      self.nodes.append(node)
-      self.paths.append(path)
-      self.nextslot = self.nextslot + 1
+    size = 0
+    if self.maxsize > 0:
+      size = node._g_footprint()
+      if size > self.maxsize:   # The node is too large for the cache
+        return
+    entry = self.entries.pop(path, None)
+    if entry is not None:
+      self.unlinkentry_(entry)
+    # Make room for the new node
+    while self.entries and self.isfull_(size):
+      self.evict_()
+    entry = NodeCacheEntry(path, node, size)
+    # Nodes revived before are frequently used, so pin them
+    if self.revived.pop(path):
+      entry.pinned = True
+      self.pins = self.pins + 1
+    self.linkentry_(entry)
+    self.entries[path] = entry
+    # Pinned nodes can take up to a half of the cache
+    while (self.npinned > self.nslots // 2 or
+           (self.maxsize > 0 and self.pinnedsize > self.maxsize // 2)):
+      entry = self.pinhead.next
+      self.unlinkentry_(entry)
+      entry.pinned = False
+      self.linkentry_(entry)
 
 
   def __contains__(self, path):
-    if self.getslot(path) == -1:
-      return 0
-    else:
+    if path in self.entries:
       return 1
-
-
-  cdef long getslot(self, object path):
-    """Checks whether path is in this cache or not."""
-
-    cdef long i, nslot
-
-    nslot = -1  # -1 means not found
-    if PyUnicode_Check(path):
-        # Start looking from the trailing values (most recently used)
-        for i from self.nextslot > i >= 0:
-          #if strcmp(<char *>encoded_path, <char *>self.paths[i]) == 0:
-          if PyUnicode_Compare(path, self.paths[i]) == 0:
-            nslot = i
-            break
     else:
-        # Start looking from the trailing values (most recently used)
-        for i from self.nextslot > i >= 0:
-          if strcmp(<char *>path, <char *>self.paths[i]) == 0:
-            nslot = i
-            break
-
-    return nslot
+      self.misses = self.misses + 1
+      return 0
 
 
   def pop(self, path):
@@ -153,24 +233,118 @@ cdef class NodeCache:
 
 
   cdef object cpop(self, object path):
-    cdef long nslot
+    cdef NodeCacheEntry entry
 
-    nslot = self.getslot(path)
-    node = self.nodes[nslot]
-    del self.nodes[nslot];  del self.paths[nslot]
-    self.nextslot = self.nextslot - 1
-    return node
+    entry = self.entries.pop(path)
+    self.unlinkentry_(entry)
+    self.hits = self.hits + 1
+    # Remember it, so that it gets pinned when it is unreferenced again
+    self.revived.add(path)
+    return entry.node
 
 
   def __iter__(self):
-    # Do a copy of the paths list because it can be modified in the middle of
+    # Do a copy of the paths because they can be modified in the middle of
     # the iterator!
-    copy = self.paths[:]
-    return iter(copy)
+    return iter(list(self.entries))
+
+
+  def values(self):
+    """Return a list with the nodes in cache."""
+    cdef NodeCacheEntry entry
+    return [entry.node for entry in self.entries.values()]
+
+
+  def getstats(self):
+    """Return a dictionary with the statistics of the cache."""
+    return {'hits': self.hits, 'misses': self.misses,
+            'evictions': self.evictions, 'disables': 0, 'enables': 0,
+            'size': len(self.entries), 'maxsize': self.nslots}
+
+
+  def resetstats(self):
+    """Reset the counters of the cache."""
+    self.hits = 0;  self.misses = 0;  self.evictions = 0;  self.pins = 0
 
 
   def __repr__(self):
-    return "<%s (%d elements)>" % (str(self.__class__), len(self.paths))
+    return "<%s (%d elements, %d pinned, %.3f KB)>" % (
+      str(self.__class__), len(self.entries), self.npinned,
+      self.size / 1024.)
+
+
+########################################################################
+# Replacement policies
+########################################################################
+
+# The caches below can discard entries following one of these policies:
+#
+# 'lru'  Least-Recently-Used.  Entries are discarded in the order in
+#        which they were last accessed.  A scan over more entries than
+#        fit in the cache wipes it out completely, so slot-based caches
+#        also probe their hit ratio and get disabled when it is too low.
+#
+# '2q'   Scan-resistant 2Q policy (Johnson & Shasha, VLDB 1994).  New
+#        entries go to a FIFO queue (A1in) that takes about a quarter of
+#        the cache, and are discarded from there unless they are
+#        accessed again.  The keys of entries discarded from A1in are
+#        remembered for a while (A1out) and, if they are requested
+#        again, they are promoted to the LRU queue (Am) of hot entries.
+#        Since a scan can only flush A1in, these caches are never
+#        disabled.
+#
+# ARC has not been implemented because of its patent, and because 2Q
+# gives comparable results for the access patterns in PyTables.
+
+cache_policies = ('lru', '2q')
+"""The replacement policies supported by caches."""
+
+
+cdef checkpolicy(object policy):
+  if policy not in cache_policies:
+    raise ValueError("Unknown cache policy %r; supported ones are: %s"
+                     % (policy, ", ".join(cache_policies)))
+
+
+cdef class GhostList:
+  """Bounded FIFO of keys of discarded entries (the A1out queue of 2Q)."""
+
+  def __init__(self, long maxlen):
+    self.maxlen = maxlen
+    self.seqn = 0
+    self.keys = {}   # {key: sequence number}
+    self.order = collections.deque()
+
+
+  def __len__(self):
+    return len(self.keys)
+
+
+  def __contains__(self, object key):
+    return key in self.keys
+
+
+  cdef add(self, object key):
+    cdef object oldkey, seqn
+
+    self.seqn = self.seqn + 1
+    self.keys[key] = self.seqn
+    self.order.append((self.seqn, key))
+    while len(self.keys) > self.maxlen:
+      seqn, oldkey = self.order.popleft()
+      # Keys added again later on have a newer sequence number
+      if self.keys.get(oldkey) == seqn:
+        del self.keys[oldkey]
+    if len(self.order) > 2 * self.maxlen + 1:
+      # Get rid of stale sequence numbers
+      self.order = collections.deque(
+        [item for item in self.order if self.keys.get(item[1]) == item[0]])
+
+
+  # Remove key and tell whether it was in the list
+  cdef int pop(self, object key):
+    return self.keys.pop(key, None) is not None
+
 
 
 ########################################################################
@@ -178,15 +352,23 @@ cdef class NodeCache:
 ########################################################################
 
 cdef class BaseCache:
-  """Base class that implements automatic probing/disabling of the cache."""
+  """Base class that implements automatic probing/disabling of the cache.
+
+  The slots to be reused are chosen following a replacement `policy`
+  (see `cache_policies`).
+  """
 
-  def __init__(self, long nslots, object name):
+  def __init__(self, long nslots, object name, object policy='lru'):
 
     if nslots < 0:
       raise ValueError("Negative number (%s) of slots!" % nslots)
+    checkpolicy(policy)
     self.setcount = 0;  self.getcount = 0;  self.containscount = 0
     self.enablecyclecount = 0;  self.disablecyclecount = 0
     self.iscachedisabled = False  # Cache is enabled by default
+    # Counters for statistics (see getstats())
+    self.hits = 0;  self.misses = 0;  self.evictions = 0
+    self.disables = 0;  self.enables = 0
     self.disableeverycycles = DISABLE_EVERY_CYCLES
     self.enableeverycycles = ENABLE_EVERY_CYCLES
     self.lowesthr = LOWEST_HIT_RATIO
@@ -198,12 +380,60 @@ cdef class BaseCache:
     # The array for keeping the access times (using long ints here)
     self.atimes = <ndarray>numpy.zeros(shape=nslots, dtype=numpy.int_)
     self.ratimes = <long *>self.atimes.data
+    # Whether slots are in the Am queue of 2Q (1) or in A1in (0)
+    self.policy = policy
+    self.policy2q = (policy == '2q')
+    self.kin = max(nslots // 4, 1)
+    self.inam = <ndarray>numpy.zeros(shape=nslots, dtype=numpy.int8)
+    self.rinam = <char *>self.inam.data
+    self.ghosts = GhostList(max(nslots // 2, 1))
 
 
   def __len__(self):
     return self.nslots
 
 
+  # Return the slot to be reused when the cache is full.  For 2Q, the
+  # oldest slot in A1in is chosen if A1in is larger than its share of
+  # the cache, otherwise the least recently used slot in Am.
+  cdef long victim_(self):
+    cdef long nslot, nin
+    cdef ndarray inmask
+
+    nslot = self.atimes.argmin()
+    if not self.policy2q or self.ratimes[nslot] == 0:
+      # LRU policy, or an empty slot
+      return nslot
+    inmask = (self.inam == 0)
+    nin = inmask.sum()
+    if nin > self.kin or nin == self.nslots:
+      return numpy.where(inmask, self.atimes, sys.maxint).argmin()
+    return numpy.where(inmask, sys.maxint, self.atimes).argmin()
+
+
+  # Register an access to a slot (hit)
+  cdef touch_(self, long nslot):
+    # Hits in A1in do not change the order of its FIFO
+    if not self.policy2q or self.rinam[nslot]:
+      self.ratimes[nslot] = self.incseqn()
+
+
+  # Register a new key in a slot
+  cdef admit_(self, long nslot, object key):
+    self.ratimes[nslot] = self.incseqn()
+    if self.policy2q:
+      # Keys seen shortly before are hot and go straight to Am
+      self.rinam[nslot] = self.ghosts.pop(key)
+
+
+  # Register that the key in a slot is being discarded
+  cdef forget_(self, long nslot, object key):
+    if self.policy2q and not self.rinam[nslot]:
+      self.ghosts.add(key)
+    self.ratimes[nslot] = 0
+    self.rinam[nslot] = 0
+
+
   # Machinery for determining whether the hit ratio is being effective
   # or not.  If not, the cache will be disabled. The efficency will be
   # checked every cycle (the time that the cache would be refilled
@@ -225,18 +455,24 @@ cdef class BaseCache:
       self.hitratio = self.hitratio + hitratio
       # Reset the hit counters
       self.setcount = 0;  self.getcount = 0;  self.containscount = 0
-      if (not self.iscachedisabled and
-          self.disablecyclecount >= self.disableeverycycles):
+      if self.policy2q:
+        # Scan-resistant caches are never disabled
+        self.disablecyclecount = 0;  self.enablecyclecount = 0
+      elif (not self.iscachedisabled and
+            self.disablecyclecount >= self.disableeverycycles):
         # Check whether the cache is being effective or not
         if hitratio < self.lowesthr:
           # Hit ratio is low. Disable the cache.
           self.iscachedisabled = True
+          self.disables = self.disables + 1
         else:
           # Hit ratio is acceptable. (Re-)Enable the cache.
           self.iscachedisabled = False
         self.disablecyclecount = 0
       if self.enablecyclecount >= self.enableeverycycles:
         # We have reached the time for forcing the cache to act again
+        if self.iscachedisabled:
+          self.enables = self.enables + 1
         self.iscachedisabled = False
         self.enablecyclecount = 0
     return not self.iscachedisabled
@@ -279,9 +515,35 @@ cdef class BaseCache:
     return self.seqn_
 
 
+  # The current and maximum sizes of the cache in bytes
+  cdef getsizes_(self):
+    return (0, 0)
+
+
+  def getstats(self):
+    """Return a dictionary with the statistics of the cache.
+
+    The counters of hits, misses, evictions and transitions of the
+    cache from enabled to disabled (disables) and back (enables) are
+    accumulated since the cache was created or `resetstats()` was last
+    called.
+    """
+
+    size, maxsize = self.getsizes_()
+    return {'hits': self.hits, 'misses': self.misses,
+            'evictions': self.evictions, 'disables': self.disables,
+            'enables': self.enables, 'size': size, 'maxsize': maxsize}
+
+
+  def resetstats(self):
+    """Reset the counters of the cache."""
+    self.hits = 0;  self.misses = 0;  self.evictions = 0
+    self.disables = 0;  self.enables = 0
+
+
   def __repr__(self):
-    return "<%s(%s) (%d elements)>" % (self.name, str(self.__class__),
-                                       self.nslots)
+    return "<%s(%s) (%d elements, %s policy)>" % (
+      self.name, str(self.__class__), self.nslots, self.policy)
 
 
 
@@ -312,7 +574,8 @@ cdef class ObjectNode:
 cdef class ObjectCache(BaseCache):
   """Least-Recently-Used (LRU) cache specific for python objects."""
 
-  def __init__(self, long nslots, long maxcachesize, object name):
+  def __init__(self, long nslots, long maxcachesize, object name,
+               object policy='lru'):
     """Maximum size of the cache.
 
     If more than 'nslots' elements are added to the cache,
@@ -321,9 +584,10 @@ cdef class ObjectCache(BaseCache):
     Parameters:
     nslots - The number of slots in cache
     name - A descriptive name for this cache
+    policy - The replacement policy ('lru' or '2q')
     """
 
-    super(ObjectCache, self).__init__(nslots, name)
+    super(ObjectCache, self).__init__(nslots, name, policy)
     self.cachesize = 0
     self.maxcachesize = maxcachesize
     # maxobjsize will be the same as the maximum cache size
@@ -338,12 +602,15 @@ cdef class ObjectCache(BaseCache):
 
   # Clear cache
   cdef clearcache_(self):
+    self.evictions = self.evictions + len(self.__dict)
     self.__list = [None]*self.nslots
     self.__dict = {}
     self.mrunode = <ObjectNode>None
     self.cachesize = 0
     self.nextslot = 0
     self.seqn_ = 0
+    self.atimes[:] = 0
+    self.inam[:] = 0
 
 
   # Remove a slot (if it exists in cache)
@@ -353,6 +620,8 @@ cdef class ObjectCache(BaseCache):
     assert nslot < self.nslots, "Attempting to remove beyond cache capacity."
     node = self.__list[nslot]
     if node is not None:
+      self.evictions = self.evictions + 1
+      self.forget_(nslot, node.key)
       self.__list[nslot] = None
       del self.__dict[node.key]
       self.cachesize = self.cachesize - self.rsizes[nslot]
@@ -363,6 +632,11 @@ cdef class ObjectCache(BaseCache):
     self.nextslot = nslot
 
 
+  # Remove a slot (for Python calls)
+  def removeslot(self, long nslot):
+    self.removeslot_(nslot)
+
+
   # Update a slot
   cdef updateslot_(self, long nslot, long size, object key, object value):
     cdef ObjectNode node, oldnode
@@ -374,21 +648,23 @@ cdef class ObjectCache(BaseCache):
     self.removeslot_(nslot)
     # Protection against too large data cache size
     while size + self.cachesize > self.maxcachesize:
-      # Remove the LRU node among the 10 largest ones
+      # Remove the LRU node among the 10 largest ones (empty slots are
+      # left out, as they have no access time)
       largidx = self.sizes.argsort()[-10:]
+      largidx = largidx[self.sizes[largidx] > 0]
       nslot1 = self.atimes[largidx].argmin()
       nslot2 = largidx[nslot1]
       self.removeslot_(nslot2)
     # Insert the new one
     node = ObjectNode(key, value, nslot)
-    self.ratimes[nslot] = self.incseqn()
+    self.admit_(nslot, key)
     self.rsizes[nslot] = size
     self.__list[nslot] = node
     self.__dict[key] = node
     self.mrunode = node
     self.cachesize = self.cachesize + size
-    # The next slot to update will be the LRU
-    self.nextslot = self.atimes.argmin()
+    # The next slot to update will be the one chosen by the policy
+    self.nextslot = self.victim_()
 
 
   # Put the object to the data in cache (for Python calls)
@@ -444,6 +720,7 @@ cdef class ObjectCache(BaseCache):
     # No luck. Look in the dictionary.
     node = self.__dict.get(key)
     if node is <ObjectNode>None:
+      self.misses = self.misses + 1
       return -1
     return node.nslot
 
@@ -457,12 +734,17 @@ cdef class ObjectCache(BaseCache):
     cdef ObjectNode node
 
     self.getcount = self.getcount + 1
+    self.hits = self.hits + 1
     node = self.__list[nslot]
-    self.ratimes[nslot] = self.incseqn()
+    self.touch_(nslot)
     self.mrunode = node
     return node.obj
 
 
+  cdef getsizes_(self):
+    return (self.cachesize, self.maxcachesize)
+
+
   def __repr__(self):
     if self.nprobes > 0:
       hitratio = self.hitratio / self.nprobes
@@ -491,7 +773,8 @@ cdef class ObjectCache(BaseCache):
 cdef class NumCache(BaseCache):
   """Least-Recently-Used (LRU) cache specific for Numerical data."""
 
-  def __init__(self, object shape, object dtype, object name):
+  def __init__(self, object shape, object dtype, object name,
+               object policy='lru'):
     """Maximum size of the cache.
 
     If more than 'nslots' elements are added to the cache,
@@ -501,6 +784,7 @@ cdef class NumCache(BaseCache):
     shape - The rectangular shape of the cache (nslots, nelemsperslot)
     itemsize - The size of the element base in cache
     name - A descriptive name for this cache
+    policy - The replacement policy ('lru' or '2q')
     """
     cdef long nslots
 
@@ -508,7 +792,7 @@ cdef class NumCache(BaseCache):
     if nslots >= 1<<16:
       # nslots can't be higher than 2**16. Will silently trunk the number.
       nslots = <long>((1<<16)-1)  # Cast makes cython happy here
-    super(NumCache, self).__init__(nslots, name)
+    super(NumCache, self).__init__(nslots, name, policy)
     self.itemsize = dtype.itemsize
     self.__dict = {}
     # The cache object where all data will go
@@ -567,11 +851,13 @@ cdef class NumCache(BaseCache):
     if self.checkhitratio():
       # Check if we are growing out of space
       if self.nextslot == self.nslots:
-        # Get the least recently used slot
-        nslot = self.atimes.argmin()
+        # Get the slot to be reused (the least recently used one for LRU)
+        nslot = self.victim_()
         # Remove the slot from the dict
         key2 = self.keys[nslot]
         del self.__dict[key2]
+        self.evictions = self.evictions + 1
+        self.forget_(nslot, key2)
         self.nextslot = self.nextslot - 1
       else:
         # Get the next slot available
@@ -579,13 +865,14 @@ cdef class NumCache(BaseCache):
       # Insert the slot in the dictionary
       self.__dict[key] = nslot
       self.keys[nslot] = key
-      self.ratimes[nslot] = self.incseqn()
+      self.admit_(nslot, key)
       self.nextslot = self.nextslot + 1
       # The next reduces the performance of the cache in scenarios where
       # the efficicency is near to zero.  I don't understand exactly why.
       # F. Alted 24-03-2008
     elif self.nextslot > 0:
       # Empty the cache if needed
+      self.evictions = self.evictions + len(self.__dict)
       self.__dict.clear()
       self.nextslot = 0
     return nslot
@@ -601,10 +888,12 @@ cdef class NumCache(BaseCache):
 
     self.containscount = self.containscount + 1
     if self.nextslot == 0:   # No chances for finding a slot
+      self.misses = self.misses + 1
       return -1
     try:
       nslot = self.__dict[key]
     except KeyError:
+      self.misses = self.misses + 1
       return -1
     return nslot
 
@@ -631,10 +920,16 @@ cdef class NumCache(BaseCache):
   cdef void *getitem1_(self, long nslot):
 
     self.getcount = self.getcount + 1
-    self.ratimes[nslot] = self.incseqn()
+    self.hits = self.hits + 1
+    self.touch_(nslot)
     return <char *>self.rcache + nslot * self.slotsize * self.itemsize
 
 
+  cdef getsizes_(self):
+    return (self.nextslot * self.slotsize * self.itemsize,
+            self.nslots * self.slotsize * self.itemsize)
+
+
   def __repr__(self):
     cachesize = (self.nslots * self.slotsize * self.itemsize) / 1024.
     if self.nprobes > 0:
@@ -649,6 +944,318 @@ cdef class NumCache(BaseCache):
 
 
 
+###################################################################
+#  LRU cache for decompressed chunks of leaves in any open file
+###################################################################
+# All the leaves in the process share a single instance of this cache
+# (`sharedcache` below), so that the memory used for keeping chunks
+# around is bounded by just one size, no matter how many leaves are
+# being read.
+###################################################################
+
+cdef class ChunkNode:
+  """Record of a cached chunk. Not for public consumption."""
+
+  def __init__(self, object key, object chunk, long long size):
+    self.key = key
+    self.chunk = chunk
+    self.size = size
+
+
+  def __repr__(self):
+    return "<%s %s (%d bytes)>" % (self.__class__, self.key, self.size)
+
+
+cdef class ChunkCache:
+  """Cache for chunks of leaves.
+
+  The cache is bounded by the total size (in bytes) of the chunks it
+  keeps rather than by a number of slots, and it can be shared by
+  leaves living in different files.  Chunks are looked up by the file
+  and pathname of their leaf and by a chunk key (the chunk number or
+  the tuple of chunk coordinates) that is only meaningful to the leaf.
+  The chunks to be discarded are chosen following a replacement
+  `policy` (see `cache_policies`).
+  """
+
+  def __init__(self, long long maxsize, object name, object policy='lru'):
+    """Maximum size of the cache.
+
+    If the chunks in cache take more than 'maxsize' bytes, some of them
+    (the least-recently-used ones for LRU) will be discarded.
+
+    Parameters:
+    maxsize - The maximum size of the cache (in bytes)
+    name - A descriptive name for this cache
+    policy - The replacement policy ('lru' or '2q')
+    """
+
+    if maxsize < 0:
+      raise ValueError("Negative size (%s) for the cache!" % maxsize)
+    checkpolicy(policy)
+    self.maxsize = maxsize
+    self.name = name
+    self.policy = policy
+    self.policy2q = (policy == '2q')
+    # Chunks can be read from different threads (prefetchers, etc.)
+    self.lock = threading.RLock()
+    self.hits = 0;  self.misses = 0;  self.evictions = 0
+    self.clearcache_()
+
+
+  def __len__(self):
+    return len(self.chunks)
+
+
+  # Clear cache
+  cdef clearcache_(self):
+    # The sentinels of the circular lists of nodes: the node next to a
+    # sentinel is the oldest (or least recently used) one, and the
+    # previous one, the newest.  Only LRU nodes and nodes in A1in go to
+    # the list in head; nodes in the Am queue of 2Q go to amhead.
+    self.head = ChunkNode(None, None, 0)
+    self.head.prev = self.head;  self.head.next = self.head
+    self.amhead = ChunkNode(None, None, 0)
+    self.amhead.prev = self.amhead;  self.amhead.next = self.amhead
+    self.chunks = {}
+    self.leaves = {}   # {fileid: {pathname: set of keys}}
+    self.ghosts = GhostList(16)
+    self.size = 0
+    self.insize = 0   # the size of the nodes in head
+
+
+  cdef unlinknode_(self, ChunkNode node):
+    node.prev.next = node.next
+    node.next.prev = node.prev
+    if not node.inam:
+      self.insize = self.insize - node.size
+
+
+  # Make node the newest one in its list
+  cdef linknode_(self, ChunkNode node):
+    cdef ChunkNode head
+
+    if node.inam:
+      head = self.amhead
+    else:
+      head = self.head
+      self.insize = self.insize + node.size
+    node.prev = head.prev
+    node.next = head
+    head.prev.next = node
+    head.prev = node
+
+
+  cdef removenode_(self, ChunkNode node):
+    cdef object fileid, pathname, leaves, keys
+
+    self.unlinknode_(node)
+    del self.chunks[node.key]
+    self.size = self.size - node.size
+    fileid, pathname = node.key[:2]
+    leaves = self.leaves[fileid]
+    keys = leaves[pathname]
+    keys.remove(node.key)
+    if not keys:
+      del leaves[pathname]
+      if not leaves:
+        del self.leaves[fileid]
+
+
+  # Return the chunk (for Python calls)
+  def getchunk(self, object leaf, object nchunk):
+    return self.getchunk_(leaf, nchunk)
+
+
+  # Return the chunk with key nchunk in leaf, or None if not in cache
+  # (for cython calls).  The chunk must not be modified.
+  cdef object getchunk_(self, object leaf, object nchunk):
+    cdef ChunkNode node
+
+    if self.maxsize == 0:   # The cache has been set to empty
+      return None
+    key = (id(leaf._v_file), leaf._v_pathname, nchunk)
+    with self.lock:
+      node = self.chunks.get(key)
+      if node is None:
+        self.misses = self.misses + 1
+        return None
+      self.hits = self.hits + 1
+      # Hits in A1in do not change the order of its FIFO
+      if not self.policy2q or node.inam:
+        self.unlinknode_(node)
+        self.linknode_(node)
+      return node.chunk
+
+
+  # Put the chunk in cache (for Python calls)
+  def putchunk(self, object leaf, object nchunk, ndarray chunk):
+    self.putchunk_(leaf, nchunk, chunk)
+
+
+  # Put the chunk with key nchunk in leaf in cache (for cython calls).
+  # The cache takes ownership of chunk, which is made read-only.
+  cdef putchunk_(self, object leaf, object nchunk, ndarray chunk):
+    cdef ChunkNode node
+    cdef long long size
+
+    size = chunk.nbytes
+    if size > self.maxsize:   # Check if the chunk is too large
+      return
+    fileid = id(leaf._v_file)
+    pathname = leaf._v_pathname
+    key = (fileid, pathname, nchunk)
+    with self.lock:
+      node = self.chunks.get(key)
+      if node is not None:
+        self.removenode_(node)
+      # Make room for the new chunk
+      while self.size + size > self.maxsize:
+        self.evict_()
+      chunk.flags.writeable = False
+      node = ChunkNode(key, chunk, size)
+      if self.policy2q:
+        # Keys seen shortly before are hot and go straight to Am
+        node.inam = self.ghosts.pop(key)
+      self.linknode_(node)
+      self.chunks[key] = node
+      self.leaves.setdefault(fileid, {}).setdefault(pathname, set()).add(key)
+      self.size = self.size + size
+
+
+  # Return the node to be discarded.  For 2Q, the oldest node in A1in
+  # is chosen if A1in takes more than its share of the cache, otherwise
+  # the least recently used node in Am.
+  cdef ChunkNode victim_(self):
+    if self.head.next is self.head:
+      return self.amhead.next
+    if (self.policy2q and self.insize <= self.maxsize // 4 and
+        self.amhead.next is not self.amhead):
+      return self.amhead.next
+    return self.head.next
+
+
+  # Discard a node following the replacement policy
+  cdef evict_(self):
+    cdef ChunkNode node
+
+    node = self.victim_()
+    if self.policy2q and not node.inam:
+      # Remember about as many discarded keys as chunks in cache
+      self.ghosts.maxlen = max(len(self.chunks), 16)
+      self.ghosts.add(node.key)
+    self.removenode_(node)
+    self.evictions = self.evictions + 1
+
+
+  def invalidate(self, object file, object pathname='/', recursive=False):
+    """Remove the chunks of the leaf in `pathname` of `file`.
+
+    If `recursive` is true, the chunks of every leaf hanging from
+    `pathname` are removed too.  This must be called whenever the data
+    of a leaf is changed or a node is moved or removed.
+    """
+
+    cdef ChunkNode node
+
+    with self.lock:
+      leaves = self.leaves.get(id(file))
+      if leaves is None:
+        return
+      if not recursive:
+        pathnames = [pathname]
+      elif pathname == '/':
+        pathnames = leaves.keys()
+      else:
+        prefix = pathname + '/'
+        pathnames = [path for path in leaves
+                     if path == pathname or path.startswith(prefix)]
+      for path in pathnames:
+        for key in list(leaves.get(path, ())):
+          node = self.chunks[key]
+          self.removenode_(node)
+
+
+  def clear(self):
+    """Remove all the chunks in cache."""
+
+    with self.lock:
+      self.clearcache_()
+
+
+  def resize(self, long long maxsize):
+    """Set the maximum size of the cache to `maxsize` bytes.
+
+    The least recently used chunks are discarded if needed.
+    """
+
+    if maxsize < 0:
+      raise ValueError("Negative size (%s) for the cache!" % maxsize)
+    with self.lock:
+      self.maxsize = maxsize
+      while self.size > self.maxsize:
+        self.evict_()
+
+
+  def getstats(self):
+    """Return a dictionary with the statistics of the cache."""
+
+    with self.lock:
+      return {'hits': self.hits, 'misses': self.misses,
+              'evictions': self.evictions, 'disables': 0, 'enables': 0,
+              'size': self.size, 'maxsize': self.maxsize}
+
+
+  def resetstats(self):
+    """Reset the counters of the cache."""
+
+    with self.lock:
+      self.hits = 0;  self.misses = 0;  self.evictions = 0
+
+
+  def __contains__(self, object key):
+    return key in self.chunks
+
+
+  def __repr__(self):
+    nprobes = self.hits + self.misses
+    if nprobes > 0:
+      hitratio = <double>self.hits / nprobes
+    else:
+      hitratio = 0.0
+    return """<%s(%s)
+  (%.3f KB maxsize, %d chunks, %.3f KB cachesize, %s policy,
+  hit ratio: %.3f, evictions: %d)>
+  """ % (self.name, str(self.__class__), self.maxsize / 1024.,
+         len(self.chunks), self.size / 1024., self.policy, hitratio,
+         self.evictions)
+
+
+# The cache of chunks shared by all the leaves
+sharedcache = ChunkCache(SHARED_CHUNK_CACHE_SIZE, 'shared chunk cache',
+                         SHARED_CHUNK_CACHE_POLICY)
+
+
+def setChunkCacheSize(size):
+  """setChunkCacheSize(size)
+
+  Set the size (in bytes) of the chunk cache shared by all leaves.
+
+  This actually overrides the
+  :data:`tables.parameters.SHARED_CHUNK_CACHE_SIZE` setting in
+  :mod:`tables.parameters`.  The least recently used chunks are
+  discarded if the cache does not fit in the new size, and a size of 0
+  disables the cache.
+
+  Returns the previous size of the cache.
+  """
+
+  oldsize = sharedcache.maxsize
+  sharedcache.resize(size)
+  return oldsize
+
+
+
 ## Local Variables:
 ## mode: python
 ## py-indent-offset: 2
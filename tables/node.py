@@ -14,18 +14,24 @@
 
 import warnings
 
+import numpy
+
 from tables.registry import classNameDict, classIdDict
 from tables.exceptions import (ClosedNodeError, NodeError, UndoRedoWarning,
     PerformanceWarning)
 from tables.path import joinPath, splitPath, isVisiblePath
-from tables.utils import lazyattr
+from tables.utils import lazyattr, hdf5lock
 from tables.undoredo import moveToShadow
 from tables.attributeset import AttributeSet, NotLoggedAttributeSet
+from tables.lrucacheExtension import sharedcache
 
 
 __docformat__ = 'reStructuredText'
 """The format of documentation strings in this module."""
 
+_nodeOverhead = 2048
+"""Approximate memory used by any node (Python objects, attributes, etc.)."""
+
 
 def _closedrepr(oldmethod):
     """Decorate string representation method to handle closed nodes.
@@ -172,7 +178,8 @@ class Node(object):
 
         """
 
-        return self._AttributeSet(self)
+        with hdf5lock:
+            return self._AttributeSet(self)
 
 
     # '_v_title' is a direct read-write shorthand for the 'TITLE' attribute
@@ -255,6 +262,10 @@ class Node(object):
 
             # This allows extra operations after creating the node.
             self._g_postInitHook()
+
+            # Record the new node in the catalog of nodes.
+            if new:
+                file_._g_updateCatalog(self)
         except:
             # If anything happens, the node must be closed
             # to undo every possible registration made so far.
@@ -314,6 +325,34 @@ class Node(object):
         pass
 
 
+    def _g_getCaches(self):
+        """Return the caches used by the node.
+
+        This is a list of ``(kind, cache)`` pairs, where `kind` is one
+        of the kinds of caches described in `File.cache_stats()`.
+        """
+        return []
+
+
+    def _g_footprint(self):
+        """Return the approximate memory used by the node (in bytes).
+
+        This is a fixed overhead plus the size of the NumPy arrays (like
+        I/O buffers) referenced by the node and of its own caches.  It
+        is used for bounding the size of the cache of unreferenced nodes.
+        """
+
+        size = _nodeOverhead
+        for value in self.__dict__.itervalues():
+            if isinstance(value, numpy.ndarray):
+                size += value.nbytes
+        for kind, cache in self._g_getCaches():
+            # The size of caches of conditions is a number of entries.
+            if kind != 'conditions':
+                size += cache.getstats()['size']
+        return size
+
+
     def _g_create(self):
         """Create a new HDF5 node and return its object identifier."""
         raise NotImplementedError
@@ -476,6 +515,10 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O"""
 
         myDict = self.__dict__
 
+        # Keep the statistics of the caches used by the node.
+        if myDict.get('_v_file') is not None:
+            self._v_file._g_retireCaches(self._g_getCaches())
+
         # Close the associated `AttributeSet`
         # only if it has already been placed in the object's dictionary.
         if '_v_attrs' in myDict:
@@ -507,6 +550,10 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O"""
         # Remove the node from the PyTables hierarchy.
         parent = self._v_parent
         parent._g_unrefNode(self._v_name)
+        # Forget the cached chunks of the node (and its descendents).
+        sharedcache.invalidate(self._v_file, self._v_pathname, recursive=True)
+        # Forget the node (and its descendents) in the catalog of nodes.
+        self._v_file._g_removeFromCatalog(self._v_pathname)
         # Close the node itself.
         self._f_close()
         # hdf5Extension operations:
@@ -555,6 +602,9 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O"""
         oldName = self._v_name
         oldPathname = self._v_pathname  # to move the HDF5 node
 
+        # Cached chunks are looked up by pathname, so forget them.
+        sharedcache.invalidate(self._v_file, oldPathname, recursive=True)
+
         # Try to insert the node into the new parent.
         newParent._g_refNode(self, newName)
         # Remove the node from the new parent.
@@ -576,6 +626,8 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O"""
 
         # Tell dependent objects about the new location of this node.
         self._g_updateDependent()
+        # Update the catalog of nodes.
+        self._v_file._g_moveInCatalog(self, oldPathname)
 
 
     def _f_rename(self, newname, overwrite=False):
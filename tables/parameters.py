@@ -34,6 +34,17 @@ BOUNDS_MAX_SIZE = 1 * _MB
 BOUNDS_MAX_SLOTS = 4 * _KB
 """The maximum number of slots for the BOUNDS cache."""
 
+BOUNDS_POLICY = 'lru'
+"""The replacement policy for the BOUNDS cache.  It can be ``'lru'``
+(least recently used entries are discarded, and the cache is disabled
+when its hit ratio is too low) or ``'2q'`` (a scan-resistant policy that
+protects entries accessed more than once from being discarded by scans
+over many different ones).
+
+.. versionadded:: 3.0
+
+"""
+
 ITERSEQ_MAX_ELEMENTS = 1 * _KB
 """The maximum number of iterator elements cached in data lookups."""
 
@@ -43,6 +54,14 @@ ITERSEQ_MAX_SIZE = 1 * _MB
 ITERSEQ_MAX_SLOTS = 128
 """The maximum number of slots in ITERSEQ cache."""
 
+ITERSEQ_POLICY = 'lru'
+"""The replacement policy for the ITERSEQ cache (see
+:data:`BOUNDS_POLICY`).
+
+.. versionadded:: 3.0
+
+"""
+
 LIMBOUNDS_MAX_SIZE = 256 * _KB
 """The maximum size for the query limits (for example, ``(lim1, lim2)``
 in conditions like ``lim1 <= col < lim2``) cached during index lookups
@@ -51,11 +70,31 @@ in conditions like ``lim1 <= col < lim2``) cached during index lookups
 LIMBOUNDS_MAX_SLOTS = 128
 """The maximum number of slots for LIMBOUNDS cache."""
 
+LIMBOUNDS_POLICY = 'lru'
+"""The replacement policy for the LIMBOUNDS cache (see
+:data:`BOUNDS_POLICY`).
+
+.. versionadded:: 3.0
+
+"""
+
 TABLE_MAX_SIZE = 1 * _MB
-"""The maximum size for table chunks cached during index queries."""
+"""The maximum size for table chunks cached during index queries.
+
+.. deprecated:: 3.0
+   Table chunks are kept in the shared chunk cache now (see
+   :data:`SHARED_CHUNK_CACHE_SIZE`), so this is not used anymore.
+
+"""
 
 SORTED_MAX_SIZE = 1 * _MB
-"""The maximum size for sorted values cached during index lookups."""
+"""The maximum size for sorted values cached during index lookups.
+
+.. deprecated:: 3.0
+   Sorted values are kept in the shared chunk cache now (see
+   :data:`SHARED_CHUNK_CACHE_SIZE`), so this is not used anymore.
+
+"""
 
 SORTEDLR_MAX_SIZE = 8 * _MB
 """The maximum size for chunks in last row cached in index lookups (in
@@ -64,6 +103,14 @@ bytes)."""
 SORTEDLR_MAX_SLOTS = 1 * _KB
 """The maximum number of chunks for SORTEDLR cache."""
 
+SORTEDLR_POLICY = 'lru'
+"""The replacement policy for the SORTEDLR cache (see
+:data:`BOUNDS_POLICY`).
+
+.. versionadded:: 3.0
+
+"""
+
 
 # Parameters for general cache behaviour
 # --------------------------------------
@@ -88,6 +135,46 @@ LOWEST_HIT_RATIO = 0.6
 """The minimum acceptable hit ratio for a cache to avoid disabling (and
 freeing) it."""
 
+SHARED_CHUNK_CACHE_SIZE = 64 * _MB
+"""Size (in bytes) of the cache of decompressed chunks shared by all the
+leaves of all the open files.
+
+Table chunks read during indexed queries, small table reads, slices of
+chunked arrays falling in a single chunk and the sorted values read
+during index lookups are all kept in this cache, and the least recently
+used chunks are discarded when it gets full.  A value of 0 disables the
+cache.  This is read just once, when PyTables is imported; use
+:func:`tables.setChunkCacheSize` to change it afterwards.
+
+.. versionadded:: 3.0
+
+"""
+
+SHARED_CHUNK_CACHE_POLICY = '2q'
+"""The replacement policy for the shared chunk cache (see
+:data:`BOUNDS_POLICY`).  The scan-resistant ``'2q'`` policy keeps the
+chunks used by repeated lookups in cache while other chunks are being
+read just once, e.g. during a large query.  This is read just once,
+when PyTables is imported.
+
+.. versionadded:: 3.0
+
+"""
+
+FILE_POOL_SLOTS = 32
+"""Maximum number of files kept open by the default pool of files.
+
+Files opened with ``openFile(..., pooled=True)`` are kept open in a
+pool shared by the whole process after they are closed, so that opening
+them again is almost free.  The least recently used files are closed
+when the pool gets full.  A value of 0 disables the pool.  This is read
+just once, when PyTables is imported; see :class:`tables.FilePool` for
+creating pools of other sizes.
+
+.. versionadded:: 3.0
+
+"""
+
 
 # Tunable parameters
 # ==================
@@ -149,23 +236,23 @@ METADATA_CACHE_SIZE = 1 * _MB  # 1 MB is the default for HDF5
 # There are several forces driving the election of this number:
 # 1.- As more nodes, better chances to re-use nodes
 #     --> better performance
-# 2.- As more nodes, the re-ordering of the LRU cache takes more time
-#     --> less performance
-# 3.- As more nodes, the memory needs for PyTables grows, specially for table
+# 2.- As more nodes, the memory needs for PyTables grows, specially for table
 #     writings (that could take double of memory than table reads!).
 #
-# The default value here is quite conservative. If you have a system
-# with tons of memory, and if you are touching regularly a very large
-# number of leaves, try increasing this value and see if it fits better
-# for you. Please report back your feedback.
-NODE_CACHE_SLOTS = 64
+# Lookups and replacements in the cache take constant time, and the
+# memory taken by the cached nodes is bounded by NODE_CACHE_SIZE, so the
+# number of slots can be quite large.  If you are touching regularly a
+# very large number of leaves, try increasing both values and see if it
+# fits better for you. Please report back your feedback.
+NODE_CACHE_SLOTS = 1024
 """Maximum number of unreferenced nodes to be kept in memory.
 
 If positive, this is the number of *unreferenced* nodes to be kept in
 the metadata cache. Least recently used nodes are unloaded from memory
-when this number of loaded nodes is reached. To load a node again,
-simply access it as usual. Nodes referenced by user variables are not
-taken into account nor unloaded.
+when this number of loaded nodes is reached (or when they take more
+memory than :data:`NODE_CACHE_SIZE`). To load a node again, simply
+access it as usual. Nodes referenced by user variables are not taken
+into account nor unloaded.
 
 Negative value means that all the touched nodes will be kept in an
 internal dictionary.  This is the faster way to load/retrieve nodes.
@@ -174,6 +261,26 @@ be warned when the number of loaded nodes will reach the
 ``-NODE_CACHE_SLOTS`` value.
 
 Finally, a value of zero means that any cache mechanism is disabled.
+
+.. versionchanged:: 3.0
+   The default value has been raised from 64.
+
+"""
+
+NODE_CACHE_SIZE = 32 * _MB
+"""Maximum size (in bytes) of the unreferenced nodes kept in memory.
+
+This bounds the approximate memory taken by the nodes in the cache of
+unreferenced nodes (see :data:`NODE_CACHE_SLOTS`), including their I/O
+buffers, the caches of their own and the HDF5 chunk cache of chunked
+leaves (see :data:`CHUNK_CACHE_SIZE`).  Nodes which are used over and
+over (i.e. which are accessed again after being kept in the cache) are
+pinned, and they are only unloaded when there are no other nodes to
+unload, so scanning many nodes does not evict them.  A value of zero
+means that the cache is only bounded by its number of slots.
+
+.. versionadded:: 3.0
+
 """
 
 
@@ -188,6 +295,29 @@ BUFFER_TIMES = 100
 """The maximum buffersize/rowsize ratio before issuing a
 :exc:`tables.PerformanceWarning`."""
 
+TABLE_PREFETCH_BUFFERS = 0
+"""The number of I/O buffers that a background thread keeps read (and
+decompressed) ahead of sequential :meth:`Table.iterrows` iterations.
+A value of 0 disables read-ahead.  It can be overridden per iterator
+with the `prefetch` argument of :meth:`Table.iterrows`.
+
+.. versionadded:: 3.0
+
+"""
+
+EXPR_PIPELINE_BUFFERS = 2
+"""The number of blocks that :meth:`Expr.eval` keeps in flight between
+each pair of the stages of its computation: a thread reads the blocks
+of the inputs, they are computed in the calling thread, and another
+thread writes the results to the output container, so that I/O and
+computation overlap.  A value of 0 runs the stages in sequence.  It can
+be overridden per expression with the :attr:`Expr.pipeline_buffers`
+attribute.
+
+.. versionadded:: 3.0
+
+"""
+
 
 # Miscellaneous
 # -------------
@@ -205,6 +335,46 @@ system attributes are not considered for guessing the class of the node
 during its loading from disk (this work is delegated to the PyTables'
 class discoverer function for general HDF5 files)."""
 
+NODE_CATALOG = False
+"""Create a catalog of nodes in new files (see
+:meth:`File.enableCatalog`).  The catalog keeps the metadata of all the
+nodes in a hidden table, so that it can be queried without opening
+each node.
+
+.. versionadded:: 3.0
+
+"""
+
+NODE_CATALOG_PATH_LENGTH = 256
+"""The maximum length (in bytes) of the paths of nodes kept in the
+catalog of nodes.  This is only used when creating the catalog.
+
+.. versionadded:: 3.0
+
+"""
+
+NODE_CATALOG_DTYPE_LENGTH = 1024
+"""The maximum length (in bytes) of the description of the NumPy types
+of nodes kept in the catalog of nodes.  The types of tables are kept
+with all their fields, so tables with many columns may need larger
+values.  This is only used when creating the catalog.
+
+.. versionadded:: 3.0
+
+"""
+
+BATCH_NODE_METADATA = True
+"""When children names of a group are first needed, also read the
+``CLASS`` and ``VERSION`` attributes of *all* its children in the same
+pass over the group.  This avoids opening each child separately when it
+is loaded later on, which greatly speeds up working with groups with
+many thousands of children.  Set this to ``False`` if you only use a
+handful of the children of such groups.
+
+.. versionadded:: 3.0
+
+"""
+
 MAX_NUMEXPR_THREADS = None
 """The maximum number of threads that PyTables should use internally in
 Numexpr.  If `None`, it is automatically set to the number of cores in
@@ -219,6 +389,63 @@ your machine. In general, it is a good idea to set this to the number of
 cores in your machine or, when your machine has many of them (e.g. > 4),
 perhaps one less than this."""
 
+MAX_QUERY_THREADS = 1
+"""The maximum number of threads that PyTables should use for evaluating
+in-kernel queries in :meth:`Table.readWhere`, :meth:`Table.getWhereList`
+and :meth:`Table.whereAppend`.  When larger than 1, the range of the
+table is split in chunk-aligned slices that are read and evaluated by a
+pool of worker threads, and the results are merged back in row order.
+Reading from the file is serialized, but chunks compressed with zlib or
+bzip2 (with or without shuffling) are decompressed by the workers in
+parallel when HDF5 1.10.2 or later is used.  If `None`, it is
+automatically set to the number of cores in your machine.  Queries that
+can make use of indexes are not affected.
+
+.. versionadded:: 3.0
+
+"""
+
+INDEX_BUILD_THREADS = None
+"""The number of threads that PyTables should use for sorting the runs
+of a column when building a completely sorted index (see
+:meth:`Column.createCSIndex`).  If `None`, it is automatically set to
+the number of cores in your machine.
+
+.. versionadded:: 3.0
+
+"""
+
+INDEX_BUILD_MEMORY = 64 * _MB
+"""The amount of memory (in bytes) to be used for building completely
+sorted indexes.  The column is sorted in runs that fit in this size,
+and they are merged afterwards using buffers that fit in this size as
+well.
+
+.. versionadded:: 3.0
+
+"""
+
+INDEX_MAX_DELTA_RATIO = 0.1
+"""The maximum ratio between the number of rows kept in the delta of a
+column index and its number of indexed rows.  When the delta of an index
+grows larger than that (see :attr:`Table.incrementalIndex`) and
+automatic indexing is on, the index is built again.
+
+.. versionadded:: 3.0
+
+"""
+
+INDEX_MAX_COORDS_RATIO = 0.01
+"""The maximum ratio between the number of rows found by full or bitmap
+indexes in a query and the number of rows in the table for the exact
+coordinates of those rows to be read.  Queries finding more rows than
+that (or more than :data:`ITERSEQ_MAX_ELEMENTS`) read the whole chunks
+holding them instead.
+
+.. versionadded:: 3.0
+
+"""
+
 USER_BLOCK_SIZE = 0
 """Sets the user block size of a file.
 
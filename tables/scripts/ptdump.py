@@ -35,6 +35,7 @@ class Options(object):
     dump = 0
     colinfo = 0
     idxinfo = 0
+    catalog = 0
 
 options = Options()
 
@@ -98,21 +99,27 @@ def dumpGroup(pgroup):
 
 
 
+def dumpCatalog(h5file, nodename):
+    for info in h5file.listNodeInfo(nodename, recursive=True):
+        print str(info)
+
+
 def main():
     usage = \
-    """usage: %s [-d] [-v] [-a] [-c] [-i] [-R start,stop,step] [-h] file[:nodepath]
+    """usage: %s [-d] [-v] [-a] [-c] [-i] [-C] [-R start,stop,step] [-h] file[:nodepath]
       -d -- Dump data information on leaves
       -v -- Dump more metainformation on nodes
       -a -- Show attributes in nodes (only useful when -v or -d are active)
       -c -- Show info of columns in tables (only useful when -v or -d are active)
       -i -- Show info of indexed columns (only useful when -v or -d are active)
+      -C -- Only show the metadata of nodes (from the catalog of nodes if any)
       -R RANGE -- Select a RANGE of rows in the form "start,stop,step"
       -h -- Print help on usage
                 \n""" \
     % os.path.basename(sys.argv[0])
 
     try:
-        opts, pargs = getopt.getopt(sys.argv[1:], 'R:ahdvci')
+        opts, pargs = getopt.getopt(sys.argv[1:], 'R:ahdvciC')
     except:
         sys.stderr.write(usage)
         sys.exit(0)
@@ -148,6 +155,8 @@ def main():
             options.colinfo = 1
         elif option[0] == '-i':
             options.idxinfo = 1
+        elif option[0] == '-C':
+            options.catalog = 1
         else:
             print option[0], ": Unrecognized option"
             sys.stderr.write(usage)
@@ -165,6 +174,11 @@ def main():
 
     # Check whether the specified node is a group or a leaf
     h5file = openFile(filename, 'r')
+    if options.catalog:
+        # The nodes do not need to be opened
+        dumpCatalog(h5file, nodename)
+        h5file.close()
+        return
     nodeobject = h5file.getNode(nodename)
     if isinstance(nodeobject, Group):
         # Close the file again and reopen using the rootUEP
@@ -16,6 +16,13 @@ import sys
 import math
 import warnings
 import os.path
+import Queue
+import threading
+import zlib
+try:
+    import bz2
+except ImportError:
+    bz2 = None
 from time import time
 from functools import reduce as _reduce
 
@@ -23,14 +30,15 @@ import numpy
 import numexpr
 
 from tables import tableExtension
-from tables.lrucacheExtension import ObjectCache, NumCache
+from tables.lrucacheExtension import ObjectCache
 from tables.atom import Atom
-from tables.conditions import compile_condition
+from tables.conditions import compile_condition, call_on_recarr
 from numexpr.necompiler import (
     getType as numexpr_getType, double, is_cpu_amd_intel)
 from numexpr.expressions import functions as numexpr_functions
 from tables.flavor import flavor_of, array_as_internal, internal_to_flavor
-from tables.utils import is_idx, lazyattr, SizeType, NailedDict as CacheDict
+from tables.utils import (is_idx, lazyattr, SizeType, hdf5lock,
+                          NailedDict as CacheDict)
 from tables.leaf import Leaf
 from tables.description import (
     IsDescription, Description, Col, descr_from_dtype)
@@ -41,7 +49,7 @@ from tables.utilsExtension import getNestedField
 from tables.path import joinPath, splitPath
 from tables.index import (
     OldIndex, defaultIndexFilters, defaultAutoIndex, Index, IndexesDescG,
-    IndexesTableG)
+    IndexesTableG, CompositeIndex, BitmapIndex, bitmap_to_coords)
 
 profile = False
 #profile = True  # Uncomment for profiling
@@ -96,6 +104,10 @@ def _indexPathnameOf(node):
 def _indexPathnameOfColumn(table, colpathname):
     return joinPath(_indexPathnameOf(table), colpathname)
 
+def _compositeIndexNameOf(colpathnames):
+    return 'composite_%s' % '__'.join(
+        [colpathname.replace('/', '_') for colpathname in colpathnames])
+
 # The next are versions that work with just paths (i.e. we don't need
 # a node instance for using them, which can be critical in certain
 # situations)
@@ -164,18 +176,31 @@ _table__autoIndex = property(
 
 
 def restorecache(self):
-    # Define a cache for sparse table reads
+    # Define a cache for sparse table reads (table chunks are kept in
+    # the shared chunk cache).  Entries are ``[nrows, coords]`` lists,
+    # where `nrows` is the number of rows in table when `coords` were
+    # computed (or -1 while the query is still being iterated).
     params = self._v_file.params
-    chunksize = self._v_chunkshape[0]
-    nslots = params['TABLE_MAX_SIZE'] / (chunksize * self._v_dtype.itemsize)
-    self._chunkcache = NumCache((nslots, chunksize), self._v_dtype,
-                                'table chunk cache')
     self._seqcache = ObjectCache(params['ITERSEQ_MAX_SLOTS'],
                                  params['ITERSEQ_MAX_SIZE'],
-                                 'Iter sequence cache')
+                                 'Iter sequence cache',
+                                 params['ITERSEQ_POLICY'])
     self._dirtycache = False
 
 
+class _Coords(object):
+    """Sorted row coordinates supporting ``&`` and ``|`` as set operations."""
+
+    def __init__(self, coords):
+        self.coords = coords
+
+    def __and__(self, other):
+        return _Coords(numpy.intersect1d(self.coords, other.coords))
+
+    def __or__(self, other):
+        return _Coords(numpy.union1d(self.coords, other.coords))
+
+
 def _table__whereIndexed(self, compiled, condition, condvars,
                          start, stop, step):
     if profile: tref = time()
@@ -190,31 +215,66 @@ def _table__whereIndexed(self, compiled, condition, condvars,
     for key, value in condvars.iteritems():
         if isinstance(value, numpy.ndarray):
             values.append((key, value.item()))
-    # Build a key for the sequence cache
-    seqkey = (condition, tuple(values), (start, stop, step))
+    # Build a key for the sequence cache.  Queries up to the end of the
+    # table do not include it, so that they can still be found after
+    # appending rows.
+    if stop == self.nrows:
+        seqkey = (condition, tuple(values), (start, None, step))
+    else:
+        seqkey = (condition, tuple(values), (start, stop, step))
     # Do a lookup in sequential cache for this query
-    nslot = self._seqcache.getslot(seqkey)
+    seqcache = self._seqcache
+    nslot = seqcache.getslot(seqkey)
     if nslot >= 0:
         # Get the row sequence from the cache
-        seq = self._seqcache.getitem(nslot)
-        if len(seq) == 0:
-            return iter([])
-        seq = numpy.array(seq, dtype='int64')
-        # Correct the ranges in cached sequence
-        if (start, stop, step) != (0, self.nrows, 1):
-            seq = seq[(seq>=start)&(seq<stop)&((seq-start)%step==0)]
-        return self.itersequence(seq)
+        nrows, seq = seqcache.getitem(nslot)
+        if nrows < 0:
+            # The query was not iterated to the end, so start again
+            seqcache.removeslot(nslot)
+        else:
+            if nrows < stop:
+                # Only the rows appended afterwards need to be evaluated
+                seq = seq + _table__whereAppended(
+                    self, compiled, condvars, nrows, stop)
+                seqcache.removeslot(nslot)
+                if len(seq) < self._v_file.params['ITERSEQ_MAX_ELEMENTS']:
+                    seqcache.setitem(seqkey, [self.nrows, seq], len(seq) * 8)
+            if len(seq) == 0:
+                return iter([])
+            seq = numpy.array(seq, dtype='int64')
+            # Correct the ranges in cached sequence
+            if (start, stop, step) != (0, self.nrows, 1):
+                seq = seq[(seq>=start)&(seq<stop)&((seq-start)%step==0)]
+            return self.itersequence(seq)
+
+    # Full and bitmap indexes keep the coordinates of rows, so the exact
+    # rows fulfilling the indexed expression can be used instead of
+    # chunkmaps when there are not too many of them.
+    idxexprs = compiled.index_expressions
+    strexpr = compiled.string_expression
+    for (var, ops, lims) in idxexprs:
+        if condvars[var].index.kind not in ('full', 'bitmap'):
+            break
     else:
-        # No luck.  Set row sequence to empty.  It will be populated
-        # in the iterator. If not possible, the slot entry will be
-        # removed there.
-        self._nslotseq = self._seqcache.setitem(seqkey, [], 1)
+        coords = _table__whereIndexedCoords(
+            self, compiled, condvars, start, stop, step)
+        if coords is not None:
+            if len(coords) < self._v_file.params['ITERSEQ_MAX_ELEMENTS']:
+                seqcache.setitem(seqkey, [self.nrows, coords.tolist()],
+                                 len(coords) * 8)
+            return self.itersequence(coords)
+
+    # No luck.  Set row sequence to empty.  It will be populated
+    # in the iterator. If not possible, the slot entry will be
+    # removed there.
+    seqentry = [-1, []]
+    self._seqentry = seqentry
+    self._nslotseq = seqcache.setitem(seqkey, seqentry, 1)
 
     # Compute the chunkmap for every index in indexed expression
-    idxexprs = compiled.index_expressions
-    strexpr = compiled.string_expression
     cmvars = {}
     tcoords = 0
+    hasdelta = False
     for i, idxexpr in enumerate(idxexprs):
         var, ops, lims = idxexpr
         col = condvars[var]
@@ -234,24 +294,148 @@ def _table__whereIndexed(self, compiled, condition, condvars,
         else:
             # Get the chunkmap from the index
             chunkmap = index.get_chunkmap()
+        if index.has_delta:
+            # Take the rows updated or removed afterwards into account
+            # (updated rows are always candidates)
+            chunkmap = index.get_delta_chunkmap(chunkmap)
+            hasdelta = True
         # Assign the chunkmap to the cmvars dictionary
         cmvars["e%d"%i] = chunkmap
 
-    if index.reduction == 1 and tcoords == 0:
+    if index.reduction == 1 and tcoords == 0 and not hasdelta:
         # No candidates found in any indexed expression component, so leave now
+        seqentry[0] = self.nrows
         return iter([])
 
+    # Chunks with rows not indexed yet have to be visited as well
+    nchunks = long(math.ceil(float(self.nrows)/self.chunkshape[0]))
+    for (name, chunkmap) in cmvars.items():
+        if len(chunkmap) < nchunks:
+            cmvars[name] = numpy.concatenate(
+                (chunkmap, numpy.ones(nchunks-len(chunkmap), dtype="bool")))
+
     # Compute the final chunkmap
     chunkmap = numexpr.evaluate(strexpr, cmvars)
     # Method .any() is twice as faster than method .sum()
     if not chunkmap.any():
         # The chunkmap is empty
+        seqentry[0] = self.nrows
         return iter([])
 
     if profile: show_stats("Exiting table_whereIndexed", tref)
     return chunkmap
 
 
+def _checkIndexableDtype(dtype):
+    """Check that a column with the given `dtype` can be indexed."""
+
+    if dtype.str[1:] == 'u8':
+        raise NotImplementedError(
+            "indexing 64-bit unsigned integer columns "
+            "is not supported yet, sorry" )
+    if dtype.kind == 'c':
+        raise TypeError("complex columns can not be indexed")
+    if dtype.shape != ():
+        raise TypeError("multidimensional columns can not be indexed")
+
+
+def _table__whereAppended(self, compiled, condvars, start, stop, step=1):
+    """Get the coordinates of rows in ``[start, stop)`` fulfilling a condition.
+
+    The condition is evaluated in-kernel, without using indexes.  This
+    is used for completing the results in `self._seqcache` with the
+    rows appended to the table after they were computed.
+    """
+
+    with self._querylock:
+        useIndex = self._useIndex
+        self._useIndex = False
+        try:
+            args = [condvars[param] for param in compiled.parameters]
+            self._whereCondition = (compiled.function, args)
+            row = tableExtension.Row(self)
+            return [r.nrow for r in row._iter(start, stop, step)]
+        finally:
+            self._useIndex = useIndex
+
+
+def _table__whereIndexedCoords(self, compiled, condvars, start, stop, step):
+    """Get the coordinates fulfilling a condition using exact indexes.
+
+    The rows in ``[start, stop)`` found for each indexed expression are
+    combined following the indexable expression in string format,
+    either as bitmaps (when all the indexes are bitmap ones) or as
+    sorted coordinates.  The resulting candidates are checked against
+    the whole condition, and the rows not indexed yet are checked
+    in-kernel.
+
+    `None` is returned when the indexes find too many rows for reading
+    them one by one (see ``INDEX_MAX_COORDS_RATIO``).
+    """
+
+    params = self._v_file.params
+    indexes = []
+    tcoords = 0
+    for idxexpr in compiled.index_expressions:
+        var, ops, lims = idxexpr
+        index = condvars[var].index
+        assert index is not None, "the chosen column is not indexed"
+        assert not index.dirty, "the chosen column has a dirty index"
+        range_ = index.getLookupRange(ops, lims)
+        tcoords += index.search(range_)
+        if index.has_delta:
+            # Updated rows are always candidates
+            tcoords += len(index.delta_updated)
+        indexes.append(index)
+    maxcoords = min(params['ITERSEQ_MAX_ELEMENTS'],
+                    params['INDEX_MAX_COORDS_RATIO'] * self.nrows)
+    if tcoords > maxcoords:
+        return None
+
+    # Only the rows in all the indexes can be resolved by them
+    nelements = min([index.nelements - index.nremoved for index in indexes])
+    istop = min(stop, nelements)
+
+    # The string expression is only made of ``eN`` names, ``&``, ``|``
+    # and parentheses.
+    strexpr = compiled.string_expression
+    if start >= istop:
+        coords = numpy.array([], dtype='int64')
+    elif [index for index in indexes if index.kind != 'bitmap']:
+        coordsvars = {}
+        for (i, index) in enumerate(indexes):
+            coords = index.get_coords()
+            if index.has_delta:
+                coords = index.get_delta_coords(coords)
+            coords = coords[coords.searchsorted(start):
+                            coords.searchsorted(istop)]
+            coordsvars["e%d"%i] = _Coords(coords)
+        coords = eval(strexpr, {'__builtins__': {}}, coordsvars).coords
+    else:
+        first, nbytes = start // 8, (istop + 7) // 8
+        bitmapvars = dict( ("e%d"%i, index.get_bitmap()[first:nbytes])
+                           for (i, index) in enumerate(indexes) )
+        bitmap = eval(strexpr, {'__builtins__': {}}, bitmapvars).copy()
+        # Clear the bits of rows not in all the indexes
+        padding = nbytes*8 - istop
+        if padding > 0:
+            bitmap[-1] &= (0xff << padding) & 0xff
+        coords = bitmap_to_coords(bitmap) + first*8
+        coords = coords[coords.searchsorted(start):]
+    coords = self._checkCoords(compiled, condvars, coords, start, stop, step)
+
+    # Rows not indexed yet are checked in-kernel.
+    if nelements < stop:
+        tstart = max(start, nelements)
+        tstart += (start - tstart) % step
+        tail = _table__whereAppended(
+            self, compiled, condvars, tstart, stop, step)
+        if tail:
+            coords = numpy.concatenate(
+                (coords, numpy.array(tail, dtype=SizeType)))
+    return coords
+
+
 def createIndexesTable(table):
     itgroup = IndexesTableG(
         table._v_parent, _indexNameOf(table),
@@ -268,7 +452,7 @@ def createIndexesDescr(igroup, dname, iname, filters):
 
 
 def _column__createIndex(self, optlevel, kind, filters, tmp_dir,
-                         blocksizes, verbose):
+                         blocksizes, verbose, progress=None):
     name = self.name
     table = self.table
     dtype = self.dtype
@@ -283,14 +467,7 @@ def _column__createIndex(self, optlevel, kind, filters, tmp_dir,
                          "better" % (str(index), str(self.pathname)))
 
     # Check that the datatype is indexable.
-    if dtype.str[1:] == 'u8':
-        raise NotImplementedError(
-            "indexing 64-bit unsigned integer columns "
-            "is not supported yet, sorry" )
-    if dtype.kind == 'c':
-        raise TypeError("complex columns can not be indexed")
-    if dtype.shape != ():
-        raise TypeError("multidimensional columns can not be indexed")
+    _checkIndexableDtype(dtype)
 
     # Get the indexes group for table, and if not exists, create it
     try:
@@ -325,23 +502,38 @@ def _column__createIndex(self, optlevel, kind, filters, tmp_dir,
         expectedrows = table.nrows
 
     # Create the index itself
-    index = Index(
-        idgroup, name, atom=atom,
-        title="Index for %s column" % name,
-        kind=kind,
-        optlevel=optlevel,
-        filters=filters,
-        tmp_dir=tmp_dir,
-        expectedrows=expectedrows,
-        byteorder=table.byteorder,
-        blocksizes=blocksizes)
+    if kind == 'bitmap':
+        index = BitmapIndex(
+            idgroup, name, atom=Atom.from_dtype(dtype),
+            title="Bitmap index for %s column" % name,
+            optlevel=optlevel,
+            filters=filters)
+    else:
+        index = Index(
+            idgroup, name, atom=atom,
+            title="Index for %s column" % name,
+            kind=kind,
+            optlevel=optlevel,
+            filters=filters,
+            tmp_dir=tmp_dir,
+            expectedrows=expectedrows,
+            byteorder=table.byteorder,
+            blocksizes=blocksizes)
 
     table._setColumnIndexing(self.pathname, True)
 
     # Feed the index with values
 
     # Add rows to the index if necessary
-    if table.nrows > 0:
+    built = (kind != 'bitmap' and index.want_complete_sort and
+             index.temp_required)
+    if built:
+        # Sort the column out-of-core and merge it into a CSI directly
+        params = table._v_file.params
+        indexedrows = index.build(nthreads=params['INDEX_BUILD_THREADS'],
+                                  memory=params['INDEX_BUILD_MEMORY'],
+                                  progress=progress, verbose=verbose)
+    elif table.nrows > 0:
         indexedrows = table._addRowsToIndex(
             self.pathname, 0, table.nrows, lastrow=True, update=False )
     else:
@@ -351,7 +543,8 @@ def _column__createIndex(self, optlevel, kind, filters, tmp_dir,
     table._unsaved_indexedrows = table.nrows - indexedrows
 
     # Optimize the index that has been already filled-up
-    index.optimize(verbose=verbose)
+    if kind != 'bitmap' and not built:
+        index.optimize(verbose=verbose)
 
     # We cannot do a flush here because when reindexing during a
     # flush, the indexes are created anew, and that creates a nested
@@ -371,6 +564,153 @@ class _ColIndexes(dict):
         return '{\n  %s}' % (',\n  '.join(rep))
 
 
+# HDF5 identifiers of the filters that `_decode_chunk()` can undo.
+_DEFLATE_FILTER, _SHUFFLE_FILTER, _BZIP2_FILTER = 1, 2, 307
+
+
+def _can_decode_chunks(filters):
+    """Can `_decode_chunk()` undo every filter in `filters`?
+
+    `filters` is the pipeline returned by `Table._get_raw_filters()`.
+    """
+
+    if filters is None:
+        return False
+    for (filter_id, cd_values) in filters:
+        if not (filter_id == _DEFLATE_FILTER
+                or (filter_id == _SHUFFLE_FILTER and len(cd_values) > 0)
+                or (filter_id == _BZIP2_FILTER and bz2 is not None)):
+            return False
+    return True
+
+
+def _unshuffle(data, itemsize):
+    """Undo the HDF5 shuffle filter over a string of `itemsize` elements."""
+
+    nelements = len(data) // itemsize
+    if itemsize <= 1 or nelements <= 1:
+        return data
+    nbytes = nelements * itemsize
+    planes = numpy.frombuffer(data, dtype=numpy.uint8, count=nbytes)
+    # Leftover bytes are not shuffled
+    return planes.reshape(itemsize, nelements).T.tostring() + data[nbytes:]
+
+
+def _decode_chunk(data, filter_mask, filters):
+    """Undo the `filters` applied to a raw chunk read from disk.
+
+    Filters are undone in the reverse order of the pipeline, skipping
+    the ones flagged in `filter_mask`.  The decompressors in the
+    standard library release the GIL, so several threads can decode
+    chunks at the same time.
+    """
+
+    for i in xrange(len(filters) - 1, -1, -1):
+        if filter_mask & (1 << i):
+            continue  # the filter was not applied to this chunk
+        (filter_id, cd_values) = filters[i]
+        if filter_id == _DEFLATE_FILTER:
+            data = zlib.decompress(data)
+        elif filter_id == _SHUFFLE_FILTER:
+            data = _unshuffle(data, cd_values[0])
+        elif filter_id == _BZIP2_FILTER:
+            data = bz2.decompress(data)
+    return data
+
+
+def _prefetch_records(table, start, stop, nrowsinbuf, free, ready):
+    """Fill the buffers of a `_RowPrefetcher` (runs in its own thread).
+
+    Buffers are taken from the `free` queue until a ``None`` is found
+    there, which means that the consumer is gone.
+    """
+
+    try:
+        for bstart in xrange(start, stop, nrowsinbuf):
+            buf = free.get()
+            if buf is None:
+                return
+            nread = table._read_records(bstart, nrowsinbuf, buf)
+            ready.put((bstart, nread, buf))
+    except Exception, exc:
+        ready.put((None, 0, exc))
+
+
+class _RowPrefetcher(object):
+    """Read the I/O buffers of a sequential table iterator in advance.
+
+    A background thread keeps up to `nbuffers` buffers of `nrowsinbuf`
+    rows read (and decompressed) ahead of the consumer, so that I/O and
+    the per-row work of the iterator can overlap.  Buffers are recycled,
+    so no more than `nbuffers` of them are ever allocated.
+    """
+
+    def __init__(self, table, start, stop, nrowsinbuf, nbuffers):
+        self._free = free = Queue.Queue()
+        self._ready = ready = Queue.Queue()
+        for i in xrange(nbuffers):
+            free.put(table._get_container(nrowsinbuf))
+        self._thread = thread = threading.Thread(
+            target=_prefetch_records,
+            args=(table, start, stop, nrowsinbuf, free, ready))
+        thread.setDaemon(True)
+        thread.start()
+
+    def fill(self, start, IObuf):
+        """Copy the buffer starting at row `start` into `IObuf`.
+
+        The number of rows copied is returned.  Buffers starting
+        before `start` (i.e. skipped by the consumer) are discarded.
+        """
+
+        while True:
+            (bstart, nread, buf) = self._ready.get()
+            if bstart is None:
+                raise buf  # the reading thread failed
+            if bstart == start:
+                IObuf[:nread] = buf[:nread]
+                self._free.put(buf)
+                return nread
+            self._free.put(buf)
+
+    def close(self):
+        """Stop reading ahead and wait for the reading thread to end."""
+
+        thread = self._thread
+        if thread is None:
+            return
+        self._thread = None
+        # Drop the free buffers, so that nothing else is read, and wake
+        # the reading thread up.
+        free = self._free
+        try:
+            while True:
+                free.get_nowait()
+        except Queue.Empty:
+            pass
+        free.put(None)
+        if thread is not threading.currentThread():
+            thread.join()
+
+    def __del__(self):
+        self.close()
+
+
+def _iter_prefetched(rows, prefetcher):
+    """Yield the `rows` of a prefetching iterator.
+
+    The `prefetcher` is closed when the iteration ends, and also when
+    the generator is closed or collected before that (e.g. after a
+    ``break``), so that its thread never outlives the iterator.
+    """
+
+    try:
+        for row in rows:
+            yield row
+    finally:
+        prefetcher.close()
+
+
 class Table(tableExtension.Table, Leaf):
     """This class represents heterogeneous datasets in an HDF5 file.
 
@@ -609,6 +949,38 @@ class Table(tableExtension.Table, Leaf):
     This value is persistent.
     """
 
+    def _getincrementalIndex(self):
+        try:
+            indexgroup = self._v_file._getNode(_indexPathnameOf(self))
+        except NoSuchNodeError:
+            return False
+        return indexgroup.incremental
+
+    def _setincrementalIndex(self, incremental):
+        try:
+            indexgroup = self._v_file._getNode(_indexPathnameOf(self))
+        except NoSuchNodeError:
+            indexgroup = createIndexesTable(self)
+        indexgroup.incremental = incremental
+
+    incrementalIndex = property(
+        _getincrementalIndex, _setincrementalIndex, None,
+        """Keep track of modified and removed rows in column indexes?
+
+        When true, modifying or removing rows does not invalidate the
+        indexes of columns (except for bitmap indexes).  Instead, the
+        changed rows are kept in a delta of every index, and indexed
+        queries check them against the condition.  The delta is merged
+        into the index by :meth:`Table.compactIndexes`, or automatically
+        when it grows larger than ``INDEX_MAX_DELTA_RATIO`` times the
+        indexed rows and :attr:`Table.autoIndex` is true.  The default is
+        false.
+
+        This value is persistent.
+
+        .. versionadded:: 3.0
+        """)
+
     indexedcolpathnames = property(
         lambda self: [ _colpname for _colpname in self.colpathnames
                        if self.colindexed[_colpname] ],
@@ -623,6 +995,19 @@ class Table(tableExtension.Table, Leaf):
         None, None,
         """A dictionary with the indexes of the indexed columns.""")
 
+    compositeIndexes = property(
+        lambda self: dict(
+        ( (_key, self._v_file._getNode(
+                  joinPath(_indexPathnameOf(self), _name)))
+          for (_key, _name) in self._compositeindexes.iteritems() )),
+        None, None,
+        """A dictionary with the composite indexes of the table.
+
+        Keys are tuples with the pathnames of the key columns.
+
+        .. versionadded:: 3.0
+        """)
+
     _dirtyindexes = property(
         lambda self: self._conditionCache._nailcount > 0,
         None, None,
@@ -703,11 +1088,16 @@ class Table(tableExtension.Table, Leaf):
         """Maps the name of a column to its default value."""
         self.colindexed = {}
         """Is the column which name is used as a key indexed?"""
+        self._compositeindexes = {}
+        """Maps tuples of column pathnames to the names of their
+        composite indexes."""
 
         self._useIndex = False
         """Whether an index can be used or not in a search.  Boolean."""
         self._whereCondition = None
         """Condition function and argument list for selection of values."""
+        self._querylock = threading.RLock()
+        """Lock for handing the conditions above over to row iterators."""
         max_slots = parentNode._v_file.params['COND_CACHE_SLOTS']
         self._conditionCache = CacheDict(max_slots)
         """Cache of already compiled conditions."""
@@ -717,6 +1107,8 @@ class Table(tableExtension.Table, Leaf):
         """Is indexing enabled in queries?  *Use only for testing.*"""
         self._emptyArrayCache = {}
         """Cache of empty arrays."""
+        self._projectedDtypes = {}
+        """Cache of dtypes used in column projections."""
 
         self._v_dtype = None
         """The NumPy datatype fopr this table."""
@@ -853,6 +1245,19 @@ class Table(tableExtension.Table, Leaf):
             if indexed:
                 self.indexed = True
 
+        # Look for composite indexes in the indexes group.
+        if igroup:
+            itgroup = self._v_file._getNode(indexesGroupPath)
+            for name in itgroup._v_groups.keys():
+                if not name.startswith('composite_'):
+                    continue
+                group = itgroup._v_groups[name]
+                if isinstance(group, CompositeIndex):
+                    key = tuple(group.colpathnames)
+                    self._compositeindexes[key] = group._v_name
+                    if group.dirty:
+                        self._conditionCache.nail()
+
         if oldindexes:  # this should only appear under 2.x Pro
             warnings.warn(
                 "table ``%s`` has column indexes with PyTables 1.x format. "
@@ -867,7 +1272,7 @@ class Table(tableExtension.Table, Leaf):
         # since their respective index objects share
         # the same number of elements.
         if self.indexed:
-            self._indexedrows = indexobj.nelements
+            self._indexedrows = indexobj.nelements - indexobj.nremoved
             self._unsaved_indexedrows = self.nrows - self._indexedrows
             # Put the autoIndex value in a cache variable
             self._autoIndex = self.autoIndex
@@ -890,6 +1295,82 @@ class Table(tableExtension.Table, Leaf):
         return numpy.empty(shape=shape, dtype=self._v_dtype)
 
 
+    def _getProjectedDtype(self, fields):
+        """Get a compact structured dtype holding only `fields`.
+
+        `fields` is a sequence of names of top-level columns (nested
+        columns are allowed too).  The projected dtypes are cached.
+        """
+
+        fields = tuple(fields)
+        try:
+            return self._projectedDtypes[fields]
+        except KeyError:
+            pass
+        v_dtype = self._v_dtype
+        for name in fields:
+            if name not in v_dtype.fields:
+                raise KeyError(("Field {0} not found in table "
+                                "{1}").format(name, self))
+        dtype = numpy.dtype([(name, v_dtype[name]) for name in fields])
+        self._projectedDtypes[fields] = dtype
+        return dtype
+
+
+    def _readFields(self, start, stop, step, fields):
+        """Read a range of rows holding only the given `fields`.
+
+        Only the requested members of the records are decoded by HDF5,
+        and a compact structured array is returned.
+        """
+
+        dtype = self._getProjectedDtype(fields)
+        nrows = len(xrange(start, stop, step))
+        result = numpy.empty(shape=nrows, dtype=dtype)
+        if nrows > 0:
+            self._read_fields(start, nrows, step, result)
+        return result
+
+
+    def _readFieldsCoordinates(self, coords, fields):
+        """Read the rows in `coords` holding only the given `fields`.
+
+        `coords` must be a contiguous and aligned array of `SizeType`.
+        """
+
+        dtype = self._getProjectedDtype(fields)
+        result = numpy.empty(shape=len(coords), dtype=dtype)
+        if len(coords) > 0:
+            self._readElementsByChunk(coords, result, projected=True)
+        return result
+
+
+    def _readElementsByChunk(self, coords, result, projected=False):
+        """Read the rows in `coords` into `result`, grouped by chunk.
+
+        `coords` must be a contiguous and aligned array of `SizeType`.
+        Unsorted coordinates are sorted before reading, so that the rows
+        of every touched chunk are read together and the chunk is only
+        decompressed once.  The rows are then put back in `result` in the
+        order of `coords`.  If `projected` is true, only the fields in the
+        dtype of `result` are read.  Return the number of rows read.
+        """
+
+        if projected:
+            read = self._read_fields_elements
+        else:
+            read = self._read_elements
+        ncoords = len(coords)
+        if ncoords > 1 and (coords[1:] < coords[:-1]).any():
+            order = coords.argsort(kind='mergesort')
+            sortedresult = numpy.empty(shape=ncoords, dtype=result.dtype)
+            read(coords[order], sortedresult)
+            result[order] = sortedresult
+        else:
+            read(coords, result)
+        return ncoords
+
+
     def _getTypeColNames(self, type_):
         """Returns a list containing 'type_' column names."""
 
@@ -1131,7 +1612,7 @@ class Table(tableExtension.Table, Leaf):
             if len(exprvarsCache) > 256:
                 # Remove 10 (arbitrary) elements from the cache
                 for k in exprvarsCache.keys()[:10]:
-                    del exprvarsCache[k]
+                    exprvarsCache.pop(k, None)
             cexpr = compile(expression, '<string>', 'eval')
             exprvars = [ var for var in cexpr.co_names
                          if var not in ['None', 'False', 'True']
@@ -1259,7 +1740,7 @@ class Table(tableExtension.Table, Leaf):
 
         # Extract more information from referenced columns.
         typemap = dict(zip(varnames, vartypes))  # start with normal variables
-        indexedcols, copycols = [], []
+        indexedcols, bitmapcols, copycols = [], [], []
         for colname in colnames:
             col = condvars[colname]
 
@@ -1269,8 +1750,12 @@ class Table(tableExtension.Table, Leaf):
 
             # Get the set of columns with usable indexes.
             if ( self._enabledIndexingInQueries  # not test in-kernel searches
-                 and self.colindexed[col.pathname] and not col.index.dirty ):
-                indexedcols.append(colname)
+                 and self.colindexed[col.pathname] ):
+                index = col.index
+                if not index.dirty:
+                    indexedcols.append(colname)
+                    if index.kind == 'bitmap':
+                        bitmapcols.append(colname)
 
             # Get the list of unaligned, unidimensional columns.  See
             # the comments in `numexpr.evaluate()` for the
@@ -1280,8 +1765,27 @@ class Table(tableExtension.Table, Leaf):
             if not is_cpu_amd_intel and col.pathname in self._colunaligned:
                 copycols.append(colname)
         indexedcols = frozenset(indexedcols)
+        bitmapcols = frozenset(bitmapcols)
+
+        # Get the variables of the usable composite indexes, in key order.
+        compositecols = []
+        if self._enabledIndexingInQueries and self._compositeindexes:
+            colvars = dict( (condvars[colname].pathname, colname)
+                            for colname in colnames )
+            for (key, cindex) in self.compositeIndexes.iteritems():
+                if cindex.dirty:
+                    continue
+                keyvars = []
+                for colpathname in key:
+                    if colpathname not in colvars:
+                        break
+                    keyvars.append(colvars[colpathname])
+                if keyvars:
+                    compositecols.append(tuple(keyvars))
+
         # Now let ``compile_condition()`` do the Numexpr-related job.
-        compiled = compile_condition(condition, typemap, indexedcols, copycols)
+        compiled = compile_condition(condition, typemap, indexedcols, copycols,
+                                     compositecols, bitmapcols)
 
         # Check that there actually are columns in the condition.
         if not set(compiled.parameters).intersection(set(colnames)):
@@ -1310,6 +1814,8 @@ class Table(tableExtension.Table, Leaf):
         compiled = self._compileCondition(condition, condvars)
         # Return the columns in indexed expressions
         idxcols = [condvars[var].pathname for var in compiled.index_variables]
+        idxcols += [ condvars[expr[0]].pathname
+                     for expr in compiled.composite_expressions ]
         return frozenset(idxcols)
 
 
@@ -1393,54 +1899,258 @@ class Table(tableExtension.Table, Leaf):
 
         if profile: tref = time()
         if profile: show_stats("Entering table._where", tref)
-        # Adjust the slice to be used.
-        (start, stop, step) = self._processRangeRead(start, stop, step)
-        if start >= stop:  # empty range, reset conditions
-            self._useIndex = False
-            self._whereCondition = None
-            return iter([])
-
-        # Compile the condition and extract usable index conditions.
-        condvars = self._requiredExprVars(condition, condvars, depth=3)
-        compiled = self._compileCondition(condition, condvars)
-
-        # Can we use indexes?
-        if compiled.index_expressions:
-            chunkmap = _table__whereIndexed(
-                self, compiled, condition, condvars, start, stop, step)
-            if not isinstance(chunkmap, numpy.ndarray):
-                # If it is not a NumPy array it should be an iterator
-                # Reset conditions
+        # The condition and index information for the row iterator are
+        # handed over through the table, so queries on it are set up one
+        # at a time.  The iteration itself can run concurrently.
+        with self._querylock:
+            # Adjust the slice to be used.
+            (start, stop, step) = self._processRangeRead(start, stop, step)
+            if start >= stop:  # empty range, reset conditions
                 self._useIndex = False
                 self._whereCondition = None
-                # ...and return the iterator
-                return chunkmap
+                return iter([])
+
+            # Compile the condition and extract usable index conditions.
+            condvars = self._requiredExprVars(condition, condvars, depth=3)
+            compiled = self._compileCondition(condition, condvars)
+
+            # Can we use a composite index?
+            if compiled.composite_expressions:
+                with hdf5lock:
+                    coords = self._whereComposite(
+                        compiled, condvars, start, stop, step)
+                if coords is not None:
+                    self._useIndex = False
+                    self._whereCondition = None
+                    return self.itersequence(coords)
+
+            # Can we use indexes?
+            if compiled.index_expressions:
+                # Index searches keep their state in the index objects
+                # and do many small reads, so they hold the HDF5 lock.
+                with hdf5lock:
+                    chunkmap = _table__whereIndexed(
+                        self, compiled, condition, condvars,
+                        start, stop, step)
+                if not isinstance(chunkmap, numpy.ndarray):
+                    # If it is not a NumPy array it should be an iterator
+                    # Reset conditions
+                    self._useIndex = False
+                    self._whereCondition = None
+                    # ...and return the iterator
+                    return chunkmap
+            else:
+                chunkmap = None  # default to an in-kernel query
+
+            args = [condvars[param] for param in compiled.parameters]
+            self._whereCondition = (compiled.function, args)
+            row = tableExtension.Row(self)
+            if profile: show_stats("Exiting table._where", tref)
+            return row._iter(start, stop, step, chunkmap=chunkmap)
+
+
+    def _whereComposite(self, compiled, condvars, start, stop, step):
+        """Get the coordinates fulfilling a condition using a composite index.
+
+        The composite index gives the candidate rows, which are then
+        checked against the whole condition.  `None` is returned if
+        the composite index is not usable anymore.
+        """
+
+        compexprs = compiled.composite_expressions
+        colpathnames = tuple([ condvars[var].pathname
+                               for (var, ops, lims) in compexprs ])
+        nkeys = len(colpathnames)
+        for (key, cindex) in self.compositeIndexes.iteritems():
+            if key[:nkeys] == colpathnames and not cindex.dirty:
+                break
         else:
-            chunkmap = None  # default to an in-kernel query
+            return None
+        nelements = cindex.nelements
+        if nelements > self.nrows:
+            return None
+
+        coords = cindex.search([(ops, lims) for (var, ops, lims) in compexprs])
+        coords = self._checkCoords(
+            compiled, condvars, coords, start, stop, step)
+        # Rows not added to the index yet are checked in-kernel.
+        if nelements < stop:
+            tstart = max(start, nelements)
+            tstart += (start - tstart) % step
+            tail = _table__whereAppended(
+                self, compiled, condvars, tstart, stop, step)
+            if tail:
+                coords = numpy.concatenate(
+                    (coords, numpy.array(tail, dtype=SizeType)))
+        return coords
+
+
+    def _checkCoords(self, compiled, condvars, coords, start, stop, step):
+        """Get the candidate `coords` in range fulfilling a condition.
+
+        `coords` must be a sorted array of row coordinates.  Only the
+        columns taking part in the condition are read.
+        """
 
+        coords = coords[(coords >= start) & (coords < stop)]
+        if step > 1:
+            coords = coords[(coords - start) % step == 0]
+
+        func = compiled.function
         args = [condvars[param] for param in compiled.parameters]
-        self._whereCondition = (compiled.function, args)
-        row = tableExtension.Row(self)
-        if profile: show_stats("Exiting table._where", tref)
-        return row._iter(start, stop, step, chunkmap=chunkmap)
+        fields = set( arg.pathname.split('/')[0] for arg in args
+                      if hasattr(arg, 'pathname') )
+        fields = [name for name in self.colnames if name in fields]
+        result = []
+        nrowsinbuf = self.nrowsinbuf
+        for i in xrange(0, len(coords), nrowsinbuf):
+            bcoords = coords[i:i+nrowsinbuf]
+            recarr = self._readCoordinates(bcoords, fields=fields)
+            result.append(bcoords[call_on_recarr(func, args, recarr)])
+        if not result:
+            return numpy.array([], dtype=SizeType)
+        return numpy.concatenate(result).astype(SizeType)
+
+
+    def _read_records_decoded(self, start, nrecords, recarr, filters):
+        """Read records like `_read_records()`, decoding chunks here.
+
+        The raw chunks holding the records are read while holding the
+        HDF5 lock, but they are decoded out of it with the `filters`
+        returned by `self._get_raw_filters()`.  If some chunk can not
+        be read raw, the records are read with `_read_records()`.
+        """
+
+        chunksize = self.chunkshape[0]
+        itemsize = recarr.dtype.itemsize
+        stop = min(start + nrecords, self.nrows)
+        for nchunk in xrange(start // chunksize, (stop - 1) // chunksize + 1):
+            (filter_mask, data) = self._read_raw_chunk(nchunk)
+            if data is not None:
+                data = _decode_chunk(data, filter_mask, filters)
+            if data is None or len(data) != chunksize * itemsize:
+                # Not allocated on disk or unexpected contents
+                return self._read_records(start, nrecords, recarr)
+            records = numpy.frombuffer(data, dtype=recarr.dtype)
+            cstart = nchunk * chunksize
+            rstart = max(start, cstart)
+            rstop = min(stop, cstart + chunksize)
+            recarr[rstart-start:rstop-start] = records[rstart-cstart:
+                                                       rstop-cstart]
+        return max(stop - start, 0)
+
+
+    def _whereParallel(self, condition, condvars,
+                       start=None, stop=None, step=None):
+        """Get the coordinates fulfilling `condition` using several threads.
+
+        The range of the table is split in slices aligned with chunk
+        boundaries, which are read and evaluated by a pool of up to
+        ``MAX_QUERY_THREADS`` worker threads.  The coordinates found
+        by every worker are merged back in row order and returned as a
+        NumPy array.
+
+        `condvars` must be a mapping already returned by
+        `self._requiredExprVars()`.  If the query can make use of
+        indexes, or the parallel engine is disabled, `None` is returned
+        and the caller should fall back to `self._where()`.
+        """
+
+        nthreads = self._v_file.params['MAX_QUERY_THREADS']
+        if nthreads is None or nthreads <= 1:
+            return None
+
+        (start, stop, step) = self._processRangeRead(start, stop, step)
+        compiled = self._compileCondition(condition, condvars)
+        if compiled.index_expressions or compiled.composite_expressions:
+            return None  # indexed queries have their own machinery
+        if start >= stop:
+            return numpy.array([], dtype=SizeType)
+
+        # Slices are made of whole chunks so that no chunk is decompressed
+        # by more than one worker.
+        chunksize = self.chunkshape[0]
+        blocksize = max(self.nrowsinbuf // chunksize, 1) * chunksize
+        bstarts = range((start // chunksize) * chunksize, stop, blocksize)
+        nthreads = min(nthreads, len(bstarts))
+        if nthreads <= 1:
+            return None
+
+        func = compiled.function
+        args = [condvars[param] for param in compiled.parameters]
+        results = [None] * len(bstarts)
+        errors = []
+        # Reads are serialized by the HDF5 lock (see `tables.utils`).  If
+        # the filters of the table can be undone here, only raw chunks are
+        # read under the lock, and their decompression runs in parallel
+        # along with the evaluation of the condition (that releases the
+        # GIL in Numexpr).
+        rawfilters = self._get_raw_filters()
+        if not _can_decode_chunks(rawfilters):
+            rawfilters = None
+        tasklock = threading.Lock()
+        tasks = iter(enumerate(bstarts))
+
+        def worker():
+            IObuf = self._get_container(blocksize)
+            while not errors:
+                tasklock.acquire()
+                try:
+                    try:
+                        (nblock, bstart) = tasks.next()
+                    except StopIteration:
+                        return
+                finally:
+                    tasklock.release()
+                bstop = min(bstart + blocksize, stop)
+                bstart = max(bstart, start)
+                try:
+                    if rawfilters is None:
+                        nread = self._read_records(
+                            bstart, bstop - bstart, IObuf)
+                    else:
+                        nread = self._read_records_decoded(
+                            bstart, bstop - bstart, IObuf, rawfilters)
+                    valid = call_on_recarr(func, args, IObuf[:nread])
+                    coords = numpy.flatnonzero(valid).astype(SizeType)
+                    coords += bstart
+                    if step > 1:
+                        coords = coords[(coords - start) % step == 0]
+                    results[nblock] = coords
+                except Exception, exc:
+                    errors.append(exc)
+
+        workers = [threading.Thread(target=worker) for i in xrange(nthreads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return numpy.concatenate(results)
 
 
     def readWhere( self, condition, condvars=None, field=None,
-                   start=None, stop=None, step=None ):
+                   start=None, stop=None, step=None, fields=None ):
         """Read table data fulfilling the given *condition*.
 
         This method is similar to :meth:`Table.read`, having their common
         arguments and return values the same meanings. However, only the rows
-        fulfilling the *condition* are included in the result.
+        fulfilling the *condition* are included in the result.  As in
+        :meth:`Table.read`, fields may be used to get only some columns.
 
         The meaning of the other arguments is the same as in the
         :meth:`Table.where` method.
         """
 
         self._g_checkOpen()
-        coords = [ p.nrow for p in
-                   self._where(condition, condvars, start, stop, step) ]
-        self._whereCondition = None  # reset the conditions
+        condvars = self._requiredExprVars(condition, condvars, depth=2)
+        coords = self._whereParallel(condition, condvars, start, stop, step)
+        if coords is None:
+            coords = [ p.nrow for p in
+                       self._where(condition, condvars, start, stop, step) ]
+        with self._querylock:
+            self._whereCondition = None  # reset the conditions
         if len(coords) > 1:
             cstart, cstop = coords[0], coords[-1]+1
             if cstop - cstart == len(coords):
@@ -1448,8 +2158,9 @@ class Table(tableExtension.Table, Leaf):
                 inc_seq = numpy.alltrue(
                     numpy.arange(cstart, cstop) == numpy.array(coords))
                 if inc_seq:
-                    return self.read(cstart, cstop, field=field)
-        return self.readCoordinates(coords, field)
+                    return self.read(cstart, cstop, field=field,
+                                     fields=fields)
+        return self.readCoordinates(coords, field, fields)
 
 
     def whereAppend( self, dstTable, condition, condvars=None,
@@ -1475,7 +2186,13 @@ class Table(tableExtension.Table, Leaf):
         colNames = [colName for colName in self.colpathnames]
         dstRow = dstTable.row
         nrows = 0
-        for srcRow in self._where(condition, condvars, start, stop, step):
+        condvars = self._requiredExprVars(condition, condvars, depth=2)
+        coords = self._whereParallel(condition, condvars, start, stop, step)
+        if coords is None:
+            srcRows = self._where(condition, condvars, start, stop, step)
+        else:
+            srcRows = self.itersequence(coords)
+        for srcRow in srcRows:
             for colName in colNames:
                 dstRow[colName] = srcRow[colName]
             dstRow.append()
@@ -1498,11 +2215,15 @@ class Table(tableExtension.Table, Leaf):
 
         self._g_checkOpen()
 
-        coords = [ p.nrow for p in
-                   self._where(condition, condvars, start, stop, step) ]
+        condvars = self._requiredExprVars(condition, condvars, depth=2)
+        coords = self._whereParallel(condition, condvars, start, stop, step)
+        if coords is None:
+            coords = [ p.nrow for p in
+                       self._where(condition, condvars, start, stop, step) ]
         coords = numpy.array(coords, dtype=SizeType)
         # Reset the conditions
-        self._whereCondition = None
+        with self._querylock:
+            self._whereCondition = None
         if sort:
             coords = numpy.sort(coords)
         return internal_to_flavor(coords, self.flavor)
@@ -1546,6 +2267,11 @@ class Table(tableExtension.Table, Leaf):
                 "`sortby` can only be a `Column` or string object, "
                 "but you passed an object of type: %s" % type(sortby))
         if icol.is_indexed and icol.index.kind == "full":
+            if icol.index.has_delta:
+                raise ValueError(
+                    "The index of field `%s` in table `%s` has pending "
+                    "changes; please call `Table.compactIndexes()` first."
+                    % (sortby, self))
             if checkCSI and not icol.index.is_CSI:
                 # The index exists, but it is not a CSI one.
                 raise ValueError(
@@ -1611,7 +2337,7 @@ class Table(tableExtension.Table, Leaf):
         return self.readCoordinates(coords, field)
 
 
-    def iterrows(self, start=None, stop=None, step=None):
+    def iterrows(self, start=None, stop=None, step=None, prefetch=None):
         """Iterate over the table using a Row instance.
 
         If a range is not supplied, *all the rows* in the table are iterated
@@ -1620,6 +2346,13 @@ class Table(tableExtension.Table, Leaf):
         the table, you may use the start, stop and step parameters, which have
         the same meaning as in :meth:`Table.read`.
 
+        If prefetch is a positive number, a background thread keeps that
+        many I/O buffers read ahead of the iterator, so that reading (and
+        decompressing) data overlaps with the work done on each row.  If
+        it is None, the value of the TABLE_PREFETCH_BUFFERS parameter is
+        used (see :ref:`parameter_files`).  The reading thread is stopped
+        as soon as the iterator is exhausted, closed or collected.
+
         .. warning::
 
             When in the middle of a table row iterator, you should not
@@ -1648,6 +2381,16 @@ class Table(tableExtension.Table, Leaf):
         (start, stop, step) = self._processRangeRead(start, stop, step)
         if start < stop:
             row = tableExtension.Row(self)
+            if prefetch is None:
+                prefetch = self._v_file.params['TABLE_PREFETCH_BUFFERS']
+            nrowsinbuf = self.nrowsinbuf
+            # Skipping whole buffers would make read-ahead useless.
+            if prefetch > 0 and step < nrowsinbuf:
+                prefetcher = _RowPrefetcher(
+                    self, start, stop, nrowsinbuf, prefetch)
+                return _iter_prefetched(
+                    row._iter(start, stop, step, prefetcher=prefetcher),
+                    prefetcher)
             return row._iter(start, stop, step)
         # Fall-back action is to return an empty iterator
         return iter([])
@@ -1682,6 +2425,77 @@ class Table(tableExtension.Table, Leaf):
         return self.iterrows()
 
 
+    def iterblocks(self, start=None, stop=None, step=None, blocksize=None,
+                   fields=None):
+        """Iterate over the table in blocks of rows.
+
+        This method returns an iterator yielding a NumPy structured array
+        for each block of rows read from the table, so that vectorized
+        computations can be used instead of the per-row access offered by
+        :meth:`Table.iterrows`.  The start, stop and step parameters have
+        the same meaning as in :meth:`Table.read`.
+
+        blocksize is the number of table rows spanned by every block.  By
+        default, it is the largest multiple of the chunk length that fits
+        in the I/O buffer, so that each block covers whole chunks.
+
+        If fields is supplied, only the named field (or the sequence of
+        top-level fields) is returned for each block, as in the field and
+        fields arguments of :meth:`Table.read`.  Only these columns are
+        decoded from disk.
+
+        .. warning::
+
+            The blocks are views over an internal buffer that is reused
+            by the iterator.  Make a copy of a block if you want to keep
+            it after the next iteration.
+
+        Examples
+        --------
+
+        ::
+
+            total = 0
+            for block in table.iterblocks(fields='var2'):
+                total += block.sum()
+
+        """
+
+        self._g_checkOpen()
+        (start, stop, step) = self._processRangeRead(start, stop, step)
+        if fields is not None and not isinstance(fields, str):
+            fields = list(fields)
+        return self._iterblocks(start, stop, step, blocksize, fields)
+
+
+    def _iterblocks(self, start, stop, step, blocksize, fields):
+        """Low-level counterpart of `self.iterblocks()`."""
+
+        if fields is None:
+            dtype = self._v_dtype
+        elif isinstance(fields, str):
+            # Only decode the top-level column that holds the field
+            dtype = self._getProjectedDtype([fields.split('/', 1)[0]])
+        else:
+            dtype = self._getProjectedDtype(fields)
+
+        IObuf = None
+        for (bstart, bstop) in self._blockRanges(start, stop, step, blocksize):
+            nrows = len(xrange(bstart, bstop, step))
+            # The first block may be shorter than the next ones
+            if IObuf is None or len(IObuf) < nrows:
+                IObuf = numpy.empty(shape=nrows, dtype=dtype)
+            block = IObuf[:nrows]
+            if fields is None:
+                yield self._read(bstart, bstop, step, out=block)
+                continue
+            self._read_fields(bstart, nrows, step, block)
+            if isinstance(fields, str):
+                yield getNestedField(block, fields)
+            else:
+                yield block
+
+
     def _read(self, start, stop, step, field=None, out=None):
         """Read a range of rows and return an in-memory object."""
 
@@ -1708,6 +2522,13 @@ class Table(tableExtension.Table, Leaf):
 
         nrows = len(xrange(start, stop, step))
 
+        if out is None and (field or select_field):
+            # Only decode the top-level column that holds the field
+            colname = (field or select_field)
+            result = self._readFields(
+                start, stop, step, [colname.split('/', 1)[0]])
+            return getNestedField(result, colname)
+
         if out is None:
             # Compute the shape of the resulting column object
             if field:
@@ -1747,7 +2568,10 @@ class Table(tableExtension.Table, Leaf):
             # For step>15, this seems to work always faster than row._fillCol.
             self._read_field_name(result, start, stop, step, field)
         else:
-            self.row._fillCol(result, start, stop, step, field)
+            # A new row is used so that concurrent reads do not share
+            # its buffers.
+            row = tableExtension.Row(self)
+            row._fillCol(result, start, stop, step, field)
 
         if select_field:
             return result[select_field]
@@ -1755,7 +2579,8 @@ class Table(tableExtension.Table, Leaf):
             return result
 
 
-    def read(self, start=None, stop=None, step=None, field=None, out=None):
+    def read(self, start=None, stop=None, step=None, field=None, out=None,
+             fields=None):
         """Get data in the table as a (record) array.
 
         The start, stop and step parameters can be used to select only a *range
@@ -1774,6 +2599,12 @@ class Table(tableExtension.Table, Leaf):
         Columns under a nested column can be specified in the field parameter by
         using a slash character (/) as a separator (e.g. 'position/x').
 
+        If fields is supplied (a sequence of names of top-level columns), a
+        structured array with only these columns (in the given order) is
+        returned.  Only the requested columns are decoded from disk, which
+        is much faster than reading whole rows on wide tables.  This can
+        not be combined with the field and out parameters.
+
         The out parameter may be used to specify a NumPy array to receive the
         output data.  Note that the array must have the same size as the data
         selected with the other parameters.  Note that the array's datatype is
@@ -1797,6 +2628,14 @@ class Table(tableExtension.Table, Leaf):
         if field:
             self._checkColumn(field)
 
+        if fields is not None:
+            if field or out is not None:
+                raise ValueError("the fields argument can not be combined "
+                                 "with the field or out arguments")
+            (start, stop, step) = self._processRangeRead(start, stop, step)
+            arr = self._readFields(start, stop, step, fields)
+            return internal_to_flavor(arr, self.flavor)
+
         if out is not None and self.flavor != 'numpy':
             msg = ("Optional 'out' argument may only be supplied if array "
                    "flavor is 'numpy', currently is {0}").format(self.flavor)
@@ -1808,10 +2647,23 @@ class Table(tableExtension.Table, Leaf):
         return internal_to_flavor(arr, self.flavor)
 
 
-    def _readCoordinates(self, coords, field=None):
+    def _readCoordinates(self, coords, field=None, fields=None):
         """Private part of `readCoordinates()` with no flavor conversion."""
 
         ncoords = len(coords)
+        if fields is not None or (field and ncoords > 0):
+            # Only decode the requested columns
+            if not (isinstance(coords, numpy.ndarray) and
+                    coords.dtype.type is _npSizeType and
+                    coords.flags.contiguous and
+                    coords.flags.aligned):
+                coords = numpy.array(coords, dtype=SizeType)
+            if fields is not None:
+                return self._readFieldsCoordinates(coords, fields)
+            result = self._readFieldsCoordinates(
+                coords, [field.split('/', 1)[0]])
+            return getNestedField(result, field)
+
         # Create a read buffer only if needed
         if field is None or ncoords > 0:
             # Doing a copy is faster when ncoords is small (<1000)
@@ -1829,7 +2681,7 @@ class Table(tableExtension.Table, Leaf):
                     coords.flags.aligned):
                 # Get a contiguous and aligned coordinate array
                 coords = numpy.array(coords, dtype=SizeType)
-            self._read_elements(coords, result)
+            self._readElementsByChunk(coords, result)
 
         # Do the final conversions, if needed
         if field:
@@ -1841,7 +2693,7 @@ class Table(tableExtension.Table, Leaf):
         return result
 
 
-    def readCoordinates(self, coords, field=None):
+    def readCoordinates(self, coords, field=None, fields=None):
         """Get a set of rows given their indexes as a (record) array.
 
         This method works much like the :meth:`Table.read` method, but it uses
@@ -1853,7 +2705,10 @@ class Table(tableExtension.Table, Leaf):
         """
 
         self._g_checkOpen()
-        result = self._readCoordinates(coords, field)
+        if field and fields is not None:
+            raise ValueError("the fields argument can not be combined "
+                             "with the field argument")
+        result = self._readCoordinates(coords, field, fields)
         return internal_to_flavor(result, self.flavor)
 
 
@@ -2034,8 +2889,6 @@ class Table(tableExtension.Table, Leaf):
         self._close_append()
         if self.indexed:
             self._unsaved_indexedrows += lenrows
-            # The table caches for indexed queries are dirty now
-            self._dirtycache = True
             if self.autoIndex:
                 # Flush the unindexed rows
                 self.flushRowsToIndex(_lastrow=False)
@@ -2158,7 +3011,7 @@ class Table(tableExtension.Table, Leaf):
             self._update_elements(lcoords, coords, recarr)
 
         # Redo the index if needed
-        self._reIndex(self.colpathnames)
+        self._reIndex(self.colpathnames, coords=coords)
 
         return SizeType(lcoords)
 
@@ -2210,7 +3063,8 @@ class Table(tableExtension.Table, Leaf):
         self._update_records(start, stop, step, recarr)
 
         # Redo the index if needed
-        self._reIndex(self.colpathnames)
+        self._reIndex(self.colpathnames,
+                      coords=numpy.arange(start, stop, step))
 
         return SizeType(lenrows)
 
@@ -2290,7 +3144,7 @@ class Table(tableExtension.Table, Leaf):
         # save this modified rows in table
         self._update_records(start, stop, step, mod_recarr)
         # Redo the index if needed
-        self._reIndex([colname])
+        self._reIndex([colname], coords=numpy.arange(start, stop, step))
 
         return SizeType(nrows)
 
@@ -2366,7 +3220,7 @@ class Table(tableExtension.Table, Leaf):
         # save this modified rows in table
         self._update_records(start, stop, step, mod_recarr)
         # Redo the index if needed
-        self._reIndex(names)
+        self._reIndex(names, coords=numpy.arange(start, stop, step))
 
         return SizeType(nrows)
 
@@ -2392,6 +3246,12 @@ class Table(tableExtension.Table, Leaf):
                             colname, start, nrows, _lastrow, update=True )
             self._unsaved_indexedrows -= rowsadded
             self._indexedrows += rowsadded
+        # Composite indexes take all the new rows in a sorted segment
+        # (see `CompositeIndex.append_rows()`)
+        if _lastrow:
+            for cindex in self.compositeIndexes.itervalues():
+                if not cindex.dirty:
+                    cindex.append_rows()
         return rowsadded
 
 
@@ -2402,12 +3262,22 @@ class Table(tableExtension.Table, Leaf):
         # use of the table, it gets dangerous when closing the file, since the
         # column may be accessing a table which is being destroyed.
         index = self.cols._g_col(colname).index
+        if index.kind == 'bitmap':
+            # Bitmaps can take any number of rows, so all of them are added
+            stop = start + nrows
+            bstart = index.nelements
+            while bstart < stop:
+                bstop = min(bstart + index.blocksize, stop)
+                index.append(self._read(bstart, bstop, 1, colname))
+                bstart = bstop
+            return stop - start
         slicesize = index.slicesize
         # The next loop does not rely on xrange so that it can
         # deal with long ints (i.e. more than 32-bit integers)
         # This allows to index columns with more than 2**31 rows
         # F. Alted 2005-05-09
-        startLR = index.sorted.nrows*slicesize
+        # Rows removed from the table are still counted by the index
+        startLR = index.sorted.nrows*slicesize - index.nremoved
         indexedrows = startLR - start
         stop = start+nrows-slicesize+1
         while startLR < stop:
@@ -2455,7 +3325,7 @@ class Table(tableExtension.Table, Leaf):
                                                             self._v_pathname)
         nrows = self._remove_row(start, nrows)
         # removeRows is a invalidating index operation
-        self._reIndex(self.colpathnames)
+        self._reIndex(self.colpathnames, removed=(start, nrows))
 
         return SizeType(nrows)
 
@@ -2503,6 +3373,7 @@ class Table(tableExtension.Table, Leaf):
         else:
             itgroup._f_remove(recursive=True)
             self.indexed = False   # there are indexes no more
+            self._compositeindexes = {}
 
         # Remove the leaf itself from the hierarchy.
         super(Table, self)._g_remove(recursive, force)
@@ -2522,46 +3393,124 @@ class Table(tableExtension.Table, Leaf):
         self.indexed = max(colindexed.values())  # this is an OR :)
 
 
-    def _markColumnsAsDirty(self, colnames):
-        """Mark column indexes in `colnames` as dirty."""
+    def _markColumnsAsDirty(self, colnames, coords=None):
+        """Mark column indexes in `colnames` as dirty.
+
+        If incremental indexing is enabled, the `coords` of updated rows
+        are kept in the delta of the indexes supporting it instead.  If
+        `coords` are given, the composite indexes covering some column
+        in `colnames` are marked as dirty too (appended rows do not
+        invalidate them).
+        """
 
         assert len(colnames) > 0
         if self.indexed:
+            dirtynames = colnames
+            if coords is not None and self.incrementalIndex:
+                dirtynames = self._addToIndexDeltas(colnames, coords, None)
+                # The table caches for indexed queries are dirty now
+                self._dirtycache = True
             colindexed, cols = self.colindexed, self.cols
             # Mark the proper indexes as dirty
-            for colname in colnames:
+            for colname in dirtynames:
                 if colindexed[colname]:
                     col = cols._g_col(colname)
                     col.index.dirty = True
+        if coords is not None and self._compositeindexes:
+            colnames = set(colnames)
+            # Mark the proper composite indexes as dirty
+            for (key, cindex) in self.compositeIndexes.iteritems():
+                if colnames.intersection(key):
+                    cindex.dirty = True
+
 
+    def _reIndex(self, colnames, coords=None, removed=None):
+        """Re-index columns in `colnames` if automatic indexing is true.
 
-    def _reIndex(self, colnames):
-        """Re-index columns in `colnames` if automatic indexing is true."""
+        If incremental indexing is enabled, the `coords` of updated rows
+        or the `removed` ``(start, nrows)`` range of rows are kept in the
+        delta of the indexes supporting it instead.
+        """
 
         if self.indexed:
             colindexed, cols = self.colindexed, self.cols
+            incremental = (self.incrementalIndex and
+                           (coords is not None or removed is not None))
+            dirtynames = colnames
+            if incremental:
+                dirtynames = self._addToIndexDeltas(colnames, coords, removed)
             colstoindex = []
             # Mark the proper indexes as dirty
-            for colname in colnames:
+            for colname in dirtynames:
                 if colindexed[colname]:
                     col = cols._g_col(colname)
                     col.index.dirty = True
                     colstoindex.append(colname)
+            if incremental and self.autoIndex:
+                # Index again the rows left out of the indexes (if any)
+                self.flushRowsToIndex(_lastrow=True)
             # Now, re-index the dirty ones
             if self.autoIndex and colstoindex:
                 self._doReIndex(dirty=True)
             # The table caches for indexed queries are dirty now
             self._dirtycache = True
+        if self._compositeindexes:
+            colnames = set(colnames)
+            # Mark the proper composite indexes as dirty
+            for (key, cindex) in self.compositeIndexes.iteritems():
+                if colnames.intersection(key):
+                    cindex.dirty = True
 
 
-    def _doReIndex(self, dirty):
-        """Common code for `reIndex()` and `reIndexDirty()`."""
+    def _addToIndexDeltas(self, colnames, coords, removed):
+        """Keep the updated `coords` or `removed` rows in index deltas.
+
+        `removed` is a ``(start, nrows)`` tuple of rows already removed
+        from the table.  The names in `colnames` whose indexes can not
+        keep a delta, or whose delta has grown too large while automatic
+        indexing is on, are returned so that they can be re-indexed.
+        """
+
+        maxratio = self._v_file.params['INDEX_MAX_DELTA_RATIO']
+        colindexed, cols = self.colindexed, self.cols
+        remaining = []
+        indexedrows = []
+        for colname in colnames:
+            if not colindexed[colname]:
+                continue
+            index = cols._g_col(colname).index
+            if index.kind == 'bitmap' or index.dirty:
+                remaining.append(colname)
+                continue
+            if removed is not None:
+                index.add_removed(*removed)
+                indexedrows.append(index.nelements - index.nremoved)
+            else:
+                index.add_updated(coords)
+            ndelta = len(index.delta_updated) + index.nremoved
+            if self.autoIndex and ndelta > maxratio * index.nelements:
+                remaining.append(colname)
+        if indexedrows:
+            # Some rows in the indexes may have been left out
+            self._indexedrows = min(indexedrows)
+            self._unsaved_indexedrows = self.nrows - self._indexedrows
+        return remaining
+
+
+    def _doReIndex(self, dirty, composite=True):
+        """Common code for `reIndex()` and `reIndexDirty()`.
+
+        Composite indexes are only rebuilt if `composite` is true.
+        """
 
         indexedrows = 0
         for (colname, colindexed) in self.colindexed.iteritems():
             if colindexed:
                 indexcol = self.cols._g_col(colname)
                 indexedrows = indexcol._doReIndex(dirty)
+        for cindex in self.compositeIndexes.itervalues():
+            if composite and (not dirty or cindex.dirty):
+                cindex.rebuild()
         # Update counters in case some column has been updated
         if indexedrows > 0:
             self._indexedrows = indexedrows
@@ -2570,6 +3519,100 @@ class Table(tableExtension.Table, Leaf):
         return SizeType(indexedrows)
 
 
+    def createCompositeIndex(self, colnames, kind='full', filters=None):
+        """Create a composite index over several columns of the table.
+
+        The index keeps the values of the columns in colnames (a
+        sequence of column names or pathnames, in key order) sorted
+        lexicographically, along with their row coordinates.  Queries
+        comparing a prefix of these columns for equality, and
+        optionally the next column with a range, like ``(sym == 'X') &
+        (ts > t0)`` for an index on ``['sym', 'ts']``, can then locate
+        the matching rows with a single search in the sorted keys.
+
+        Only the 'full' kind of index is supported for the moment.  The
+        filters argument can be used to set the Filters (see
+        :ref:`FiltersClassDescr`) used to compress the index; if None,
+        default index filters will be used (currently, zlib level 1
+        with shuffling).
+
+        Rows appended to the table are added to the composite index
+        when the table is flushed if :attr:`Table.autoIndex` is true, or
+        when :meth:`Table.flushRowsToIndex` is called; until then, they
+        are checked by queries.  Modifying or removing rows marks the
+        composite index as dirty until :meth:`Table.reIndexDirty` is
+        called, so that it is not rebuilt on every change.
+
+        Returns the new :class:`tables.index.CompositeIndex` object.
+
+        .. versionadded:: 3.0
+
+        """
+
+        self._g_checkOpen()
+        if kind != 'full':
+            raise ValueError( "only 'full' composite indexes are supported: "
+                              "%r" % (kind,) )
+        colpathnames = []
+        for colname in colnames:
+            col = self.cols._f_col(colname)
+            if not isinstance(col, Column):
+                raise TypeError( "``%s`` is not a column; composite indexes "
+                                 "can not include nested columns" % colname )
+            _checkIndexableDtype(col.dtype)
+            colpathnames.append(col.pathname)
+        if len(colpathnames) < 2:
+            raise ValueError( "composite indexes need at least two columns; "
+                              "use ``Column.createIndex()`` instead" )
+        if len(set(colpathnames)) != len(colpathnames):
+            raise ValueError( "repeated columns in composite index: %s"
+                              % (colpathnames,) )
+        key = tuple(colpathnames)
+        if key in self._compositeindexes:
+            raise ValueError( "a composite index for columns %s "
+                              "already exists" % (colpathnames,) )
+
+        # Get the indexes group for table, and if not exists, create it
+        try:
+            itgroup = self._v_file._getNode(_indexPathnameOf(self))
+        except NoSuchNodeError:
+            itgroup = createIndexesTable(self)
+        if filters is None:
+            filters = defaultIndexFilters
+
+        # Rows still in the buffers have to be indexed as well
+        self.flush()
+        cindex = CompositeIndex(itgroup, _compositeIndexNameOf(colpathnames),
+                                colpathnames, filters=filters, new=True)
+        cindex.rebuild()
+        self._compositeindexes[key] = cindex._v_name
+        # Changing the set of indexes invalidates the condition cache
+        self._conditionCache.clear()
+        return cindex
+
+
+    def removeCompositeIndex(self, colnames):
+        """Remove the composite index over the columns in colnames.
+
+        .. versionadded:: 3.0
+
+        """
+
+        self._g_checkOpen()
+        key = tuple([self.cols._f_col(colname).pathname
+                     for colname in colnames])
+        if key not in self._compositeindexes:
+            raise KeyError( "there is no composite index for columns %s"
+                            % (list(key),) )
+        cindex = self.compositeIndexes[key]
+        # Remove the nail of a dirty index in the condition cache
+        cindex.dirty = False
+        cindex._f_remove(recursive=True)
+        del self._compositeindexes[key]
+        # Changing the set of indexes invalidates the condition cache
+        self._conditionCache.clear()
+
+
     def reIndex(self):
         """Recompute all the existing indexes in the table.
 
@@ -2581,6 +3624,28 @@ class Table(tableExtension.Table, Leaf):
         self._doReIndex(dirty=False)
 
 
+    def compactIndexes(self):
+        """Merge the deltas of column indexes into the indexes.
+
+        The indexes keeping track of modified or removed rows (see
+        :attr:`Table.incrementalIndex`) are recomputed, so that indexed
+        queries do not need to check those rows any more.
+
+        .. versionadded:: 3.0
+
+        """
+
+        self._g_checkOpen()
+        dirty = False
+        for index in self.colindexes.itervalues():
+            if index.has_delta:
+                index.dirty = True
+                dirty = True
+        if dirty:
+            return self._doReIndex(dirty=True)
+        return SizeType(0)
+
+
     def reIndexDirty(self):
         """Recompute the existing indexes in table, *if* they are dirty.
 
@@ -2667,10 +3732,10 @@ class Table(tableExtension.Table, Leaf):
         # And the number of final rows
         nrows = len(xrange(start, stop, step))
         # Create the new table and copy the selected data.
-        newtable = Table( group, name, self.description, title=title,
-                          filters=filters, expectedrows=nrows,
-                          chunkshape=chunkshape,
-                          _log=_log )
+        newtable = self.__class__( group, name, self.description,
+                                   title=title, filters=filters,
+                                   expectedrows=nrows, chunkshape=chunkshape,
+                                   _log=_log )
         self._g_copyRows(newtable, start, stop, step, sortby, checkCSI)
         nbytes = newtable.nrows * newtable.rowsize
         # Generate equivalent indexes in the new table, if required.
@@ -2718,7 +3783,7 @@ class Table(tableExtension.Table, Leaf):
         # Flush rows that remains to be appended
         if 'row' in self.__dict__:
             self.row._flushBufferedRows()
-        if self.indexed and self.autoIndex:
+        if self.autoIndex and (self.indexed or self._compositeindexes):
             # Flush any unindexed row
             rowsadded = self.flushRowsToIndex(_lastrow=True)
             assert rowsadded <= 0 or self._indexedrows == self.nrows, \
@@ -2726,13 +3791,24 @@ class Table(tableExtension.Table, Leaf):
                      "and rows in the table (%d) is not equal; "
                      "please report this to the authors."
                      % (self._indexedrows, self.nrows) )
-            if self._dirtyindexes:
-                # Finally, re-index any dirty column
-                self.reIndexDirty()
+        if self.indexed and self.autoIndex and self._dirtyindexes:
+            # Finally, re-index any dirty column (dirty composite indexes
+            # are only rebuilt by `reIndexDirty()`)
+            self._doReIndex(dirty=True, composite=False)
 
         super(Table, self).flush()
 
 
+    def _g_getCaches(self):
+        caches = []
+        for kind, name in [('conditions', '_conditionCache'),
+                           ('iterseq', '_seqcache')]:
+            cache = self.__dict__.get(name)
+            if cache is not None:
+                caches.append((kind, cache))
+        return caches
+
+
     def _g_preKillHook(self):
         """Code to be called before killing the node."""
 
@@ -3297,16 +4373,17 @@ class Column(object):
         """Iterate through all items in the column.
         """
         table = self.table
-        itemsize = self.dtype.itemsize
-        nrowsinbuf = table._v_file.params['IO_BUFFER_SIZE'] // itemsize
-        buf = numpy.empty((nrowsinbuf, ), self.dtype)
+        # Only decode the top-level column that holds this one
+        dtype = table._getProjectedDtype([self.pathname.split('/', 1)[0]])
+        nrowsinbuf = max(
+            table._v_file.params['IO_BUFFER_SIZE'] // dtype.itemsize, 1)
+        buf = numpy.empty((nrowsinbuf, ), dtype)
         max_row = len(self)
         for start_row in xrange(0, len(self), nrowsinbuf):
             end_row = min(start_row + nrowsinbuf, max_row)
             buf_slice = buf[0:end_row - start_row]
-            table.read(start_row, end_row, 1, field=self.pathname,
-                       out=buf_slice)
-            for row in buf_slice:
+            table._read_fields(start_row, end_row - start_row, 1, buf_slice)
+            for row in getNestedField(buf_slice, self.pathname):
                 yield row
 
 
@@ -3367,7 +4444,7 @@ class Column(object):
 
     def createIndex( self, optlevel=6, kind="medium", filters=None,
                      tmp_dir=None, _blocksizes=None, _testmode=False,
-                     _verbose=False ):
+                     _verbose=False, progress=None ):
         """Create an index for this column.
 
         .. warning::
@@ -3386,12 +4463,22 @@ class Column(object):
             resources for creating the index.
         kind : str
             The kind of the index to be built.  It can take the 'ultralight',
-            'light', 'medium' or 'full' values.  Lighter kinds ('ultralight'
-            and 'light') mean that the index takes less space on disk, but will
-            perform queries slower.  Heavier kinds ('medium' and 'full') mean
-            better chances for reducing the entropy of the index (increasing
-            the query speed) at the price of using more disk space as well as
-            more CPU, memory and I/O resources for creating the index.
+            'light', 'medium', 'full' or 'bitmap' values.  Lighter kinds
+            ('ultralight' and 'light') mean that the index takes less space on
+            disk, but will perform queries slower.  Heavier kinds ('medium' and
+            'full') mean better chances for reducing the entropy of the index
+            (increasing the query speed) at the price of using more disk space
+            as well as more CPU, memory and I/O resources for creating the
+            index.
+
+            The 'bitmap' kind is meant for columns with few distinct values
+            (e.g. enumerated, boolean or short string columns): it keeps a
+            compressed bitmap of the rows holding each value, and it can
+            solve ``!=`` comparisons as well.  The optlevel is not used for
+            this kind.
+
+            .. versionchanged:: 3.0
+               The 'bitmap' kind was added.
 
             Note that selecting a full kind with an optlevel of 9 (the maximum)
             guarantees the creation of an index with zero entropy, that is, a
@@ -3409,9 +4496,25 @@ class Column(object):
             to specify the directory for this temporary file.  The default is
             to create it in the same directory as the file containing the
             original table.
+        progress
+            A callable to be called with the number of rows processed so far
+            and the total number of rows to be processed, as a way to
+            follow the build of completely sorted indexes (see below).
+
+        Notes
+        -----
+        Completely sorted indexes (a full kind with an optlevel of 9) are
+        built out-of-core: the column is read in runs that are sorted by
+        ``INDEX_BUILD_THREADS`` threads, and the sorted runs are merged
+        into the index afterwards.  ``INDEX_BUILD_MEMORY`` sets the
+        memory to be used during the build.  In this case, every row is
+        processed twice (when sorting and when merging).
+
+        .. versionchanged:: 3.0
+           The progress argument was added.
         """
 
-        kinds = ['ultralight', 'light', 'medium', 'full']
+        kinds = ['ultralight', 'light', 'medium', 'full', 'bitmap']
         if kind not in kinds:
             raise ValueError("Kind must have any of these values: %s" % kinds)
         if (not isinstance(optlevel, (int, long)) or
@@ -3431,12 +4534,14 @@ class Column(object):
             raise ValueError("_blocksizes must be a tuple with exactly 4 "
                              "elements")
         idxrows = _column__createIndex(self, optlevel, kind, filters,
-                                       tmp_dir, _blocksizes, _verbose)
+                                       tmp_dir, _blocksizes, _verbose,
+                                       progress)
         return SizeType(idxrows)
 
 
     def createCSIndex( self, filters=None, tmp_dir=None,
-                       _blocksizes=None, _testmode=False, _verbose=False ):
+                       _blocksizes=None, _testmode=False, _verbose=False,
+                       progress=None ):
         """Create a completely sorted index (CSI) for this column.
 
         This method guarantees the creation of an index with zero entropy, that
@@ -3446,7 +4551,7 @@ class Column(object):
         :meth:`Table.itersorted` or :meth:`Table.readSorted`) in order to
         ensure completely sorted results.
 
-        For the meaning of filters and tmp_dir arguments see
+        For the meaning of filters, tmp_dir and progress arguments see
         :meth:`Column.createIndex`.
 
         Notes
@@ -3457,7 +4562,8 @@ class Column(object):
 
         return self.createIndex(
             kind='full', optlevel=9, filters=filters, tmp_dir=tmp_dir,
-            _blocksizes=_blocksizes, _testmode=_testmode, _verbose=_verbose)
+            _blocksizes=_blocksizes, _testmode=_testmode, _verbose=_verbose,
+            progress=progress)
 
 
     def _doReIndex(self, dirty):
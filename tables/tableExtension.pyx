@@ -33,7 +33,7 @@ from tables.utilsExtension import (getNestedField, AtomFromHDF5Type,
   createNestedType, HDF5ToNPExtType, createNestedType, platform_byteorder,
   PTTypeToHDF5, PTSpecialKinds, NPExtPrefixesToPTKinds, HDF5ClassToString,
   H5T_STD_I64)
-from tables.utils import SizeType
+from tables.utils import SizeType, hdf5lock
 
 from utilsExtension cimport get_native_type
 
@@ -55,13 +55,16 @@ from definitions cimport (hid_t, herr_t, hsize_t, htri_t,
   H5Sget_simple_extent_ndims, H5Sget_simple_extent_dims, H5Sclose,
   H5T_class_t, H5Tget_size, H5Tset_size, H5Tcreate, H5Tcopy, H5Tclose,
   H5Tget_nmembers, H5Tget_member_name, H5Tget_member_type, H5Tget_native_type,
+  H5Tget_member_index,
   H5Tget_member_value, H5Tinsert, H5Tget_class, H5Tget_super, H5Tget_offset,
   H5T_cset_t, H5T_CSET_ASCII, H5T_CSET_UTF8,
-  H5ATTRset_attribute_string, H5ATTRset_attribute,
+  H5Tequal, H5ATTRset_attribute_string, H5ATTRset_attribute,
   get_len_of_range, get_order, set_order, is_complex,
-  conv_float64_timeval32, truncate_dset)
+  conv_float64_timeval32, truncate_dset, get_filter_pipeline,
+  H5_HAVE_READ_CHUNK, pt_H5Dget_chunk_storage_size, pt_H5Dread_chunk)
 
-from lrucacheExtension cimport ObjectCache, NumCache
+from lrucacheExtension cimport ObjectCache, NumCache, ChunkCache
+from lrucacheExtension import sharedcache
 
 
 #-----------------------------------------------------------------
@@ -79,6 +82,10 @@ cdef extern from "H5TB-opt.h" nogil:
   herr_t H5TBOread_records( hid_t dataset_id, hid_t mem_type_id,
                             hsize_t start, hsize_t nrecords, void *data )
 
+  herr_t H5TBOread_records_step( hid_t dataset_id, hid_t mem_type_id,
+                                 hsize_t start, hsize_t nrecords,
+                                 hsize_t step, void *data )
+
   herr_t H5TBOread_elements( hid_t dataset_id, hid_t mem_type_id,
                              hsize_t nrecords, void *coords, void *data )
 
@@ -131,6 +138,12 @@ cdef getNestedFieldCache(recarray, fieldname, fieldcache):
   return field
 
 
+cdef _hasField(ndarray recarr, object colpathname):
+  """Whether the top-level field of `colpathname` is in `recarr`."""
+
+  return colpathname.split('/', 1)[0] in recarr.dtype.fields
+
+
 cdef joinPath(object parent, object name):
   if parent == "":
     return name
@@ -455,12 +468,16 @@ cdef class Table(Leaf):
           colobj = self.coldescrs[colpathname]
           if hasattr(colobj, "_byteorder"):
             if colobj._byteorder != platform_byteorder:
+              if not _hasField(recarr, colpathname):
+                continue  # not in a projected read
               column = getNestedField(recarr, colpathname)
               # Do an *inplace* byteswapping
               column.byteswap(True)
 
     # This should be generalised to support other type conversions.
     for t64cname in self._time64colnames:
+      if not _hasField(recarr, t64cname):
+        continue  # not in a projected read
       column = getNestedField(recarr, t64cname)
       self._convertTime64_(column, nrecords, sense)
 
@@ -480,7 +497,7 @@ cdef class Table(Leaf):
 
     nrows = self.nrows
     # release GIL (allow other threads to use the Python interpreter)
-    with nogil:
+    with hdf5lock, nogil:
         # Append the records:
         ret = H5TBOappend_records(self.dataset_id, self.type_id,
                                   nrecords, nrows, self.wbuf)
@@ -501,9 +518,9 @@ cdef class Table(Leaf):
                               0, NULL, <char *>&nrows) < 0):
         raise HDF5ExtError("Problems setting the NROWS attribute.")
 
-    # Set the caches to dirty (in fact, and for the append case,
-    # it should be only the caches based on limits, but anyway)
-    self._dirtycache = True
+    # Cached results of indexed queries are still valid, as the rows
+    # appended are evaluated when they are used (see _table__whereIndexed)
+    sharedcache.invalidate(self._v_file, self._v_pathname)
     # Delete the reference to recarray as we doesn't need it anymore
     self._v_recarray = None
 
@@ -526,7 +543,7 @@ cdef class Table(Leaf):
     # Convert some NumPy types to HDF5 before storing.
     self._convertTypes(recarr, nrecords, 0)
     # Update the records:
-    with nogil:
+    with hdf5lock, nogil:
         ret = H5TBOwrite_records(self.dataset_id, self.type_id,
                                  start, nrecords, step, rbuf )
 
@@ -535,6 +552,7 @@ cdef class Table(Leaf):
 
     # Set the caches to dirty
     self._dirtycache = True
+    sharedcache.invalidate(self._v_file, self._v_pathname)
 
 
   def _update_elements(self, hsize_t nrecords, ndarray coords,
@@ -552,7 +570,7 @@ cdef class Table(Leaf):
     self._convertTypes(recarr, nrecords, 0)
 
     # Update the records:
-    with nogil:
+    with hdf5lock, nogil:
         ret = H5TBOwrite_elements(self.dataset_id, self.type_id,
                                   nrecords, rcoords, rbuf)
 
@@ -561,11 +579,15 @@ cdef class Table(Leaf):
 
     # Set the caches to dirty
     self._dirtycache = True
+    sharedcache.invalidate(self._v_file, self._v_pathname)
 
 
   def _read_records(self, hsize_t start, hsize_t nrecords, ndarray recarr):
     cdef void *rbuf
     cdef int ret
+    cdef hsize_t chunkshape, nchunk
+    cdef long itemsize
+    cdef ndarray chunk
 
     # Correct the number of records to read, if needed
     if (start + nrecords) > self.nrows:
@@ -574,13 +596,25 @@ cdef class Table(Leaf):
     # Get the pointer to the buffer data area
     rbuf = recarr.data
 
-    # Read the records from disk
-    with nogil:
-        ret = H5TBOread_records(self.dataset_id, self.type_id, start,
-                                nrecords, rbuf)
+    # Reads of a few records falling in a single chunk are served from
+    # the shared chunk cache (larger ones would just pollute it)
+    chunkshape = self._v_chunkshape[0]
+    nchunk = start // chunkshape
+    if (nrecords > 0 and nrecords < chunkshape and
+        (start + nrecords - 1) // chunkshape == nchunk and
+        (<ChunkCache>sharedcache).maxsize > 0):
+      chunk = self._get_chunk(nchunk)
+      itemsize = chunk.dtype.itemsize
+      memcpy(rbuf, chunk.data + (start - nchunk*chunkshape) * itemsize,
+             nrecords * itemsize)
+    else:
+      # Read the records from disk
+      with hdf5lock, nogil:
+          ret = H5TBOread_records(self.dataset_id, self.type_id, start,
+                                  nrecords, rbuf)
 
-    if ret < 0:
-      raise HDF5ExtError("Problems reading records.")
+      if ret < 0:
+        raise HDF5ExtError("Problems reading records.")
 
     # Convert some HDF5 types to NumPy after reading.
     self._convertTypes(recarr, nrecords, 1)
@@ -588,37 +622,123 @@ cdef class Table(Leaf):
     return nrecords
 
 
-  cdef hsize_t _read_chunk(self, hsize_t nchunk, ndarray IObuf, long cstart):
-    cdef long nslot
+  cdef ndarray _get_chunk(self, hsize_t nchunk):
+    """Get the (unconverted) records in chunk `nchunk`.
+
+    The chunk is looked up in the shared chunk cache first and, if not
+    there, it is read and put in the cache.  It must not be modified.
+    """
+
+    cdef hsize_t start, nrecords, chunkshape
+    cdef int ret
+    cdef ChunkCache chunkcache
+    cdef ndarray chunk
+
+    chunkcache = <ChunkCache>sharedcache
+    chunk = chunkcache.getchunk_(self, nchunk)
+    if chunk is not None:
+      return chunk
+    # Chunk is not in cache. Read it and put it in the cache.
+    chunkshape = self._v_chunkshape[0]
+    start = nchunk*chunkshape
+    nrecords = chunkshape
+    if (start + nrecords) > self.nrows:
+      nrecords = self.nrows - start
+    chunk = self._get_container(nrecords)
+    with hdf5lock, nogil:
+        ret = H5TBOread_records(self.dataset_id, self.type_id,
+                                start, nrecords, chunk.data)
+
+    if ret < 0:
+      raise HDF5ExtError("Problems reading chunk records.")
+    chunkcache.putchunk_(self, nchunk, chunk)
+    return chunk
+
+
+  cpdef hsize_t _read_chunk(self, hsize_t nchunk, ndarray IObuf,
+                            long cstart):
     cdef hsize_t start, nrecords, chunkshape
     cdef int ret
+    cdef long itemsize
     cdef void *rbuf
-    cdef NumCache chunkcache
+    cdef ndarray chunk
 
-    chunkcache = self._chunkcache
-    chunkshape = chunkcache.slotsize
+    chunkshape = self._v_chunkshape[0]
+    itemsize = IObuf.dtype.itemsize
     # Correct the number of records to read, if needed
     start = nchunk*chunkshape
     nrecords = chunkshape
     if (start + nrecords) > self.nrows:
       nrecords = self.nrows - start
-    rbuf = <char *>IObuf.data + cstart * chunkcache.itemsize
-    # Try to see if the chunk is in cache
-    nslot = chunkcache.getslot_(nchunk)
-    if nslot >= 0:
-      chunkcache.getitem_(nslot, rbuf, 0)
+    rbuf = <char *>IObuf.data + cstart * itemsize
+    if (<ChunkCache>sharedcache).maxsize > 0:
+      chunk = self._get_chunk(nchunk)
+      memcpy(rbuf, chunk.data, nrecords * itemsize)
     else:
-      # Chunk is not in cache. Read it and put it in the LRU cache.
-      with nogil:
+      # The cache is disabled.  Read the chunk straight into the buffer.
+      with hdf5lock, nogil:
           ret = H5TBOread_records(self.dataset_id, self.type_id,
                                   start, nrecords, rbuf)
 
       if ret < 0:
         raise HDF5ExtError("Problems reading chunk records.")
-      nslot = chunkcache.setitem_(nchunk, rbuf, 0)
     return nrecords
 
 
+  def _get_raw_filters(self):
+    """Get the filters needed for decoding raw chunks of the table.
+
+    A list with a ``(filter_id, cd_values)`` tuple for every filter in
+    the pipeline of the dataset, in order, is returned.  If chunks can
+    not be read raw, because the HDF5 library does not support it or
+    because records need some conversion between their formats on
+    disk and in memory, `None` is returned.
+    """
+
+    if not H5_HAVE_READ_CHUNK or self._time64colnames:
+      return None
+    with hdf5lock:
+      if H5Tequal(self.disk_type_id, self.type_id) <= 0:
+        return None
+      return get_filter_pipeline(self.dataset_id)
+
+
+  def _read_raw_chunk(self, hsize_t nchunk):
+    """Read the chunk `nchunk` as it is stored on disk.
+
+    A ``(filter_mask, data)`` tuple is returned, where `data` is a
+    string with the still encoded contents of the chunk (or `None` if
+    the chunk is not allocated on disk) and bit ``i`` of `filter_mask`
+    is set if filter ``i`` in the pipeline was not applied to it.
+    Decoding `data` is left to the caller, which can do it without
+    holding the HDF5 lock.
+    """
+
+    cdef hsize_t offset[1]
+    cdef hsize_t nbytes
+    cdef unsigned filter_mask
+    cdef herr_t ret
+    cdef void *rbuf
+    cdef ndarray data
+
+    offset[0] = nchunk * self._v_chunkshape[0]
+    with hdf5lock:
+      with nogil:
+        ret = pt_H5Dget_chunk_storage_size(self.dataset_id, offset, &nbytes)
+      if ret < 0:
+        raise HDF5ExtError("Problems getting the size of a chunk.")
+      if nbytes == 0:
+        return (0, None)
+      data = numpy.empty(nbytes, dtype=numpy.uint8)
+      rbuf = data.data
+      with nogil:
+        ret = pt_H5Dread_chunk(self.dataset_id, H5P_DEFAULT, offset,
+                               &filter_mask, rbuf)
+      if ret < 0:
+        raise HDF5ExtError("Problems reading a raw chunk.")
+    return (filter_mask, data.tostring())
+
+
   def _read_elements(self, ndarray coords, ndarray recarr):
     cdef long nrecords
     cdef void *rbuf, *rbuf2
@@ -631,7 +751,7 @@ cdef class Table(Leaf):
     # Get the pointer to the buffer coords area
     rbuf2 = coords.data
 
-    with nogil:
+    with hdf5lock, nogil:
         ret = H5TBOread_elements(self.dataset_id, self.type_id,
                                  nrecords, rbuf2, rbuf)
 
@@ -644,6 +764,104 @@ cdef class Table(Leaf):
     return nrecords
 
 
+  cdef hid_t _get_projected_type(self, object dtype) except -1:
+    """Get an HDF5 compound memory type for the fields in `dtype`.
+
+    The type only holds the (top-level) members of the table named in
+    `dtype`, placed at the offsets of the fields in it, so that HDF5
+    does not need to convert nor copy any other member.  The caller is
+    responsible for closing the returned type.
+    """
+
+    cdef hid_t mem_type_id, member_type_id
+    cdef int idx
+    cdef herr_t ret
+    cdef bytes encoded_name
+
+    mem_type_id = H5Tcreate(H5T_COMPOUND, dtype.itemsize)
+    if mem_type_id < 0:
+      raise HDF5ExtError("Problems creating the projected type.")
+    for name in dtype.names:
+      encoded_name = name.encode('utf-8')
+      idx = H5Tget_member_index(self.type_id, encoded_name)
+      if idx < 0:
+        H5Tclose(mem_type_id)
+        raise KeyError("Field %s not found in table %s" % (name, self))
+      member_type_id = H5Tget_member_type(self.type_id, idx)
+      ret = H5Tinsert(mem_type_id, encoded_name, dtype.fields[name][1],
+                      member_type_id)
+      H5Tclose(member_type_id)
+      if ret < 0:
+        H5Tclose(mem_type_id)
+        raise HDF5ExtError("Problems inserting field %s in the projected "
+                           "type." % name)
+    return mem_type_id
+
+
+  def _read_fields(self, hsize_t start, hsize_t nrecords, hsize_t step,
+                   ndarray recarr):
+    """Read the fields in `recarr` for a range of records.
+
+    Only the members named in the dtype of `recarr` are decoded, and
+    they are placed directly in `recarr`.
+    """
+
+    cdef hid_t mem_type_id
+    cdef void *rbuf
+    cdef int ret
+
+    # Get the pointer to the buffer data area
+    rbuf = recarr.data
+
+    with hdf5lock:
+      mem_type_id = self._get_projected_type(recarr.dtype)
+      with nogil:
+          ret = H5TBOread_records_step(self.dataset_id, mem_type_id, start,
+                                       nrecords, step, rbuf)
+      H5Tclose(mem_type_id)
+
+    if ret < 0:
+      raise HDF5ExtError("Problems reading records.")
+
+    # Convert some HDF5 types to NumPy after reading.
+    self._convertTypes(recarr, nrecords, 1)
+
+    return nrecords
+
+
+  def _read_fields_elements(self, ndarray coords, ndarray recarr):
+    """Read the fields in `recarr` for the records in `coords`.
+
+    Only the members named in the dtype of `recarr` are decoded, and
+    they are placed directly in `recarr`.
+    """
+
+    cdef hid_t mem_type_id
+    cdef long nrecords
+    cdef void *rbuf, *rbuf2
+    cdef int ret
+
+    nrecords = coords.size
+    # Get the pointers to the buffer data and coords areas
+    rbuf = recarr.data
+    rbuf2 = coords.data
+
+    with hdf5lock:
+      mem_type_id = self._get_projected_type(recarr.dtype)
+      with nogil:
+          ret = H5TBOread_elements(self.dataset_id, mem_type_id,
+                                   nrecords, rbuf2, rbuf)
+      H5Tclose(mem_type_id)
+
+    if ret < 0:
+      raise HDF5ExtError("Problems reading records.")
+
+    # Convert some HDF5 types to NumPy after reading.
+    self._convertTypes(recarr, nrecords, 1)
+
+    return nrecords
+
+
   def _remove_row(self, hsize_t nrow, hsize_t nrecords):
     cdef size_t rowsize
     cdef hsize_t nrecords2
@@ -667,6 +885,7 @@ cdef class Table(Leaf):
                           0, NULL, <char *>&nrecords2)
     # Set the caches to dirty
     self._dirtycache = True
+    sharedcache.invalidate(self._v_file, self._v_pathname)
     # Return the number of records removed
     return nrecords
 
@@ -723,7 +942,8 @@ cdef class Row:
   cdef object  rfieldscache, wfieldscache
   cdef object  _tableFile, _tablePath
   cdef object  modified_fields
-  cdef object  seq_available
+  cdef object  seq_available, seqentry, nslotseq
+  cdef object  prefetcher
 
   # The nrow() method has been converted into a property, which is handier
   property nrow:
@@ -772,10 +992,16 @@ cdef class Row:
     self.modified_fields = set()
 
 
-  def _iter(self, start=0, stop=0, step=1, coords=None, chunkmap=None):
-    """Return an iterator for traversiong the data in table."""
+  def _iter(self, start=0, stop=0, step=1, coords=None, chunkmap=None,
+            prefetcher=None):
+    """Return an iterator for traversiong the data in table.
 
-    self._initLoop(start, stop, step, coords, chunkmap)
+    If a `prefetcher` is passed, the I/O buffers of a sequential
+    iteration are taken from it instead of being read in place.
+    """
+
+    self._initLoop(start, stop, step, coords, chunkmap, 1)
+    self.prefetcher = prefetcher
     return iter(self)
 
 
@@ -818,8 +1044,12 @@ cdef class Row:
 
 
   cdef _initLoop(self, hsize_t start, hsize_t stop, hsize_t step,
-                 object coords, object chunkmap):
-    """Initialization for the __iter__ iterator"""
+                 object coords, object chunkmap, int query):
+    """Initialization for the __iter__ iterator
+
+    If `query` is true, the condition and index information left in the
+    table by the query creating this iterator are taken.
+    """
 
     table = self.table
     self._riterator = 1   # We are inside a read iterator
@@ -833,6 +1063,7 @@ cdef class Row:
     self._row = -1  # a sentinel
     self.whereCond = 0
     self.indexed = 0
+    self.prefetcher = None
 
     self.nrows = table.nrows   # Update the row counter
 
@@ -843,6 +1074,9 @@ cdef class Row:
       self.absstep = abs(step)
       return
 
+    if not query:
+      return
+
     if table._whereCondition:
       self.whereCond = 1
       self.condfunc, self.condargs = table._whereCondition
@@ -865,6 +1099,10 @@ cdef class Row:
       self.sss_on = (self.start > 0 or self.stop < self.nrows or self.step > 1)
       self.iterseqMaxElements = table._v_file.params['ITERSEQ_MAX_ELEMENTS']
       self.seq_available = True
+      # The entry in the seqcache for this query (see _table__whereIndexed)
+      self.seqentry = table._seqentry
+      self.nslotseq = table._nslotseq
+      table._seqentry = None
 
   def __next__(self):
     """next() method for __iter__() that is called on each iteration"""
@@ -948,10 +1186,10 @@ cdef class Row:
 
         # Feed the indexValues into the seqcache
         seqcache = table._seqcache
-        nslot = table._nslotseq
+        nslot = self.nslotseq
         # See if we have a buffer available to place results
         if nslot >= 0 and self.seq_available:
-          seq = seqcache.getitem_(nslot)
+          seq = self.seqentry[1]
           if self.lenbuf + len(seq) < self.iterseqMaxElements:
             seq.extend(self.indexValues)
             # Update the size of sequence in cache
@@ -984,9 +1222,33 @@ cdef class Row:
       return self
     else:
       # All the elements have been read for this mode
+      if self.seq_available:
+        # The sequence in cache is complete now
+        self.seqentry[0] = self.nrows
       self._finish_riterator()
 
 
+  cdef long long _chunkAlign(self, long long lenbuf) except? -1:
+    """Trim the buffer of coordinates at the start of its last chunk.
+
+    When the coordinates in the buffer are sorted and the next one
+    falls in the same chunk as the last of them, the rows in that chunk
+    are left for the next buffer, so that the chunk is not decompressed
+    for both buffers.  Return the new length of the buffer.
+    """
+
+    cdef object chunks
+    cdef long long nchunk
+
+    chunks = self.bufcoords // numpy.uint64(self.chunksize)
+    nchunk = chunks[-1]
+    if (self.coords[self.nrowsread+lenbuf] // self.chunksize == nchunk and
+        chunks[0] != nchunk and (chunks[1:] >= chunks[:-1]).all()):
+      lenbuf = chunks.searchsorted(nchunk)
+      self.bufcoords = self.bufcoords[:lenbuf]
+    return lenbuf
+
+
   cdef __next__coords(self):
     """The version of next() for user-required coordinates"""
 
@@ -1004,9 +1266,12 @@ cdef class Row:
         tmp = self.coords[self.nrowsread:self.nrowsread+lenbuf:self.step]
         # We have to get a contiguous buffer, so numpy.array is the way to go
         self.bufcoords = numpy.array(tmp, dtype="uint64")
+        if self.step == 1 and self.nrowsread+lenbuf < self.stop:
+          lenbuf = self._chunkAlign(lenbuf)
         self._row = -1
         if self.bufcoords.size > 0:
-          recout = self.table._read_elements(self.bufcoords, self.IObuf)
+          recout = self.table._readElementsByChunk(self.bufcoords,
+                                                   self.IObuf)
         else:
           recout = 0
         self.bufcoordsData = <hsize_t*>self.bufcoords.data
@@ -1097,8 +1362,11 @@ cdef class Row:
           self.stopb = self.nrowsinbuf
         self._row = self.startb - self.step
         # Read a chunk
-        recout = self.table._read_records(self.nrowsread, self.nrowsinbuf,
-                                          self.IObuf)
+        if self.prefetcher is not None:
+          recout = self.prefetcher.fill(self.nrowsread, self.IObuf)
+        else:
+          recout = self.table._read_records(self.nrowsread, self.nrowsinbuf,
+                                            self.IObuf)
         self.nrowsread = self.nrowsread + recout
 
       self._row = self._row + self.step
@@ -1124,6 +1392,9 @@ cdef class Row:
     if self._row >= 0:
       self.wrec[:] = self.IObuf[self._row]
     self._riterator = 0        # out of iterator
+    if self.prefetcher is not None:
+      self.prefetcher.close()  # stop reading ahead
+      self.prefetcher = None
     if self._mod_nrows > 0:    # Check if there is some modified row
       self._flushModRows()     # Flush any possible modified row
     self.modified_fields = set()  # Empty the set of modified fields
@@ -1138,7 +1409,7 @@ cdef class Row:
     cdef object fields
 
     # We can't reuse existing buffers in this context
-    self._initLoop(start, stop, step, None, None)
+    self._initLoop(start, stop, step, None, None, 0)
     istart, istop, istep = (self.start, self.stop, self.step)
     inrowsinbuf, inextelement, inrowsread = (self.nrowsinbuf, istart, istart)
     istartb, startr = (self.startb, 0)
@@ -1321,10 +1592,11 @@ cdef class Row:
     table = self.table
     # Save the records on disk
     table._update_elements(self._mod_nrows, self.mod_elements, self.IObufcpy)
+    # Mark the modified fields' indexes as dirty.
+    table._markColumnsAsDirty(self.modified_fields,
+                              self.mod_elements[:self._mod_nrows].copy())
     # Reset the counter of modified rows to 0
     self._mod_nrows = 0
-    # Mark the modified fields' indexes as dirty.
-    table._markColumnsAsDirty(self.modified_fields)
 
 
   def __contains__(self, item):
@@ -34,6 +34,7 @@ def suite():
         'tables.tests.test_lists',
         'tables.tests.test_tables',
         'tables.tests.test_tablesMD',
+        'tables.tests.test_ctable',
         'tables.tests.test_array',
         'tables.tests.test_earray',
         'tables.tests.test_carray',
@@ -51,6 +52,7 @@ def suite():
         'tables.tests.test_indexes',
         'tables.tests.test_indexvalues',
         'tables.tests.test_index_backcompat',
+        'tables.tests.test_chunkcache',
         # Sub-packages
         'tables.nodes.tests.test_filenode',
     ]
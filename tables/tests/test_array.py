@@ -2265,6 +2265,8 @@ class FancySelectionTestCase(common.PyTablesTestCase):
             (Ellipsis, [1, 2]),    # one ellipsis
             (numpy.array([1, -2], 'i4'), 2, -1),  # array 32-bit instead of list
             (numpy.array([-1, 2], 'i8'), 2, -1),  # array 64-bit instead of list
+            ([0, 1, 3, 4], slice(None), 1),  # several runs of indices
+            ([M-1, 0, 1, 3], slice(1, N), -1),  # unordered runs
             ]
 
         # Tests for keys that have to support the __index__ attribute
@@ -2417,6 +2419,45 @@ class FancySelection4(FancySelectionTestCase):
     shape = (5, 3, 10)
 
 
+class FancySelectionRunsTestCase(common.TempFileMixin,
+                                 common.PyTablesTestCase):
+
+    def setUp(self):
+        super(FancySelectionRunsTestCase, self).setUp()
+        self.nparr = numpy.arange(3000, dtype='i4').reshape(1000, 3)
+        self.tbarr = self.h5file.createCArray('/', 'carray', Int32Atom(),
+                                              (1000, 3), chunkshape=(64, 3))
+        self.tbarr[:] = self.nparr
+        numpy.random.seed(1)
+        clusters = numpy.random.permutation(100)[:20] * 10
+        self.keysets = [
+            numpy.random.permutation(1000)[:300],  # scattered
+            (clusters[:, numpy.newaxis] + numpy.arange(5)).ravel(),  # runs
+            ]
+
+    def test00_read(self):
+        """Reading many scattered and clustered indices."""
+        for key in self.keysets:
+            for indices in (key, numpy.sort(key)):
+                self.assertTrue(allequal(self.tbarr[indices],
+                                         self.nparr[indices]))
+                self.assertTrue(allequal(self.tbarr[indices, 1:],
+                                         self.nparr[indices, 1:]))
+                self.assertTrue(allequal(self.tbarr[indices, -1],
+                                         self.nparr[indices, -1]))
+
+    def test01_write(self):
+        """Writing many scattered and clustered indices."""
+        for key in self.keysets:
+            values = -numpy.arange(len(key) * 3, dtype='i4')
+            values = values.reshape(len(key), 3)
+            self.nparr[key] = values
+            self.tbarr[key] = values
+            self.nparr[key, 1] = 7
+            self.tbarr[key, 1] = 7
+        self.assertTrue(allequal(self.tbarr[:], self.nparr))
+
+
 class CopyNativeHDF5MDAtom(common.PyTablesTestCase):
 
     def setUp(self):
@@ -2448,6 +2489,47 @@ class CopyNativeHDF5MDAtom(common.PyTablesTestCase):
         self.assertEqual(self.arr.shape, self.arr2.shape)
 
 
+class IterBlocksTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    def check(self, array, start=None, stop=None, step=None, blocksize=None):
+        blocks = [block.copy() for block in
+                  array.iterblocks(start, stop, step, blocksize)]
+        if common.verbose:
+            print "Block shapes:", [block.shape for block in blocks]
+        result = numpy.concatenate(blocks, axis=array.maindim)
+        self.assertTrue(allequal(result, array.read(start, stop, step)))
+        return blocks
+
+    def test00_array(self):
+        """Iterating over blocks of an Array."""
+        array = self.h5file.createArray('/', 'array', numpy.arange(1000))
+        self.check(array, blocksize=128)
+        self.check(array, 10, 900, 3, blocksize=128)
+
+    def test01_carray(self):
+        """Iterating over blocks of a CArray (aligned with chunks)."""
+        array = self.h5file.createCArray('/', 'carray', Int32Atom(),
+                                         (1000, 3), chunkshape=(25, 3))
+        array[:] = numpy.arange(3000).reshape(1000, 3)
+        array.nrowsinbuf = 60
+        blocks = self.check(array)
+        self.assertEqual(len(blocks[0]), 50)
+        self.check(array, 30, 990, 2)
+
+    def test02_earray(self):
+        """Iterating over blocks of an EArray with a non-zero main dim."""
+        array = self.h5file.createEArray('/', 'earray', Float64Atom(),
+                                         (3, 0), chunkshape=(3, 16))
+        array.append(numpy.arange(3000.).reshape(3, 1000))
+        self.check(array, blocksize=100)
+        self.check(array, 7, 777, 5, blocksize=32)
+
+    def test03_scalar(self):
+        """Iterating over blocks of a scalar array."""
+        array = self.h5file.createArray('/', 'scalar', 1)
+        self.assertRaises(TypeError, array.iterblocks)
+
+
 class AccessClosedTestCase(common.TempFileMixin, common.PyTablesTestCase):
 
     def setUp(self):
@@ -2528,11 +2610,13 @@ def suite():
         theSuite.addTest(unittest.makeSuite(FancySelection2))
         theSuite.addTest(unittest.makeSuite(FancySelection3))
         theSuite.addTest(unittest.makeSuite(FancySelection4))
+        theSuite.addTest(unittest.makeSuite(FancySelectionRunsTestCase))
         theSuite.addTest(unittest.makeSuite(PointSelection1))
         theSuite.addTest(unittest.makeSuite(PointSelection2))
         theSuite.addTest(unittest.makeSuite(PointSelection3))
         theSuite.addTest(unittest.makeSuite(PointSelection4))
         theSuite.addTest(unittest.makeSuite(CopyNativeHDF5MDAtom))
+        theSuite.addTest(unittest.makeSuite(IterBlocksTestCase))
         theSuite.addTest(unittest.makeSuite(AccessClosedTestCase))
 
     return theSuite
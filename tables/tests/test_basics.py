@@ -2416,6 +2416,120 @@ class FilePropertyTestCase(common.PyTablesTestCase):
                           user_block_size=USER_BLOCK_SIZE)
 
 
+class FilePoolTestCase(common.PyTablesTestCase):
+    def setUp(self):
+        self.h5fnames = [tempfile.mktemp(".h5") for i in range(2)]
+        for (i, h5fname) in enumerate(self.h5fnames):
+            h5file = openFile(h5fname, mode="w")
+            group = h5file.createGroup('/', 'group')
+            h5file.createArray(group, 'array', [i, i])
+            h5file.close()
+        self.pool = FilePool(1)
+
+    def tearDown(self):
+        self.pool.close()
+        tables.file._filepool.close()
+        for h5fname in self.h5fnames:
+            if os.path.exists(h5fname):
+                os.remove(h5fname)
+
+    def test00_reuse(self):
+        """Reusing a pooled file."""
+
+        h5fname = self.h5fnames[0]
+        h5file1 = self.pool.openFile(h5fname)
+        h5file1.close()
+        self.assertTrue(h5file1.isopen)
+        self.assertTrue(h5fname in self.pool)
+        h5file2 = self.pool.openFile(h5fname)
+        self.assertTrue(h5file2 is h5file1)
+        self.assertEqual(h5file2.root.group.array.read().tolist(), [0, 0])
+        h5file2.close()
+        self.assertEqual((self.pool.hits, self.pool.misses), (1, 1))
+
+    def test01_evict(self):
+        """Evicting the least recently used file."""
+
+        h5file1 = self.pool.openFile(self.h5fnames[0])
+        h5file1.close()
+        h5file2 = self.pool.openFile(self.h5fnames[1])
+        h5file2.close()
+        self.assertFalse(h5file1.isopen)
+        self.assertTrue(h5file2.isopen)
+        self.assertEqual(len(self.pool), 1)
+        self.assertEqual(self.pool.evictions, 1)
+
+    def test02_evictInUse(self):
+        """Evicting a file which is still in use."""
+
+        h5file1 = self.pool.openFile(self.h5fnames[0])
+        h5file2 = self.pool.openFile(self.h5fnames[1])
+        self.assertTrue(h5file1.isopen)
+        self.assertEqual(h5file1.root.group.array.read().tolist(), [0, 0])
+        h5file1.close()
+        self.assertFalse(h5file1.isopen)
+        h5file2.close()
+
+    def test03_stale(self):
+        """Reopening a pooled file which has changed."""
+
+        h5fname = self.h5fnames[0]
+        h5file1 = self.pool.openFile(h5fname)
+        h5file1.close()
+        stat = os.stat(h5fname)
+        os.utime(h5fname, (stat.st_atime, stat.st_mtime + 10))
+        h5file2 = self.pool.openFile(h5fname)
+        self.assertFalse(h5file2 is h5file1)
+        self.assertFalse(h5file1.isopen)
+        h5file2.close()
+        self.assertEqual(self.pool.misses, 2)
+
+    def test04_options(self):
+        """Reopening a pooled file with other options."""
+
+        h5fname = self.h5fnames[0]
+        h5file1 = self.pool.openFile(h5fname)
+        h5file1.close()
+        h5file2 = self.pool.openFile(h5fname, rootUEP='/group')
+        self.assertFalse(h5file2 is h5file1)
+        self.assertTrue('array' in h5file2.root)
+        h5file2.close()
+
+    def test05_writable(self):
+        """Reopening a pooled file for writing."""
+
+        h5fname = self.h5fnames[0]
+        h5file1 = openFile(h5fname, pooled=True)
+        h5file1.close()
+        self.assertTrue(h5file1.isopen)
+        h5file2 = openFile(h5fname, mode="a")
+        self.assertFalse(h5file1.isopen)
+        h5file2.root.group.array[:] = [2, 2]
+        h5file2.close()
+        h5file3 = openFile(h5fname, pooled=True)
+        self.assertEqual(h5file3.root.group.array.read().tolist(), [2, 2])
+        h5file3.close()
+
+    def test06_writableInUse(self):
+        """Pooling files in modes other than read-only."""
+
+        h5fname = self.h5fnames[0]
+        self.assertRaises(ValueError, openFile, h5fname, mode="a",
+                          pooled=True)
+        h5file = openFile(h5fname, pooled=True)
+        self.assertRaises(ValueError, openFile, h5fname, mode="a")
+        h5file.close()
+
+    def test07_noSlots(self):
+        """Using a pool without slots."""
+
+        pool = FilePool(0)
+        h5file = pool.openFile(self.h5fnames[0])
+        h5file.close()
+        self.assertFalse(h5file.isopen)
+        self.assertEqual(len(pool), 0)
+
+
 # Test for reading a file that uses Blosc and created on a big-endian platform
 class BloscBigEndian(common.PyTablesTestCase):
 
@@ -2816,6 +2930,7 @@ def suite():
         theSuite.addTest(unittest.makeSuite(StateTestCase))
         theSuite.addTest(unittest.makeSuite(FlavorTestCase))
         theSuite.addTest(unittest.makeSuite(FilePropertyTestCase))
+        theSuite.addTest(unittest.makeSuite(FilePoolTestCase))
         if blosc_avail:
             theSuite.addTest(unittest.makeSuite(BloscBigEndian))
         if multiprocessing_imported:
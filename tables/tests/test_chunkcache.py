@@ -0,0 +1,538 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy
+
+import tables
+from tables import *
+from tables.lrucacheExtension import (ChunkCache, ObjectCache, NumCache,
+                                      NodeCache, sharedcache)
+from tables.tests import common
+from tables.tests.common import allequal
+
+# To delete the internal attributes automagically
+unittest.TestCase.tearDown = common.cleanup
+
+
+class Record(IsDescription):
+    var1 = StringCol(itemsize=4, pos=0)  # 4-character String
+    var2 = IntCol(pos=1)                 # integer
+    var3 = FloatCol(pos=2)               # double (double-precision)
+
+
+class ChunkCacheTestCase(common.TempFileMixin, common.PyTablesTestCase):
+    """Tests for the `ChunkCache` class itself."""
+
+    def setUp(self):
+        super(ChunkCacheTestCase, self).setUp()
+        self.leaf1 = self.h5file.createArray('/', 'leaf1', [1])
+        group = self.h5file.createGroup('/', 'group')
+        self.leaf2 = self.h5file.createArray(group, 'leaf2', [1])
+        self.cache = ChunkCache(1000, 'test chunk cache')
+
+    def key(self, leaf, nchunk):
+        return (id(leaf._v_file), leaf._v_pathname, nchunk)
+
+    def test00_getput(self):
+        """Putting and getting chunks."""
+        cache = self.cache
+        chunk = numpy.arange(10, dtype='int32')
+        self.assertTrue(cache.getchunk(self.leaf1, 0) is None)
+        cache.putchunk(self.leaf1, 0, chunk)
+        self.assertTrue(cache.getchunk(self.leaf1, 0) is chunk)
+        self.assertTrue(cache.getchunk(self.leaf2, 0) is None)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size, 40)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        # Chunks in cache can not be modified
+        self.assertRaises((RuntimeError, ValueError),
+                          chunk.__setitem__, 0, 1)
+
+    def test01_evict(self):
+        """Discarding the least recently used chunks."""
+        cache = self.cache
+        for nchunk in range(4):
+            cache.putchunk(self.leaf1, nchunk, numpy.zeros(200, 'uint8'))
+        cache.getchunk(self.leaf1, 0)
+        cache.putchunk(self.leaf1, 4, numpy.zeros(500, 'uint8'))
+        self.assertTrue(self.key(self.leaf1, 0) in cache)
+        self.assertFalse(self.key(self.leaf1, 1) in cache)
+        self.assertFalse(self.key(self.leaf1, 2) in cache)
+        self.assertTrue(self.key(self.leaf1, 4) in cache)
+        self.assertEqual(cache.size, 900)
+        self.assertEqual(cache.evictions, 2)
+        # Chunks larger than the cache are never kept
+        cache.putchunk(self.leaf1, 5, numpy.zeros(1001, 'uint8'))
+        self.assertFalse(self.key(self.leaf1, 5) in cache)
+        self.assertEqual(len(cache), 3)
+
+    def test02_invalidate(self):
+        """Removing the chunks of some leaves."""
+        cache = self.cache
+        for leaf in [self.leaf1, self.leaf2]:
+            for nchunk in range(2):
+                cache.putchunk(leaf, nchunk, numpy.zeros(10, 'uint8'))
+        cache.invalidate(self.h5file, '/leaf1')
+        self.assertFalse(self.key(self.leaf1, 0) in cache)
+        self.assertTrue(self.key(self.leaf2, 0) in cache)
+        cache.invalidate(self.h5file, '/group')
+        self.assertEqual(len(cache), 2)
+        cache.invalidate(self.h5file, '/group', recursive=True)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+        cache.putchunk(self.leaf2, 0, numpy.zeros(10, 'uint8'))
+        cache.invalidate(self.h5file, recursive=True)
+        self.assertEqual(len(cache), 0)
+
+    def test03_resize(self):
+        """Changing the size of the cache."""
+        cache = self.cache
+        for nchunk in range(4):
+            cache.putchunk(self.leaf1, nchunk, numpy.zeros(200, 'uint8'))
+        cache.resize(500)
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(self.key(self.leaf1, 3) in cache)
+        cache.resize(0)
+        self.assertEqual(len(cache), 0)
+        cache.putchunk(self.leaf1, 0, numpy.zeros(10, 'uint8'))
+        self.assertTrue(cache.getchunk(self.leaf1, 0) is None)
+        self.assertRaises(ValueError, cache.resize, -1)
+
+
+class SharedCacheTestCase(common.TempFileMixin, common.PyTablesTestCase):
+    """Tests for reading leaves through the shared chunk cache."""
+
+    nrows = 1000
+
+    def setUp(self):
+        super(SharedCacheTestCase, self).setUp()
+        self.oldsize = tables.setChunkCacheSize(4 * 1024 * 1024)
+        table = self.h5file.createTable('/', 'table', Record, chunkshape=64)
+        table.append([(str(i), i, i * 1.5) for i in xrange(self.nrows)])
+        table.flush()
+        self.table = table
+        earray = self.h5file.createEArray('/', 'earray', Int32Atom(),
+                                          (0, 10), chunkshape=(16, 5))
+        earray.append(numpy.arange(self.nrows * 10).reshape(self.nrows, 10))
+        self.earray = earray
+
+    def tearDown(self):
+        tables.setChunkCacheSize(self.oldsize)
+        super(SharedCacheTestCase, self).tearDown()
+
+    def cached(self, leaf, nchunk):
+        return (id(leaf._v_file), leaf._v_pathname, nchunk) in sharedcache
+
+    def test00_tableReads(self):
+        """Reading a few table rows."""
+        table = self.table
+        self.assertEqual(table[100]['var2'], 100)
+        self.assertTrue(self.cached(table, 1))
+        self.assertTrue(allequal(table[65:70]['var2'], range(65, 70)))
+        self.assertEqual(table[127]['var1'], '127')
+        # Rows spanning several chunks are read directly
+        self.assertTrue(allequal(table[60:200]['var2'], range(60, 200)))
+        self.assertFalse(self.cached(table, 0))
+        # Modifying the table discards its chunks
+        table.cols.var2[100] = -1
+        self.assertFalse(self.cached(table, 1))
+        self.assertEqual(table[100]['var2'], -1)
+        table.append([('new', -2, 0.)])
+        table.flush()
+        self.assertEqual(table[self.nrows]['var2'], -2)
+        table.removeRows(0, 10)
+        self.assertEqual(table[100]['var2'], 110)
+
+    def test01_arrayReads(self):
+        """Reading slices of a chunked array."""
+        earray = self.earray
+        expected = numpy.arange(self.nrows * 10).reshape(self.nrows, 10)
+        self.assertTrue(allequal(earray[20:30, 5:9], expected[20:30, 5:9]))
+        self.assertTrue(self.cached(earray, (1, 1)))
+        self.assertTrue(allequal(earray[21, 6], expected[21, 6]))
+        self.assertTrue(allequal(earray[17:31:3, 5], expected[17:31:3, 5]))
+        self.assertTrue(allequal(earray[10:20, 2:8], expected[10:20, 2:8]))
+        # The last (partial) chunk
+        self.assertTrue(allequal(earray[-3:, :4], expected[-3:, :4]))
+        # The results are not shared with the cache
+        result = earray[20:30, 5:9]
+        result[:] = 0
+        self.assertTrue(allequal(earray[20:30, 5:9], expected[20:30, 5:9]))
+        # Modifying the array discards its chunks
+        earray[21, 6] = -1
+        self.assertFalse(self.cached(earray, (1, 1)))
+        self.assertEqual(earray[21, 6], -1)
+        earray.append(-numpy.ones((4, 10), dtype='int32'))
+        self.assertTrue(allequal(earray[-5:, :4], [[9990, 9991, 9992, 9993]] +
+                                 [[-1] * 4] * 4))
+        earray.truncate(10)
+        self.assertTrue(allequal(earray[8:10, 1], [81, 91]))
+
+    def test02_indexedQueries(self):
+        """Querying indexed columns."""
+        table = self.table
+        table.cols.var2.createIndex(kind='full')
+        table.cols.var3.createIndex(kind='light')
+        for i in range(2):
+            result = table.readWhere('(var2 > 100) & (var2 < 105)')
+            self.assertTrue(allequal(result['var2'], range(101, 105)))
+            result = table.readWhere('(var3 >= 30) & (var3 < 31)')
+            self.assertTrue(allequal(result['var2'], [20]))
+        table.modifyColumn(101, 102, column=[-1], colname='var2')
+        result = table.readWhere('(var2 > 100) & (var2 < 105)')
+        self.assertTrue(allequal(result['var2'], range(102, 105)))
+
+    def test03_moveRemove(self):
+        """Moving and removing leaves."""
+        fileid = id(self.h5file)
+        self.table[100]
+        self.earray[0, 0]
+        self.assertTrue((fileid, '/table', 1) in sharedcache)
+        self.h5file.renameNode('/table', 'table2')
+        self.assertFalse((fileid, '/table', 1) in sharedcache)
+        self.assertEqual(self.table[100]['var2'], 100)
+        self.assertTrue((fileid, '/table2', 1) in sharedcache)
+        self.assertTrue((fileid, '/earray', (0, 0)) in sharedcache)
+        self.earray.remove()
+        self.assertFalse((fileid, '/earray', (0, 0)) in sharedcache)
+        self.h5file.createEArray('/', 'earray', Int32Atom(), (0, 10),
+                                 chunkshape=(16, 5))
+        self.assertEqual(self.h5file.root.earray[:3, :2].shape, (0, 2))
+
+    def test04_close(self):
+        """Closing the file."""
+        self.table[100]
+        size = sharedcache.size
+        self.assertTrue(size > 0)
+        self._reopen()
+        self.assertTrue(sharedcache.size < size)
+        self.assertEqual(self.h5file.root.table[100]['var2'], 100)
+
+    def test05_disabled(self):
+        """Reading with the cache disabled."""
+        self.assertEqual(tables.setChunkCacheSize(0), 4 * 1024 * 1024)
+        self.assertEqual(self.table[100]['var2'], 100)
+        self.assertTrue(allequal(self.earray[20, 5:9], range(205, 209)))
+        self.assertEqual(len(sharedcache), 0)
+
+
+class PolicyTestCase(common.TempFileMixin, common.PyTablesTestCase):
+    """Tests for the replacement policies of caches."""
+
+    def setUp(self):
+        super(PolicyTestCase, self).setUp()
+        self.leaf = self.h5file.createArray('/', 'leaf', [1])
+
+    def key(self, nchunk):
+        return (id(self.h5file), '/leaf', nchunk)
+
+    def scanChunks(self, policy):
+        cache = ChunkCache(1000, 'test chunk cache', policy)
+        for nchunk in range(15):
+            cache.putchunk(self.leaf, nchunk, numpy.zeros(100, 'uint8'))
+        # Chunks 0 to 4 have been discarded and are requested again
+        for nchunk in range(5):
+            self.assertFalse(self.key(nchunk) in cache)
+        cache.putchunk(self.leaf, 0, numpy.zeros(100, 'uint8'))
+        cache.putchunk(self.leaf, 1, numpy.zeros(100, 'uint8'))
+        # A scan over many chunks that are used just once
+        for nchunk in range(100, 150):
+            cache.putchunk(self.leaf, nchunk, numpy.zeros(100, 'uint8'))
+        self.assertEqual(len(cache), 10)
+        self.assertEqual(cache.size, 1000)
+        return cache
+
+    def test00_chunkLRU(self):
+        """Scanning chunks with the LRU policy."""
+        cache = self.scanChunks('lru')
+        self.assertFalse(self.key(0) in cache)
+        self.assertFalse(self.key(1) in cache)
+
+    def test01_chunk2Q(self):
+        """Scanning chunks with the 2Q policy."""
+        cache = self.scanChunks('2q')
+        self.assertEqual(cache.policy, '2q')
+        self.assertTrue(self.key(0) in cache)
+        self.assertTrue(self.key(1) in cache)
+        self.assertTrue(cache.getchunk(self.leaf, 1) is not None)
+        # Scans of larger chunks can not flush the hot chunks either
+        for nchunk in range(200, 300):
+            cache.putchunk(self.leaf, nchunk, numpy.zeros(300, 'uint8'))
+        self.assertTrue(self.key(0) in cache)
+        self.assertEqual(cache.size, 800)
+
+    def test02_object2Q(self):
+        """Scanning objects with the 2Q policy."""
+        cache = ObjectCache(8, 1000, 'test object cache', '2q')
+        def lookup(key):
+            if cache.getslot(key) < 0:
+                cache.setitem(key, str(key), 1)
+        for key in range(9):
+            lookup(key)
+        self.assertFalse(0 in cache)
+        lookup(0)
+        for key in range(100, 130):
+            lookup(key)
+        self.assertTrue(0 in cache)
+        self.assertEqual(cache.getitem(cache.getslot(0)), '0')
+        self.assertFalse(1 in cache)
+        # 2Q caches are never disabled, even if they never hit
+        self.assertFalse(cache.iscachedisabled)
+        self.assertTrue(129 in cache)
+
+    def test03_num2Q(self):
+        """Scanning numerical data with the 2Q policy."""
+        cache = NumCache((8, 2), numpy.dtype('int32'), 'test num cache', '2q')
+        def lookup(key, value):
+            if cache.getslot(key) < 0:
+                cache.setitem(key, numpy.array(value, 'int32'), 0)
+        for key in range(9):
+            lookup(key, [key, -key])
+        self.assertEqual(cache.getslot(0), -1)
+        lookup(0, [7, 8])
+        for key in range(100, 130):
+            lookup(key, [key, -key])
+        nslot = cache.getslot(0)
+        self.assertTrue(nslot >= 0)
+        result = numpy.empty(2, 'int32')
+        cache.getitem(nslot, result, 0)
+        self.assertTrue(allequal(result, [7, 8]))
+        self.assertEqual(cache.getslot(1), -1)
+
+    def test04_badPolicy(self):
+        """Checking that unknown policies are rejected."""
+        self.assertRaises(ValueError, ChunkCache, 1000, 'test', 'arc')
+        self.assertRaises(ValueError, ObjectCache, 8, 1000, 'test', 'mru')
+        self.assertRaises(ValueError, NumCache, (8, 2),
+                          numpy.dtype('int32'), 'test', 'LRU')
+
+    def test05_params(self):
+        """Selecting the policies of the caches of a file."""
+        table = self.h5file.createTable('/', 'table', Record)
+        table.append([(str(i), i, i * 1.5) for i in xrange(100)])
+        table.cols.var2.createIndex()
+        self.h5file.close()
+        self.h5file = tables.openFile(self.h5fname, 'r',
+                                      iterseq_policy='2q',
+                                      limbounds_policy='2q')
+        table = self.h5file.root.table
+        result = table.readWhere('(var2 > 10) & (var2 < 20)')
+        self.assertTrue(allequal(result['var2'], range(11, 20)))
+        self.assertEqual(table._seqcache.policy, '2q')
+        index = table.cols.var2.index
+        self.assertEqual(index.limboundscache.policy, '2q')
+        self.assertEqual(index.sortedLRcache.policy, 'lru')
+
+
+class CacheStatsTestCase(common.TempFileMixin, common.PyTablesTestCase):
+    """Tests for the statistics of caches."""
+
+    def setUp(self):
+        super(CacheStatsTestCase, self).setUp()
+        table = self.h5file.createTable('/', 'table', Record)
+        table.append([(str(i), i, i * 1.5) for i in xrange(100)])
+        table.cols.var2.createIndex()
+        self.h5file.createArray('/', 'array', [1])
+
+    def test00_objectCache(self):
+        """Counting hits, misses and evictions in object caches."""
+        cache = ObjectCache(8, 1000, 'test object cache')
+        for key in range(10):
+            if cache.getslot(key) < 0:
+                cache.setitem(key, str(key), 2)
+        cache.getitem(cache.getslot(9))
+        stats = cache.getstats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 10))
+        self.assertEqual(stats['evictions'], 2)
+        self.assertEqual((stats['size'], stats['maxsize']), (16, 1000))
+        cache.resetstats()
+        stats = cache.getstats()
+        self.assertEqual((stats['hits'], stats['misses']), (0, 0))
+        self.assertEqual(stats['size'], 16)
+
+    def test01_disables(self):
+        """Counting the transitions of caches with a low hit ratio."""
+        cache = NumCache((8, 2), numpy.dtype('int32'), 'test num cache')
+        value = numpy.zeros(2, 'int32')
+        for key in range(1000):
+            if cache.getslot(key) < 0:
+                cache.setitem(key, value, 0)
+        stats = cache.getstats()
+        self.assertEqual(stats['hits'], 0)
+        self.assertEqual(stats['misses'], 1000)
+        self.assertTrue(stats['disables'] >= 1)
+        self.assertTrue(stats['enables'] >= 1)
+        self.assertEqual(stats['maxsize'], 8 * 2 * 4)
+
+    def test02_fileStats(self):
+        """Getting the statistics of the caches of a file."""
+        self._reopen()
+        table = self.h5file.root.table
+        for i in range(2):
+            result = table.readWhere('(var2 > 10) & (var2 < 20)')
+            self.assertTrue(allequal(result['var2'], range(11, 20)))
+        self.h5file.root.array
+        self.h5file.root.array
+        stats = self.h5file.cache_stats()
+        if common.verbose:
+            print "Cache statistics:", stats
+        condstats = stats['conditions']
+        self.assertTrue(condstats['hits'] >= 1)
+        self.assertTrue(condstats['misses'] >= 1)
+        self.assertEqual(condstats['ncaches'], 1)
+        self.assertEqual(condstats['hitratio'], condstats['hits'] /
+                         float(condstats['hits'] + condstats['misses']))
+        self.assertTrue(stats['nodes']['hits'] >= 1)
+        self.assertTrue(stats['nodes']['misses'] >= 1)
+        self.assertTrue('limbounds' in stats)
+        self.assertTrue('iterseq' in stats)
+        self.assertFalse('chunks' in stats)
+
+    def test03_reset(self):
+        """Resetting the statistics of the caches of a file."""
+        table = self.h5file.root.table
+        table.readWhere('var2 < 3')
+        table.readWhere('var2 < 3')
+        stats = self.h5file.cache_stats(reset=True)
+        self.assertTrue(stats['conditions']['hits'] >= 1)
+        stats = self.h5file.cache_stats()
+        self.assertEqual(stats['conditions']['hits'], 0)
+        self.assertEqual(stats['conditions']['size'], 1)
+        table.readWhere('var2 < 3')
+        self.assertTrue(self.h5file.cache_stats()['conditions']['hits'] >= 1)
+
+    def test04_closedNodes(self):
+        """Keeping the statistics of the caches of closed nodes."""
+        table = self.h5file.root.table
+        table.readWhere('var2 < 3')
+        table.readWhere('var2 < 3')
+        hits = self.h5file.cache_stats()['conditions']['hits']
+        table.close()
+        stats = self.h5file.cache_stats()
+        self.assertEqual(stats['conditions']['hits'], hits)
+        self.assertEqual(stats['conditions']['ncaches'], 0)
+        self.h5file.cache_stats(reset=True)
+        self.assertEqual(self.h5file.cache_stats()['conditions']['hits'], 0)
+
+    def test05_allFiles(self):
+        """Getting the statistics of the caches of all open files."""
+        self.h5file.root.table.readWhere('var2 < 3')
+        stats = tables.cache_stats()
+        self.assertTrue(stats['conditions']['misses'] >= 1)
+        self.assertTrue('chunks' in stats)
+        self.assertEqual(stats['chunks']['maxsize'], sharedcache.maxsize)
+        tables.cache_stats(reset=True)
+        self.assertEqual(sharedcache.hits, 0)
+        self.assertEqual(tables.cache_stats()['conditions']['misses'], 0)
+
+
+class FakeNode(object):
+    """An object with the footprint of a node."""
+
+    def __init__(self, size):
+        self.size = size
+
+    def _g_footprint(self):
+        return self.size
+
+
+class NodeCacheTestCase(common.TempFileMixin, common.PyTablesTestCase):
+    """Tests for the cache of unreferenced nodes."""
+
+    def test00_slots(self):
+        """Bounding the cache of nodes by a number of slots."""
+        cache = NodeCache(4)
+        for i in range(6):
+            cache['/n%d' % i] = FakeNode(0)
+        self.assertEqual(len(cache), 4)
+        self.assertEqual(cache.evictions, 2)
+        self.assertFalse('/n0' in cache)
+        self.assertTrue('/n5' in cache)
+        node = cache.pop('/n3')
+        self.assertTrue(isinstance(node, FakeNode))
+        self.assertEqual(sorted(cache), ['/n2', '/n4', '/n5'])
+        self.assertEqual(cache.hits, 1)
+
+    def test01_size(self):
+        """Bounding the cache of nodes by their size."""
+        cache = NodeCache(100, 1000)
+        for i in range(5):
+            cache['/n%d' % i] = FakeNode(300)
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.size, 900)
+        self.assertEqual(sorted(cache), ['/n2', '/n3', '/n4'])
+        cache['/large'] = FakeNode(2000)
+        self.assertFalse('/large' in cache)
+        self.assertEqual(len(cache), 3)
+        cache.pop('/n2')
+        self.assertEqual(cache.size, 600)
+
+    def test02_pinning(self):
+        """Pinning nodes which are used over and over."""
+        cache = NodeCache(4)
+        cache['/hot'] = FakeNode(0)
+        cache['/hot'] = cache.pop('/hot')
+        self.assertEqual((cache.npinned, cache.pins), (1, 1))
+        # A scan over many nodes does not evict the pinned node.
+        for i in range(20):
+            cache['/n%d' % i] = FakeNode(0)
+        self.assertTrue('/hot' in cache)
+        self.assertEqual(len(cache), 4)
+        # Pinned nodes can only take a half of the cache.
+        for i in range(17, 20):
+            cache['/n%d' % i] = cache.pop('/n%d' % i)
+        self.assertEqual(cache.npinned, 2)
+        self.assertEqual(len(cache), 4)
+
+    def test03_fileNodes(self):
+        """Keeping frequently used nodes of a file in cache."""
+        for i in range(20):
+            self.h5file.createArray('/', 'array%d' % i, [i])
+        self.h5file.close()
+        self.h5file = openFile(self.h5fname, 'r', node_cache_slots=8)
+        deadNodes = self.h5file._deadNodes
+        for i in range(3):
+            self.h5file.root.array0.read()
+        self.assertTrue('/array0' in deadNodes)
+        for i in range(1, 20):
+            self.h5file.getNode('/array%d' % i).read()
+        self.assertEqual(len(deadNodes), 8)
+        self.assertTrue('/array0' in deadNodes)
+        self.assertTrue(deadNodes.size > 0)
+
+    def test04_chunkCache(self):
+        """Counting the HDF5 chunk cache in the footprint of leaves."""
+        cachesize = self.h5file.params['CHUNK_CACHE_SIZE']
+        array = self.h5file.createArray('/', 'array', [1, 2])
+        self.assertTrue(array._g_footprint() < cachesize)
+        carray = self.h5file.createCArray('/', 'carray', tables.Int32Atom(),
+                                          (cachesize,))
+        self.assertTrue(carray._g_footprint() > cachesize)
+        earray = self.h5file.createEArray('/', 'earray', tables.Int32Atom(),
+                                          (0,))
+        self.assertTrue(earray._g_footprint() < cachesize)
+
+
+def suite():
+    theSuite = unittest.TestSuite()
+    niter = 1
+
+    for n in range(niter):
+        theSuite.addTest(unittest.makeSuite(ChunkCacheTestCase))
+        theSuite.addTest(unittest.makeSuite(SharedCacheTestCase))
+        theSuite.addTest(unittest.makeSuite(PolicyTestCase))
+        theSuite.addTest(unittest.makeSuite(CacheStatsTestCase))
+        theSuite.addTest(unittest.makeSuite(NodeCacheTestCase))
+
+    return theSuite
+
+
+if __name__ == '__main__':
+    unittest.main( defaultTest='suite' )
+
+## Local Variables:
+## mode: python
+## py-indent-offset: 4
+## tab-width: 4
+## End:
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy
+
+from tables import *
+from tables.tests import common
+from tables.tests.common import allequal
+
+# To delete the internal attributes automagically
+unittest.TestCase.tearDown = common.cleanup
+
+
+class Record(IsDescription):
+    var1 = StringCol(itemsize=4, pos=0)  # 4-character String
+    var2 = IntCol(pos=1)                 # integer
+    var3 = Int16Col(pos=2)               # short integer
+    var4 = FloatCol(pos=3)               # double (double-precision)
+    class info(IsDescription):
+        _v_pos = 4
+        x = Float32Col(pos=0, dflt=-1)
+        y = Int32Col(shape=2, pos=1)
+
+
+class BasicTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    nrows = 1000
+    filters = Filters(complevel=1)
+
+    def setUp(self):
+        super(BasicTestCase, self).setUp()
+        table = self.h5file.createTable('/', 'table', Record,
+                                        filters=self.filters,
+                                        chunkshape=64, layout='columnar')
+        row = table.row
+        for i in xrange(self.nrows):
+            row['var1'] = str(i)
+            row['var2'] = i
+            row['var3'] = i % 30
+            row['var4'] = i * 1.5
+            row['info/y'] = (i, -i)
+            row.append()
+        table.flush()
+        self.table = table
+
+    def test00_layout(self):
+        """Checking that columns are stored in their own datasets."""
+        table = self.table
+        self.assertTrue(isinstance(table, CTable))
+        self.assertTrue(isinstance(table, Table))
+        self.assertEqual(table.colnames, ['var1', 'var2', 'var3', 'var4',
+                                          'info'])
+        self.assertEqual(table.nrows, self.nrows)
+        self.assertEqual(table.chunkshape, (64,))
+        # The column datasets are hidden
+        self.assertEqual(self.h5file.root._v_children.keys(), ['table'])
+        self.assertEqual([node._v_pathname
+                          for node in self.h5file.walkNodes('/')],
+                         ['/', '/table'])
+        for colpathname in table.colpathnames:
+            leaf = self.h5file.getNode('/_p_cols_table', colpathname)
+            self.assertTrue(isinstance(leaf, EArray))
+            self.assertEqual(leaf.nrows, self.nrows)
+            self.assertEqual(leaf.filters.complevel, 1)
+
+    def test01_reopen(self):
+        """Checking the description of a reopened columnar table."""
+        description = self.table.description
+        self._reopen()
+        table = self.h5file.root.table
+        if common.verbose:
+            print "Reopened table:", repr(table)
+        self.assertTrue(isinstance(table, CTable))
+        self.assertEqual(table.colpathnames, ['var1', 'var2', 'var3', 'var4',
+                                              'info/x', 'info/y'])
+        self.assertEqual(table.description._v_dtype, description._v_dtype)
+        self.assertEqual(table.coldflts['info/x'], -1)
+        self.assertEqual(table.nrows, self.nrows)
+
+    def test02_read(self):
+        """Reading ranges, fields and projections."""
+        table = self.table
+        result = table.read(3, 400, 2)
+        self.assertEqual(result.dtype, table.dtype)
+        self.assertTrue(allequal(result['var2'], numpy.arange(3, 400, 2)))
+        self.assertTrue(allequal(table.read(field='var3'),
+                                 numpy.arange(self.nrows) % 30))
+        self.assertTrue(allequal(table.read(5, 8, field='info/y')[:, 1],
+                                 [-5, -6, -7]))
+        result = table.read(fields=['var4', 'var1'])
+        self.assertEqual(result.dtype.names, ('var4', 'var1'))
+        self.assertEqual(result['var1'][12], '12')
+        self.assertEqual(table[10]['var4'], 15.)
+        self.assertTrue(allequal(table[[3, 1]]['var2'], [3, 1]))
+        self.assertEqual(table[[3, 1, 3]]['info']['y'].tolist(),
+                         [[3, -3], [1, -1], [3, -3]])
+        self.assertTrue(allequal(table.cols.info.x[:3], [-1, -1, -1]))
+        self.assertRaises(KeyError, table.read, field='var5')
+
+    def test03_iterrows(self):
+        """Iterating over rows."""
+        table = self.table
+        result = [row['var2'] for row in table.iterrows(5, 900, 7)]
+        self.assertEqual(result, range(5, 900, 7))
+        result = [row.nrow for row in table if row['var3'] == 4]
+        self.assertEqual(result, range(4, self.nrows, 30))
+        self.assertEqual([int(x) for x in table.cols.var2],
+                         range(self.nrows))
+
+    def test04_where(self):
+        """Querying the table."""
+        table = self.table
+        result = [(row.nrow, row['var4'])
+                  for row in table.where('(var3 == 7) & (var2 > 100)')]
+        expected = [(i, i * 1.5) for i in xrange(127, self.nrows, 30)]
+        self.assertEqual(result, expected)
+        coords = table.getWhereList('var2 < 10', step=3)
+        self.assertTrue(allequal(coords, [0, 3, 6, 9]))
+        result = table.readWhere('var2 >= limit', {'limit': 995},
+                                 fields=['var1'])
+        self.assertEqual(list(result['var1']), ['995', '996', '997', '998',
+                                                '999'])
+        self.assertRaises(NameError, table.readWhere, 'var5 > 0')
+
+    def test05_append(self):
+        """Appending structured arrays and modifying columns."""
+        table = self.table
+        rows = table.read(0, 10)
+        table.append(rows)
+        self.assertEqual(table.nrows, self.nrows + 10)
+        self.assertTrue(allequal(table.read(self.nrows, self.nrows + 10),
+                                 rows))
+        table.cols.var2[:10] = numpy.arange(10) * 2
+        table.cols.var3[2] = -3
+        self.assertTrue(allequal(table.cols.var2[:5], [0, 2, 4, 6, 8]))
+        self.assertEqual(table.cols.var3[2], -3)
+        # The other columns are not touched
+        self.assertTrue(allequal(table.cols.var4[:5], rows['var4'][:5]))
+
+    def test06_iterblocks(self):
+        """Iterating over blocks of a columnar table."""
+        table = self.table
+        blocks = list(table.iterblocks(step=3, blocksize=64, fields='var2'))
+        self.assertEqual(len(blocks), self.nrows // 64 + 1)
+        self.assertTrue(allequal(numpy.concatenate(blocks),
+                                 numpy.arange(0, self.nrows, 3)))
+
+    def test07_update(self):
+        """Modifying rows while iterating."""
+        table = self.table
+        for row in table.iterrows(step=3):
+            row['var2'] = -row['var2']
+            row['info/y'] = (0, 0)
+            row.update()
+        for row in table.where('var3 == 1'):
+            # Not saved, as update() is not called
+            row['var4'] = 0
+        self.assertTrue(allequal(table.cols.var2[:7],
+                                 [0, 1, 2, -3, 4, 5, -6]))
+        self.assertEqual(table.cols.info.y[4].tolist(), [4, -4])
+        self.assertEqual(table.cols.info.y[6].tolist(), [0, 0])
+        self.assertEqual(table.cols.var4[1], 1.5)
+        # Other columns are not touched
+        self.assertEqual(table.cols.var1[3], '3')
+
+    def test08_removeRows(self):
+        """Removing ranges of rows."""
+        table = self.table
+        self.assertEqual(table.removeRows(10, 20), 10)
+        self.assertEqual(table.removeRows(-1), 1)
+        self.assertEqual(table.nrows, self.nrows - 11)
+        expected = range(10) + range(20, self.nrows - 1)
+        self.assertEqual(table.cols.var2[:].tolist(), expected)
+        self.assertEqual(table.cols.info.y[:, 1].tolist(),
+                         [-i for i in expected])
+        table.removeRows(0, table.nrows)
+        self.assertEqual(table.nrows, 0)
+
+    def test09_modifyColumns(self):
+        """Modifying several columns at once."""
+        table = self.table
+        nrows = table.modifyColumns(1, columns=[[5, 6], [1.5, 2.5]],
+                                    names=['var3', 'var4'])
+        self.assertEqual(nrows, 2)
+        self.assertEqual(table.cols.var3[:4].tolist(), [0, 5, 6, 3])
+        self.assertEqual(table.cols.var4[:4].tolist(), [0., 1.5, 2.5, 4.5])
+        self.assertRaises(ValueError, table.modifyColumns,
+                          columns=[[1]], names=['var3', 'var4'])
+
+    def test10_whereAppend(self):
+        """Appending the results of a query to other tables."""
+        table = self.table
+        dst = self.h5file.createTable('/', 'dst', Record)
+        cdst = self.h5file.createTable('/', 'cdst', Record,
+                                       layout='columnar')
+        for dstTable in (dst, cdst):
+            nrows = table.whereAppend(dstTable, 'var3 == 2')
+            self.assertEqual(nrows, len(xrange(2, self.nrows, 30)))
+            self.assertEqual(len(dstTable), nrows)
+            self.assertTrue(allequal(dstTable.read(),
+                                     table.readWhere('var3 == 2')))
+
+    def test11_createIndex(self):
+        """Indexing columns and querying them."""
+        table = self.table
+        table.cols.var2.createIndex()
+        table.cols.var3.createIndex(kind='full')
+        self.assertTrue(table.cols.var2.is_indexed)
+        self.assertTrue('/_i_table' in self.h5file)
+        condition = '(var3 == 7) & (var2 > 100)'
+        self.assertTrue(table.willQueryUseIndexing(condition))
+        result = [row.nrow for row in table.where(condition)]
+        self.assertEqual(result, range(127, self.nrows, 30))
+        # New rows are indexed as well
+        table.append(table.read(0, 10))
+        table.flush()
+        self.assertEqual(table.getWhereList('var2 < 3', sort=True).tolist(),
+                         [0, 1, 2, 1000, 1001, 1002])
+        result = [row['var3'] for row in table.itersorted('var3', stop=3)]
+        self.assertEqual(result, [0, 0, 0])
+        result = table.readSorted('var3', field='var3')
+        self.assertEqual(len(result), self.nrows + 10)
+        self.assertTrue((result[1:] >= result[:-1]).all())
+        self._reopen(mode='a')
+        table = self.h5file.root.table
+        self.assertTrue(table.cols.var3.is_indexed)
+        coords = table.getWhereList('var3 == 29', sort=True)
+        self.assertEqual(coords.tolist(), range(29, self.nrows, 30))
+
+    def test12_moveAndRemove(self):
+        """Moving, copying and removing columnar tables."""
+        table = self.table
+        table.cols.var2.createIndex()
+        table.move('/', 'table2')
+        self.assertEqual(table._v_pathname, '/table2')
+        self.assertTrue('/_p_cols_table2' in self.h5file)
+        self.assertTrue('/_p_cols_table' not in self.h5file)
+        self.assertTrue('/_i_table2/var2' in self.h5file)
+        self.assertEqual(table.cols.var2[:3].tolist(), [0, 1, 2])
+        table2 = table.copy('/', 'table3', propindexes=True)
+        self.assertTrue(isinstance(table2, CTable))
+        self.assertTrue('/_p_cols_table3/info/y' in self.h5file)
+        self.assertTrue(table2.cols.var2.is_indexed)
+        self.assertTrue(allequal(table2.read(), table.read()))
+        table.remove()
+        self.assertTrue('/_p_cols_table2' not in self.h5file)
+        self.assertTrue('/_i_table2' not in self.h5file)
+        table2.truncate(5)
+        self.assertEqual(table2.cols.var2[:].tolist(), range(5))
+
+def suite():
+    theSuite = unittest.TestSuite()
+    niter = 1
+
+    for n in range(niter):
+        theSuite.addTest(unittest.makeSuite(BasicTestCase))
+
+    return theSuite
+
+
+if __name__ == '__main__':
+    unittest.main( defaultTest='suite' )
+
+## Local Variables:
+## mode: python
+## py-indent-offset: 4
+## tab-width: 4
+## End:
@@ -12,6 +12,8 @@
 
 """Test module for evaluating expressions under PyTables"""
 
+import sys
+import traceback
 import unittest
 
 import numpy as np
@@ -1394,6 +1396,71 @@ class VeryLargeInputs2(VeryLargeInputsTestCase):
     shape = (2**32+1,)    # check that arrays > 32-bit are supported
 
 
+class PipelineTestCase(common.TempFileMixin, common.PyTablesTestCase):
+    # Rows large enough for the inputs to be computed in several blocks
+    shape = (80, 2**15)
+
+    def setUp(self):
+        super(PipelineTestCase, self).setUp()
+        root = self.h5file.root
+        self.a = np.arange(np.prod(self.shape), dtype="i4").reshape(self.shape)
+        self.b = self.a % 7
+        self.a1 = self.h5file.createCArray(root, 'a1', tb.Int32Atom(),
+                                           self.shape)
+        self.b1 = self.h5file.createCArray(root, 'b1', tb.Int32Atom(),
+                                           self.shape)
+        self.a1[:] = self.a
+        self.b1[:] = self.b
+        self.r = 2*self.a + self.b
+
+    def test00_carray(self):
+        """Pipelined evaluation into a CArray."""
+        for nbuffers in (0, 1, 4):
+            r1 = self.h5file.createCArray(self.h5file.root, 'r%d' % nbuffers,
+                                          tb.Int32Atom(), self.shape)
+            expr = tb.Expr("2*a1+b1", {'a1': self.a1, 'b1': self.b1})
+            expr.pipeline_buffers = nbuffers
+            expr.setOutput(r1)
+            expr.eval()
+            self.assertTrue(common.areArraysEqual(r1[:], self.r))
+
+    def test01_numpy(self):
+        """Pipelined evaluation into a NumPy array."""
+        expr = tb.Expr("2*a1+b1", {'a1': self.a1, 'b1': self.b1})
+        expr.pipeline_buffers = 2
+        self.assertTrue(common.areArraysEqual(expr.eval(), self.r))
+
+    def test02_append(self):
+        """Pipelined evaluation appending to an EArray."""
+        r1 = self.h5file.createEArray(self.h5file.root, 'r1', tb.Int32Atom(),
+                                      (0,) + self.shape[1:])
+        expr = tb.Expr("2*a1+b1", {'a1': self.a1, 'b1': self.b1})
+        expr.pipeline_buffers = 2
+        expr.setOutput(r1, append_mode=True)
+        expr.eval()
+        self.assertTrue(common.areArraysEqual(r1[:], self.r))
+
+    def test03_error(self):
+        """Errors in the write stage of a pipelined evaluation."""
+        class BadOutput(object):
+            shape = self.shape
+            def __setitem__(self, key, value):
+                raise IOError("cannot write")
+        expr = tb.Expr("2*a1+b1", {'a1': self.a1, 'b1': self.b1})
+        expr.pipeline_buffers = 2
+        expr.setOutput(BadOutput())
+        try:
+            expr.eval()
+        except IOError:
+            # The traceback must lead to the failing write
+            frames = traceback.extract_tb(sys.exc_info()[2])
+            self.assertEqual(frames[-1][2], '__setitem__')
+        else:
+            self.fail("expected an IOError")
+        # The conversion of inputs must have been restored
+        self.assertTrue(self.a1._v_convert)
+
+
 #----------------------------------------------------------------------
 
 def suite():
@@ -1452,6 +1519,7 @@ def suite():
         theSuite.addTest(unittest.makeSuite(setOutputRange8))
         theSuite.addTest(unittest.makeSuite(setOutputRange9))
         theSuite.addTest(unittest.makeSuite(VeryLargeInputs1))
+        theSuite.addTest(unittest.makeSuite(PipelineTestCase))
         if common.heavy:
             theSuite.addTest(unittest.makeSuite(VeryLargeInputs2))
     return theSuite
@@ -6,7 +6,8 @@ import tempfile
 import copy
 
 from tables import *
-from tables.index import Index, defaultAutoIndex, defaultIndexFilters
+from tables.index import Index, BitmapIndex, defaultAutoIndex, \
+     defaultIndexFilters
 from tables.idxutils import calcChunksize
 from tables.tests.common import verbose, allequal, heavy, cleanup, \
      PyTablesTestCase, TempFileMixin
@@ -2400,6 +2401,617 @@ class Issue156_2(Issue156TestBase):
     test_copysort = Issue156TestBase._copysort
 
 
+class CompositeIndexTestCase(TempFileMixin, PyTablesTestCase):
+    nrows = 500
+
+    def setUp(self):
+        super(CompositeIndexTestCase, self).setUp()
+        table = self.h5file.createTable('/', 'table', TDescr)
+        row = table.row
+        for i in xrange(self.nrows):
+            row['var1'] = str(i % 7).encode('ascii')
+            row['var2'] = i % 2
+            row['var3'] = i
+            row['var4'] = float(i % 13)
+            row.append()
+        table.flush()
+        self.table = table
+        self.cindex = table.createCompositeIndex(['var1', 'var4'])
+
+    def getCoords(self, condition, **kwargs):
+        table = self.table
+        coords = table.getWhereList(condition, **kwargs)
+        # Check the results against an in-kernel query
+        table._disableIndexingInQueries()
+        try:
+            expected = table.getWhereList(condition, **kwargs)
+        finally:
+            table._enableIndexingInQueries()
+        self.assertTrue(allequal(coords, expected))
+        return coords
+
+    def test00_create(self):
+        """Checking the contents of a composite index."""
+        table, cindex = self.table, self.cindex
+        if verbose:
+            print "Composite index:", repr(cindex)
+        self.assertEqual(cindex.colpathnames, ['var1', 'var4'])
+        self.assertEqual(cindex.nelements, self.nrows)
+        self.assertFalse(cindex.dirty)
+        self.assertEqual(table.compositeIndexes.keys(), [('var1', 'var4')])
+        # Columns are not indexed individually
+        self.assertFalse(table.indexed)
+        self.assertRaises(ValueError, table.createCompositeIndex,
+                          ['var1', 'var4'])
+        self.assertRaises(ValueError, table.createCompositeIndex, ['var1'])
+        self.assertRaises(ValueError, table.createCompositeIndex,
+                          ['var3', 'var4'], kind='light')
+
+    def test01_query(self):
+        """Checking queries using a composite index."""
+        table = self.table
+        condition = '(var1 == b"3") & (var4 > 5)'
+        self.assertEqual(table.willQueryUseIndexing(condition),
+                         frozenset(['var1', 'var4']))
+        coords = self.getCoords(condition)
+        self.assertTrue(len(coords) > 0)
+        self.getCoords('(var1 == b"3") & (var4 == 5) & (var2 == True)')
+        self.getCoords('(var1 == b"3") & (var4 >= 2) & (var4 < 7)',
+                       start=10, stop=400, step=3)
+        self.getCoords('(var1 == b"6") & (var3 < 100)')
+        self.assertEqual(len(self.getCoords('var1 == b"9"')), 0)
+        # The prefix of the index is needed
+        self.assertEqual(table.willQueryUseIndexing('var4 > 5'), frozenset())
+
+    def test02_modify(self):
+        """Checking composite indexes after modifying the table."""
+        table, cindex = self.table, self.cindex
+        table.append([(b"3", True, -1, 6.)])
+        self.assertEqual(cindex.nelements, self.nrows)
+        coords = self.getCoords('(var1 == b"3") & (var4 == 6)')
+        self.assertEqual(coords[-1], self.nrows)
+        table.modifyColumn(0, 5, column=[b"3"] * 5, colname='var1')
+        self.assertTrue(cindex.dirty)
+        self.getCoords('(var1 == b"3") & (var4 < 4)')
+        table.reIndexDirty()
+        self.assertFalse(cindex.dirty)
+        self.assertEqual(cindex.nelements, self.nrows + 1)
+        self.getCoords('(var1 == b"3") & (var4 < 4)')
+        table.autoIndex = False
+        table.removeRows(0, 10)
+        self.assertTrue(cindex.dirty)
+        self.assertEqual(table.willQueryUseIndexing('var1 == b"3"'),
+                         frozenset())
+        self.getCoords('(var1 == b"3") & (var4 < 4)')
+        table.reIndexDirty()
+        self.assertFalse(cindex.dirty)
+        self.assertEqual(cindex.nelements, table.nrows)
+        self.getCoords('(var1 == b"3") & (var4 < 4)')
+
+    def test03_reopen(self):
+        """Checking composite indexes after reopening the file."""
+        self._reopen(mode='a')
+        table = self.h5file.root.table
+        self.table = table
+        cindex = table.compositeIndexes[('var1', 'var4')]
+        self.assertEqual(cindex.colpathnames, ['var1', 'var4'])
+        self.assertEqual(cindex.nelements, self.nrows)
+        self.getCoords('(var1 == b"0") & (var4 <= 3)')
+        table.removeCompositeIndex(['var1', 'var4'])
+        self.assertEqual(table.compositeIndexes, {})
+        self.assertEqual(table.willQueryUseIndexing('var1 == b"0"'),
+                         frozenset())
+        self.assertRaises(KeyError, table.removeCompositeIndex,
+                          ['var1', 'var4'])
+
+    def test04_rowUpdate(self):
+        """Checking composite indexes after updating rows with Row.update()."""
+        table, cindex = self.table, self.cindex
+        for row in table.where('var3 < 20'):
+            row['var4'] = 100.
+            row.update()
+        self.assertTrue(cindex.dirty)
+        condition = '(var1 == b"3") & (var4 == 100)'
+        self.assertEqual(table.willQueryUseIndexing(condition), frozenset())
+        self.assertEqual(self.getCoords(condition).tolist(), [3, 10, 17])
+        # Flushing the table does not rebuild the composite index
+        table.flush()
+        self.assertTrue(cindex.dirty)
+        table.reIndexDirty()
+        self.assertFalse(cindex.dirty)
+        self.assertEqual(table.willQueryUseIndexing(condition),
+                         frozenset(['var1', 'var4']))
+        self.assertEqual(self.getCoords(condition).tolist(), [3, 10, 17])
+
+    def test05_appendRows(self):
+        """Checking composite indexes after appending rows."""
+        table, cindex = self.table, self.cindex
+        self.assertEqual(cindex.segments, [0])
+        nrows = self.nrows
+        for (nappend, segments) in [(10, [0, nrows]), (10, [0, nrows]),
+                                    (5, [0, nrows, nrows + 20])]:
+            table.append([(b"3", True, -1, 6.)] * nappend)
+            coords = self.getCoords('(var1 == b"3") & (var4 == 6)')
+            self.assertEqual(coords[-1], table.nrows - 1)
+            table.flush()
+            self.assertFalse(cindex.dirty)
+            self.assertEqual(cindex.nelements, table.nrows)
+            self.assertEqual(cindex.segments, segments)
+            coords = self.getCoords('(var1 == b"3") & (var4 == 6)')
+            self.assertEqual(coords[-1], table.nrows - 1)
+        self._reopen(mode='a')
+        self.table = table = self.h5file.root.table
+        cindex = table.compositeIndexes[('var1', 'var4')]
+        self.assertEqual(cindex.segments, [0, nrows, nrows + 20])
+        self.getCoords('(var1 == b"3") & (var4 >= 6)', start=400, step=3)
+
+    def test06_outOfCore(self):
+        """Checking composite indexes built in several runs."""
+        table, cindex = self.table, self.cindex
+        # Every run takes 100 rows
+        self.h5file.params['INDEX_BUILD_MEMORY'] = 100 * (4 + 8 + 8)
+        table.reIndex()
+        self.assertFalse(cindex.dirty)
+        self.assertEqual(cindex.segments, [0])
+        key0 = cindex._f_getChild('key0').read()
+        key1 = cindex._f_getChild('key1').read()
+        indices = cindex._f_getChild('indices').read()
+        self.assertTrue(allequal(numpy.lexsort((key1, key0)),
+                                 numpy.arange(self.nrows)))
+        self.assertTrue(allequal(numpy.sort(indices),
+                                 numpy.arange(self.nrows)))
+        self.assertTrue(allequal(table.read(field='var1')[indices], key0))
+        self.getCoords('(var1 == b"3") & (var4 > 5)')
+        self.getCoords('(var1 == b"5") & (var4 <= 2)')
+
+
+class BitmapIndexTestCase(TempFileMixin, PyTablesTestCase):
+    nrows = 501   # not a multiple of 8
+
+    def setUp(self):
+        super(BitmapIndexTestCase, self).setUp()
+        table = self.h5file.createTable('/', 'table', TDescr)
+        row = table.row
+        for i in xrange(self.nrows):
+            row['var1'] = str(i % 7).encode('ascii')
+            row['var2'] = i % 3 == 0
+            row['var3'] = i % 5
+            row['var4'] = float(i)
+            row.append()
+        table.flush()
+        table.cols.var1.createIndex(kind='bitmap')
+        table.cols.var2.createIndex(kind='bitmap')
+        table.cols.var3.createIndex(kind='bitmap')
+        self.table = table
+
+    def getCoords(self, condition, **kwargs):
+        table = self.table
+        coords = table.getWhereList(condition, **kwargs)
+        # Check the results against an in-kernel query
+        table._disableIndexingInQueries()
+        try:
+            expected = table.getWhereList(condition, **kwargs)
+        finally:
+            table._enableIndexingInQueries()
+        self.assertTrue(allequal(coords, expected))
+        return coords
+
+    def test00_create(self):
+        """Checking the contents of a bitmap index."""
+        index = self.table.cols.var1.index
+        if verbose:
+            print "Bitmap index:", repr(index)
+        self.assertTrue(isinstance(index, BitmapIndex))
+        self.assertEqual(index.kind, 'bitmap')
+        self.assertEqual(index.nelements, self.nrows)
+        self.assertEqual(sorted(index.values),
+                         [str(i).encode('ascii') for i in range(7)])
+        self.assertFalse(index.dirty)
+
+    def test01_query(self):
+        """Checking queries using bitmap indexes."""
+        table = self.table
+        condition = '(var1 == b"3") | (var1 == b"5")'
+        self.assertEqual(table.willQueryUseIndexing(condition),
+                         frozenset(['var1']))
+        coords = self.getCoords(condition)
+        self.assertEqual(len(coords), 143)
+        self.getCoords('var2 == True')
+        self.getCoords('~var2')
+        self.getCoords('(var3 != 2) & var2')
+        self.assertEqual(table.willQueryUseIndexing('~(var3 == 2)'),
+                         frozenset(['var3']))
+        self.getCoords('~(var3 == 2) & (var1 == b"1")',
+                       start=10, stop=400, step=3)
+        self.getCoords('(var3 >= 1) & (var3 < 3) | (var1 != b"0")')
+        self.assertEqual(len(self.getCoords('var1 == b"9"')), 0)
+        # Bitmap indexes can be mixed with other kinds
+        table.cols.var4.createIndex(kind='full')
+        self.getCoords('(var1 == b"4") & (var4 < 100)')
+        self.getCoords('(var3 != 4) | (var4 > 480)')
+        # Only bitmap indexes can resolve ``!=``
+        self.assertEqual(table.willQueryUseIndexing('var4 != 2'), frozenset())
+
+    def test02_append(self):
+        """Checking bitmap indexes after appending rows."""
+        table = self.table
+        index = table.cols.var3.index
+        table.append([(b"7", True, 9, -1.), (b"3", False, 4, -2.)])
+        table.flush()
+        self.assertEqual(index.nelements, self.nrows + 2)
+        self.assertEqual(len(index.values), 6)
+        coords = self.getCoords('var3 == 9')
+        self.assertEqual(list(coords), [self.nrows])
+        coords = self.getCoords('(var1 == b"3") & (var3 == 4)')
+        self.assertEqual(coords[-1], self.nrows + 1)
+        self.getCoords('var3 != 9')
+        # Rows not flushed yet are not in the index
+        table.append([(b"7", True, 9, -3.)])
+        self.assertEqual(len(self.getCoords('var3 == 9')), 2)
+
+    def test03_reopen(self):
+        """Checking bitmap indexes after reopening the file."""
+        self._reopen(mode='a')
+        table = self.h5file.root.table
+        self.table = table
+        index = table.cols.var1.index
+        self.assertTrue(isinstance(index, BitmapIndex))
+        self.assertEqual(index.nelements, self.nrows)
+        self.getCoords('(var1 == b"0") | ~var2')
+        table.cols.var1.removeIndex()
+        self.assertEqual(table.willQueryUseIndexing('var1 == b"0"'),
+                         frozenset())
+        table.cols.var3.reIndex()
+        self.assertEqual(table.cols.var3.index.kind, 'bitmap')
+        self.getCoords('var3 != 0')
+
+
+class OutOfCoreBuildTestCase(TempFileMixin, PyTablesTestCase):
+    nrows = 1000
+    nthreads = 3
+
+    def setUp(self):
+        super(OutOfCoreBuildTestCase, self).setUp()
+        table = self.h5file.createTable('/', 'table', TDescr)
+        row = table.row
+        numpy.random.seed(1)
+        for value in numpy.random.normal(size=self.nrows):
+            row['var3'] = int(value * 10)   # lots of duplicates
+            row['var4'] = value
+            row.append()
+        table.flush()
+        self.table = table
+        # Make the runs span several slices and the merge buffers
+        # several chunks.
+        params = self.h5file.params
+        params['INDEX_BUILD_THREADS'] = self.nthreads
+        params['INDEX_BUILD_MEMORY'] = self.nthreads * 16 * 96
+
+    def checkIndex(self, colname):
+        col = self.table.cols._f_col(colname)
+        index = col.index
+        self.assertEqual(index.nelements, self.nrows)
+        self.assertTrue(index.is_CSI)
+        self.assertFalse(index.dirty)
+        values = col[:]
+        svalues = index.readSorted()
+        indices = index.readIndices()
+        self.assertTrue(allequal(svalues, numpy.sort(values)))
+        self.assertTrue(allequal(values[indices], svalues))
+        self.assertTrue(allequal(numpy.sort(indices),
+                                 numpy.arange(self.nrows)))
+        # Check queries against in-kernel ones
+        table = self.table
+        for condition in ['%s < 0' % colname,
+                          '(%s >= -3) & (%s < 3)' % (colname, colname),
+                          '%s == %r' % (colname, values[17])]:
+            coords = table.getWhereList(condition)
+            table._disableIndexingInQueries()
+            try:
+                expected = table.getWhereList(condition)
+            finally:
+                table._enableIndexingInQueries()
+            self.assertTrue(allequal(coords, expected))
+
+    def test00_build(self):
+        """Building completely sorted indexes out-of-core."""
+        calls = []
+        progress = lambda done, total: calls.append((done, total))
+        indexrows = self.table.cols.var4.createCSIndex(
+            _blocksizes=small_blocksizes, progress=progress)
+        if verbose:
+            print "Progress calls:", calls
+        self.assertEqual(indexrows, self.nrows)
+        self.assertEqual(calls[-1], (2*self.nrows, 2*self.nrows))
+        self.assertEqual(sorted(calls), calls)
+        self.checkIndex('var4')
+
+    def test01_duplicates(self):
+        """Building completely sorted indexes with duplicated values."""
+        self.table.cols.var3.createCSIndex(_blocksizes=small_blocksizes)
+        self.checkIndex('var3')
+
+    def test02_reopen(self):
+        """Using built indexes after reopening and appending."""
+        self.table.cols.var4.createCSIndex(_blocksizes=small_blocksizes)
+        self._reopen(mode='a')
+        self.table = table = self.h5file.root.table
+        self.checkIndex('var4')
+        table.append([(b"", False, 0, 0.5)])
+        table.flush()
+        self.nrows += 1
+        self.assertEqual(table.cols.var4.index.nelements, self.nrows)
+        self.assertTrue(allequal(table.cols.var4.index.readSorted(),
+                                 numpy.sort(table.cols.var4[:])))
+
+
+class OutOfCoreBuildOneThreadTestCase(OutOfCoreBuildTestCase):
+    nthreads = 1
+
+
+class IncrementalIndexTestCase(TempFileMixin, PyTablesTestCase):
+    nrows = 500
+
+    def setUp(self):
+        super(IncrementalIndexTestCase, self).setUp()
+        table = self.h5file.createTable('/', 'table', TDescr, chunkshape=10)
+        row = table.row
+        for i in xrange(self.nrows):
+            row['var1'] = str(i % 7).encode('ascii')
+            row['var3'] = i
+            row['var4'] = float(self.nrows - i)
+            row.append()
+        table.flush()
+        table.cols.var1.createIndex(kind='light', _blocksizes=small_blocksizes)
+        table.cols.var3.createIndex(kind='full', _blocksizes=small_blocksizes)
+        table.cols.var4.createIndex(kind='medium',
+                                    _blocksizes=small_blocksizes)
+        table.incrementalIndex = True
+        self.h5file.params['INDEX_MAX_DELTA_RATIO'] = 1.0
+        self.table = table
+
+    def checkQueries(self):
+        table = self.table
+        for condition in ['(var3 >= 100) & (var3 < 120)',
+                          '(var4 > 400) | (var3 == 250)',
+                          '(var1 == b"3") & (var3 < 200)',
+                          'var3 == -1',
+                          'var4 < 10']:
+            coords = table.getWhereList(condition)
+            self.assertTrue(table.willQueryUseIndexing(condition))
+            # Check the results against an in-kernel query
+            table._disableIndexingInQueries()
+            try:
+                expected = table.getWhereList(condition)
+            finally:
+                table._enableIndexingInQueries()
+            if verbose:
+                print "Condition:", condition
+                print "Coordinates:", coords
+            self.assertTrue(allequal(coords, expected))
+
+    def test00_update(self):
+        """Updating rows of incrementally indexed columns."""
+        table = self.table
+        table.modifyColumn(100, 110, column=range(-10, 0), colname='var3')
+        table.modifyRows(3, 9, 2, [(b"3", False, 250, 401.)] * 3)
+        table.cols.var4[20:40] = numpy.arange(20.)
+        for row in table.where('var3 == 50'):
+            row['var3'] = -1
+            row.update()
+        table.flush()
+        for colname in ['var1', 'var3', 'var4']:
+            index = table.cols._f_col(colname).index
+            self.assertFalse(index.dirty)
+            self.assertTrue(index.has_delta)
+        self.assertEqual(len(table.cols.var3.index.delta_updated), 14)
+        self.checkQueries()
+
+    def test01_remove(self):
+        """Removing rows of incrementally indexed columns."""
+        table = self.table
+        table.removeRows(10, 30)
+        table.modifyColumn(10, 15, column=range(-5, 0), colname='var3')
+        table.removeRows(5, 12)
+        table.removeRows(table.nrows - 1)   # a row in the last row
+        index = table.cols.var3.index
+        self.assertFalse(index.dirty)
+        self.assertEqual(index.nremoved, 27)
+        self.assertEqual(index.nelements - index.nremoved, table.nrows)
+        self.checkQueries()
+        # Appended rows are indexed after the remaining ones
+        table.append([(b"3", False, 250, 401.)] * 10)
+        table.flush()
+        self.assertEqual(index.nelements - index.nremoved, table.nrows)
+        self.checkQueries()
+
+    def test02_compact(self):
+        """Compacting the deltas of indexes."""
+        table = self.table
+        table.removeRows(10, 30)
+        table.modifyColumn(10, 15, column=range(-5, 0), colname='var3')
+        self.assertRaises(ValueError, table.readSorted, 'var3')
+        self.assertEqual(table.compactIndexes(), table.nrows)
+        index = table.cols.var3.index
+        self.assertFalse(index.has_delta)
+        self.assertEqual(index.nelements, table.nrows)
+        self.assertTrue(allequal(table.readSorted('var3', field='var3'),
+                                 numpy.sort(table.cols.var3[:])))
+        self.checkQueries()
+        self.assertEqual(table.compactIndexes(), 0)
+
+    def test03_reopen(self):
+        """Using the deltas of indexes after reopening the file."""
+        self.table.removeRows(10, 30)
+        self.table.modifyColumn(10, 15, column=range(-5, 0), colname='var3')
+        self._reopen(mode='a')
+        self.table = table = self.h5file.root.table
+        self.assertTrue(table.incrementalIndex)
+        index = table.cols.var3.index
+        self.assertEqual(index.nremoved, 20)
+        self.assertEqual(len(index.delta_updated), 5)
+        self.checkQueries()
+
+    def test04_autoCompact(self):
+        """Compacting large deltas of indexes automatically."""
+        table = self.table
+        self.h5file.params['INDEX_MAX_DELTA_RATIO'] = 0.01
+        table.modifyColumn(10, 13, column=range(-3, 0), colname='var3')
+        self.assertTrue(table.cols.var3.index.has_delta)
+        table.modifyColumn(20, 30, column=range(-10, 0), colname='var3')
+        self.assertFalse(table.cols.var3.index.has_delta)
+        self.assertFalse(table.cols.var3.index.dirty)
+        # Without automatic indexing, deltas are kept until compacted
+        table.autoIndex = False
+        table.modifyColumn(20, 30, column=range(-10, 0), colname='var3')
+        self.assertTrue(table.cols.var3.index.has_delta)
+        self.checkQueries()
+        table.compactIndexes()
+        self.assertFalse(table.cols.var3.index.has_delta)
+        self.checkQueries()
+
+    def test05_notIncremental(self):
+        """Modifying rows without incremental indexing."""
+        table = self.table
+        table.incrementalIndex = False
+        table.autoIndex = False
+        table.modifyColumn(10, 13, column=range(-3, 0), colname='var3')
+        self.assertTrue(table.cols.var3.index.dirty)
+        self.assertFalse(table.cols.var3.index.has_delta)
+        self.assertFalse(table.cols.var4.index.dirty)
+
+    def test06_appendDelta(self):
+        """Appending the changes to the deltas of indexes on disk."""
+        table = self.table
+        table.modifyColumn(10, 13, column=range(-3, 0), colname='var3')
+        table.modifyColumn(12, 15, column=range(-3, 0), colname='var3')
+        table.removeRows(10, 12)
+        index = table.cols.var3.index
+        self.assertEqual(index.delta_updated.tolist(), [12, 13, 14])
+        self.assertEqual(index.delta_removed.tolist(), [[10, 12]])
+        # Changes are appended as they come, not merged on disk
+        self.assertEqual(index._f_getChild('dupdated').nrows, 5)
+        self.assertEqual(index._f_getChild('dremoved').nrows, 1)
+        table.removeRows(15, 17)
+        table.removeRows(14, 16)
+        self.assertEqual(index.delta_removed.tolist(), [[10, 12], [16, 20]])
+        self.assertEqual(index._f_getChild('dremoved').nrows, 3)
+        self.checkQueries()
+        # Deltas are merged again when read back
+        self._reopen(mode='a')
+        self.table = table = self.h5file.root.table
+        index = table.cols.var3.index
+        self.assertEqual(index.delta_updated.tolist(), [12, 13, 14])
+        self.assertEqual(index.delta_removed.tolist(), [[10, 12], [16, 20]])
+        self.checkQueries()
+
+
+class AppendedRowsQueryCacheTestCase(TempFileMixin, PyTablesTestCase):
+    nrows = 500
+    conditions = ['(var3 >= 100) & (var3 < 120)',   # medium index
+                  '(var4 >= 100) & (var4 < 120)']   # full index
+
+    def setUp(self):
+        super(AppendedRowsQueryCacheTestCase, self).setUp()
+        table = self.h5file.createTable('/', 'table', TDescr, chunkshape=10)
+        self.table = table
+        self.appendRows(range(self.nrows))
+        table.cols.var3.createIndex(kind='medium',
+                                    _blocksizes=small_blocksizes)
+        table.cols.var4.createIndex(kind='full', _blocksizes=small_blocksizes)
+
+    def appendRows(self, values):
+        row = self.table.row
+        for value in values:
+            row['var3'] = value
+            row['var4'] = float(value)
+            row.append()
+        self.table.flush()
+
+    def query(self, condition, **kwargs):
+        table = self.table
+        coords = table.getWhereList(condition, **kwargs)
+        # Check the results against an in-kernel query
+        table._disableIndexingInQueries()
+        try:
+            expected = table.getWhereList(condition, **kwargs)
+        finally:
+            table._enableIndexingInQueries()
+        if verbose:
+            print "Condition:", condition
+            print "Coordinates:", coords
+        self.assertTrue(allequal(coords, expected))
+        return coords
+
+    def hits(self):
+        return self.table._seqcache.getstats()['hits']
+
+    def test00_append(self):
+        """Using cached results of queries after appending rows."""
+        table = self.table
+        for condition in self.conditions:
+            self.query(condition)
+            self.query(condition)
+            hits = self.hits()
+            self.appendRows([110, 1000, 115])
+            self.assertFalse(table._dirtycache)
+            coords = self.query(condition)
+            self.assertEqual(list(coords[-2:]),
+                             [table.nrows - 3, table.nrows - 1])
+            self.assertEqual(self.hits(), hits + 1)
+            # The rows appended are in cache now
+            self.query(condition)
+            self.assertEqual(self.hits(), hits + 2)
+
+    def test01_ranges(self):
+        """Using cached results of queries in ranges after appending rows."""
+        table = self.table
+        for condition in self.conditions:
+            self.query(condition, start=5, step=3)
+            self.query(condition, stop=110)
+            hits = self.hits()
+            self.appendRows([103, 104])
+            coords = self.query(condition, start=5, step=3)
+            self.assertTrue(coords[-1] >= self.nrows)
+            self.assertEqual(len(self.query(condition, stop=110)), 10)
+            self.assertEqual(self.hits(), hits + 2)
+
+    def test02_modify(self):
+        """Discarding cached results of queries after modifying rows."""
+        table = self.table
+        for condition in self.conditions:
+            self.query(condition)
+        table.modifyColumn(100, 105, column=range(-5, 0), colname='var3')
+        table.modifyColumn(100, 105, column=range(-5, 0), colname='var4')
+        self.assertTrue(table._dirtycache)
+        for condition in self.conditions:
+            self.assertEqual(len(self.query(condition)), 15)
+        table.removeRows(0, 10)
+        for condition in self.conditions:
+            self.assertEqual(self.query(condition)[0], 95)
+
+    def test03_truncate(self):
+        """Discarding cached results of queries after truncating the table."""
+        table = self.table
+        for condition in self.conditions:
+            self.query(condition)
+        table.truncate(105)
+        table.reIndex()
+        self.appendRows([1000] * 10 + [101])
+        for condition in self.conditions:
+            self.assertEqual(list(self.query(condition)),
+                             range(100, 105) + [table.nrows - 1])
+
+    def test04_partial(self):
+        """Discarding the results of queries not iterated to the end."""
+        table = self.table
+        condition = self.conditions[0]
+        for row in table.where(condition):
+            break
+        self.appendRows([101])
+        self.assertEqual(len(self.query(condition)), 21)
+
+
 #----------------------------------------------------------------------
 
 def suite():
@@ -2435,6 +3047,12 @@ def suite():
         theSuite.addTest(unittest.makeSuite(readSortedIndex9))
         theSuite.addTest(unittest.makeSuite(Issue156_1))
         theSuite.addTest(unittest.makeSuite(Issue156_2))
+        theSuite.addTest(unittest.makeSuite(CompositeIndexTestCase))
+        theSuite.addTest(unittest.makeSuite(BitmapIndexTestCase))
+        theSuite.addTest(unittest.makeSuite(OutOfCoreBuildTestCase))
+        theSuite.addTest(unittest.makeSuite(OutOfCoreBuildOneThreadTestCase))
+        theSuite.addTest(unittest.makeSuite(IncrementalIndexTestCase))
+        theSuite.addTest(unittest.makeSuite(AppendedRowsQueryCacheTestCase))
     if heavy:
         # These are too heavy for normal testing
         theSuite.addTest(unittest.makeSuite(AI4bTestCase))
@@ -16,6 +16,7 @@ import re
 import sys
 import types
 import unittest
+import threading
 
 import numpy
 
@@ -1091,6 +1092,221 @@ class IndexedTableUsage32(IndexedTableUsage):
     str_expr = ''
 
 
+class ParallelQueryTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    """Test case for the parallel in-kernel query engine."""
+
+    nrows = 1000
+
+    def setUp(self):
+        super(ParallelQueryTestCase, self).setUp()
+        self.table = table = self.h5file.createTable(
+            '/', 'test', {'c1': tables.Int32Col(), 'c2': tables.Float64Col()},
+            chunkshape=(32,))
+        table.append([(i, i * 0.5) for i in xrange(self.nrows)])
+        table.flush()
+        # Make the I/O buffer small so that many slices are evaluated.
+        table.nrowsinbuf = 64
+
+    def _check(self, condition, **kwargs):
+        table = self.table
+        table._v_file.params['MAX_QUERY_THREADS'] = 1
+        coords1 = table.getWhereList(condition, **kwargs)
+        rows1 = table.readWhere(condition, **kwargs)
+        table._v_file.params['MAX_QUERY_THREADS'] = 4
+        coords4 = table.getWhereList(condition, **kwargs)
+        rows4 = table.readWhere(condition, **kwargs)
+        vprint("* Coordinates found: %s" % coords4)
+        self.assertTrue(common.allequal(coords1, coords4))
+        self.assertTrue(common.areArraysEqual(rows1, rows4))
+
+    def test00_fullRange(self):
+        """Querying the whole table in parallel."""
+        self._check('(c1 > 100) & (c2 < 400)')
+
+    def test01_unalignedRange(self):
+        """Querying a range not aligned with chunks in parallel."""
+        self._check('c1 % 3 == 0', start=45, stop=901)
+
+    def test02_step(self):
+        """Querying a range with a step in parallel."""
+        self._check('c2 > 10', start=7, stop=999, step=7)
+
+    def test03_noResults(self):
+        """Querying with no matching rows in parallel."""
+        self._check('c1 < 0')
+
+    def test04_whereAppend(self):
+        """Appending the results of a parallel query."""
+        self.h5file.params['MAX_QUERY_THREADS'] = 4
+        table2 = self.h5file.createTable('/', 'test2', self.table.description)
+        nrows = self.table.whereAppend(table2, '(c1 >= 10) & (c1 < 300)')
+        self.assertEqual(nrows, 290)
+        self.assertTrue(common.allequal(table2.cols.c1[:],
+                                        numpy.arange(10, 300)))
+
+    def test05_decodeChunks(self):
+        """Decompressing chunks in the workers of a parallel query."""
+        filters = tables.Filters(complevel=1, complib='zlib', shuffle=True)
+        table = self.h5file.createTable('/', 'test2', self.table.description,
+                                        filters=filters, chunkshape=(32,))
+        table.append(self.table.read())
+        table.flush()
+        table.nrowsinbuf = 64
+        if table._get_raw_filters() is None:
+            raise common.SkipTest("raw chunks can not be read")
+        # Record the raw chunks read by the workers
+        chunks = []
+        read_raw_chunk = table._read_raw_chunk
+        def _read_raw_chunk(nchunk):
+            chunks.append(nchunk)
+            return read_raw_chunk(nchunk)
+        table._read_raw_chunk = _read_raw_chunk
+        self.table = table
+        self._check('(c1 > 100) & (c2 < 400)')
+        # Only the parallel queries (getWhereList and readWhere) read them
+        nchunks = (self.nrows - 1) // 32 + 1
+        self.assertEqual(sorted(chunks), sorted(range(nchunks) * 2))
+
+
+class ConcurrentReadTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    """Test case for reading from a file in several threads at once."""
+
+    nrows = 1000
+    nthreads = 8
+    niter = 5
+
+    def setUp(self):
+        super(ConcurrentReadTestCase, self).setUp()
+        filters = tables.Filters(complevel=1)
+        table = self.h5file.createTable(
+            '/', 'test', {'c1': tables.Int32Col(), 'c2': tables.Float64Col()},
+            chunkshape=(32,), filters=filters)
+        table.append([(i, i * 0.5) for i in xrange(self.nrows)])
+        table.cols.c2.createIndex()
+        array = self.h5file.createCArray(
+            '/', 'array', tables.Int32Atom(), (self.nrows, 10),
+            chunkshape=(16, 10), filters=filters)
+        array[:] = numpy.arange(self.nrows * 10).reshape(self.nrows, 10)
+        self._reopen()
+        self.table = self.h5file.root.test
+        self.table.nrowsinbuf = 64
+
+    def _tasks(self):
+        h5file = self.h5file
+        table = self.table
+        return [
+            lambda: table.read(),
+            lambda: table.read(3, 900, 7, field='c2'),
+            lambda: table.readWhere('c1 % 3 == 0'),
+            lambda: table.readWhere('(c2 > 10) & (c2 < 20)'),
+            lambda: table.getWhereList('(c1 > 100) & (c2 < 400)'),
+            lambda: table.readCoordinates([1, 10, 100, 999]),
+            lambda: h5file.root.array[10:900:3],
+            lambda: h5file.root.array[[5, 500, 50]],
+            lambda: h5file.getNode('/array').attrs.CLASS,
+            ]
+
+    def test00_read(self):
+        """Reading the same nodes from several threads."""
+
+        tasks = self._tasks()
+        expected = [task() for task in tasks]
+        errors = []
+
+        def reader():
+            try:
+                for i in xrange(self.niter):
+                    for (task, result) in zip(tasks, expected):
+                        if not common.areArraysEqual(task(), result):
+                            errors.append("wrong result from %r" % task)
+            except Exception, exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=reader)
+                   for i in xrange(self.nthreads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+
+class ExactIndexedQueryTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    """Test case for indexed queries getting exact coordinates."""
+
+    nrows = 1000
+
+    def setUp(self):
+        super(ExactIndexedQueryTestCase, self).setUp()
+        self.table = table = self.h5file.createTable(
+            '/', 'test', {'c1': tables.Int32Col(), 'c2': tables.Float64Col(),
+                          'c3': tables.Int16Col()},
+            chunkshape=(256,))
+        table.append([(i, i * 0.5, i % 10) for i in xrange(self.nrows)])
+        table.flush()
+        table.cols.c1.createIndex(kind='full', _blocksizes=small_blocksizes)
+        table.cols.c2.createIndex(kind='full', _blocksizes=small_blocksizes)
+        # Always get exact coordinates unless told otherwise
+        self.h5file.params['INDEX_MAX_COORDS_RATIO'] = 1.0
+
+    def _check(self, condition, **kwargs):
+        table = self.table
+        coords = table.getWhereList(condition, **kwargs)
+        table._disableIndexingInQueries()
+        expected = table.getWhereList(condition, **kwargs)
+        table._enableIndexingInQueries()
+        vprint("* Coordinates found: %s" % coords)
+        self.assertTrue(common.allequal(coords, expected))
+        return coords
+
+    def test00_getCoords(self):
+        """Getting exact coordinates from a full index."""
+        index = self.table.cols.c1.index
+        index.search(index.getLookupRange(('ge', 'lt'), (10, 13)))
+        self.assertTrue(common.allequal(index.get_coords(), [10, 11, 12]))
+
+    def test01_simple(self):
+        """Querying with a single full index."""
+        self.assertEqual(len(self._check('(c1 > 500) & (c1 <= 505)')), 5)
+        self._check('c1 == 999')
+        self._check('c1 < 0')
+
+    def test02_combined(self):
+        """Querying with several full indexes and a residual condition."""
+        self._check('(c1 < 30) | (c2 > 480)')
+        self._check('((c1 < 300) & (c2 > 100)) & (c3 == 7)')
+        self._check('(c1 < 300) & (c3 == 7)', start=21, stop=250, step=3)
+
+    def test03_unindexedRows(self):
+        """Querying rows appended without updating the indexes."""
+        table = self.table
+        # Less rows than a slice are not indexed until the table is flushed
+        table.append([(3, 1.5, 3)] * 5)
+        index = table.cols.c1.index
+        self.assertTrue(index.nelements < table.nrows)
+        coords = self._check('c1 == 3')
+        self.assertTrue(common.allequal(coords, [3] + range(1000, 1005)))
+        coords = self._check('c1 == 3', start=3, stop=1004, step=2)
+        self.assertTrue(common.allequal(coords, [3, 1001, 1003]))
+
+    def test04_notSelective(self):
+        """Falling back to chunkmaps when indexes find too many rows."""
+        table = self.table
+        condition = '(c1 >= 100) & (c1 < 110)'
+        condvars = table._requiredExprVars(condition, {})
+        compiled = table._compileCondition(condition, condvars)
+        coords = tables.table._table__whereIndexedCoords(
+            table, compiled, condvars, 0, table.nrows, 1)
+        self.assertTrue(common.allequal(coords, range(100, 110)))
+        self.h5file.params['INDEX_MAX_COORDS_RATIO'] = 0.005
+        coords = tables.table._table__whereIndexedCoords(
+            table, compiled, condvars, 0, table.nrows, 1)
+        self.assertTrue(coords is None)
+        self.assertEqual(len(self._check(condition)), 10)
+
 
 # Main part
 # ---------
@@ -1153,6 +1369,9 @@ def suite():
         testSuite.addTest(unittest.makeSuite(IndexedTableUsage30))
         testSuite.addTest(unittest.makeSuite(IndexedTableUsage31))
         testSuite.addTest(unittest.makeSuite(IndexedTableUsage32))
+        testSuite.addTest(unittest.makeSuite(ParallelQueryTestCase))
+        testSuite.addTest(unittest.makeSuite(ConcurrentReadTestCase))
+        testSuite.addTest(unittest.makeSuite(ExactIndexedQueryTestCase))
 
     return testSuite
 
@@ -5,6 +5,7 @@ import unittest
 import os
 import tempfile
 import warnings
+import threading
 
 import numpy as np
 from numpy import rec as records
@@ -6098,6 +6099,237 @@ class ColumnIterationTestCase(unittest.TestCase):
         self.iterate(array, table)
 
 
+class ProjectionTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    nrows = 500
+
+    def setUp(self):
+        super(ProjectionTestCase, self).setUp()
+        self.table = self.h5file.createTable('/', 'table', Record)
+        row = self.table.row
+        for i in xrange(self.nrows):
+            row['var1'] = str(i)
+            row['var2'] = i
+            row['var3'] = i % 30
+            row['var4'] = i * 1.5
+            row.append()
+        self.table.flush()
+
+    def test00_read(self):
+        """Reading a projection of some columns."""
+        table = self.table
+        result = table.read(3, 400, 2, fields=['var4', 'var2'])
+        if common.verbose:
+            print "Projected dtype:", result.dtype
+        self.assertEqual(result.dtype.names, ('var4', 'var2'))
+        self.assertEqual(result.dtype.itemsize, 8 + 4)
+        expected = table.read(3, 400, 2)
+        self.assertTrue(allequal(result['var4'], expected['var4']))
+        self.assertTrue(allequal(result['var2'], expected['var2']))
+
+    def test01_readField(self):
+        """Reading a single field through a projection."""
+        table = self.table
+        result = table.read(10, 20, field='var2')
+        self.assertTrue(allequal(result, np.arange(10, 20, dtype='i4')))
+        self.assertTrue(allequal(table.cols.var3[5:50:5],
+                                 np.arange(5, 50, 5) % 30))
+        self.assertEqual(table.cols.var4[3], 4.5)
+
+    def test02_readWhere(self):
+        """Reading a projection of the rows fulfilling a condition."""
+        table = self.table
+        result = table.readWhere('var3 == 7', fields=['var2'])
+        self.assertEqual(result.dtype.names, ('var2',))
+        self.assertTrue(allequal(result['var2'],
+                                 np.arange(7, self.nrows, 30)))
+        result = table.readWhere('(var2 >= 5) & (var2 < 15)',
+                                 fields=['var1', 'var3'])
+        self.assertEqual(result.dtype.names, ('var1', 'var3'))
+        self.assertEqual(len(result), 10)
+
+    def test03_readCoordinates(self):
+        """Reading a projection of some coordinates."""
+        table = self.table
+        result = table.readCoordinates([3, 1, 400], fields=['var4'])
+        self.assertTrue(allequal(result['var4'], [4.5, 1.5, 600.]))
+        result = table.readCoordinates([3, 1, 400], field='var2')
+        self.assertTrue(allequal(result, [3, 1, 400]))
+
+    def test04_columnIteration(self):
+        """Iterating over a column through a projection."""
+        self.assertEqual([int(x) for x in self.table.cols.var2],
+                         range(self.nrows))
+
+    def test05_errors(self):
+        """Wrong arguments for projections."""
+        table = self.table
+        self.assertRaises(KeyError, table.read, fields=['var2', 'foo'])
+        self.assertRaises(ValueError, table.read, field='var2',
+                          fields=['var2'])
+
+
+class IterBlocksTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    nrows = 1000
+
+    def setUp(self):
+        super(IterBlocksTestCase, self).setUp()
+        self.table = self.h5file.createTable(
+            '/', 'table', {'c1': Int32Col(), 'c2': Float64Col()},
+            chunkshape=(16,))
+        self.table.append([(i, i * 2.) for i in xrange(self.nrows)])
+        self.table.flush()
+
+    def check(self, start=None, stop=None, step=None, blocksize=None,
+              fields=None):
+        table = self.table
+        blocks = [block.copy() for block in
+                  table.iterblocks(start, stop, step, blocksize, fields)]
+        if common.verbose:
+            print "Block lengths:", [len(block) for block in blocks]
+        if fields is None:
+            expected = table.read(start, stop, step)
+        elif isinstance(fields, str):
+            expected = table.read(start, stop, step, field=fields)
+        else:
+            expected = table.read(start, stop, step)[fields]
+        self.assertTrue(allequal(np.concatenate(blocks), expected))
+        return blocks
+
+    def test00_default(self):
+        """Iterating over blocks with the default blocksize."""
+        self.table.nrowsinbuf = 40
+        blocks = self.check()
+        # Blocks must cover whole chunks
+        self.assertEqual([len(block) for block in blocks[:-1]],
+                         [32] * (len(blocks) - 1))
+
+    def test01_unaligned(self):
+        """Iterating over blocks of a range not aligned with chunks."""
+        blocks = self.check(5, 300, blocksize=64)
+        self.assertEqual(len(blocks[0]), 59)
+
+    def test02_step(self):
+        """Iterating over blocks with a step."""
+        self.check(3, 999, 7, blocksize=50)
+        self.check(3, 999, 70, blocksize=50)
+
+    def test03_field(self):
+        """Iterating over blocks of a single field."""
+        self.check(blocksize=100, fields='c2')
+
+    def test04_fields(self):
+        """Iterating over blocks of several fields."""
+        self.check(blocksize=100, fields=['c2', 'c1'])
+
+    def test05_badBlocksize(self):
+        """Iterating over blocks with a wrong blocksize."""
+        self.assertRaises(ValueError, list, self.table.iterblocks(blocksize=0))
+
+
+class PrefetchTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    nrows = 1000
+
+    def setUp(self):
+        super(PrefetchTestCase, self).setUp()
+        self.table = self.h5file.createTable(
+            '/', 'table', {'c1': Int32Col(), 'c2': Float64Col()},
+            filters=Filters(complevel=1), chunkshape=(16,))
+        self.table.append([(i, i * 2.) for i in xrange(self.nrows)])
+        self.table.flush()
+        # Make the I/O buffer small so that many buffers are prefetched
+        self.table.nrowsinbuf = 32
+
+    def check(self, start=None, stop=None, step=None, prefetch=2):
+        table = self.table
+        result = [row['c1'] for row in
+                  table.iterrows(start, stop, step, prefetch=prefetch)]
+        expected = range(self.nrows)[start:stop:step]
+        if common.verbose:
+            print "Selected values:", result
+        self.assertEqual(result, expected)
+
+    def test00_all(self):
+        """Prefetching while iterating over the whole table."""
+        self.check()
+
+    def test01_range(self):
+        """Prefetching while iterating over a range."""
+        self.check(3, 677)
+
+    def test02_step(self):
+        """Prefetching while iterating with a step."""
+        self.check(5, 901, 7)
+
+    def test03_oneBuffer(self):
+        """Prefetching with a single buffer."""
+        self.check(prefetch=1)
+
+    def test04_parameter(self):
+        """Prefetching set through the TABLE_PREFETCH_BUFFERS parameter."""
+        self.h5file.params['TABLE_PREFETCH_BUFFERS'] = 3
+        self.check(prefetch=None)
+
+    def test05_break(self):
+        """Leaving a prefetching iterator before it is exhausted."""
+        for row in self.table.iterrows(prefetch=4):
+            if row.nrow == 100:
+                break
+        self.check()
+
+    def test06_stopThread(self):
+        """The reading thread ends when a prefetching iterator is left."""
+        nthreads = threading.activeCount()
+        rows = self.table.iterrows(prefetch=4)
+        for row in rows:
+            if row.nrow == 100:
+                break
+        self.assertEqual(threading.activeCount(), nthreads + 1)
+        rows.close()
+        self.assertEqual(threading.activeCount(), nthreads)
+        rows = self.table.iterrows(prefetch=4)
+        rows.next()
+        del rows
+        self.assertEqual(threading.activeCount(), nthreads)
+
+
+class ScatteredReadTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    nrows = 1000
+
+    def setUp(self):
+        super(ScatteredReadTestCase, self).setUp()
+        self.table = self.h5file.createTable(
+            '/', 'table', {'c1': Int32Col(), 'c2': Float64Col()},
+            chunkshape=(16,), filters=Filters(complevel=1))
+        self.table.append([(i, i * 2.) for i in xrange(self.nrows)])
+        self.table.flush()
+        np.random.seed(1)
+        coords = np.random.randint(0, self.nrows, 300)
+        self.keysets = [coords, np.sort(coords), coords[:1], coords[:0]]
+
+    def test00_readCoordinates(self):
+        """Reading unsorted coordinates (and repeated ones)."""
+        for coords in self.keysets:
+            result = self.table.readCoordinates(coords)
+            self.assertEqual(len(result), len(coords))
+            self.assertEqual(result['c1'].tolist(), coords.tolist())
+            self.assertEqual(result['c2'].tolist(), (coords * 2.).tolist())
+            result = self.table.readCoordinates(coords, fields=['c2'])
+            self.assertEqual(result['c2'].tolist(), (coords * 2.).tolist())
+
+    def test01_itersequence(self):
+        """Iterating over unsorted and sorted coordinates."""
+        # Use buffers smaller than the sequences
+        self.table.nrowsinbuf = 40
+        for coords in self.keysets:
+            result = [(row.nrow, row['c1'])
+                      for row in self.table.itersequence(coords)]
+            self.assertEqual(result, [(i, i) for i in coords])
+
+
 #----------------------------------------------------------------------
 
 def suite():
@@ -6173,6 +6405,10 @@ def suite():
         theSuite.addTest(unittest.makeSuite(RowContainsTestCase))
         theSuite.addTest(unittest.makeSuite(AccessClosedTestCase))
         theSuite.addTest(unittest.makeSuite(ColumnIterationTestCase))
+        theSuite.addTest(unittest.makeSuite(ProjectionTestCase))
+        theSuite.addTest(unittest.makeSuite(IterBlocksTestCase))
+        theSuite.addTest(unittest.makeSuite(PrefetchTestCase))
+        theSuite.addTest(unittest.makeSuite(ScatteredReadTestCase))
 
     if common.heavy:
         theSuite.addTest(unittest.makeSuite(CompressBzip2TablesTestCase))
@@ -6,9 +6,12 @@ import unittest
 import os
 import tempfile
 
+import numpy
+
 from tables import *
 # Next imports are only necessary for this test suite
 from tables import Group, Leaf, Table, Array
+from tables.link import SoftLink
 
 from tables.tests import common
 
@@ -1014,6 +1017,347 @@ class CreateParentsTestCase(common.TempFileMixin, common.PyTablesTestCase):
 
 
 
+class ChildrenMetadataTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    """Test the batched loading of the metadata of children nodes."""
+
+    def setUp(self):
+        super(ChildrenMetadataTestCase, self).setUp()
+        group = self.h5file.createGroup('/', 'group')
+        self.h5file.createGroup(group, 'subgroup')
+        self.h5file.createTable(group, 'table', Record)
+        self.h5file.createArray(group, 'array', [1, 2])
+        self.h5file.createVLArray(group, 'vlarray', Int32Atom())
+        self.h5file.createArray(group, '_i_hidden', [1])
+        self.h5file.createSoftLink(group, 'link', '/group/array')
+        self._reopen()
+
+    def test00_metadata(self):
+        """Reading the metadata of all children at once."""
+        group = self.h5file.root.group
+        self.assertEqual(sorted(group._v_children.keys()),
+                         ['array', 'link', 'subgroup', 'table', 'vlarray'])
+        self.assertEqual(sorted(group._v_groups.keys()), ['subgroup'])
+        self.assertEqual(sorted(group._v_leaves.keys()),
+                         ['array', 'table', 'vlarray'])
+        self.assertEqual(group._v_links.keys(), ['link'])
+        self.assertEqual(group._v_hidden.keys(), ['_i_hidden'])
+        self.assertEqual(sorted(group.__members__),
+                         sorted(group._v_children.keys()))
+        meta = group._v__childrenmeta
+        self.assertEqual(len(meta), 6)
+        self.assertEqual(meta.names, sorted(meta.names))
+        self.assertEqual(meta.get('subgroup'), ('Group', 'GROUP', '1.0'))
+        self.assertEqual(meta.get('table')[:2], ('Leaf', 'TABLE'))
+        self.assertEqual(meta.get('vlarray')[:2], ('Leaf', 'VLARRAY'))
+        self.assertEqual(meta.get('link'), ('SoftLink', None, None))
+        self.assertEqual(meta.get('nothere'), None)
+
+    def test01_load(self):
+        """Loading children with the metadata of their parent."""
+        group = self.h5file.root.group
+        self.assertTrue(isinstance(group.subgroup, Group))
+        self.assertEqual(group.subgroup._v_version, '1.0')
+        self.assertTrue(isinstance(group.table, Table))
+        self.assertTrue(isinstance(group.array, Array))
+        self.assertTrue(isinstance(group.vlarray, VLArray))
+        self.assertTrue(isinstance(group.link, SoftLink))
+        self.assertEqual(group.link.target, '/group/array')
+        self.assertEqual([node._v_name for node in group],
+                         ['array', 'link', 'subgroup', 'table', 'vlarray'])
+
+    def test02_stale(self):
+        """Not using the metadata of replaced or moved children."""
+        self._reopen('a')
+        group = self.h5file.root.group
+        self.assertEqual(group._g_getChildMetadata('array')[1], 'ARRAY')
+        group.array._f_remove()
+        self.assertEqual(group._g_getChildMetadata('array'), None)
+        self.h5file.createTable(group, 'array', Record)
+        group.vlarray._f_rename('vlarray2')
+        self.assertEqual(group._g_getChildMetadata('vlarray'), None)
+        self.assertEqual(group._g_getChildMetadata('vlarray2'), None)
+        # Force the nodes to be loaded again.
+        group.array._f_close()
+        group.vlarray2._f_close()
+        self.assertTrue(isinstance(group.array, Table))
+        self.assertTrue(isinstance(group.vlarray2, VLArray))
+
+    def test03_nobatch(self):
+        """Listing children without their metadata."""
+        self.h5file.close()
+        self.h5file = openFile(self.h5fname, 'r', batch_node_metadata=False)
+        group = self.h5file.root.group
+        self.assertEqual(sorted(group._v_leaves.keys()),
+                         ['array', 'table', 'vlarray'])
+        self.assertFalse('_v__childrenmeta' in group.__dict__)
+        self.assertEqual(group._g_getChildMetadata('table'), None)
+        self.assertTrue(isinstance(group.table, Table))
+
+    def test04_nosysattrs(self):
+        """Not reading system attributes of children."""
+        self.h5file.close()
+        self.h5file = openFile(self.h5fname, 'r', pytables_sys_attrs=False)
+        group = self.h5file.root.group
+        self.assertEqual(group._g_getChildMetadata('table'),
+                         ('Leaf', None, None))
+        self.assertTrue(isinstance(group.table, Table))
+        self.assertTrue(isinstance(group.subgroup, Group))
+
+
+
+class CatalogTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    """Test the catalog of nodes."""
+
+    def setUp(self):
+        super(CatalogTestCase, self).setUp()
+        group = self.h5file.createGroup('/', 'group')
+        self.h5file.createGroup(group, 'subgroup')
+        self.h5file.createTable(group, 'table', Record)
+        self.h5file.createArray(group, 'array', [1, 2])
+        self.h5file.createEArray('/', 'earray', Int32Atom(), (0, 3),
+                                 filters=Filters(complevel=1))
+        self.h5file.enableCatalog()
+
+    def _checkInfo(self, where):
+        """Check that the catalog matches the nodes in `where`."""
+        catalog = self.h5file._catalog
+        self.h5file._catalog = None
+        try:
+            expected = self.h5file.listNodeInfo(where, recursive=True)
+        finally:
+            self.h5file._catalog = catalog
+        self.assertEqual(self.h5file.listNodeInfo(where, recursive=True),
+                         expected)
+
+    def test00_enable(self):
+        """Enabling and disabling the catalog."""
+        self.assertTrue(self.h5file.isCatalogEnabled())
+        self.assertFalse('_p_catalog' in self.h5file.root._v_children)
+        self._checkInfo('/')
+        self._reopen()
+        self.assertTrue(self.h5file.isCatalogEnabled())
+        self._checkInfo('/')
+        self._reopen('a')
+        self.h5file.disableCatalog()
+        self.assertFalse(self.h5file.isCatalogEnabled())
+        self._reopen()
+        self.assertFalse(self.h5file.isCatalogEnabled())
+
+    def test01_getNodeInfo(self):
+        """Getting the metadata of a single node."""
+        self._reopen()
+        info = self.h5file.getNodeInfo('/earray')
+        self.assertEqual(info.pathname, '/earray')
+        self.assertEqual(info.classname, 'EArray')
+        self.assertEqual(info.shape, (0, 3))
+        self.assertEqual(info.dtype, numpy.dtype('int32'))
+        self.assertEqual(info.filters, Filters(complevel=1))
+        info = self.h5file.getNodeInfo('/group/subgroup')
+        self.assertEqual(info.classname, 'Group')
+        self.assertEqual(info.shape, None)
+        self.assertEqual(self.h5file.getNodeInfo('/group/table').shape, (0,))
+        self.assertFalse('/group/table' in self.h5file._aliveNodes)
+        self.assertRaises(NoSuchNodeError, self.h5file.getNodeInfo, '/foo')
+
+    def test02_listNodeInfo(self):
+        """Listing the metadata of nodes."""
+        self._reopen()
+        paths = lambda infolist: [info.pathname for info in infolist]
+        self.assertEqual(paths(self.h5file.listNodeInfo('/group')),
+                         ['/group/array', '/group/subgroup', '/group/table'])
+        self.assertEqual(paths(self.h5file.listNodeInfo('/', 'Leaf', True)),
+                         ['/earray', '/group/array', '/group/table'])
+        self.assertEqual(paths(self.h5file.listNodeInfo('/', 'Group')),
+                         ['/group'])
+        self.assertEqual(len(self.h5file.listNodeInfo('/', recursive=True)),
+                         6)
+        self.assertRaises(TypeError, self.h5file.listNodeInfo, '/earray')
+
+    def test03_update(self):
+        """Keeping the catalog up to date."""
+        earray = self.h5file.root.earray
+        earray.append([[1, 2, 3]] * 2)
+        self.h5file.createArray('/group/subgroup', 'array2', [1.0])
+        self.h5file.root.group.array._f_remove()
+        self.h5file.root.group._f_rename('group2')
+        self.h5file.moveNode('/group2/table', '/', 'table2')
+        self._reopen()
+        self._checkInfo('/')
+        self.assertEqual(self.h5file.getNodeInfo('/earray').shape, (2, 3))
+        self.assertEqual(
+            self.h5file.getNodeInfo('/group2/subgroup/array2').dtype,
+            numpy.dtype('float64'))
+        self.assertRaises(NoSuchNodeError,
+                          self.h5file.getNodeInfo, '/group/array')
+
+    def test04_undo(self):
+        """Keeping the catalog up to date with undo and redo."""
+        self.h5file.enableUndo()
+        self.h5file.root.group._f_remove(recursive=True)
+        self._checkInfo('/')
+        self.h5file.undo()
+        self._checkInfo('/')
+        self.assertEqual(self.h5file.getNodeInfo('/group/table').classname,
+                         'Table')
+        self.h5file.redo()
+        self._checkInfo('/')
+
+    def test05_newFile(self):
+        """Creating the catalog of new files."""
+        self.h5file.close()
+        self.h5file = openFile(self.h5fname, 'w', node_catalog=True)
+        self.assertTrue(self.h5file.isCatalogEnabled())
+        self.h5file.createArray('/', 'array', [1, 2])
+        self._reopen()
+        self.assertEqual(self.h5file.getNodeInfo('/array').shape, (2,))
+
+    def test06_longPath(self):
+        """Disabling the catalog when paths are too long."""
+        self.h5file.close()
+        self.h5file = openFile(self.h5fname, 'w', node_catalog=True,
+                               node_catalog_path_length=8)
+        warnings.filterwarnings('ignore', category=PerformanceWarning)
+        try:
+            self.h5file.createArray('/', 'short', [1])
+            self.assertTrue(self.h5file.isCatalogEnabled())
+            self.h5file.createArray('/', 'a' * 20, [1])
+        finally:
+            warnings.filterwarnings('default', category=PerformanceWarning)
+        self.assertFalse(self.h5file.isCatalogEnabled())
+        self.assertEqual(self.h5file.getNodeInfo('/' + 'a' * 20).shape, (1,))
+
+    def test07_incrementalIndex(self):
+        """Updating the catalog without reindexing it."""
+        table = self.h5file._catalog.table
+        self.assertTrue(table.incrementalIndex)
+        self.h5file.createArray('/group', 'array2', [1])
+        self.h5file.removeNode('/group/array')
+        self.h5file.renameNode('/earray', 'earray2')
+        self.assertFalse(table.cols.pathname.index.dirty)
+        self._checkInfo('/')
+
+    def test08_tableDtype(self):
+        """Keeping the fields of the types of tables."""
+        description = {'x': Int32Col(pos=0), 'y': Float64Col(shape=2, pos=1),
+                       'nested': {'z': StringCol(3, pos=0)}}
+        table = self.h5file.createTable('/', 'nested', description)
+        dtypes = [('/group/table', self.h5file.root.group.table.dtype),
+                  ('/nested', table.dtype)]
+        self._reopen()
+        for (pathname, dtype) in dtypes:
+            info = self.h5file.getNodeInfo(pathname)
+            self.assertEqual(info.dtype, dtype)
+            self.assertEqual(info.dtype.names, dtype.names)
+        self.assertEqual(self.h5file.getNodeInfo('/nested').dtype['y'].shape,
+                         (2,))
+        self._checkInfo('/')
+
+    def test09_longDtype(self):
+        """Disabling the catalog when types are too long."""
+        self.h5file.close()
+        self.h5file = openFile(self.h5fname, 'w', node_catalog=True,
+                               node_catalog_dtype_length=64)
+        warnings.filterwarnings('ignore', category=PerformanceWarning)
+        try:
+            self.h5file.createTable('/', 'table', {'x': Int32Col()})
+            self.assertTrue(self.h5file.isCatalogEnabled())
+            description = dict(('column%d' % i, Int32Col())
+                               for i in range(10))
+            self.h5file.createTable('/', 'wide', description)
+        finally:
+            warnings.filterwarnings('default', category=PerformanceWarning)
+        self.assertFalse(self.h5file.isCatalogEnabled())
+
+
+
+class ScanTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    """Test the bulk scan of the metadata of nodes."""
+
+    def setUp(self):
+        super(ScanTestCase, self).setUp()
+        group = self.h5file.createGroup('/', 'group')
+        self.h5file.createGroup(group, 'subgroup')
+        table = self.h5file.createTable(group, 'table', Record)
+        table.append([('abcd', 1, 2, 3.0, 4.0)] * 3)
+        table.cols.var2.createIndex()
+        self.h5file.createArray(group, 'array', [[1, 2], [3, 4]])
+        self.h5file.createEArray('/', 'earray', Int16Atom(), (0, 3),
+                                 filters=Filters(complevel=1))
+        self.h5file.createVLArray('/', 'vlarray', Int32Atom())
+        self.h5file.createArray(group, '_i_hidden', [1])
+        self.h5file.createSoftLink(group, 'link', '/group/array')
+        self._reopen()
+
+    def test00_paths(self):
+        """Scanning the same nodes as when walking the tree."""
+        paths = [node._v_pathname for node in self.h5file.walkNodes('/')]
+        records = self.h5file.scan()
+        self.assertEqual(sorted(records['path']), sorted(paths))
+        records = self.h5file.scan('/group', fields=('path',))
+        self.assertEqual(records.dtype.names, ('path',))
+        self.assertEqual(
+            sorted(records['path']),
+            ['/group', '/group/array', '/group/link', '/group/subgroup',
+             '/group/table'])
+        # No node has been loaded.
+        self.assertFalse('/group/table' in self.h5file._aliveNodes)
+
+    def test01_metadata(self):
+        """Scanning the metadata of nodes."""
+        records = self.h5file.scan()
+        for record in records:
+            node = self.h5file.getNode(record['path'])
+            self.assertEqual(record['class'], node.__class__.__name__)
+            if isinstance(node, Leaf):
+                self.assertEqual(record['shape'], node.shape)
+                self.assertEqual(record['dtype'], node.dtype)
+                self.assertEqual(record['filters'], node.filters)
+            else:
+                self.assertEqual(record['shape'], None)
+                self.assertEqual(record['dtype'], None)
+                self.assertEqual(record['filters'], None)
+        nbytes = dict(zip(records['path'], records['nbytes']))
+        self.assertEqual(nbytes['/group/table'],
+                         self.h5file.root.group.table.size_in_memory)
+        self.assertEqual(nbytes['/group/array'], 4 * 8)
+        self.assertEqual(nbytes['/earray'], 0)
+        self.assertEqual(nbytes['/vlarray'], -1)
+        self.assertEqual(nbytes['/group'], -1)
+
+    def test02_leaf(self):
+        """Scanning a leaf."""
+        records = self.h5file.scan(self.h5file.root.earray)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['path'], '/earray')
+        self.assertEqual(records[0]['shape'], (0, 3))
+        self.assertEqual(records[0]['dtype'], numpy.dtype('int16'))
+        self.assertEqual(records[0]['filters'], Filters(complevel=1))
+
+    def test03_errors(self):
+        """Scanning missing nodes or fields."""
+        self.assertRaises(NoSuchNodeError, self.h5file.scan, '/foo')
+        self.assertRaises(NameError, self.h5file.scan, 'group')
+        self.assertRaises(ValueError, self.h5file.scan, '/', ('size',))
+
+    def test04_rootUEP(self):
+        """Scanning a file opened with a root user entry point."""
+        self.h5file.close()
+        self.h5file = openFile(self.h5fname, 'r', rootUEP='/group')
+        records = self.h5file.scan(fields=('path', 'class'))
+        self.assertEqual(
+            sorted(zip(records['path'], records['class'])),
+            [('/', 'RootGroup'), ('/array', 'Array'), ('/link', 'SoftLink'),
+             ('/subgroup', 'Group'), ('/table', 'Table')])
+        records = self.h5file.scan('/table', fields=('path', 'shape'))
+        self.assertEqual(records[0]['path'], '/table')
+        self.assertEqual(records[0]['shape'], (3,))
+        self.assertRaises(NoSuchNodeError, self.h5file.scan, '/group')
+
+
+
 #----------------------------------------------------------------------
 
 def suite():
@@ -1027,6 +1371,9 @@ def suite():
         theSuite.addTest(unittest.makeSuite(WideTreeTestCase))
         theSuite.addTest(unittest.makeSuite(HiddenTreeTestCase))
         theSuite.addTest(unittest.makeSuite(CreateParentsTestCase))
+        theSuite.addTest(unittest.makeSuite(ChildrenMetadataTestCase))
+        theSuite.addTest(unittest.makeSuite(CatalogTestCase))
+        theSuite.addTest(unittest.makeSuite(ScanTestCase))
 
     return theSuite
 
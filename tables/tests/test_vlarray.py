@@ -4176,6 +4176,147 @@ class SizeOnDiskPropertyTestCase(unittest.TestCase):
                           'size_on_disk')
 
 
+class IterBlocksTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    def setUp(self):
+        super(IterBlocksTestCase, self).setUp()
+        self.array = self.h5file.createVLArray('/', 'array', Int32Atom(),
+                                               chunkshape=(32,))
+        for i in xrange(500):
+            self.array.append(numpy.arange(i % 7))
+
+    def check(self, start=None, stop=None, step=None, blocksize=None):
+        result = []
+        for block in self.array.iterblocks(start, stop, step, blocksize):
+            result.extend(block)
+        expected = self.array.read(start, stop, step)
+        self.assertEqual(len(result), len(expected))
+        for row1, row2 in zip(result, expected):
+            self.assertTrue(allequal(row1, row2))
+
+    def test00_default(self):
+        """Iterating over blocks with the default blocksize."""
+        self.check()
+
+    def test01_range(self):
+        """Iterating over blocks of a range with a step."""
+        self.check(3, 450, 4, blocksize=20)
+
+
+class ExtendTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    def check(self, pathname, expected):
+        self._reopen()
+        array = self.h5file.getNode(pathname)
+        self.assertEqual(array.nrows, len(expected))
+        rows = array.read()
+        self.assertEqual(len(rows), len(expected))
+        for row1, row2 in zip(rows, expected):
+            if isinstance(row2, numpy.ndarray):
+                self.assertTrue(allequal(row1, row2))
+            else:
+                self.assertEqual(row1, row2)
+
+    def test00_rows(self):
+        """Extending with a sequence of rows."""
+        array = self.h5file.createVLArray('/', 'array', Int32Atom())
+        array.append([1])
+        rows = [numpy.arange(i % 5, dtype='int32') for i in range(100)]
+        array.extend(rows)
+        self.check('/array', [numpy.array([1], 'int32')] + rows)
+
+    def test01_offsets(self):
+        """Extending with flat values and offsets."""
+        array = self.h5file.createVLArray('/', 'array', Int32Atom())
+        array.extend(numpy.arange(6), offsets=[0, 2, 2, 6])
+        self.check('/array', [numpy.array([0, 1], 'int32'),
+                              numpy.array([], 'int32'),
+                              numpy.array([2, 3, 4, 5], 'int32')])
+
+    def test02_shape(self):
+        """Extending with multidimensional atoms."""
+        array = self.h5file.createVLArray('/', 'array',
+                                          Float64Atom(shape=(2,)))
+        rows = [numpy.ones((i, 2)) * i for i in range(4)]
+        array.extend(rows)
+        array.extend(numpy.arange(6.).reshape(3, 2), offsets=[0, 1, 3])
+        expected = rows + [numpy.array([[0., 1.]]),
+                           numpy.array([[2., 3.], [4., 5.]])]
+        self.check('/array', expected)
+
+    def test03_pseudo(self):
+        """Extending with pseudo-atoms."""
+        strings = self.h5file.createVLArray('/', 'strings', VLStringAtom())
+        strings.extend(["abc", "", "de"])
+        objects = self.h5file.createVLArray('/', 'objects', ObjectAtom())
+        objects.extend([{'a': 1}, [2, 3], None])
+        self.assertRaises(TypeError, objects.extend, "abc", offsets=[0, 3])
+        self.check('/strings', ["abc", "", "de"])
+        self.check('/objects', [{'a': 1}, [2, 3], None])
+
+    def test04_badoffsets(self):
+        """Extending with wrong offsets."""
+        array = self.h5file.createVLArray('/', 'array', Int32Atom())
+        self.assertRaises(ValueError, array.extend, [1, 2], offsets=[0, 3])
+        self.assertRaises(ValueError, array.extend, [1, 2],
+                          offsets=[0, 2, 1])
+        self.assertRaises(ValueError, array.extend, [1, 2], offsets=[])
+        array.extend([])
+        self.assertEqual(array.nrows, 0)
+
+
+class FlatReadTestCase(common.TempFileMixin, common.PyTablesTestCase):
+
+    def setUp(self):
+        super(FlatReadTestCase, self).setUp()
+        self.rows = [numpy.arange(i % 4, dtype='int32') for i in range(50)]
+        array = self.h5file.createVLArray('/', 'array', Int32Atom())
+        for row in self.rows:
+            array.append(row)
+        self._reopen(mode='a')
+        self.array = self.h5file.root.array
+
+    def checkFlat(self, flat, rows):
+        values, offsets = flat
+        self.assertEqual(offsets.dtype, numpy.int64)
+        self.assertEqual(len(offsets), len(rows) + 1)
+        self.assertEqual(offsets[0], 0)
+        for i, row in enumerate(rows):
+            self.assertTrue(allequal(values[offsets[i]:offsets[i+1]], row))
+
+    def test00_read(self):
+        """Reading rows in flat form."""
+        self.checkFlat(self.array.read(as_flat=True), self.rows)
+        self.checkFlat(self.array.read(3, 40, 3, as_flat=True),
+                       self.rows[3:40:3])
+        self.checkFlat(self.array.read(10, 10, as_flat=True), [])
+
+    def test01_coordinates(self):
+        """Reading coordinates with a single point selection."""
+        coords = [7, 2, 2, 49, 0, -1]
+        expected = [self.rows[i] for i in coords]
+        rows = self.array._readCoordinates(coords)
+        self.assertEqual(len(rows), len(expected))
+        for row1, row2 in zip(rows, expected):
+            self.assertTrue(allequal(row1, row2))
+        self.checkFlat(self.array._readCoordinates(coords, as_flat=True),
+                       expected)
+        self.assertEqual(self.array._readCoordinates([]), [])
+        self.assertRaises(IndexError, self.array._readCoordinates, [50])
+
+    def test02_pseudo(self):
+        """Reading pseudo-atoms in flat form."""
+        strings = self.h5file.createVLArray('/', 'strings', VLStringAtom())
+        objects = self.h5file.createVLArray('/', 'objects', ObjectAtom())
+        for string in ["abc", "", "de"]:
+            strings.append(string)
+            objects.append(string)
+        values, offsets = strings.read(as_flat=True)
+        self.assertEqual(offsets.tolist(), [0, 3, 3, 5])
+        self.assertEqual(values.tostring(), "abcde")
+        self.assertRaises(TypeError, objects.read, as_flat=True)
+
+
 class AccessClosedTestCase(common.TempFileMixin, common.PyTablesTestCase):
 
     def setUp(self):
@@ -4249,6 +4390,9 @@ def suite():
         theSuite.addTest(unittest.makeSuite(PointSelectionTestCase))
         theSuite.addTest(unittest.makeSuite(SizeInMemoryPropertyTestCase))
         theSuite.addTest(unittest.makeSuite(SizeOnDiskPropertyTestCase))
+        theSuite.addTest(unittest.makeSuite(IterBlocksTestCase))
+        theSuite.addTest(unittest.makeSuite(ExtendTestCase))
+        theSuite.addTest(unittest.makeSuite(FlatReadTestCase))
         theSuite.addTest(unittest.makeSuite(AccessClosedTestCase))
 
     return theSuite
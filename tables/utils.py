@@ -15,6 +15,7 @@
 import os
 import sys
 import subprocess
+import threading
 from time import time
 
 import numpy
@@ -32,6 +33,14 @@ byteorders = {'>': 'big',
 # lengths, row numbers, shapes, chunk shapes, byte counts...
 SizeType = numpy.int64
 
+# The HDF5 library is not guaranteed to be thread-safe, and the
+# extensions release the GIL while reading and writing datasets, so
+# every call to it which may run concurrently with others (reads and
+# writes of datasets, opening of nodes, reading of attributes) holds
+# this lock.  The rest of the work (type conversions, evaluation of
+# conditions...) runs in parallel.
+hdf5lock = threading.RLock()
+
 
 def correct_byteorder(ptype, byteorder):
     """Fix the byteorder depending on the PyTables types."""
@@ -328,6 +337,9 @@ class CacheDict(dict):
         super(CacheDict, self).__setitem__(key, value)
 
 
+_missing = object()
+
+
 class NailedDict(object):
     """A dictionary which ignores its items when it has nails on it."""
 
@@ -335,6 +347,7 @@ class NailedDict(object):
         self.maxentries = maxentries
         self._cache = {}
         self._nailcount = 0
+        self.resetstats()
 
     # Only a restricted set of dictionary methods are supported.  That
     # is why we buy instead of inherit.
@@ -343,6 +356,7 @@ class NailedDict(object):
     # the set of usable indexes.
 
     def clear(self):
+        self.evictions += len(self._cache)
         self._cache.clear()
     def nail(self):
         self._nailcount += 1
@@ -364,8 +378,15 @@ class NailedDict(object):
 
     def get(self, key, default=None):
         if self._nailcount > 0:
+            self.misses += 1
             return default
-        return self._cache.get(key, default)
+        # Other threads may be evicting entries, so look up just once.
+        value = self._cache.get(key, _missing)
+        if value is not _missing:
+            self.hits += 1
+            return value
+        self.misses += 1
+        return default
 
     def __setitem__(self, key, value):
         if self._nailcount > 0:
@@ -376,9 +397,21 @@ class NailedDict(object):
             # Remove a 10% of (arbitrary) elements from the cache
             entries_to_remove = self.maxentries // 10
             for k in cache.keys()[:entries_to_remove]:
-                del cache[k]
+                cache.pop(k, None)
+            self.evictions += entries_to_remove
         cache[key] = value
 
+    # The following are intended to be used for cache statistics (see
+    # `File.cache_stats()`).
+
+    def getstats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'disables': 0, 'enables': 0,
+                'size': len(self._cache), 'maxsize': self.maxentries}
+
+    def resetstats(self):
+        self.hits = self.misses = self.evictions = 0
+
 
 def detectNumberOfCores():
     """Detects the number of cores on a system. Cribbed from pp."""
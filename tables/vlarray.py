@@ -481,6 +481,99 @@ class VLArray(hdf5Extension.VLArray, Leaf):
         self.nrows += 1
 
 
+    def extend(self, sequence, offsets=None):
+        """Add a sequence of rows to the end of the dataset.
+
+        This is equivalent to calling :meth:`VLArray.append` for each
+        item in `sequence`, but all the rows are written to disk in a
+        single operation, which is much faster when appending many
+        short rows.
+
+        If `offsets` is given, `sequence` is taken instead as the flat
+        concatenation of the objects in all the rows, and `offsets` as
+        a sequence of ``nrows + 1`` non-decreasing integers so that row
+        ``i`` is made of the objects in
+        ``sequence[offsets[i]:offsets[i+1]]`` (``offsets[0]`` is usually
+        0).  This form is not supported for ``object`` atoms.
+
+        Examples
+        --------
+
+        ::
+
+            vlarray.extend([[1, 2], [], [3, 4, 5]])
+            # The same rows in flat form.
+            vlarray.extend([1, 2, 3, 4, 5], offsets=[0, 2, 2, 5])
+
+        .. versionadded:: 3.0
+
+        """
+
+        self._g_checkOpen()
+        self._v_file._checkWritable()
+
+        atom = self.atom
+        pseudo = not hasattr(atom, 'size')
+        if pseudo:
+            statom = atom.base
+        else:
+            statom = atom
+
+        if offsets is None:
+            nparrs = []
+            lengths = []
+            for row in sequence:
+                if pseudo:
+                    row = atom.toarray(row)
+                else:
+                    try:
+                        len(row)
+                    except TypeError:
+                        raise TypeError("row is not a sequence: %r" % (row,))
+                if len(row) > 0:
+                    nparr = convertToNPAtom2(row, statom)
+                    nobjects = self._getnobjects(nparr)
+                else:
+                    nobjects = 0
+                if nobjects:
+                    nparrs.append(nparr.reshape((nobjects,) + statom.shape))
+                lengths.append(nobjects)
+            offsets = numpy.zeros(len(lengths) + 1, dtype=numpy.int64)
+            numpy.cumsum(lengths, out=offsets[1:])
+            if nparrs:
+                nparr = numpy.concatenate(nparrs)
+            else:
+                nparr = numpy.empty((0,) + statom.shape, dtype=statom.dtype)
+        else:
+            if isinstance(atom, ObjectAtom):
+                raise TypeError("``offsets`` is not supported "
+                                "for ``object`` atoms")
+            if pseudo:
+                sequence = atom.toarray(sequence)
+            nparr = convertToNPAtom2(sequence, statom)
+            if nparr.shape[:1] == (0,):
+                nobjects = 0
+            else:
+                nobjects = self._getnobjects(nparr)
+            nparr = nparr.reshape((nobjects,) + statom.shape)
+            offsets = numpy.array(offsets, dtype=numpy.int64)
+            if offsets.ndim != 1 or len(offsets) == 0:
+                raise ValueError("``offsets`` must be a non-empty "
+                                 "one-dimensional sequence")
+            if (offsets[0] < 0 or offsets[-1] > nobjects or
+                (numpy.diff(offsets) < 0).any()):
+                raise ValueError("``offsets`` must be non-decreasing and "
+                                 "within the %d objects in ``sequence``"
+                                 % nobjects)
+
+        nrows = len(offsets) - 1
+        if nrows == 0:
+            return
+        self._extend(numpy.ascontiguousarray(nparr),
+                     numpy.ascontiguousarray(offsets))
+        self.nrows += nrows
+
+
     def iterrows(self, start=None, stop=None, step=None):
         """Iterate over the rows of the array.
 
@@ -536,6 +629,39 @@ class VLArray(hdf5Extension.VLArray, Leaf):
         return self
 
 
+    def iterblocks(self, start=None, stop=None, step=None, blocksize=None):
+        """Iterate over the array in blocks of rows.
+
+        This method returns an iterator yielding, for each block of rows
+        read from the array, a list with the rows in it (as returned by
+        :meth:`VLArray.read`).  The start, stop and step parameters have
+        the same meaning as in :meth:`VLArray.read`.
+
+        blocksize is the number of rows spanned by every block.  By
+        default, it is the largest multiple of the chunk length that fits
+        in the I/O buffer, so that each block covers whole chunks.
+
+        Examples
+        --------
+
+        ::
+
+            for block in vlarray.iterblocks(blocksize=1000):
+                lengths = [len(row) for row in block]
+        """
+
+        self._g_checkOpen()
+        (start, stop, step) = self._processRangeRead(start, stop, step)
+        return self._iterblocks(start, stop, step, blocksize)
+
+
+    def _iterblocks(self, start, stop, step, blocksize):
+        """Low-level counterpart of `self.iterblocks()`."""
+
+        for (bstart, bstop) in self._blockRanges(start, stop, step, blocksize):
+            yield self.read(bstart, bstop, step)
+
+
     def _initLoop(self):
         "Initialization for the __iter__ iterator"
 
@@ -721,7 +847,7 @@ class VLArray(hdf5Extension.VLArray, Leaf):
 
 
     # Accessor for the _readArray method in superclass
-    def read(self, start=None, stop=None, step=1):
+    def read(self, start=None, stop=None, step=1, as_flat=False):
         """Get data in the array as a list of objects of the current flavor.
 
         Please note that, as the lengths of the different rows are variable,
@@ -735,14 +861,57 @@ class VLArray(hdf5Extension.VLArray, Leaf):
         allowed yet. Moreover, if only start is specified, then stop will be
         set to start+1. If you do not specify neither start nor stop, then *all
         the rows* in the array are selected.
+
+        If as_flat is true, a ``(values, offsets)`` tuple is returned
+        instead of a list.  values is an array of the current flavor with
+        the atoms of all the selected rows one after the other, and
+        offsets a NumPy array of ``nrows + 1`` ``int64`` values, so that
+        the row ``i`` of the selection is ``values[offsets[i]:offsets[i+1]]``.
+        This avoids creating an object per row.  For pseudo-atoms, values
+        holds the raw atoms of the base type (e.g. the bytes of the
+        strings in a ``vlstring`` array), and ``object`` atoms are not
+        supported.
+
+        .. versionchanged:: 3.0
+           The *as_flat* parameter.
+
         """
 
         self._g_checkOpen()
         start, stop, step = self._processRangeRead(start, stop, step)
+        if as_flat:
+            self._checkFlat()
+            if start == stop:
+                return self._emptyFlat()
+            values, offsets = self._readArray(start, stop, step, True)
+            return (internal_to_flavor(values, self.flavor), offsets)
+
         if start == stop:
             listarr = []
         else:
             listarr = self._readArray(start, stop, step)
+        return self._convertRows(listarr)
+
+
+    def _checkFlat(self):
+        """Check that rows can be read in flat form."""
+
+        if isinstance(self.atom, ObjectAtom):
+            raise TypeError("flat reads are not supported for "
+                            "``object`` atoms")
+
+
+    def _emptyFlat(self):
+        """Return an empty selection in flat form."""
+
+        values = numpy.empty((0,) + self._atomicshape,
+                             dtype=self._atomicdtype.base)
+        offsets = numpy.zeros(1, dtype=numpy.int64)
+        return (internal_to_flavor(values, self.flavor), offsets)
+
+
+    def _convertRows(self, listarr):
+        """Convert a list of read rows to the atom and flavor of the array."""
 
         atom = self.atom
         if not hasattr(atom, 'size'):  # it is a pseudo-atom
@@ -754,12 +923,29 @@ class VLArray(hdf5Extension.VLArray, Leaf):
         return outlistarr
 
 
-    def _readCoordinates(self, coords):
-        """Read rows specified in `coords`."""
-        rows = []
-        for coord in coords:
-            rows.append(self.read(coord)[0])
-        return rows
+    def _readCoordinates(self, coords, as_flat=False):
+        """Read rows specified in `coords`.
+
+        All the rows are read with a single point selection.  See
+        :meth:`VLArray.read` for the meaning of `as_flat`.
+        """
+
+        coords = numpy.array(coords, dtype=numpy.int64).ravel()
+        # Negative coordinates count from the end of the array
+        coords[coords < 0] += self.nrows
+        if len(coords) > 0 and (coords.min() < 0 or
+                                coords.max() >= self.nrows):
+            raise IndexError("coordinates out of range")
+        if as_flat:
+            self._checkFlat()
+            if len(coords) == 0:
+                return self._emptyFlat()
+            values, offsets = self._readCoords(coords, True)
+            return (internal_to_flavor(values, self.flavor), offsets)
+
+        if len(coords) == 0:
+            return []
+        return self._convertRows(self._readCoords(coords))
 
 
     def _g_copyWithStats(self, group, name, start, stop, step,